@@ -4,12 +4,12 @@ Asset Management Admin
 
 from django.contrib import admin
 from apps.core.admin_mixins import BranchAwareAdminMixin, OrganizationAwareAdminMixin
-from .models import AssetCategory, Asset, AssetAssignment
+from .models import AssetCategory, Asset, AssetAssignment, AssetDepreciationRun
 
 
 @admin.register(AssetCategory)
 class AssetCategoryAdmin(OrganizationAwareAdminMixin, admin.ModelAdmin):
-    list_display = ['name', 'code', 'created_at']
+    list_display = ['name', 'code', 'depreciation_method', 'depreciation_rate', 'created_at']
     search_fields = ['name', 'code']
 
 
@@ -26,3 +26,10 @@ class AssetAssignmentAdmin(BranchAwareAdminMixin, admin.ModelAdmin):
     list_display = ['asset', 'employee', 'branch', 'assigned_date', 'returned_date', 'is_active']
     list_filter = ['returned_date', 'branch']
     raw_id_fields = ['asset', 'employee', 'branch', 'assigned_by']
+
+
+@admin.register(AssetDepreciationRun)
+class AssetDepreciationRunAdmin(OrganizationAwareAdminMixin, admin.ModelAdmin):
+    list_display = ['period_end', 'status', 'asset_count', 'total_depreciation', 'total_book_value', 'completed_at']
+    list_filter = ['status']
+    readonly_fields = ['asset_count', 'total_cost', 'total_depreciation', 'total_book_value', 'completed_at']
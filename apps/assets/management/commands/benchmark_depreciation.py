@@ -0,0 +1,99 @@
+"""
+Management command to compare per-asset depreciation with the portfolio engine
+Usage: python manage.py benchmark_depreciation [--assets N] [--sample N]
+
+The per-asset path (one lookup and Decimal calculation per asset, as when
+looping calculate_depreciation) is timed on a sample and extrapolated.
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.assets.models import Asset, AssetCategory
+from apps.assets.services import DepreciationService
+from apps.core.benchmarking import QueryCounter, rolled_back
+from apps.core.models import Organization
+
+
+class Command(BaseCommand):
+    help = 'Benchmark month-end depreciation of N assets: per-asset loop vs vectorized engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assets', type=int, default=100000)
+        parser.add_argument('--sample', type=int, default=2000, help='Assets timed on the per-asset path')
+
+    def handle(self, *args, **options):
+        period_end = DepreciationService.previous_month_end()
+        with rolled_back():
+            org, ids = self._seed(options['assets'], period_end)
+            self.stdout.write(self.style.SUCCESS(
+                f"=== Depreciating {len(ids)} assets for {period_end} ==="
+            ))
+            sample = ids[:options['sample']]
+            queries, elapsed = self._measure(lambda: self._per_asset(sample, period_end))
+            scale = len(ids) / max(len(sample), 1)
+            self.stdout.write(
+                f"{'per-asset':<12} {queries:>7} queries  {elapsed:9.1f} ms for {len(sample)}"
+                f"  (~{elapsed * scale / 1000:.1f} s for {len(ids)})"
+            )
+            self._report('compute', lambda: DepreciationService.compute(
+                DepreciationService.load_register(DepreciationService.register_queryset(org.id, period_end)),
+                period_end,
+            ))
+            self._report('run_period', lambda: DepreciationService.run_period(org.id, period_end), keep=True)
+            self._report('export', lambda: sum(
+                len(chunk) for chunk in DepreciationService.stream_register(org.id, period_end)
+            ))
+
+    def _seed(self, count, period_end):
+        org = Organization.objects.create(name='Depreciation Benchmark', email='depreciation-benchmark@example.com')
+        methods = [AssetCategory.STRAIGHT_LINE, AssetCategory.WRITTEN_DOWN_VALUE]
+        categories = [
+            AssetCategory.all_objects.create(
+                organization=org, name=f'Category {n}', code=f'DEP-BENCH-{n}',
+                depreciation_method=methods[n % 2], depreciation_rate=10 + n * 5,
+            )
+            for n in range(6)
+        ]
+        assets = Asset.all_objects.bulk_create([
+            Asset(
+                organization=org,
+                name=f'Asset {n}',
+                asset_tag=f'DEP-BENCH-{n:06d}',
+                category=categories[n % len(categories)],
+                purchase_date=period_end - timedelta(days=n % 2500),
+                purchase_price=Decimal(500 + n % 4500),
+                salvage_value=Decimal(n % 50),
+                depreciation_rate=Decimal(25) if n % 10 == 0 else None,
+            )
+            for n in range(count)
+        ], batch_size=2000)
+        return org, [asset.id for asset in assets]
+
+    def _per_asset(self, ids, period_end):
+        for asset_id in ids:
+            asset = Asset.all_objects.select_related('category').get(id=asset_id)
+            rate = (asset.depreciation_rate or asset.category.depreciation_rate) / Decimal('100')
+            years = Decimal((period_end - asset.purchase_date).days) / Decimal('365')
+            if (asset.depreciation_method or asset.category.depreciation_method) == AssetCategory.STRAIGHT_LINE:
+                value = asset.purchase_price - asset.purchase_price * rate * years
+            else:
+                value = asset.purchase_price * ((Decimal('1') - rate) ** years)
+            max(value, asset.salvage_value)
+
+    def _measure(self, fn, keep=False):
+        counter = QueryCounter()
+        with transaction.atomic() if keep else rolled_back():
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                fn()
+                elapsed = (time.perf_counter() - started) * 1000
+        return counter.queries, elapsed
+
+    def _report(self, label, fn, keep=False):
+        queries, elapsed = self._measure(fn, keep=keep)
+        self.stdout.write(f'{label:<12} {queries:>7} queries  {elapsed:9.1f} ms')
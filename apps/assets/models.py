@@ -10,11 +10,29 @@ from apps.core.models import OrganizationEntity
 class AssetCategory(OrganizationEntity):
     """Asset categories (e.g., Laptop, Phone, Vehicle)"""
     
+    # Depreciation methods
+    STRAIGHT_LINE = 'straight_line'
+    WRITTEN_DOWN_VALUE = 'written_down_value'
+    
+    DEPRECIATION_METHOD_CHOICES = [
+        (STRAIGHT_LINE, 'Straight Line'),
+        (WRITTEN_DOWN_VALUE, 'Written Down Value'),
+    ]
+    
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True, help_text="Icon name for UI")
     
+    # Depreciation defaults for assets in this category
+    depreciation_method = models.CharField(
+        max_length=20, choices=DEPRECIATION_METHOD_CHOICES, default=STRAIGHT_LINE
+    )
+    depreciation_rate = models.DecimalField(
+        max_digits=5, decimal_places=2, default=20,
+        help_text="Annual depreciation rate in percent"
+    )
+    
     class Meta:
         verbose_name_plural = "Asset Categories"
         ordering = ['name']
@@ -70,6 +88,16 @@ class Asset(OrganizationEntity):
     vendor = models.CharField(max_length=200, blank=True)
     warranty_expires = models.DateField(null=True, blank=True)
     
+    # Depreciation (blank method/rate fall back to the category)
+    depreciation_method = models.CharField(
+        max_length=20, choices=AssetCategory.DEPRECIATION_METHOD_CHOICES, blank=True
+    )
+    depreciation_rate = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        help_text="Annual depreciation rate in percent"
+    )
+    salvage_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
     # Current assignment
     current_assignee = models.ForeignKey(
         'employees.Employee',
@@ -326,3 +354,66 @@ class AssetRequest(OrganizationEntity):
             self.reviewed_by = reviewer
             self.reviewed_at = timezone.now()
         self.save()
+
+
+class AssetDepreciationRun(OrganizationEntity):
+    """One month-end depreciation run over an organization's asset register"""
+    
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+    
+    period_end = models.DateField(help_text="Last day of the depreciated month")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RUNNING)
+    asset_count = models.PositiveIntegerField(default=0)
+    total_cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_depreciation = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_book_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['-period_end']
+        unique_together = [('organization', 'period_end')]
+    
+    def __str__(self):
+        return f"Depreciation {self.period_end} ({self.status})"
+
+
+class AssetDepreciationSnapshot(OrganizationEntity):
+    """Depreciation and book value of one asset for one period"""
+    
+    run = models.ForeignKey(
+        AssetDepreciationRun,
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name='depreciation_snapshots'
+    )
+    period_end = models.DateField()
+    method = models.CharField(max_length=20, choices=AssetCategory.DEPRECIATION_METHOD_CHOICES)
+    rate = models.DecimalField(max_digits=5, decimal_places=2)
+    cost = models.DecimalField(max_digits=12, decimal_places=2)
+    opening_value = models.DecimalField(max_digits=12, decimal_places=2)
+    depreciation = models.DecimalField(max_digits=12, decimal_places=2)
+    accumulated_depreciation = models.DecimalField(max_digits=12, decimal_places=2)
+    book_value = models.DecimalField(max_digits=12, decimal_places=2)
+    
+    class Meta:
+        ordering = ['period_end']
+        unique_together = [('asset', 'period_end')]
+        indexes = [
+            models.Index(fields=['organization', 'period_end']),
+        ]
+    
+    def __str__(self):
+        return f"{self.asset.asset_tag} @ {self.period_end}: {self.book_value}"
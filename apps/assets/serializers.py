@@ -5,7 +5,9 @@ Asset Management Serializers
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
-from .models import AssetCategory, Asset, AssetAssignment, AssetMaintenance, AssetRequest
+from .models import (
+    AssetCategory, Asset, AssetAssignment, AssetMaintenance, AssetRequest, AssetDepreciationRun
+)
 from apps.employees.models import Employee
 
 
@@ -15,7 +17,10 @@ class AssetCategorySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AssetCategory
-        fields = ['id', 'name', 'code', 'description', 'icon', 'asset_count']
+        fields = [
+            'id', 'name', 'code', 'description', 'icon',
+            'depreciation_method', 'depreciation_rate', 'asset_count'
+        ]
         read_only_fields = ['id']
     
     @extend_schema_field(OpenApiTypes.INT)
@@ -52,6 +57,7 @@ class AssetDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'asset_tag', 'serial_number', 'description',
             'category', 'category_id', 'status', 'status_display',
             'purchase_date', 'purchase_price', 'vendor', 'warranty_expires',
+            'depreciation_method', 'depreciation_rate', 'salvage_value',
             'current_assignee', 'assignee_name', 'location', 'notes',
             'assignments', 'created_at', 'updated_at'
         ]
@@ -71,6 +77,7 @@ class AssetSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'asset_tag', 'serial_number', 'description',
             'category', 'status', 'purchase_date', 'purchase_price', 
+            'depreciation_method', 'depreciation_rate', 'salvage_value',
             'vendor', 'warranty_expires', 'location', 'notes'
         ]
         read_only_fields = ['id']
@@ -86,7 +93,8 @@ class AssetBulkImportSerializer(serializers.ModelSerializer):
         fields = [
             'name', 'asset_tag', 'serial_number', 'description',
             'category_code', 'status', 'purchase_date',
-            'purchase_price', 'vendor', 'warranty_expires',
+            'purchase_price', 'depreciation_method', 'depreciation_rate',
+            'salvage_value', 'vendor', 'warranty_expires',
             'location', 'notes', 'assignee_id'
         ]
 
@@ -210,3 +218,15 @@ class DepreciationCalculationSerializer(serializers.Serializer):
     depreciation_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
     years_owned = serializers.DecimalField(max_digits=5, decimal_places=2)
     method = serializers.CharField()
+
+
+class AssetDepreciationRunSerializer(serializers.ModelSerializer):
+    """Month-end depreciation run with register totals"""
+    
+    class Meta:
+        model = AssetDepreciationRun
+        fields = [
+            'id', 'period_end', 'status', 'asset_count', 'total_cost',
+            'total_depreciation', 'total_book_value', 'completed_at', 'error_message'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,30 @@
+"""Asset background tasks"""
+from celery import shared_task
+from .models import Asset
+from .services import DepreciationService
+
+
+@shared_task
+def run_depreciation_for_organization(organization_id, period_end=None):
+    """Depreciate one organization's asset register for a month (ISO period end)"""
+    if period_end:
+        period_end = DepreciationService.parse_period(period_end)
+    run = DepreciationService.run_period(organization_id, period_end)
+    return {'run_id': str(run.id), 'status': run.status, 'asset_count': run.asset_count}
+
+
+@shared_task
+def run_month_end_depreciation(period_end=None):
+    """
+    Queue the depreciation run of every organization with a priced asset
+    register (run monthly, on the 1st). Defaults to the month just ended.
+    """
+    period_end = period_end or DepreciationService.previous_month_end().isoformat()
+    organization_ids = Asset.all_objects.filter(
+        is_deleted=False, purchase_price__isnull=False
+    ).order_by().values_list('organization_id', flat=True).distinct()
+    count = 0
+    for organization_id in organization_ids:
+        run_depreciation_for_organization.delay(str(organization_id), period_end)
+        count += 1
+    return count
@@ -0,0 +1,123 @@
+"""
+Tests for the portfolio depreciation engine
+"""
+
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.assets.models import Asset, AssetCategory, AssetDepreciationRun, AssetDepreciationSnapshot
+from apps.assets.services import DepreciationService
+from apps.authentication.models import User
+from apps.core.models import Organization
+
+
+class DepreciationServiceTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Ledger Org', email='ledger@example.com')
+        self.laptops = AssetCategory.all_objects.create(
+            organization=self.org, name='Laptops', code='LAP', depreciation_rate=20,
+        )
+        self.vehicles = AssetCategory.all_objects.create(
+            organization=self.org, name='Vehicles', code='VEH',
+            depreciation_method=AssetCategory.WRITTEN_DOWN_VALUE, depreciation_rate=15,
+        )
+        self.period_end = date(2025, 6, 30)
+
+    def _asset(self, tag, category, **extra):
+        fields = {'purchase_date': date(2023, 6, 30), 'purchase_price': Decimal('1000.00')}
+        fields.update(extra)
+        return Asset.all_objects.create(organization=self.org, name=tag, asset_tag=tag, category=category, **fields)
+
+    def _compute(self):
+        frame = DepreciationService.compute(
+            DepreciationService.load_register(
+                DepreciationService.register_queryset(self.org.id, self.period_end)
+            ),
+            self.period_end,
+        )
+        return frame.set_index('asset_tag')
+
+    def test_methods_match_the_single_asset_formula(self):
+        self._asset('SL-1', self.laptops)
+        self._asset('WDV-1', self.vehicles)
+        self._asset('SL-OVERRIDE', self.vehicles, depreciation_method=AssetCategory.STRAIGHT_LINE,
+                    depreciation_rate=Decimal('10'))
+        self._asset('FLOOR', self.laptops, purchase_date=date(2019, 1, 1), salvage_value=Decimal('50'))
+        self._asset('NEW', self.laptops, purchase_date=date(2025, 6, 15))
+        self._asset('OLD', self.laptops, status=Asset.RETIRED)
+        self._asset('LATER', self.laptops, purchase_date=date(2025, 7, 1))
+        self._asset('UNPRICED', self.laptops, purchase_price=None)
+
+        frame = self._compute()
+
+        self.assertEqual(sorted(frame.index), ['FLOOR', 'NEW', 'SL-1', 'SL-OVERRIDE', 'WDV-1'])
+        years = 731 / 365
+        self.assertEqual(frame.loc['SL-1', 'book_value'], round(1000 - 1000 * 0.2 * years, 2))
+        self.assertEqual(frame.loc['WDV-1', 'book_value'], round(1000 * 0.85 ** years, 2))
+        self.assertEqual(frame.loc['SL-OVERRIDE', 'book_value'], round(1000 - 1000 * 0.1 * years, 2))
+        self.assertEqual(frame.loc['FLOOR', 'book_value'], 50)
+        self.assertEqual(frame.loc['FLOOR', 'depreciation'], 0)
+        # Bought mid-month: opens at cost
+        self.assertEqual(frame.loc['NEW', 'opening_value'], 1000)
+        row = frame.loc['SL-1']
+        self.assertAlmostEqual(row['opening_value'] - row['depreciation'], row['book_value'], places=6)
+        self.assertAlmostEqual(row['accumulated_depreciation'], 1000 - row['book_value'], places=6)
+
+    def test_run_period_persists_snapshots_and_reruns_in_place(self):
+        first = self._asset('SL-1', self.laptops)
+        self._asset('WDV-1', self.vehicles)
+
+        run = DepreciationService.run_period(self.org.id, date(2025, 6, 12))
+
+        self.assertEqual((run.status, run.period_end, run.asset_count), ('completed', self.period_end, 2))
+        snapshots = AssetDepreciationSnapshot.all_objects.filter(run=run)
+        self.assertEqual(snapshots.count(), 2)
+        self.assertEqual(run.total_book_value, sum(s.book_value for s in snapshots))
+        self.assertEqual(run.total_cost, Decimal('2000.00'))
+
+        first.status = Asset.RETIRED
+        first.save()
+        rerun = DepreciationService.run_period(self.org.id, self.period_end)
+
+        self.assertEqual(rerun.id, run.id)
+        self.assertEqual(AssetDepreciationRun.all_objects.filter(organization=self.org).count(), 1)
+        self.assertEqual(
+            list(AssetDepreciationSnapshot.all_objects.filter(run=run).values_list('asset__asset_tag', flat=True)),
+            ['WDV-1'],
+        )
+
+    def test_register_export_matches_with_and_without_a_run(self):
+        self._asset('SL-1', self.laptops)
+        self._asset('WDV-1', self.vehicles)
+
+        def export():
+            return list(csv.reader(io.StringIO(''.join(
+                DepreciationService.stream_register(self.org.id, self.period_end)
+            ))))
+
+        computed = export()
+        DepreciationService.run_period(self.org.id, self.period_end)
+        stored = export()
+
+        self.assertEqual(stored[0], DepreciationService.REGISTER_HEADER)
+        self.assertEqual([row[0] for row in stored[1:]], ['SL-1', 'WDV-1'])
+        self.assertEqual(stored[1][3], '2023-06-30')
+        for live, persisted in zip(computed[1:], stored[1:]):
+            self.assertEqual(live[:5], persisted[:5])
+            self.assertEqual([Decimal(v) for v in live[5:]], [Decimal(v) for v in persisted[5:]])
+
+    def test_depreciation_endpoints_require_an_organization(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_superuser(
+            email='ledger.root@example.com', password='pass', first_name='Ledger', last_name='Root',
+        ))
+        response = client.post('/api/v1/assets/assets/run-depreciation/', {'period': '2025-06'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/v1/assets/assets/depreciation-register/', {'period': '2025-06'})
+        self.assertEqual(response.status_code, 400)
@@ -6,6 +6,8 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
@@ -15,7 +17,9 @@ from apps.core.mixins import BulkImportExportMixin
 from apps.core.permissions_branch import BranchFilterBackend, BranchPermission
 from apps.abac.permissions import ABACPermission
 
-from .models import AssetCategory, Asset, AssetAssignment, AssetMaintenance, AssetRequest
+from .models import (
+    AssetCategory, Asset, AssetAssignment, AssetMaintenance, AssetRequest, AssetDepreciationRun
+)
 from .serializers import (
     AssetCategorySerializer,
     AssetSerializer,
@@ -30,7 +34,9 @@ from .serializers import (
     AssetRequestCreateSerializer,
     AssetRequestReviewSerializer,
     AssetRequestFulfillSerializer,
+    AssetDepreciationRunSerializer,
 )
+from .services import DepreciationService
 
 
 class AssetCategoryViewSet(BulkImportExportMixin, OrganizationViewSetMixin, viewsets.ModelViewSet):
@@ -178,21 +184,90 @@ class AssetViewSet(BulkImportExportMixin, OrganizationViewSetMixin, viewsets.Mod
         """Get asset statistics"""
         queryset = self.get_queryset()
         
-        stats = {
-            'total': queryset.count(),
-            'available': queryset.filter(status=Asset.AVAILABLE).count(),
-            'assigned': queryset.filter(status=Asset.ASSIGNED).count(),
-            'maintenance': queryset.filter(status=Asset.MAINTENANCE).count(),
-            'retired': queryset.filter(status=Asset.RETIRED).count(),
-        }
+        stats = queryset.aggregate(
+            total=Count('id'),
+            available=Count('id', filter=Q(status=Asset.AVAILABLE)),
+            assigned=Count('id', filter=Q(status=Asset.ASSIGNED)),
+            maintenance=Count('id', filter=Q(status=Asset.MAINTENANCE)),
+            retired=Count('id', filter=Q(status=Asset.RETIRED)),
+        )
         
         # By category
-        from django.db.models import Count
-        by_category = queryset.values('category__name').annotate(count=Count('id'))
+        by_category = queryset.values('category__name').annotate(count=Count('id')).order_by('category__name')
         stats['by_category'] = list(by_category)
         
+        # Book value as of the latest completed month-end run
+        run = AssetDepreciationRun.objects.filter(status=AssetDepreciationRun.COMPLETED).first()
+        stats['book_value'] = AssetDepreciationRunSerializer(run).data if run else None
+        
         return Response({'success': True, 'data': stats})
     
+    @action(detail=False, methods=['post'], url_path='run-depreciation')
+    def run_depreciation(self, request):
+        """Queue the depreciation run of the organization's register for a month"""
+        from .tasks import run_depreciation_for_organization
+        
+        if getattr(request, 'organization', None) is None:
+            return Response(
+                {'success': False, 'message': 'Organization context required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            period_end = DepreciationService.parse_period(
+                request.data.get('period') or DepreciationService.previous_month_end().isoformat()
+            )
+        except ValueError:
+            return Response(
+                {'success': False, 'message': 'period must be YYYY-MM or YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        run_depreciation_for_organization.delay(str(request.organization.id), period_end.isoformat())
+        return Response({
+            'success': True,
+            'message': f'Depreciation run queued for {period_end}',
+            'data': {'period_end': str(period_end)}
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path='depreciation-runs')
+    def depreciation_runs(self, request):
+        """List month-end depreciation runs with their totals"""
+        runs = AssetDepreciationRun.objects.all()[:24]
+        return Response({
+            'success': True,
+            'data': AssetDepreciationRunSerializer(runs, many=True).data
+        })
+    
+    @action(detail=False, methods=['get'], url_path='depreciation-register')
+    def depreciation_register(self, request):
+        """
+        Stream the depreciation register for a month as CSV (?period=YYYY-MM,
+        default the month just ended).
+        """
+        if getattr(request, 'organization', None) is None:
+            return Response(
+                {'success': False, 'message': 'Organization context required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            period_end = DepreciationService.parse_period(
+                request.query_params.get('period') or DepreciationService.previous_month_end().isoformat()
+            )
+        except ValueError:
+            return Response(
+                {'success': False, 'message': 'period must be YYYY-MM or YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            DepreciationService.stream_register(request.organization.id, period_end),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = f'attachment; filename="asset_register_{period_end:%Y_%m}.csv"'
+        return response
+    
     @action(detail=True, methods=['get'])
     def calculate_depreciation(self, request, pk=None):
         """Calculate depreciation for an asset using straight-line method"""
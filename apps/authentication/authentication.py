@@ -3,9 +3,13 @@ Custom JWT Authentication with Tenant Validation
 SECURITY: Validates organization_id claim in JWT matches request organization
 """
 
+import hmac
 import logging
+import re
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied, Throttled
 from django.utils.translation import gettext_lazy as _
 
 logger = logging.getLogger(__name__)
@@ -20,6 +24,7 @@ class OrganizationAwareJWTAuthentication(JWTAuthentication):
     """
 
     def authenticate(self, request):
+        self._request_context = None
         result = super().authenticate(request)
 
         if result is None:
@@ -32,6 +37,39 @@ class OrganizationAwareJWTAuthentication(JWTAuthentication):
 
         return user, token
 
+    def get_user(self, validated_token):
+        """
+        Resolve the user from the cached request context (user, organization,
+        roles and branches in one cache read) instead of a per-request query.
+        """
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from rest_framework_simplejwt.settings import api_settings
+        from apps.core.request_context import RequestContextCache
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        context = RequestContextCache.get(
+            user_id,
+            RequestContextCache.token_id(validated_token),
+            validated_token.get('organization_id'),
+        )
+        if context is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        user = context.user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            from rest_framework_simplejwt.utils import get_md5_hash_password
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        self._request_context = context
+        return user
+
     def _validate_org_binding(self, request, user, token):
         """
         Enforce organization isolation
@@ -50,28 +88,22 @@ class OrganizationAwareJWTAuthentication(JWTAuthentication):
         # 🔒 Token MUST contain org for non-superusers
         if not token_org_id:
             if user.is_superuser:
+                if self._request_context and not getattr(request, 'organization', None):
+                    self._attach_request_context(request, self._request_context)
                 return
             logger.error("JWT rejected: missing organization_id claim")
             raise AuthenticationFailed(_('Organization binding missing in token'))
 
         request_org = getattr(request, 'organization', None)
         
-        # Resolve organization from token if not set by middleware
         # Resolve organization from token if not set by middleware
         if not request_org and token_org_id:
-            try:
-                from apps.core.models import Organization
-                from apps.core.context import set_current_organization
-                
-                org = Organization.objects.get(id=token_org_id, is_active=True)
-                request.organization = org
-                set_current_organization(org)
-                return
-            except Organization.DoesNotExist:
+            context = self._request_context
+            org = context.organization if context else None
+            if org is None or not org.is_active or str(org.id) != str(token_org_id):
                 raise AuthenticationFailed(_('Invalid organization in token'))
-            except Exception as e:
-                logger.error(f"JWT org resolution failed: {e}")
-                raise AuthenticationFailed(_('Organization validation error'))
+            self._attach_request_context(request, context)
+            return
 
         if not request_org:
             if user.is_superuser:
@@ -92,6 +124,18 @@ class OrganizationAwareJWTAuthentication(JWTAuthentication):
                 _('Your credentials do not belong to this organization')
             )
 
+    def _attach_request_context(self, request, context):
+        """Expose the resolved context on the request and in the context vars"""
+        from apps.core.context import set_request_context
+
+        request.organization = context.organization
+        request.request_context = context
+        django_request = getattr(request, '_request', None)
+        if django_request is not None:
+            django_request.organization = context.organization
+            django_request.request_context = context
+        set_request_context(context)
+
     def _attach_role_context(self, request, token):
         """
         Freeze role context from JWT
@@ -100,6 +144,85 @@ class OrganizationAwareJWTAuthentication(JWTAuthentication):
         request.jwt_role_ids = token.get('role_ids', [])
 
 
+class APIKeyAuthentication(BaseAuthentication):
+    """
+    Machine-to-machine authentication with ``X-API-Key: <key>`` or
+    ``Authorization: Api-Key <key>``.
+
+    The key record (with its user and organization) comes from APIKeyCache,
+    so a warm request does not touch the database. A key authenticates as
+    the organization user chosen when it was created; keys acting as a
+    superuser are refused. The key's scopes (APIKey.permissions, e.g.
+    ``["employees.read", "leave.*"]``) are checked against the API module
+    and read/write action of the request, so a key never carries more than
+    its user's privileges within those scopes. The per-key quota is
+    enforced here and last-used timestamps are recorded in batches.
+    """
+
+    keyword = 'Api-Key'
+    module_pattern = re.compile(r'^/api/v\d+/([^/]+)/')
+
+    def _scope(self, request):
+        """(module, action) of a request: /api/v1/<module>/..., read for safe methods"""
+        match = self.module_pattern.match(request.path)
+        module = match.group(1) if match else request.path.strip('/').split('/', 1)[0]
+        return module, 'read' if request.method in SAFE_METHODS else 'write'
+
+    def _raw_key(self, request):
+        raw_key = request.META.get('HTTP_X_API_KEY')
+        if raw_key:
+            return raw_key.strip()
+        auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+        if len(auth) == 2 and auth[0].lower() == self.keyword.lower():
+            return auth[1]
+        return None
+
+    def authenticate(self, request):
+        from apps.core.context import set_current_organization, set_current_user
+        from apps.integrations.api_keys import APIKeyCache, APIKeyQuota, APIKeyUsage, hash_key, split_key
+
+        raw_key = self._raw_key(request)
+        if raw_key is None:
+            return None
+
+        prefix = split_key(raw_key)
+        record = APIKeyCache.get(prefix) if prefix else None
+        if record is None or not hmac.compare_digest(record.key_hash, hash_key(raw_key)):
+            raise AuthenticationFailed(_('Invalid API key'))
+        if record.revoked or not record.is_active or record.is_expired():
+            raise AuthenticationFailed(_('API key is inactive or expired'))
+
+        user, organization = record.user, record.organization
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_('API key owner is inactive'))
+        if user.is_superuser:
+            raise AuthenticationFailed(_('API keys cannot act as a superuser'))
+        if organization is None or not organization.is_active or \
+                organization.subscription_status in {'suspended', 'cancelled'}:
+            raise AuthenticationFailed(_('Organization is inactive'))
+
+        module, action = self._scope(request)
+        if not record.allows(module, action):
+            raise PermissionDenied(_('API key is not permitted to %(action)s %(module)s') % {
+                'action': action, 'module': module,
+            })
+
+        quota = APIKeyQuota.hit(record.id, record.rate_limit)
+        request.api_key_quota = quota
+        if not quota.allowed:
+            raise Throttled(wait=quota.retry_after, detail='API key quota exceeded.')
+
+        APIKeyUsage.record(record.id)
+
+        request.organization = organization
+        set_current_organization(organization)
+        set_current_user(user)
+        return user, record
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
 from rest_framework.authentication import SessionAuthentication
 
 class CsrfExemptSessionAuthentication(SessionAuthentication):
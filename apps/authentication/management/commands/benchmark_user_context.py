@@ -0,0 +1,116 @@
+"""
+Management command to measure queries per request with and without cached user tenant facts
+Usage: python manage.py benchmark_user_context [--endpoint PATH ...]
+
+Requests each endpoint as an organization admin with a role assignment:
+once with User.get_organization / is_organization_admin / get_role_codes /
+get_all_permissions recomputed on every call (the previous behaviour), then
+with the cache cold and warm.
+"""
+
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.abac.models import Role, RoleAssignment
+from apps.authentication.models import User
+from apps.authentication.models_hierarchy import Branch, BranchUser, OrganizationUser
+from apps.core.benchmarking import rolled_back
+from apps.core.models import Organization
+from apps.employees.models import Department, Employee
+
+TOP_ENDPOINTS = [
+    '/api/v1/employees/',
+    '/api/v1/employees/departments/',
+    '/api/v1/employees/designations/',
+    '/api/v1/attendance/records/',
+    '/api/v1/attendance/shifts/',
+    '/api/v1/leave/requests/',
+    '/api/v1/leave/balances/',
+    '/api/v1/leave/types/',
+    '/api/v1/leave/holidays/',
+    '/api/v1/payroll/payslips/',
+    '/api/v1/payroll/runs/',
+    '/api/v1/performance/reviews/',
+    '/api/v1/performance/okrs/',
+    '/api/v1/notifications/notifications/',
+    '/api/v1/workflows/instances/',
+    '/api/v1/expenses/claims/',
+    '/api/v1/assets/assets/',
+    '/api/v1/training/programs/',
+    '/api/v1/chat/conversations/',
+    '/api/v1/auth/users/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark queries per request before/after caching user organization, roles and permissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Endpoint to request (repeatable; default: the top 20 list endpoints)')
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoints'] or TOP_ENDPOINTS
+        with rolled_back():
+            client = self._seed()
+            self.stdout.write(self.style.SUCCESS(
+                f"=== Queries per request across {len(endpoints)} endpoints ==="
+            ))
+            self.stdout.write(f"{'endpoint':45} {'status':>6} {'before':>7} {'cold':>6} {'warm':>6}")
+            totals = [0, 0, 0]
+            for path in endpoints:
+                with mock.patch.object(User, '_remember', lambda user, name, loader: loader()):
+                    self._get(client, path)  # warm the request context cache only
+                    status, before = self._get(client, path)
+                cache.clear()
+                _, cold = self._get(client, path)
+                _, warm = self._get(client, path)
+                for i, count in enumerate((before, cold, warm)):
+                    totals[i] += count
+                self.stdout.write(f"{path:45} {status:>6} {before:>7} {cold:>6} {warm:>6}")
+
+            count = len(endpoints)
+            self.stdout.write(
+                f"{'mean':45} {'':>6} {totals[0] / count:>7.1f} {totals[1] / count:>6.1f} {totals[2] / count:>6.1f}"
+            )
+            if totals[0]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Warm requests run {100 * (totals[0] - totals[2]) / totals[0]:.0f}% fewer queries"
+                ))
+
+    def _get(self, client, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+        return response.status_code, len(queries.captured_queries)
+
+    def _seed(self):
+        org = Organization.objects.create(name='Context Benchmark', email='context-benchmark@example.com')
+        user = User.objects.create_user(
+            email='admin@context-bench.example.com', password=None,
+            first_name='Bench', last_name='Admin', organization=org, is_org_admin=True,
+        )
+        OrganizationUser.objects.create(
+            user=user, organization_id=org.id, role=OrganizationUser.RoleChoices.ORG_ADMIN
+        )
+        branch = Branch.objects.create(organization_id=org.id, name='HQ', code='HQ')
+        BranchUser.objects.create(user=user, branch=branch)
+        role = Role.objects.create(name='HR Manager', code='hr_manager')
+        RoleAssignment.objects.create(user=user, role=role, scope_id=org.id)
+        department = Department.all_objects.create(organization=org, name='Bench', code='BENCH')
+        Employee.all_objects.create(
+            organization=org, user=user, employee_id='ADM', date_of_joining=date(2020, 1, 1),
+            department=department,
+        )
+
+        token = AccessToken.for_user(user)
+        token['organization_id'] = str(org.id)
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
@@ -180,6 +180,41 @@ class User(AbstractBaseUser, PermissionsMixin):
         parts.append(self.last_name)
         return ' '.join(parts)
     
+    # ===== Cached tenant facts =====
+
+    def __getstate__(self):
+        # Memoized facts belong to this instance only, never to cached copies
+        state = super().__getstate__()
+        state.pop('_access_memo', None)
+        return state
+
+    def _remember(self, name, loader):
+        """
+        Memoize a tenant fact on this instance (request.user is loaded per
+        request) and share it across requests through RequestContextCache,
+        whose generation the role, membership and BranchUser signals bump.
+        """
+        memo = self.__dict__.setdefault('_access_memo', {})
+        if name not in memo:
+            if self.pk is None:
+                return loader()
+            from apps.core.request_context import RequestContextCache
+            memo[name] = RequestContextCache.remember(self.pk, name, loader)
+        return memo[name]
+
+    def forget_cached_access(self):
+        """Drop the facts memoized on this instance"""
+        self.__dict__.pop('_access_memo', None)
+
+    @staticmethod
+    def _context_organization_key():
+        try:
+            from apps.core.context import get_current_organization
+            current_org = get_current_organization()
+        except ImportError:
+            current_org = None
+        return current_org.id if current_org else '-'
+
     # ===== Hierarchical Multi-Tenancy Helper Methods =====
     
     def get_organization_membership(self):
@@ -194,9 +229,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     def get_organization(self):
         """
-        Get the organization this user belongs to.
+        Get the organization this user belongs to (cached, see _remember).
         Returns: Organization instance or None
         """
+        return self._remember('organization', self._load_organization)
+
+    def _load_organization(self):
         membership = self.get_organization_membership()
         if membership:
             return membership.organization
@@ -211,7 +249,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         return None
     
     def is_organization_admin(self):
-        """Check if user is an org admin via OrganizationUser mapping"""
+        """Check if user is an org admin via OrganizationUser mapping (cached)"""
+        return self._remember('org_admin', self._load_is_organization_admin)
+
+    def _load_is_organization_admin(self):
         try:
             from .models_hierarchy import OrganizationUser
             membership = self.get_organization_membership()
@@ -401,8 +442,14 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def get_role_codes(self):
         """
-        Get list of role codes for the user.
+        Get list of role codes for the user in the current organization
+        context (cached per organization).
         """
+        return list(self._remember(
+            f'role_codes:{self._context_organization_key()}', self._load_role_codes
+        ))
+
+    def _load_role_codes(self):
         # 🔒 SECURITY FIX: Superusers always have 'superuser' role
         roles = set()
         if self.is_superuser:
@@ -424,8 +471,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         🔒 SECURITY FIX:
         Permissions are now tenant-isolated via role scoping.
-        Superusers get all permissions.
+        Superusers get all permissions. Cached per organization context.
         """
+        scope = 'all' if self.is_superuser else self._context_organization_key()
+        return list(self._remember(f'permissions:{scope}', self._load_all_permissions))
+
+    def _load_all_permissions(self):
         if self.is_superuser:
             # Return all available permissions for superuser
             # In a real system, this should query all Permission objects
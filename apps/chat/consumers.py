@@ -2,10 +2,15 @@
 Chat Consumers - WebSocket handlers for real-time chat
 """
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 
+from .presence import PresenceService, publish_typing
+from .receipts import ReadReceiptBuffer
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
@@ -13,8 +18,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
     Handles:
     - Joining conversation rooms
     - Sending/receiving messages
-    - Typing indicators
+    - Presence (heartbeats) and coalesced typing indicators
     - Read receipts
+    - Catching up on missed messages after a reconnect
     """
     
     async def connect(self):
@@ -42,26 +48,42 @@ class ChatConsumer(AsyncWebsocketConsumer):
         
         await self.accept()
         
-        # Notify others that user is online
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'user_online',
-                'user_id': str(self.user.id),
-                'username': self.user.full_name,
-            }
+        # Notify others only when this is the user's first live connection
+        came_online = await sync_to_async(PresenceService.connect)(
+            self.user.organization_id, self.conversation_id, self.user.id, self.channel_name
         )
-    
-    async def disconnect(self, close_code):
-        if hasattr(self, 'room_group_name'):
-            # Notify others that user went offline
+        if came_online:
             await self.channel_layer.group_send(
                 self.room_group_name,
                 {
-                    'type': 'user_offline',
+                    'type': 'user_online',
                     'user_id': str(self.user.id),
+                    'username': self.user.full_name,
                 }
             )
+    
+    async def disconnect(self, close_code):
+        if hasattr(self, 'room_group_name'):
+            await publish_typing(
+                self.channel_layer, self.room_group_name, self.conversation_id,
+                self.user.id, self.user.full_name, False
+            )
+            
+            # Notify others once the user's last connection is gone
+            went_offline = await sync_to_async(PresenceService.disconnect)(
+                self.user.organization_id, self.conversation_id, self.user.id, self.channel_name
+            )
+            if went_offline:
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {
+                        'type': 'user_offline',
+                        'user_id': str(self.user.id),
+                    }
+                )
+            
+            # Persist this connection's read watermark right away
+            await ReadReceiptBuffer.flush([(self.conversation_id, self.user.id)])
             
             # Leave room group
             await self.channel_layer.group_discard(
@@ -80,6 +102,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.handle_typing(data)
         elif message_type == 'read_receipt':
             await self.handle_read_receipt(data)
+        elif message_type == 'sync':
+            await self.handle_sync(data)
+        elif message_type == 'heartbeat':
+            await sync_to_async(PresenceService.heartbeat)(
+                self.user.organization_id, self.conversation_id, self.user.id, self.channel_name
+            )
+        elif message_type == 'presence':
+            await self.handle_presence()
     
     async def handle_chat_message(self, data):
         """Process and broadcast a new chat message"""
@@ -88,46 +118,67 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not content.strip():
             return
         
-        # Save message to database
-        message = await self.save_message(content)
+        # Saved and broadcast to the room once committed
+        await self.save_message(content)
+    
+    async def handle_sync(self, data):
+        """Send messages newer than the client's last cursor"""
+        from .services import InvalidCursor
         
-        # Broadcast to room
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message_id': str(message.id),
-                'content': message.content,
-                'sender_id': str(self.user.id),
-                'sender_name': self.user.full_name,
-                'created_at': message.created_at.isoformat(),
-            }
-        )
+        since = data.get('since')
+        if not since:
+            return
+        
+        try:
+            frame = await self.fetch_messages_since(since, data.get('limit'))
+        except InvalidCursor:
+            await self.send(text_data=json.dumps({'type': 'error', 'error': 'Invalid cursor'}))
+            return
+        
+        await self.send(text_data=json.dumps(frame, cls=DjangoJSONEncoder))
     
     async def handle_typing(self, data):
-        """Broadcast typing indicator"""
-        is_typing = data.get('is_typing', False)
-        
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'typing_indicator',
-                'user_id': str(self.user.id),
-                'username': self.user.full_name,
-                'is_typing': is_typing,
-            }
+        """Record typing state; peers get at most one coalesced frame per interval"""
+        await publish_typing(
+            self.channel_layer, self.room_group_name, self.conversation_id,
+            self.user.id, self.user.full_name, bool(data.get('is_typing', False))
         )
     
+    async def handle_presence(self):
+        """Send the conversation's current presence to this client"""
+        snapshot = await sync_to_async(PresenceService.presence)(self.conversation_id)
+        await self.send(text_data=json.dumps({
+            'type': 'presence',
+            'heartbeat_interval': PresenceService.HEARTBEAT_INTERVAL,
+            **snapshot,
+        }))
+    
     async def handle_read_receipt(self, data):
-        """Update read status and broadcast"""
-        await self.update_last_read()
+        """
+        Advance the read watermark (to the message at 'cursor', or now) and
+        broadcast it. Receipts that do not move the watermark forward are
+        dropped; the database write is buffered and flushed in bulk.
+        """
+        from .services import InvalidCursor, MessageHistoryService
+        
+        read_at = timezone.now()
+        if data.get('cursor'):
+            try:
+                read_at = min(read_at, MessageHistoryService.decode_cursor(data['cursor'])[0])
+            except InvalidCursor:
+                return
+        
+        if read_at <= self.read_watermark:
+            return
+        self.read_watermark = read_at
+        ReadReceiptBuffer.record(self.conversation_id, self.user.id, read_at)
         
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'read_receipt',
                 'user_id': str(self.user.id),
-                'read_at': timezone.now().isoformat(),
+                'read_at': read_at.isoformat(),
             }
         )
     
@@ -135,25 +186,23 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     async def chat_message(self, event):
         """Send chat message to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'chat_message',
-            'message_id': event['message_id'],
-            'content': event['content'],
-            'sender_id': event['sender_id'],
-            'sender_name': event['sender_name'],
-            'created_at': event['created_at'],
-        }))
+        await self.send(text_data=json.dumps(event))
     
-    async def typing_indicator(self, event):
-        """Send typing indicator to WebSocket"""
-        # Don't send to the user who is typing
-        if event['user_id'] != str(self.user.id):
-            await self.send(text_data=json.dumps({
-                'type': 'typing',
-                'user_id': event['user_id'],
-                'username': event['username'],
-                'is_typing': event['is_typing'],
-            }))
+    async def chat_messages(self, event):
+        """Send a batch of messages (e.g. system messages) as one frame"""
+        await self.send(text_data=json.dumps(event))
+    
+    async def typing_state(self, event):
+        """Send typing indicators of other users to WebSocket, one frame per user"""
+        user_id = str(self.user.id)
+        for change in event['changes']:
+            if change['user_id'] != user_id:
+                await self.send(text_data=json.dumps({
+                    'type': 'typing',
+                    'user_id': change['user_id'],
+                    'username': change['username'],
+                    'is_typing': change['is_typing'],
+                }))
     
     async def read_receipt(self, event):
         """Send read receipt to WebSocket"""
@@ -181,31 +230,37 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     # ----- Database helpers -----
     
+    @database_sync_to_async
+    def fetch_messages_since(self, since, limit=None):
+        from .serializers import MessageSerializer
+        from .services import MessageHistoryService
+        page = MessageHistoryService.page(self.conversation_id, since=since, limit=limit)
+        messages = page['messages']
+        context = {'reaction_summaries': MessageHistoryService.reaction_summaries(m.id for m in messages)}
+        return {
+            'type': 'history',
+            'messages': MessageSerializer(messages, many=True, context=context).data,
+            'has_more': page['has_more'],
+            'cursor': MessageHistoryService.encode_cursor(messages[-1]) if messages else since,
+        }
+    
     @database_sync_to_async
     def check_participant(self):
         from .models import ConversationParticipant
-        return ConversationParticipant.objects.filter(
+        rows = list(ConversationParticipant.objects.filter(
             conversation_id=self.conversation_id,
             user=self.user
-        ).exists()
+        ).values_list('conversation__organization_id', 'last_read_at')[:1])
+        if not rows:
+            return False
+        self.organization_id, self.read_watermark = rows[0]
+        return True
     
     @database_sync_to_async
     def save_message(self, content):
-        from .models import Message, Conversation
-        conversation = Conversation.objects.get(id=self.conversation_id)
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=self.user,
-            content=content
+        from .services import MessageDispatchService
+        return MessageDispatchService.send(
+            self.conversation_id, self.user, content=content,
+            organization_id=self.organization_id,
         )
-        conversation.last_message_at = timezone.now()
-        conversation.save(update_fields=['last_message_at'])
-        return message
-    
-    @database_sync_to_async
-    def update_last_read(self):
-        from .models import ConversationParticipant
-        ConversationParticipant.objects.filter(
-            conversation_id=self.conversation_id,
-            user=self.user
-        ).update(last_read_at=timezone.now())
+
@@ -0,0 +1,54 @@
+"""
+Management command to build chat inbox rows for existing conversations
+Usage: python manage.py backfill_chat_inbox [--organization ORG_ID] [--batch-size N]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.chat.models import Conversation
+from apps.chat.services import InboxService
+
+
+class Command(BaseCommand):
+    help = 'Build or refresh the denormalized chat inbox for existing conversations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            type=str,
+            help='Process specific organization ID only',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Conversations loaded per batch',
+        )
+
+    def handle(self, *args, **options):
+        org_id = options.get('organization')
+        batch_size = options['batch_size']
+
+        conversations = Conversation.all_objects.filter(is_deleted=False)
+        if org_id:
+            conversations = conversations.filter(organization_id=org_id)
+
+        processed = created = 0
+        last_id = None
+        while True:
+            batch = conversations.order_by('id')
+            if last_id is not None:
+                batch = batch.filter(id__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+
+            for conversation in batch:
+                created += InboxService.sync_conversation(conversation)
+            processed += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'  {processed} conversations processed...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Inbox backfill complete: {processed} conversations, {created} inbox rows created'
+        ))
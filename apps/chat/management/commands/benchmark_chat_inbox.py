@@ -0,0 +1,99 @@
+"""
+Management command to compare the legacy conversation list with the inbox read model
+Usage: python manage.py benchmark_chat_inbox [--conversations N] [--messages N] [--participants N]
+"""
+
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.chat.models import Conversation, ConversationParticipant, Message
+from apps.chat.serializers import ConversationInboxSerializer, ConversationListSerializer
+from apps.chat.services import InboxService
+from apps.core.benchmarking import rolled_back
+from apps.core.models import Organization
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the conversation list: per-row serializer vs denormalized inbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conversations', type=int, default=200)
+        parser.add_argument('--messages', type=int, default=50, help='Messages per conversation')
+        parser.add_argument('--participants', type=int, default=4, help='Participants per conversation')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = self._seed(options)
+            self._run(user, options)
+
+    def _seed(self, options):
+        org = Organization.objects.create(name='Chat Benchmark', email='chat-benchmark@example.com')
+        users = [
+            User.objects.create_user(
+                email=f'chat-bench-{i}@example.com', password=None,
+                first_name='Bench', last_name=str(i), organization=org,
+            )
+            for i in range(options['participants'])
+        ]
+
+        conversations = Conversation.all_objects.bulk_create([
+            Conversation(organization=org, type=Conversation.Type.GROUP, name=f'Group {i}')
+            for i in range(options['conversations'])
+        ])
+        ConversationParticipant.all_objects.bulk_create([
+            ConversationParticipant(organization=org, conversation=conversation, user=user)
+            for conversation in conversations for user in users
+        ])
+
+        for conversation in conversations:
+            Message.all_objects.bulk_create([
+                Message(
+                    organization=org, conversation=conversation,
+                    sender=users[i % len(users)], content=f'Message {i}',
+                )
+                for i in range(options['messages'])
+            ])
+
+        started = time.perf_counter()
+        for conversation in conversations:
+            InboxService.sync_conversation(conversation)
+        self.stdout.write(f'Backfilled {len(conversations)} conversations in {time.perf_counter() - started:.2f}s')
+        return users[0]
+
+    def _measure(self, label, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - started)
+        best = min(timings) * 1000
+        self.stdout.write(f'{label:<10} {len(ctx.captured_queries):>6} queries  best {best:8.1f} ms')
+
+    def _run(self, user, options):
+        page_size = options['page_size']
+        request = SimpleNamespace(user=user)
+
+        def legacy():
+            queryset = Conversation.all_objects.filter(
+                participants__user=user, participants__is_archived=False, is_deleted=False
+            ).annotate(latest_message=Max('messages__created_at')).order_by('-latest_message')
+            ConversationListSerializer(queryset[:page_size], many=True, context={'request': request}).data
+
+        def inbox():
+            ConversationInboxSerializer(InboxService.inbox_for(user)[:page_size], many=True).data
+
+        self.stdout.write(self.style.SUCCESS(
+            f"=== Conversation list, page of {page_size} "
+            f"({options['conversations']} conversations x {options['messages']} messages) ==="
+        ))
+        self._measure('legacy', legacy, options['repeat'])
+        self._measure('inbox', inbox, options['repeat'])
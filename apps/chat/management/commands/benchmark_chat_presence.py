@@ -0,0 +1,83 @@
+"""
+Management command to load-test typing fan-out on the channel layer
+Usage: python manage.py benchmark_chat_presence [--users N] [--rate KEYS_PER_SEC] [--duration SECONDS]
+
+Compares the legacy one-frame-per-keystroke broadcast with the coalesced
+typing frames from PresenceService on an in-memory channel layer.
+"""
+
+import asyncio
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+
+from apps.chat.presence import PresenceService, publish_typing
+
+
+class CountingChannelLayer(InMemoryChannelLayer):
+    """In-memory layer that counts group sends and per-member deliveries"""
+
+    def __init__(self, **kwargs):
+        super().__init__(capacity=1_000_000, **kwargs)
+        self.group_sends = 0
+        self.deliveries = 0
+
+    async def group_send(self, group, message):
+        self.group_sends += 1
+        self.deliveries += len(self.groups.get(group, {}))
+        await super().group_send(group, message)
+
+
+class Command(BaseCommand):
+    help = 'Measure channel-layer messages per second for typing indicators, before and after coalescing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Participants typing in one conversation')
+        parser.add_argument('--rate', type=float, default=5.0, help='Keystrokes per second per user')
+        parser.add_argument('--duration', type=float, default=3.0, help='Seconds to simulate')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f"=== Typing fan-out: {options['users']} users x {options['rate']:g} keys/s "
+            f"for {options['duration']:g}s ==="
+        ))
+        for label, coalesced in (('legacy', False), ('coalesced', True)):
+            layer, elapsed = asyncio.run(self._simulate(coalesced, options))
+            self.stdout.write(
+                f"{label:<10} {layer.group_sends / elapsed:10.1f} group sends/s "
+                f"{layer.deliveries / elapsed:12.1f} deliveries/s"
+            )
+
+    async def _simulate(self, coalesced, options):
+        layer = CountingChannelLayer()
+        group = 'chat_benchmark'
+        conversation_id = f'benchmark-{time.monotonic_ns()}'
+        for _ in range(options['users']):
+            await layer.group_add(group, await layer.new_channel())
+
+        interval = 1.0 / options['rate']
+        deadline = time.monotonic() + options['duration']
+        pending = []
+
+        async def typist(user_id):
+            while time.monotonic() < deadline:
+                if coalesced:
+                    task = await publish_typing(layer, group, conversation_id, user_id, f'User {user_id}', True)
+                    if task:
+                        pending.append(task)
+                else:
+                    await layer.group_send(group, {
+                        'type': 'typing_indicator', 'user_id': user_id,
+                        'username': f'User {user_id}', 'is_typing': True,
+                    })
+                await asyncio.sleep(interval)
+
+        started = time.monotonic()
+        await asyncio.gather(*(typist(str(i)) for i in range(options['users'])))
+        await asyncio.gather(*pending)
+        elapsed = time.monotonic() - started
+
+        for user_id in range(options['users']):
+            PresenceService.set_typing(conversation_id, str(user_id), f'User {user_id}', False)
+        return layer, elapsed
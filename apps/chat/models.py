@@ -70,6 +70,9 @@ class Message(OrganizationEntity):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chat_msg_history_idx'),
+        ]
         
     def __str__(self):
         return f"Message {self.id} from {self.sender}"
@@ -84,3 +87,34 @@ class MessageReaction(OrganizationEntity):
     
     class Meta:
         unique_together = ('message', 'user', 'reaction')
+
+
+class ConversationInbox(OrganizationEntity):
+    """
+    Denormalized inbox row for one participant of a conversation.
+
+    Holds everything the conversation list shows (last message snippet,
+    sender, unread counter, participants preview) so the inbox is read with
+    a single indexed query instead of per-conversation subqueries. Kept in
+    sync by ``apps.chat.services.InboxService``.
+    """
+    participant = models.OneToOneField(ConversationParticipant, on_delete=models.CASCADE, related_name='inbox')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='inbox_entries')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_inbox')
+
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_snippet = models.CharField(max_length=100, blank=True)
+    last_message_sender_name = models.CharField(max_length=255, blank=True)
+    last_message_at = models.DateTimeField(db_index=True)
+
+    unread_count = models.PositiveIntegerField(default=0)
+    participants_preview = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-last_message_at']
+        indexes = [
+            models.Index(fields=['user', '-last_message_at'], name='chat_inbox_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"Inbox of {self.user} for {self.conversation}"
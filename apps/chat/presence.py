@@ -0,0 +1,255 @@
+"""
+Chat Presence - Heartbeat-based online state and coalesced typing indicators
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Iterable, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+
+class RedisPresenceStore:
+    """
+    Presence sets kept as Redis sorted sets scored by expiry time.
+
+    Expired members are pruned on read, so a connection that stops sending
+    heartbeats drops out without any cleanup job.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def touch(self, keys: Iterable[str], member: str, expires_at: float, ttl: int) -> None:
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.zadd(key, {member: expires_at})
+            pipe.expire(key, max(1, math.ceil(ttl)))
+        pipe.execute()
+
+    def remove(self, keys: Iterable[str], member: str) -> None:
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.zrem(key, member)
+        pipe.execute()
+
+    def members(self, key: str, now: float) -> List[str]:
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zrange(key, 0, -1)
+        _, members = pipe.execute()
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        return bool(self.client.set(key, 1, nx=True, px=max(1, int(ttl * 1000))))
+
+
+class CachePresenceStore:
+    """
+    Fallback store on the Django cache for deployments without Redis.
+    Updates are read-modify-write, so it is only exact within one process.
+    """
+
+    def touch(self, keys: Iterable[str], member: str, expires_at: float, ttl: int) -> None:
+        for key in keys:
+            members = cache.get(key) or {}
+            members[member] = expires_at
+            cache.set(key, members, ttl)
+
+    def remove(self, keys: Iterable[str], member: str) -> None:
+        for key in keys:
+            members = cache.get(key) or {}
+            if members.pop(member, None) is not None:
+                cache.set(key, members)
+
+    def members(self, key: str, now: float) -> List[str]:
+        return [m for m, expires_at in (cache.get(key) or {}).items() if expires_at > now]
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        return cache.add(key, 1, ttl)
+
+
+class PresenceService:
+    """
+    Who is online in an organization/conversation and who is typing.
+
+    Every WebSocket connection is a member ``<user_id>|<connection_id>`` of
+    the online sets and refreshes itself with heartbeats; a user is online
+    while any of their connections is. Typing state is written per user and
+    its changes are broadcast as one coalesced event per conversation per
+    TYPING_INTERVAL.
+    """
+
+    PRESENCE_TTL = getattr(settings, 'CHAT_PRESENCE_TTL', 90)  # 3 missed heartbeats
+    HEARTBEAT_INTERVAL = getattr(settings, 'CHAT_PRESENCE_HEARTBEAT_INTERVAL', 30)
+    TYPING_TTL = getattr(settings, 'CHAT_TYPING_TTL', 6)
+    TYPING_INTERVAL = getattr(settings, 'CHAT_TYPING_INTERVAL', 1.0)
+    CACHE_PREFIX = 'chat:presence:'
+
+    _store = None
+
+    @classmethod
+    def _make_key(cls, *parts):
+        """Generate cache key"""
+        key = ':'.join(str(p) for p in parts)
+        return f"{cls.CACHE_PREFIX}{key}"
+
+    @classmethod
+    def get_store(cls):
+        if cls._store is None:
+            url = getattr(settings, 'CHAT_PRESENCE_REDIS_URL', None) or getattr(settings, 'REDIS_URL', None)
+            if url:
+                import redis
+                cls._store = RedisPresenceStore(redis.Redis.from_url(url))
+            else:
+                cls._store = CachePresenceStore()
+        return cls._store
+
+    @classmethod
+    def set_store(cls, store) -> None:
+        """Swap the backing store (e.g. a fakeredis-backed RedisPresenceStore in tests)"""
+        cls._store = store
+
+    @staticmethod
+    def _users(members: Iterable[str]) -> List[str]:
+        return sorted({m.split('|', 1)[0] for m in members})
+
+    @classmethod
+    def _online_keys(cls, organization_id, conversation_id) -> List[str]:
+        return [
+            cls._make_key('conversation', conversation_id, 'online'),
+            cls._make_key('org', organization_id or 'global', 'online'),
+        ]
+
+    # ----- Online state -----
+
+    @classmethod
+    def connect(cls, organization_id, conversation_id, user_id, connection_id) -> bool:
+        """Register a connection; True if the user just came online in the conversation"""
+        user_id = str(user_id)
+        was_online = user_id in cls.online_users(conversation_id)
+        cls.heartbeat(organization_id, conversation_id, user_id, connection_id)
+        return not was_online
+
+    @classmethod
+    def heartbeat(cls, organization_id, conversation_id, user_id, connection_id) -> None:
+        """Refresh a connection's presence for another PRESENCE_TTL seconds"""
+        cls.get_store().touch(
+            cls._online_keys(organization_id, conversation_id),
+            f"{user_id}|{connection_id}",
+            time.time() + cls.PRESENCE_TTL,
+            cls.PRESENCE_TTL,
+        )
+
+    @classmethod
+    def disconnect(cls, organization_id, conversation_id, user_id, connection_id) -> bool:
+        """Drop a connection; True if the user has no connection left in the conversation"""
+        cls.get_store().remove(
+            cls._online_keys(organization_id, conversation_id), f"{user_id}|{connection_id}"
+        )
+        return str(user_id) not in cls.online_users(conversation_id)
+
+    @classmethod
+    def online_users(cls, conversation_id) -> List[str]:
+        key = cls._make_key('conversation', conversation_id, 'online')
+        return cls._users(cls.get_store().members(key, time.time()))
+
+    @classmethod
+    def online_users_in_organization(cls, organization_id) -> List[str]:
+        key = cls._make_key('org', organization_id or 'global', 'online')
+        return cls._users(cls.get_store().members(key, time.time()))
+
+    # ----- Typing -----
+
+    @classmethod
+    def set_typing(cls, conversation_id, user_id, username, is_typing) -> bool:
+        """
+        Record a user's typing state.
+
+        Returns:
+            True if the caller won the conversation's throttle slot and must
+            publish the typing frame after TYPING_INTERVAL
+        """
+        store = cls.get_store()
+        key = cls._make_key('conversation', conversation_id, 'typing')
+        member = f"{user_id}|{username}"
+        if is_typing:
+            store.touch([key], member, time.time() + cls.TYPING_TTL, cls.TYPING_TTL)
+        else:
+            store.remove([key], member)
+        return store.acquire(cls._make_key('conversation', conversation_id, 'typing', 'lock'), cls.TYPING_INTERVAL)
+
+    @classmethod
+    def typing_users(cls, conversation_id) -> List[Dict[str, str]]:
+        key = cls._make_key('conversation', conversation_id, 'typing')
+        members = cls.get_store().members(key, time.time())
+        return sorted(
+            ({'user_id': user_id, 'username': username}
+             for user_id, username in (m.split('|', 1) for m in members)),
+            key=lambda item: item['user_id'],
+        )
+
+    @classmethod
+    def typing_changes(cls, conversation_id) -> List[Dict]:
+        """
+        Typing transitions since the previous call for the conversation:
+        users who started typing, then users who stopped, explicitly or by
+        TYPING_TTL expiry.
+        """
+        key = cls._make_key('conversation', conversation_id, 'typing', 'published')
+        current = {u['user_id']: u['username'] for u in cls.typing_users(conversation_id)}
+        published = cache.get(key) or {}
+
+        changes = [
+            {'user_id': user_id, 'username': username, 'is_typing': True}
+            for user_id, username in sorted(current.items()) if user_id not in published
+        ] + [
+            {'user_id': user_id, 'username': username, 'is_typing': False}
+            for user_id, username in sorted(published.items()) if user_id not in current
+        ]
+        if current:
+            cache.set(key, current, cls.PRESENCE_TTL)
+        elif published:
+            cache.delete(key)
+        return changes
+
+    @classmethod
+    def presence(cls, conversation_id) -> Dict[str, list]:
+        """Current presence snapshot of a conversation"""
+        return {
+            'online': cls.online_users(conversation_id),
+            'typing': cls.typing_users(conversation_id),
+        }
+
+
+async def publish_typing(channel_layer, group_name, conversation_id, user_id, username, is_typing):
+    """
+    Record a typing event and, if no event is pending for the conversation,
+    publish one ``typing_state`` event with the typing changes after
+    TYPING_INTERVAL. Bursts of keystrokes collapse into that single event.
+    While someone is still typing the changes are checked again after
+    TYPING_TTL, so users whose typing state expired are announced as
+    stopped.
+    """
+    should_publish = await sync_to_async(PresenceService.set_typing)(
+        conversation_id, str(user_id), username, is_typing
+    )
+    if not should_publish:
+        return None
+
+    async def _publish_changes():
+        changes = await sync_to_async(PresenceService.typing_changes)(conversation_id)
+        if changes:
+            await channel_layer.group_send(group_name, {'type': 'typing_state', 'changes': changes})
+        return bool(await sync_to_async(PresenceService.typing_users)(conversation_id))
+
+    async def _flush():
+        await asyncio.sleep(PresenceService.TYPING_INTERVAL)
+        if await _publish_changes():
+            await asyncio.sleep(PresenceService.TYPING_TTL)
+            await _publish_changes()
+
+    return asyncio.ensure_future(_flush())
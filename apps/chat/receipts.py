@@ -0,0 +1,95 @@
+"""
+Chat Read Receipts - Buffered last-read watermarks flushed in bulk
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+Key = Tuple[str, str]  # (conversation_id, user_id)
+
+
+class ReadReceiptBuffer:
+    """
+    Process-wide buffer of pending last-read watermarks.
+
+    Consumers record watermarks here instead of writing one UPDATE per read
+    receipt; everything pending is written with a single UPDATE every
+    FLUSH_INTERVAL seconds, and a connection's own watermark is flushed when
+    it disconnects. Writes never move ``last_read_at`` backwards.
+    """
+
+    FLUSH_INTERVAL = getattr(settings, 'CHAT_READ_RECEIPT_FLUSH_INTERVAL', 5.0)
+
+    _pending: Dict[Key, datetime] = {}
+    _flush_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def record(cls, conversation_id, user_id, read_at: datetime) -> None:
+        """Buffer a watermark and make sure a flush is scheduled"""
+        key = (str(conversation_id), str(user_id))
+        current = cls._pending.get(key)
+        if current is None or read_at > current:
+            cls._pending[key] = read_at
+        cls._schedule()
+
+    @classmethod
+    def _schedule(cls) -> None:
+        if cls._flush_task is not None and not cls._flush_task.done():
+            return
+
+        async def _delayed_flush():
+            await asyncio.sleep(cls.FLUSH_INTERVAL)
+            await cls.flush()
+
+        cls._flush_task = asyncio.ensure_future(_delayed_flush())
+
+    @classmethod
+    def take(cls, keys: Optional[Iterable[Key]] = None) -> Dict[Key, datetime]:
+        """Remove and return pending watermarks (all of them, or only ``keys``)"""
+        if keys is None:
+            entries, cls._pending = cls._pending, {}
+            return entries
+        return {
+            key: cls._pending.pop(key)
+            for key in ((str(c), str(u)) for c, u in keys)
+            if key in cls._pending
+        }
+
+    @classmethod
+    async def flush(cls, keys: Optional[Iterable[Key]] = None) -> int:
+        entries = cls.take(keys)
+        if not entries:
+            return 0
+        return await database_sync_to_async(cls.write)(entries)
+
+    @staticmethod
+    def write(entries: Dict[Key, datetime]) -> int:
+        """
+        Persist watermarks: one UPDATE for the participants and one to clear
+        the unread counter of inboxes whose last message is now read.
+        """
+        from .models import ConversationInbox, ConversationParticipant
+
+        participants = Q()
+        read_inboxes = Q()
+        whens = []
+        for (conversation_id, user_id), read_at in entries.items():
+            match = Q(conversation_id=conversation_id, user_id=user_id)
+            participants |= match
+            read_inboxes |= match & Q(last_message_at__lte=read_at)
+            whens.append(When(match, then=Value(read_at)))
+
+        updated = ConversationParticipant.all_objects.filter(participants).update(
+            last_read_at=Greatest(
+                F('last_read_at'),
+                Case(*whens, default=F('last_read_at'), output_field=DateTimeField()),
+            )
+        )
+        ConversationInbox.all_objects.filter(read_inboxes).exclude(unread_count=0).update(unread_count=0)
+        return updated
@@ -6,7 +6,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Count
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
-from .models import Conversation, ConversationParticipant, Message, MessageReaction
+from .models import Conversation, ConversationInbox, ConversationParticipant, Message, MessageReaction
 
 User = get_user_model()
 
@@ -37,6 +37,9 @@ class MessageSerializer(serializers.ModelSerializer):
     @extend_schema_field({'type': 'object', 'additionalProperties': {'type': 'integer'}})
     def get_reactions_summary(self, obj):
         """Returns a dict of reaction counts, e.g., {'👍': 3, '❤️': 1}"""
+        summaries = self.context.get('reaction_summaries')
+        if summaries is not None:
+            return summaries.get(obj.id, {})
         summary = obj.reactions.values('reaction').annotate(count=Count('id'))
         return {item['reaction']: item['count'] for item in summary}
 
@@ -90,6 +93,35 @@ class ConversationListSerializer(serializers.ModelSerializer):
         return UserMiniSerializer([p.user for p in participants], many=True).data
 
 
+class ConversationInboxSerializer(serializers.ModelSerializer):
+    """
+    Conversation list entry read from the denormalized inbox.
+    Same shape as ConversationListSerializer without any per-row queries.
+    """
+    id = serializers.UUIDField(source='conversation_id', read_only=True)
+    type = serializers.CharField(source='conversation.type', read_only=True)
+    name = serializers.CharField(source='conversation.name', read_only=True)
+    description = serializers.CharField(source='conversation.description', read_only=True)
+    last_message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ConversationInbox
+        fields = [
+            'id', 'type', 'name', 'description', 'last_message_at',
+            'last_message', 'unread_count', 'participants_preview'
+        ]
+
+    @extend_schema_field({'type': 'object', 'nullable': True, 'properties': {'content': {'type': 'string'}, 'sender_name': {'type': 'string'}, 'created_at': {'type': 'string', 'format': 'date-time'}}})
+    def get_last_message(self, obj):
+        if obj.last_message_id:
+            return {
+                'content': obj.last_message_snippet,
+                'sender_name': obj.last_message_sender_name,
+                'created_at': obj.last_message_at.isoformat()
+            }
+        return None
+
+
 class ConversationDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for a single conversation"""
     participants = ConversationParticipantSerializer(many=True, read_only=True)
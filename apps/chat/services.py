@@ -0,0 +1,365 @@
+"""
+Chat Services - Message dispatch, inbox read model and keyset message history
+"""
+
+import base64
+import binascii
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, When
+
+from .models import Conversation, ConversationInbox, ConversationParticipant, Message, MessageReaction
+
+
+class InboxService:
+    """
+    Maintains the per-participant ``ConversationInbox`` rows.
+
+    Message writes touch every inbox row of the conversation with a single
+    UPDATE; the inbox list is then one indexed query per user.
+    """
+
+    PREVIEW_SIZE = 3
+    SNIPPET_LENGTH = 100
+
+    @staticmethod
+    def sender_name(message) -> str:
+        if message.is_system_message or not message.sender_id:
+            return 'System'
+        return message.sender.full_name
+
+    @classmethod
+    def _message_fields(cls, message) -> dict:
+        return {
+            'last_message': message,
+            'last_message_snippet': message.content[:cls.SNIPPET_LENGTH],
+            'last_message_sender_name': cls.sender_name(message),
+            'last_message_at': message.created_at,
+        }
+
+    @staticmethod
+    def _preview(user) -> dict:
+        return {
+            'id': str(user.id),
+            'email': user.email,
+            'full_name': user.full_name,
+            'avatar': user.avatar.url if user.avatar else None,
+        }
+
+    @classmethod
+    def inbox_for(cls, user):
+        """Inbox rows of a user, most recent conversation first (one query)"""
+        return ConversationInbox.all_objects.filter(
+            user=user,
+            participant__is_archived=False,
+            conversation__is_deleted=False,
+        ).select_related('conversation').order_by('-last_message_at')
+
+    @classmethod
+    def record_message(cls, message, count: int = 1) -> int:
+        """
+        Fold a new message into every inbox row of its conversation.
+
+        The sender's unread counter is left untouched; everyone else's is
+        incremented by ``count`` (messages created together) in the same
+        statement. Conversations that have no inbox rows yet (created before
+        the read model existed) are rebuilt.
+        """
+        updated = ConversationInbox.all_objects.filter(
+            conversation_id=message.conversation_id
+        ).update(
+            unread_count=Case(
+                When(user_id=message.sender_id, then=F('unread_count')),
+                default=F('unread_count') + count,
+            ),
+            **cls._message_fields(message),
+        )
+        if not updated:
+            cls.sync_conversation(message.conversation_id)
+        return updated
+
+    @classmethod
+    def record_message_removed(cls, message) -> int:
+        """Refresh the snippet of inbox rows still pointing at an edited/deleted message"""
+        return ConversationInbox.all_objects.filter(last_message=message).update(
+            last_message_snippet=message.content[:cls.SNIPPET_LENGTH],
+        )
+
+    @classmethod
+    def mark_read(cls, conversation_id, user) -> int:
+        """Reset a participant's unread counter"""
+        return ConversationInbox.all_objects.filter(
+            conversation_id=conversation_id, user=user
+        ).exclude(unread_count=0).update(unread_count=0)
+
+    @classmethod
+    @transaction.atomic
+    def sync_conversation(cls, conversation) -> int:
+        """
+        Rebuild the inbox rows of a conversation from its messages.
+
+        Creates rows for participants that have none and refreshes the last
+        message, unread counters and participants preview of existing ones.
+        Used when participants change and by the backfill command.
+
+        Returns:
+            Number of inbox rows created
+        """
+        conversation_id = getattr(conversation, 'pk', conversation)
+        if not isinstance(conversation, Conversation):
+            conversation = Conversation.all_objects.get(pk=conversation_id)
+
+        participants = list(
+            ConversationParticipant.all_objects.filter(
+                conversation_id=conversation_id
+            ).select_related('user').order_by('joined_at', 'id')
+        )
+        if not participants:
+            return 0
+
+        messages = Message.all_objects.filter(conversation_id=conversation_id)
+        last_message = messages.select_related('sender').order_by('-created_at', '-id').first()
+        unread = messages.aggregate(**{
+            f'p{i}': Count('id', filter=Q(created_at__gt=p.last_read_at) & ~Q(sender_id=p.user_id))
+            for i, p in enumerate(participants)
+        })
+        previews = [cls._preview(p.user) for p in participants]
+
+        existing = {
+            entry.participant_id: entry
+            for entry in ConversationInbox.all_objects.filter(conversation_id=conversation_id)
+        }
+        if last_message:
+            message_fields = cls._message_fields(last_message)
+        else:
+            message_fields = {
+                'last_message': None,
+                'last_message_snippet': '',
+                'last_message_sender_name': '',
+                'last_message_at': conversation.last_message_at,
+            }
+
+        to_create, to_update = [], []
+        for i, participant in enumerate(participants):
+            preview = [
+                item for item, other in zip(previews, participants)
+                if other.user_id != participant.user_id
+            ][:cls.PREVIEW_SIZE]
+
+            entry = existing.get(participant.id)
+            if entry is None:
+                entry = ConversationInbox(
+                    organization_id=participant.organization_id or conversation.organization_id,
+                    participant=participant,
+                    conversation_id=conversation_id,
+                    user_id=participant.user_id,
+                )
+                to_create.append(entry)
+            else:
+                to_update.append(entry)
+
+            for field, value in message_fields.items():
+                setattr(entry, field, value)
+            entry.unread_count = unread[f'p{i}']
+            entry.participants_preview = preview
+
+        ConversationInbox.all_objects.bulk_create(to_create)
+        if to_update:
+            ConversationInbox.all_objects.bulk_update(
+                to_update,
+                list(message_fields) + ['unread_count', 'participants_preview'],
+            )
+        return len(to_create)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a message history cursor cannot be decoded"""
+
+
+class MessageHistoryService:
+    """
+    Keyset pagination over a conversation's messages.
+
+    Pages are addressed by an opaque cursor encoding ``(created_at, id)`` of
+    a boundary message and read through the ``(conversation, created_at, id)``
+    index, so fetching an old page costs the same as fetching the newest one.
+    """
+
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
+
+    @staticmethod
+    def encode_cursor(message) -> str:
+        raw = f"{message.created_at.isoformat()}|{message.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Decode a cursor into ``(created_at, id)``"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            created_at, message_id = raw.split('|', 1)
+            return datetime.fromisoformat(created_at), uuid.UUID(message_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+            raise InvalidCursor('Invalid cursor') from exc
+
+    @classmethod
+    def clamp_limit(cls, limit) -> int:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return cls.DEFAULT_LIMIT
+        return max(1, min(limit, cls.MAX_LIMIT))
+
+    @classmethod
+    def page(cls, conversation_id, before=None, since=None, limit=None) -> dict:
+        """
+        Fetch one page of messages in chronological order.
+
+        Args:
+            before: Cursor; return the ``limit`` messages just older than it.
+                Without a cursor the newest page is returned.
+            since: Cursor; return the ``limit`` messages just newer than it
+                (catch-up after a reconnect).
+
+        Returns:
+            {'messages': [...], 'has_more': bool, 'next_cursor': str | None}
+            where ``next_cursor`` continues in the same direction.
+        """
+        limit = cls.clamp_limit(limit)
+        queryset = Message.all_objects.filter(
+            conversation_id=conversation_id, is_deleted=False
+        ).select_related('sender')
+
+        if since:
+            created_at, message_id = cls.decode_cursor(since)
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+            ).order_by('created_at', 'id')
+        else:
+            if before:
+                created_at, message_id = cls.decode_cursor(before)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+                )
+            queryset = queryset.order_by('-created_at', '-id')
+
+        messages = list(queryset[:limit + 1])
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        next_cursor = cls.encode_cursor(messages[-1]) if has_more else None
+
+        if not since:
+            messages.reverse()
+        return {'messages': messages, 'has_more': has_more, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def reaction_summaries(message_ids) -> dict:
+        """
+        Reaction counts for a page of messages in one grouped query.
+
+        Returns:
+            {message_id: {reaction: count}}
+        """
+        summaries = defaultdict(dict)
+        rows = MessageReaction.all_objects.filter(
+            message_id__in=list(message_ids)
+        ).values('message_id', 'reaction').annotate(count=Count('id'))
+        for row in rows:
+            summaries[row['message_id']][row['reaction']] = row['count']
+        return summaries
+
+
+class MessageDispatchService:
+    """
+    Single write path for chat messages from REST and WebSocket clients.
+
+    Persists the message, bumps the conversation and inbox rows in the same
+    transaction, and publishes to the conversation's channel group only once
+    the transaction has committed.
+    """
+
+    @staticmethod
+    def group_name(conversation_id) -> str:
+        return f"chat_{conversation_id}"
+
+    @staticmethod
+    def message_event(message) -> dict:
+        """Channel-layer payload for one message"""
+        return {
+            'message_id': str(message.id),
+            'content': message.content,
+            'sender_id': str(message.sender_id) if message.sender_id else None,
+            'sender_name': InboxService.sender_name(message),
+            'is_system_message': message.is_system_message,
+            'reply_to': str(message.reply_to_id) if message.reply_to_id else None,
+            'attachment': message.attachment.url if message.attachment else None,
+            'created_at': message.created_at.isoformat(),
+            'cursor': MessageHistoryService.encode_cursor(message),
+        }
+
+    @classmethod
+    def publish(cls, conversation_id, event: dict) -> None:
+        """Send an event to the conversation group after the current transaction commits"""
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        group = cls.group_name(conversation_id)
+        transaction.on_commit(lambda: async_to_sync(channel_layer.group_send)(group, event))
+
+    @classmethod
+    @transaction.atomic
+    def send(cls, conversation_id, sender, content='', attachment=None,
+             reply_to_id=None, organization_id=None) -> Message:
+        """Create a message and broadcast it to the conversation"""
+        message = Message.all_objects.create(
+            organization_id=organization_id,
+            conversation_id=conversation_id,
+            sender=sender,
+            content=content,
+            attachment=attachment,
+            reply_to_id=reply_to_id,
+        )
+        Conversation.all_objects.filter(pk=conversation_id).update(last_message_at=message.created_at)
+        InboxService.record_message(message)
+        cls.publish(conversation_id, {'type': 'chat_message', **cls.message_event(message)})
+        return message
+
+    @classmethod
+    @transaction.atomic
+    def send_system_messages(cls, conversation_id, sender, contents, organization_id=None) -> list:
+        """
+        Create several system messages at once and broadcast them as a
+        single grouped ``chat_messages`` frame.
+        """
+        if not contents:
+            return []
+
+        # Messages of one batch may share a created_at; ascending ids keep
+        # them in order under the (created_at, id) keyset.
+        ids = sorted(uuid.uuid4() for _ in contents)
+        messages = Message.all_objects.bulk_create([
+            Message(
+                id=message_id,
+                organization_id=organization_id,
+                conversation_id=conversation_id,
+                sender=sender,
+                content=content,
+                is_system_message=True,
+            )
+            for message_id, content in zip(ids, contents)
+        ])
+
+        last = messages[-1]
+        Conversation.all_objects.filter(pk=conversation_id).update(last_message_at=last.created_at)
+        InboxService.record_message(last, count=len(messages))
+        cls.publish(conversation_id, {
+            'type': 'chat_messages',
+            'messages': [cls.message_event(m) for m in messages],
+        })
+        return messages
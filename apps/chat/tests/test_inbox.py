@@ -0,0 +1,112 @@
+"""
+Tests for the denormalized chat inbox
+"""
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.chat.models import Conversation, ConversationInbox, ConversationParticipant, Message
+from apps.chat.serializers import ConversationInboxSerializer
+from apps.chat.services import InboxService
+from apps.core.models import Organization
+
+
+class InboxServiceTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Chat Org', email='chat@example.com')
+        self.users = [
+            User.objects.create_user(
+                email=f'chat{i}@example.com', password='pass',
+                first_name=f'C{i}', last_name='Hat', organization=self.org,
+            )
+            for i in range(3)
+        ]
+        self.conversation = Conversation.all_objects.create(
+            organization=self.org, type=Conversation.Type.GROUP, name='Team'
+        )
+        for user in self.users:
+            ConversationParticipant.all_objects.create(
+                organization=self.org, conversation=self.conversation, user=user
+            )
+
+    def _send(self, sender, content):
+        message = Message.all_objects.create(
+            organization=self.org, conversation=self.conversation, sender=sender, content=content
+        )
+        InboxService.record_message(message)
+        return message
+
+    def _entry(self, user):
+        return ConversationInbox.all_objects.get(conversation=self.conversation, user=user)
+
+    def test_record_message_builds_and_updates_inbox(self):
+        self._send(self.users[0], 'hello')
+        self.assertEqual(ConversationInbox.all_objects.count(), 3)
+
+        message = Message.all_objects.create(
+            organization=self.org, conversation=self.conversation, sender=self.users[1], content='x' * 150
+        )
+        with self.assertNumQueries(1):
+            InboxService.record_message(message)
+
+        entry = self._entry(self.users[2])
+        self.assertEqual(entry.unread_count, 2)
+        self.assertEqual(entry.last_message_snippet, 'x' * 100)
+        self.assertEqual(entry.last_message_sender_name, self.users[1].full_name)
+        self.assertEqual(self._entry(self.users[1]).unread_count, 1)
+        self.assertEqual(
+            [p['email'] for p in entry.participants_preview],
+            ['chat0@example.com', 'chat1@example.com'],
+        )
+
+        InboxService.mark_read(self.conversation.id, self.users[2])
+        self.assertEqual(self._entry(self.users[2]).unread_count, 0)
+
+    def test_inbox_list_is_one_query(self):
+        self._send(self.users[0], 'first')
+        other = Conversation.all_objects.create(organization=self.org, type=Conversation.Type.DIRECT)
+        ConversationParticipant.all_objects.create(organization=self.org, conversation=other, user=self.users[0])
+        ConversationParticipant.all_objects.create(organization=self.org, conversation=other, user=self.users[2])
+        InboxService.sync_conversation(other)
+
+        with self.assertNumQueries(1):
+            data = ConversationInboxSerializer(InboxService.inbox_for(self.users[2]), many=True).data
+
+        self.assertEqual(len(data), 2)
+        by_id = {item['id']: item for item in data}
+        self.assertEqual(by_id[str(self.conversation.id)]['last_message']['content'], 'first')
+        self.assertEqual(by_id[str(self.conversation.id)]['unread_count'], 1)
+        self.assertIsNone(by_id[str(other.id)]['last_message'])
+
+    def test_inbox_endpoint_applies_search_and_ordering(self):
+        self._send(self.users[0], 'first')
+        other = Conversation.all_objects.create(organization=self.org, type=Conversation.Type.GROUP, name='Ops')
+        ConversationParticipant.all_objects.create(organization=self.org, conversation=other, user=self.users[2])
+        InboxService.sync_conversation(other)
+
+        client = APIClient()
+        client.force_authenticate(user=self.users[2])
+        url = '/api/v1/chat/conversations/'
+
+        def ids(params):
+            response = client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            return [item['id'] for item in body.get('data', body.get('results', body))]
+
+        self.assertEqual(ids({'search': 'ops'}), [str(other.id)])
+        newest_first = ids({'ordering': '-last_message_at'})
+        self.assertEqual(ids({'ordering': 'last_message_at'}), newest_first[::-1])
+
+    def test_backfill_command_matches_live_counts(self):
+        Message.all_objects.create(
+            organization=self.org, conversation=self.conversation, sender=self.users[0], content='legacy'
+        )
+        call_command('backfill_chat_inbox', stdout=open('/dev/null', 'w'))
+
+        self.assertEqual(self._entry(self.users[1]).unread_count, 1)
+        self.assertEqual(self._entry(self.users[0]).unread_count, 0)
+        self.assertEqual(self._entry(self.users[1]).last_message_snippet, 'legacy')
@@ -0,0 +1,97 @@
+"""
+Tests for the unified chat message dispatch path
+"""
+
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.chat.models import Conversation, ConversationInbox, ConversationParticipant
+from apps.chat.services import InboxService, MessageDispatchService, MessageHistoryService
+from apps.core.models import Organization
+
+
+class MessageDispatchTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Dispatch Org', email='dispatch@example.com')
+        self.sender, self.reader = [
+            User.objects.create_user(
+                email=f'dispatch{i}@example.com', password='pass',
+                first_name=f'D{i}', last_name='Spatch', organization=self.org,
+            )
+            for i in range(2)
+        ]
+        self.conversation = Conversation.all_objects.create(organization=self.org, name='Ops')
+        for user in (self.sender, self.reader):
+            ConversationParticipant.all_objects.create(
+                organization=self.org, conversation=self.conversation, user=user
+            )
+        InboxService.sync_conversation(self.conversation)
+
+        self.layer = InMemoryChannelLayer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(f'chat_{self.conversation.id}', self.channel)
+        patcher = mock.patch('apps.chat.services.get_channel_layer', return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _receive(self):
+        return async_to_sync(self.layer.receive)(self.channel)
+
+    def test_send_publishes_after_commit_without_conversation_fetch(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                CaptureQueriesContext(connection) as ctx:
+            message = MessageDispatchService.send(
+                self.conversation.id, self.sender, content='hi', organization_id=self.org.id
+            )
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse([
+            q for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "chat_conversation"' in q['sql']
+        ])
+
+        event = self._receive()
+        self.assertEqual(event['type'], 'chat_message')
+        self.assertEqual(event['message_id'], str(message.id))
+        self.assertEqual(event['cursor'], MessageHistoryService.encode_cursor(message))
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_at, message.created_at)
+        self.assertEqual(message.organization_id, self.org.id)
+
+    def test_system_messages_are_one_grouped_frame(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            messages = MessageDispatchService.send_system_messages(
+                self.conversation.id, self.sender, ['a', 'b', 'c'], organization_id=self.org.id
+            )
+        self.assertEqual(len(callbacks), 1)
+
+        event = self._receive()
+        self.assertEqual(event['type'], 'chat_messages')
+        self.assertEqual([m['content'] for m in event['messages']], ['a', 'b', 'c'])
+
+        page = MessageHistoryService.page(self.conversation.id)
+        self.assertEqual([m.id for m in page['messages']], [m.id for m in messages])
+        inbox = ConversationInbox.all_objects.get(conversation=self.conversation, user=self.reader)
+        self.assertEqual(inbox.unread_count, 3)
+        self.assertEqual(inbox.last_message_sender_name, 'System')
+
+    def test_rest_create_broadcasts(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sender)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/v1/chat/messages/', {
+                'conversation': str(self.conversation.id), 'content': 'from rest',
+            })
+
+        self.assertEqual(response.status_code, 201)
+        event = self._receive()
+        self.assertEqual(event['content'], 'from rest')
+        self.assertEqual(event['sender_name'], self.sender.full_name)
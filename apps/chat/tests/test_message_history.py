@@ -0,0 +1,95 @@
+"""
+Tests for keyset-paginated chat message history
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.chat.models import Conversation, ConversationParticipant, Message, MessageReaction
+from apps.chat.services import InvalidCursor, MessageHistoryService
+from apps.core.models import Organization
+
+
+class MessageHistoryTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='History Org', email='history@example.com')
+        self.user = User.objects.create_user(
+            email='history@example.com', password='pass',
+            first_name='His', last_name='Tory', organization=self.org,
+        )
+        self.conversation = Conversation.all_objects.create(organization=self.org, name='Log')
+        ConversationParticipant.all_objects.create(
+            organization=self.org, conversation=self.conversation, user=self.user
+        )
+        self.messages = [
+            Message.all_objects.create(
+                organization=self.org, conversation=self.conversation,
+                sender=self.user, content=f'm{i}',
+            )
+            for i in range(7)
+        ]
+        # Two pairs of messages share a timestamp so the id tie-break is exercised
+        base = timezone.now() - timedelta(hours=1)
+        offsets = [0, 1, 1, 2, 3, 3, 4]
+        for message, offset in zip(self.messages, offsets):
+            Message.all_objects.filter(pk=message.pk).update(created_at=base + timedelta(minutes=offset))
+        self.ordered = list(
+            Message.all_objects.filter(conversation=self.conversation).order_by('created_at', 'id')
+        )
+
+    def test_before_pages_walk_back_without_gaps(self):
+        seen = []
+        cursor = None
+        while True:
+            page = MessageHistoryService.page(self.conversation.id, before=cursor, limit=3)
+            seen = page['messages'] + seen
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                break
+
+        self.assertEqual([m.id for m in seen], [m.id for m in self.ordered])
+
+    def test_since_returns_only_newer_messages(self):
+        cursor = MessageHistoryService.encode_cursor(self.ordered[2])
+        page = MessageHistoryService.page(self.conversation.id, since=cursor, limit=10)
+
+        self.assertEqual([m.id for m in page['messages']], [m.id for m in self.ordered[3:]])
+        self.assertFalse(page['has_more'])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            MessageHistoryService.page(self.conversation.id, before='not-a-cursor')
+
+    def test_history_endpoint_rejects_malformed_conversation_id(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get('/api/v1/chat/messages/history/', {'conversation': 'not-a-uuid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_endpoint_aggregates_reactions_in_one_query(self):
+        for message in self.ordered[-3:]:
+            MessageReaction.all_objects.create(
+                organization=self.org, message=message, user=self.user, reaction='+1'
+            )
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get('/api/v1/chat/messages/history/', {
+            'conversation': str(self.conversation.id), 'limit': 5,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([m['content'] for m in data['data']], [m.content for m in self.ordered[2:]])
+        self.assertTrue(data['pagination']['has_more'])
+        self.assertEqual(data['data'][-1]['reactions_summary'], {'+1': 1})
+        self.assertEqual(data['data'][0]['reactions_summary'], {})
+
+        with self.assertNumQueries(1):
+            summaries = MessageHistoryService.reaction_summaries(m.id for m in self.ordered)
+        self.assertEqual(len(summaries), 3)
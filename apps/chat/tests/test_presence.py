@@ -0,0 +1,102 @@
+"""
+Tests for chat presence and coalesced typing indicators
+"""
+
+import asyncio
+from unittest import mock
+
+import fakeredis
+from channels.layers import InMemoryChannelLayer
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.chat.presence import CachePresenceStore, PresenceService, RedisPresenceStore, publish_typing
+
+
+class PresenceServiceTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        PresenceService.set_store(RedisPresenceStore(fakeredis.FakeRedis()))
+
+    def tearDown(self):
+        PresenceService.set_store(None)
+
+    def test_user_online_until_last_connection_closes(self):
+        self.assertTrue(PresenceService.connect('org', 'conv', 'u1', 'tab-1'))
+        self.assertFalse(PresenceService.connect('org', 'conv', 'u1', 'tab-2'))
+        PresenceService.connect('org', 'conv', 'u2', 'tab-1')
+
+        self.assertEqual(PresenceService.online_users('conv'), ['u1', 'u2'])
+        self.assertEqual(PresenceService.online_users_in_organization('org'), ['u1', 'u2'])
+
+        self.assertFalse(PresenceService.disconnect('org', 'conv', 'u1', 'tab-1'))
+        self.assertTrue(PresenceService.disconnect('org', 'conv', 'u1', 'tab-2'))
+        self.assertEqual(PresenceService.online_users('conv'), ['u2'])
+
+    def test_missed_heartbeats_expire_presence(self):
+        with mock.patch('apps.chat.presence.time.time', return_value=1000.0):
+            PresenceService.connect('org', 'conv', 'u1', 'tab-1')
+        with mock.patch('apps.chat.presence.time.time', return_value=1000.0 + PresenceService.PRESENCE_TTL + 1):
+            self.assertEqual(PresenceService.online_users('conv'), [])
+
+    def test_typing_burst_is_coalesced_into_one_frame(self):
+        async def scenario():
+            layer = InMemoryChannelLayer()
+            channel = await layer.new_channel()
+            await layer.group_add('chat_conv', channel)
+
+            tasks = []
+            for _ in range(10):
+                for user_id, name in (('u1', 'One'), ('u2', 'Two')):
+                    tasks.append(await publish_typing(layer, 'chat_conv', 'conv', user_id, name, True))
+            frame = await layer.receive(channel)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(layer.receive(channel), 0.05)
+            for task in tasks:
+                if task:
+                    task.cancel()
+            return tasks, frame
+
+        with mock.patch.object(PresenceService, 'TYPING_INTERVAL', 0.05):
+            tasks, frame = asyncio.run(scenario())
+
+        self.assertEqual(sum(1 for t in tasks if t), 1)
+        self.assertEqual(frame['type'], 'typing_state')
+        self.assertEqual(
+            [(c['username'], c['is_typing']) for c in frame['changes']], [('One', True), ('Two', True)]
+        )
+
+        PresenceService.set_typing('conv', 'u1', 'One', False)
+        self.assertEqual(PresenceService.presence('conv')['typing'], [{'user_id': 'u2', 'username': 'Two'}])
+
+    def test_expired_typing_state_is_announced_as_stopped(self):
+        async def scenario():
+            layer = InMemoryChannelLayer()
+            channel = await layer.new_channel()
+            await layer.group_add('chat_conv', channel)
+
+            task = await publish_typing(layer, 'chat_conv', 'conv', 'u1', 'One', True)
+            await task
+            return [await layer.receive(channel), await layer.receive(channel)]
+
+        with mock.patch.multiple(PresenceService, TYPING_INTERVAL=0.01, TYPING_TTL=0.05):
+            started, stopped = asyncio.run(scenario())
+
+        self.assertEqual(started['changes'], [{'user_id': 'u1', 'username': 'One', 'is_typing': True}])
+        self.assertEqual(stopped['changes'], [{'user_id': 'u1', 'username': 'One', 'is_typing': False}])
+
+
+class CachePresenceStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        PresenceService.set_store(CachePresenceStore())
+
+    def tearDown(self):
+        PresenceService.set_store(None)
+
+    def test_fallback_store_tracks_connections(self):
+        self.assertTrue(PresenceService.connect('org', 'conv', 'u1', 'tab-1'))
+        self.assertEqual(PresenceService.presence('conv'), {'online': ['u1'], 'typing': []})
+        self.assertTrue(PresenceService.disconnect('org', 'conv', 'u1', 'tab-1'))
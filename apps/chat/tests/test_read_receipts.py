@@ -0,0 +1,120 @@
+"""
+Tests for buffered chat read receipts
+"""
+
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from channels.layers import InMemoryChannelLayer
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.chat.consumers import ChatConsumer
+from apps.chat.models import Conversation, ConversationInbox, ConversationParticipant
+from apps.chat.receipts import ReadReceiptBuffer
+from apps.chat.services import InboxService, MessageDispatchService, MessageHistoryService
+from apps.core.models import Organization
+
+
+class ReadReceiptTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Receipt Org', email='receipt@example.com')
+        self.users = [
+            User.objects.create_user(
+                email=f'receipt{i}@example.com', password='pass',
+                first_name=f'R{i}', last_name='Ceipt', organization=self.org,
+            )
+            for i in range(3)
+        ]
+        self.conversations = [
+            Conversation.all_objects.create(organization=self.org, name=f'Room {i}') for i in range(2)
+        ]
+        for conversation in self.conversations:
+            for user in self.users:
+                ConversationParticipant.all_objects.create(
+                    organization=self.org, conversation=conversation, user=user
+                )
+            InboxService.sync_conversation(conversation)
+        self.addCleanup(ReadReceiptBuffer.take)
+
+    def _last_read(self, conversation, user):
+        return ConversationParticipant.all_objects.get(conversation=conversation, user=user).last_read_at
+
+    def test_flush_writes_all_watermarks_in_one_update(self):
+        MessageDispatchService.send(self.conversations[0].id, self.users[0], content='hi')
+        later = timezone.now() + timedelta(minutes=5)
+        stale = timezone.now() - timedelta(days=1)
+
+        with mock.patch.object(ReadReceiptBuffer, '_schedule'):
+            ReadReceiptBuffer.record(self.conversations[0].id, self.users[1].id, later)
+            ReadReceiptBuffer.record(self.conversations[0].id, self.users[1].id, stale)
+            ReadReceiptBuffer.record(self.conversations[1].id, self.users[1].id, later)
+            ReadReceiptBuffer.record(self.conversations[0].id, self.users[2].id, stale)
+
+        entries = ReadReceiptBuffer.take()
+        self.assertEqual(len(entries), 3)
+        before = self._last_read(self.conversations[0], self.users[2])
+        with self.assertNumQueries(2):
+            ReadReceiptBuffer.write(entries)
+
+        self.assertEqual(self._last_read(self.conversations[0], self.users[1]), later)
+        self.assertEqual(self._last_read(self.conversations[1], self.users[1]), later)
+        # An older watermark never moves last_read_at backwards
+        self.assertEqual(self._last_read(self.conversations[0], self.users[2]), before)
+        self.assertEqual(
+            ConversationInbox.all_objects.get(conversation=self.conversations[0], user=self.users[1]).unread_count, 0
+        )
+        self.assertEqual(
+            ConversationInbox.all_objects.get(conversation=self.conversations[0], user=self.users[2]).unread_count, 1
+        )
+
+    def test_consumer_broadcasts_only_when_watermark_advances(self):
+        messages = [
+            MessageDispatchService.send(self.conversations[0].id, self.users[0], content=str(i))
+            for i in range(2)
+        ]
+        consumer = ChatConsumer()
+        consumer.user = self.users[1]
+        consumer.conversation_id = str(self.conversations[0].id)
+        consumer.room_group_name = f'chat_{consumer.conversation_id}'
+        consumer.read_watermark = self._last_read(self.conversations[0], self.users[1])
+
+        async def scenario():
+            layer = consumer.channel_layer = InMemoryChannelLayer()
+            channel = await layer.new_channel()
+            await layer.group_add(consumer.room_group_name, channel)
+
+            newest = MessageHistoryService.encode_cursor(messages[1])
+            older = MessageHistoryService.encode_cursor(messages[0])
+            for cursor in (newest, older, newest):
+                await consumer.handle_read_receipt({'type': 'read_receipt', 'cursor': cursor})
+
+            events = [await layer.receive(channel)]
+            with self.assertRaises(asyncio.TimeoutError):
+                events.append(await asyncio.wait_for(layer.receive(channel), 0.05))
+            return events
+
+        with mock.patch.object(ReadReceiptBuffer, 'FLUSH_INTERVAL', 3600):
+            events = asyncio.run(scenario())
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['read_at'], messages[1].created_at.isoformat())
+        self.assertEqual(
+            ReadReceiptBuffer.take(),
+            {(str(self.conversations[0].id), str(self.users[1].id)): messages[1].created_at},
+        )
+
+    def test_mark_read_is_a_single_update(self):
+        client = APIClient()
+        client.force_authenticate(user=self.users[1])
+        response = client.post(f'/api/v1/chat/conversations/{self.conversations[0].id}/mark_read/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(
+            self._last_read(self.conversations[0], self.users[1]),
+            self._last_read(self.conversations[0], self.users[2]),
+        )
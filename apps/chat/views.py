@@ -1,17 +1,23 @@
 """
 Chat Views - REST API endpoints for chat functionality
 """
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Max
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from apps.core.tenant_guards import OrganizationViewSetMixin
 from .models import Conversation, ConversationParticipant, Message, MessageReaction
+from .presence import PresenceService
+from .services import InboxService, InvalidCursor, MessageDispatchService, MessageHistoryService
 from .serializers import (
-    ConversationListSerializer, ConversationDetailSerializer,
+    ConversationListSerializer, ConversationDetailSerializer, ConversationInboxSerializer,
     MessageSerializer, CreateDirectConversationSerializer,
     CreateGroupConversationSerializer, SendMessageSerializer
 )
@@ -24,6 +30,14 @@ class ConversationViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
     """
     serializer_class = ConversationListSerializer
     permission_classes = [IsAuthenticated]
+    # Present on both Conversation and the ConversationInbox rows list() serves
+    ordering_fields = ['last_message_at']
+
+    @property
+    def search_fields(self):
+        if self.action == 'list':
+            return ['conversation__name', 'last_message_snippet']
+        return ['name']
     
     def get_queryset(self):
         user = self.request.user
@@ -31,9 +45,23 @@ class ConversationViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
             participants__user=user,
             participants__is_archived=False,
             is_deleted=False
-        ).annotate(
-            latest_message=Max('messages__created_at')
-        ).order_by('-latest_message')
+        ).order_by('-last_message_at')
+    
+    def list(self, request, *args, **kwargs):
+        """List the user's conversations from the denormalized inbox"""
+        queryset = InboxService.inbox_for(request.user)
+        org = getattr(request, 'organization', None)
+        if org:
+            queryset = queryset.filter(organization_id=org.id)
+        queryset = self.filter_queryset(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ConversationInboxSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = ConversationInboxSerializer(queryset, many=True)
+        return Response(serializer.data)
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -81,16 +109,20 @@ class ConversationViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
             return Response(ConversationDetailSerializer(existing).data)
         
         # Create new direct conversation
-        conversation = Conversation.objects.create(type=Conversation.Type.DIRECT)
-        ConversationParticipant.objects.create(conversation=conversation, user=current_user, role=ConversationParticipant.Role.MEMBER)
-        ConversationParticipant.objects.create(conversation=conversation, user=target_user, role=ConversationParticipant.Role.MEMBER)
-        
-        # Send initial message if provided
-        initial_message = serializer.validated_data.get('initial_message')
-        if initial_message:
-            Message.objects.create(conversation=conversation, sender=current_user, content=initial_message)
-            conversation.last_message_at = timezone.now()
-            conversation.save()
+        with transaction.atomic():
+            conversation = Conversation.objects.create(type=Conversation.Type.DIRECT)
+            ConversationParticipant.objects.create(conversation=conversation, user=current_user, role=ConversationParticipant.Role.MEMBER)
+            ConversationParticipant.objects.create(conversation=conversation, user=target_user, role=ConversationParticipant.Role.MEMBER)
+            
+            InboxService.sync_conversation(conversation)
+            
+            # Send initial message if provided
+            initial_message = serializer.validated_data.get('initial_message')
+            if initial_message:
+                MessageDispatchService.send(
+                    conversation.id, current_user, content=initial_message,
+                    organization_id=conversation.organization_id,
+                )
         
         return Response(ConversationDetailSerializer(conversation).data, status=status.HTTP_201_CREATED)
     
@@ -125,22 +157,29 @@ class ConversationViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
             except User.DoesNotExist:
                 pass # Skip invalid user IDs
         
+        InboxService.sync_conversation(conversation)
+        
         return Response(ConversationDetailSerializer(conversation).data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark all messages in conversation as read"""
         conversation = self.get_object()
-        participant = ConversationParticipant.objects.filter(
+        updated = ConversationParticipant.objects.filter(
             conversation=conversation, user=request.user
-        ).first()
+        ).update(last_read_at=Greatest(F('last_read_at'), Value(timezone.now())))
         
-        if participant:
-            participant.last_read_at = timezone.now()
-            participant.save()
+        if updated:
+            InboxService.mark_read(conversation.id, request.user)
             return Response({'status': 'marked as read'})
         return Response({'error': 'Not a participant'}, status=status.HTTP_403_FORBIDDEN)
     
+    @action(detail=True, methods=['get'])
+    def presence(self, request, pk=None):
+        """Users online and typing in a conversation"""
+        conversation = self.get_object()
+        return Response(PresenceService.presence(conversation.id))
+    
     @action(detail=True, methods=['post'])
     def mute(self, request, pk=None):
         """Mute/unmute a conversation"""
@@ -185,12 +224,64 @@ class MessageViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            serializer = self.get_serializer(page, many=True, context=self._page_context(page))
             return self.get_paginated_response(serializer.data)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def _page_context(self, messages):
+        context = self.get_serializer_context()
+        context['reaction_summaries'] = MessageHistoryService.reaction_summaries(m.id for m in messages)
+        return context
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Keyset-paginated message history.
+        ?before=<cursor> pages back in time, ?since=<cursor> returns messages
+        newer than a cursor (catch-up after reconnect). Without either the
+        newest page is returned.
+        """
+        conversation_id = request.query_params.get('conversation')
+        if not conversation_id:
+            return Response({'error': 'conversation parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            conversation_id = uuid.UUID(conversation_id)
+        except ValueError:
+            return Response({'error': 'Invalid conversation id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        is_participant = ConversationParticipant.objects.filter(
+            conversation_id=conversation_id, user=request.user, conversation__is_deleted=False
+        ).exists()
+        if not is_participant:
+            return Response({'error': 'Not a participant of this conversation'}, status=status.HTTP_403_FORBIDDEN)
+
+        before = request.query_params.get('before')
+        since = request.query_params.get('since')
+        if before and since:
+            return Response({'error': 'Use either before or since, not both'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page = MessageHistoryService.page(
+                conversation_id, before=before, since=since,
+                limit=request.query_params.get('limit'),
+            )
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        messages = page['messages']
+        serializer = MessageSerializer(messages, many=True, context=self._page_context(messages))
+        return Response({
+            'success': True,
+            'data': serializer.data,
+            'pagination': {
+                'next': page['next_cursor'],
+                'has_more': page['has_more'],
+                'latest': MessageHistoryService.encode_cursor(messages[-1]) if messages else since,
+            }
+        })
+
     def create(self, request, *args, **kwargs):
         """Safe create with participant + payload validation to avoid 500s"""
         conversation_id = request.data.get('conversation')
@@ -211,17 +302,15 @@ class MessageViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         payload = SendMessageSerializer(data=request.data)
         payload.is_valid(raise_exception=True)
 
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=request.user,
+        message = MessageDispatchService.send(
+            conversation.id,
+            request.user,
             content=payload.validated_data.get('content', ''),
             attachment=payload.validated_data.get('attachment'),
             reply_to_id=payload.validated_data.get('reply_to_id'),
+            organization_id=conversation.organization_id,
         )
 
-        conversation.last_message_at = timezone.now()
-        conversation.save(update_fields=['last_message_at'])
-
         return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
     
     def get_queryset(self):
@@ -244,17 +333,17 @@ class MessageViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         ).select_related('sender').order_by('created_at')
     
     def perform_create(self, serializer):
-        conversation_id = self.request.data.get('conversation')
-        conversation = Conversation.objects.get(id=conversation_id)
-        
-        message = serializer.save(sender=self.request.user, conversation=conversation)
-        
-        # Update conversation last_message_at
-        conversation.last_message_at = timezone.now()
-        conversation.save()
-        
-        # TODO: Broadcast via WebSocket
+        conversation = Conversation.objects.get(id=self.request.data.get('conversation'))
         
+        message = MessageDispatchService.send(
+            conversation.id,
+            self.request.user,
+            content=serializer.validated_data.get('content', ''),
+            attachment=serializer.validated_data.get('attachment'),
+            reply_to_id=getattr(serializer.validated_data.get('reply_to'), 'id', None),
+            organization_id=conversation.organization_id,
+        )
+        serializer.instance = message
         return message
     
     @action(detail=True, methods=['post'])
@@ -284,4 +373,5 @@ class MessageViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         message.is_deleted = True
         message.content = "[Message deleted]"
         message.save()
+        InboxService.record_message_removed(message)
         return Response(status=status.HTTP_204_NO_CONTENT)
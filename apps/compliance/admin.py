@@ -35,7 +35,7 @@ class DataSubjectRequestAdmin(admin.ModelAdmin):
 
 @admin.register(AuditExportRequest)
 class AuditExportRequestAdmin(admin.ModelAdmin):
-    list_display = ['status', 'requested_by', 'row_count', 'created_at']
+    list_display = ['status', 'requested_by', 'row_count', 'progress', 'created_at']
     list_filter = ['status']
 
 
@@ -0,0 +1,210 @@
+"""
+Audit Exports - Streaming, resumable audit log export to gzip-compressed files
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AuditExportRequest
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogExporter:
+    """
+    Writes an audit log queryset to local storage without materializing it.
+
+    Rows are read in keyset order on ``(timestamp, id)``, CHUNK_SIZE at a
+    time. CSV and JSONL chunks are each written as a separate gzip member
+    (concatenated members form one valid gzip file), fsynced, and then the
+    keyset position and file offset are stored on the export request. A
+    killed export therefore resumes by truncating the file to the last
+    checkpoint and continuing after the last exported row.
+
+    XLSX is already a zip archive and cannot be appended to, so it is
+    streamed with openpyxl's write-only mode and restarts from the
+    beginning when resumed.
+    """
+
+    CHUNK_SIZE = getattr(settings, 'AUDIT_EXPORT_CHUNK_SIZE', 5000)
+    COMPRESSLEVEL = getattr(settings, 'AUDIT_EXPORT_COMPRESSLEVEL', 6)
+    UPLOAD_TO = 'compliance/audit_exports'
+    FORMATS = ('csv', 'jsonl', 'xlsx')
+    XLSX_MAX_ROWS = 1048575  # sheet limit minus the header row
+
+    FIELDS = (
+        'id', 'timestamp', 'user_id', 'user_email', 'action', 'resource_type',
+        'resource_id', 'resource_repr', 'old_values', 'new_values', 'changed_fields',
+        'ip_address', 'user_agent', 'request_id', 'organization_id',
+    )
+
+    def __init__(self, export_request: AuditExportRequest, queryset):
+        self.export_request = export_request
+        self.queryset = queryset.order_by()
+        self.format = (export_request.filters or {}).get('format', 'csv')
+        if self.format not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {self.format}")
+
+    # ----- Reading -----
+
+    def chunks(self, after: Optional[Tuple[datetime, uuid.UUID]] = None) -> Iterator[List[tuple]]:
+        """Value tuples in ``(timestamp, id)`` order, one keyset page at a time"""
+        ts_index, id_index = self.FIELDS.index('timestamp'), self.FIELDS.index('id')
+        while True:
+            qs = self.queryset
+            if after is not None:
+                qs = qs.filter(Q(timestamp__gt=after[0]) | Q(timestamp=after[0], id__gt=after[1]))
+            rows = list(qs.order_by('timestamp', 'id').values_list(*self.FIELDS)[:self.CHUNK_SIZE])
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.CHUNK_SIZE:
+                return
+            after = (rows[-1][ts_index], rows[-1][id_index])
+
+    # ----- Formatting -----
+
+    @staticmethod
+    def cell(value):
+        """Flatten a value for CSV/XLSX cells"""
+        if value is None:
+            return ''
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        return value
+
+    def encode(self, rows: List[tuple], header: bool = False) -> bytes:
+        if self.format == 'jsonl':
+            return ''.join(
+                json.dumps(dict(zip(self.FIELDS, row)), default=str) + '\n' for row in rows
+            ).encode('utf-8')
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(self.FIELDS)
+        writer.writerows([self.cell(value) for value in row] for row in rows)
+        return buffer.getvalue().encode('utf-8')
+
+    # ----- Writing -----
+
+    def file_name(self) -> str:
+        extension = 'xlsx' if self.format == 'xlsx' else f'{self.format}.gz'
+        return f"{self.UPLOAD_TO}/audit_export_{self.export_request.id}.{extension}"
+
+    def run(self) -> int:
+        """Export every row (resuming from the checkpoint if there is one) and return the row count"""
+        export = self.export_request
+        name = self.file_name()
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        checkpoint = export.checkpoint or {}
+        resume = (
+            self.format != 'xlsx'
+            and not checkpoint.get('done')
+            and checkpoint.get('file') == name
+            and os.path.exists(path)
+        )
+        if not resume:
+            checkpoint = {'file': name, 'format': self.format, 'offset': 0, 'rows': 0}
+            total = self.queryset.count()
+        else:
+            total = export.total_rows or 0
+
+        if self.format == 'xlsx' and total > self.XLSX_MAX_ROWS:
+            raise ValueError(
+                f"{total} rows exceed the XLSX sheet limit; export as csv or jsonl instead"
+            )
+
+        export.file.name = name
+        export.total_rows = total
+        if self.format == 'xlsx':
+            self._write_xlsx(path, checkpoint)
+        else:
+            self._write_gzip(path, checkpoint)
+
+        checkpoint['done'] = True
+        self._save_progress(checkpoint)
+        return checkpoint['rows']
+
+    def _write_gzip(self, path: str, checkpoint: dict) -> None:
+        after = None
+        if checkpoint.get('last_id'):
+            after = (datetime.fromisoformat(checkpoint['last_timestamp']), uuid.UUID(checkpoint['last_id']))
+            logger.info(
+                "Resuming audit export %s after %s rows", self.export_request.id, checkpoint['rows']
+            )
+
+        with open(path, 'r+b' if checkpoint['offset'] else 'wb') as raw:
+            # Anything past the checkpoint is a partial chunk from an interrupted run
+            raw.truncate(checkpoint['offset'])
+            raw.seek(checkpoint['offset'])
+            if not checkpoint['offset'] and self.format == 'csv':
+                self._write_member(raw, self.encode([], header=True))
+                checkpoint['offset'] = raw.tell()
+
+            for rows in self.chunks(after):
+                self._write_member(raw, self.encode(rows))
+                last = rows[-1]
+                checkpoint.update(
+                    offset=raw.tell(),
+                    rows=checkpoint['rows'] + len(rows),
+                    last_timestamp=last[self.FIELDS.index('timestamp')].isoformat(),
+                    last_id=str(last[self.FIELDS.index('id')]),
+                )
+                self._save_progress(checkpoint)
+
+    def _write_member(self, raw, data: bytes) -> None:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=self.COMPRESSLEVEL, mtime=0) as member:
+            member.write(data)
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    def _write_xlsx(self, path: str, checkpoint: dict) -> None:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Audit Log')
+        sheet.append(self.FIELDS)
+        for rows in self.chunks():
+            for row in rows:
+                sheet.append([self.cell(value) for value in row])
+            checkpoint['rows'] += len(rows)
+            self._save_progress(checkpoint)
+        workbook.save(path)
+        checkpoint['offset'] = os.path.getsize(path)
+
+    def _save_progress(self, checkpoint: dict) -> None:
+        """Persist the checkpoint and progress with a single UPDATE"""
+        export = self.export_request
+        export.checkpoint = dict(checkpoint)
+        export.row_count = checkpoint['rows']
+        if checkpoint.get('done'):
+            export.progress = 100
+        elif export.total_rows:
+            export.progress = min(99, checkpoint['rows'] * 100 // export.total_rows)
+        export.updated_at = timezone.now()
+        AuditExportRequest.all_objects.filter(pk=export.pk).update(
+            file=export.file.name,
+            checkpoint=export.checkpoint,
+            row_count=export.row_count,
+            total_rows=export.total_rows,
+            progress=export.progress,
+            updated_at=export.updated_at,
+        )
@@ -0,0 +1,101 @@
+"""
+Management command to compare per-row anonymization with the batched retention executor
+Usage: python manage.py benchmark_retention [--employees N] [--legacy-sample N] [--batch-size N]
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.compliance.models import DataRetentionPolicy, RetentionExecution
+from apps.compliance.services import RetentionService
+from apps.core.benchmarking import rolled_back
+from apps.core.models import Organization
+from apps.employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Benchmark anonymizing N employees: save() per row vs batched set-based UPDATEs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=500000)
+        parser.add_argument('--legacy-sample', type=int, default=2000,
+                            help='Rows anonymized one by one; the total is extrapolated')
+        parser.add_argument('--batch-size', type=int, default=RetentionService.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        RetentionService.BATCH_SIZE = options['batch_size']
+        RetentionService.BATCH_SLEEP = 0
+        with rolled_back():
+            started = time.perf_counter()
+            org, policy = self._seed(options['employees'])
+            self.stdout.write(self.style.SUCCESS(
+                f"=== Anonymizing {options['employees']} employees "
+                f"(seeded in {time.perf_counter() - started:.1f} s) ==="
+            ))
+            self._legacy(org, options['legacy_sample'], options['employees'])
+            self._batched(org, policy)
+
+    def _seed(self, count, chunk=5000):
+        org = Organization.objects.create(name='Retention Benchmark', email='retention-benchmark@example.com')
+        created_at = timezone.now() - timedelta(days=400)
+        for start in range(0, count, chunk):
+            codes = [f'R{n:07d}' for n in range(start, min(start + chunk, count))]
+            users = User.objects.bulk_create([
+                User(email=f'{code.lower()}@retention-bench.example.com', password='!',
+                     slug=code.lower(), first_name='Bench', last_name=code, organization=org)
+                for code in codes
+            ])
+            Employee.all_objects.bulk_create([
+                Employee(organization=org, user=user, employee_id=code, date_of_joining=date(2015, 1, 1),
+                         date_of_birth=date(1985, 1, 1), bio='Seeded', metadata={'seed': True})
+                for user, code in zip(users, codes)
+            ])
+        Employee.all_objects.filter(organization=org).update(created_at=created_at)
+        policy = DataRetentionPolicy.all_objects.create(
+            organization=org, name='Leavers', entity_type='employees', retention_days=365, action='anonymize',
+        )
+        return org, policy
+
+    def _legacy(self, org, sample, total):
+        """Previous behaviour: load each row and save() it, firing audit signals"""
+        pii_fields = ['first_name', 'last_name', 'email', 'phone', 'mobile', 'name']
+        with rolled_back():
+            rows = Employee.all_objects.filter(organization=org).order_by('pk')[:sample]
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                for obj in rows.iterator():
+                    for field in obj._meta.fields:
+                        if field.name in pii_fields:
+                            setattr(obj, field.name, None if field.null else 'REDACTED')
+                    obj.metadata['anonymized'] = True
+                    obj.is_active = False
+                    obj.is_deleted = True
+                    obj.deleted_at = timezone.now()
+                    obj.save()
+                elapsed = time.perf_counter() - started
+        projected = elapsed * total / max(sample, 1)
+        self.stdout.write(
+            f"{'per-row':<10} {sample:>7} rows  {len(ctx.captured_queries):>8} queries  "
+            f"{elapsed:8.2f} s  {sample / elapsed:9.0f} rows/s  (~{projected:.0f} s for {total})"
+        )
+
+    def _batched(self, org, policy):
+        execution = RetentionExecution.all_objects.create(organization=org, policy=policy, dry_run=False)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            RetentionService.run_execution(execution)
+            elapsed = time.perf_counter() - started
+        if execution.status != RetentionExecution.STATUS_COMPLETED:
+            self.stderr.write(f'Retention execution failed: {execution.error_message}')
+            return
+        self.stdout.write(
+            f"{'batched':<10} {execution.affected_count:>7} rows  {len(ctx.captured_queries):>8} queries  "
+            f"{elapsed:8.2f} s  {execution.affected_count / elapsed:9.0f} rows/s  "
+            f"({execution.details['batches']} batches)"
+        )
@@ -120,6 +120,10 @@ class AuditExportRequest(OrganizationEntity):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     file = models.FileField(upload_to='compliance/audit_exports/', null=True, blank=True)
     row_count = models.PositiveIntegerField(null=True, blank=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0, help_text='Percent of rows written')
+    # Keyset position and file offset of the last fully written chunk, used to resume
+    checkpoint = models.JSONField(default=dict, blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True)
@@ -159,6 +163,8 @@ class RetentionExecution(OrganizationEntity):
     completed_at = models.DateTimeField(null=True, blank=True)
     affected_count = models.PositiveIntegerField(default=0)
     details = models.JSONField(default=dict, blank=True)
+    # Cutoff, last processed pk and batch counters, used to resume a batched run
+    checkpoint = models.JSONField(default=dict, blank=True)
     error_message = models.TextField(blank=True)
 
     class Meta:
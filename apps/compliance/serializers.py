@@ -63,10 +63,14 @@ class AuditExportRequestSerializer(serializers.ModelSerializer):
         model = AuditExportRequest
         fields = [
             'id', 'organization', 'requested_by', 'filters', 'status',
-            'file', 'row_count', 'started_at', 'completed_at', 'error_message',
+            'file', 'row_count', 'total_rows', 'progress', 'started_at',
+            'completed_at', 'error_message',
             'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'organization', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'organization', 'file', 'row_count', 'total_rows', 'progress',
+            'created_at', 'updated_at'
+        ]
 
 
 class RetentionExecutionSerializer(serializers.ModelSerializer):
@@ -75,7 +79,7 @@ class RetentionExecutionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'organization', 'policy', 'requested_by', 'status',
             'dry_run', 'started_at', 'completed_at', 'affected_count',
-            'details', 'error_message',
+            'details', 'checkpoint', 'error_message',
             'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'organization', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'organization', 'checkpoint', 'created_at', 'updated_at']
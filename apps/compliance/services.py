@@ -1,69 +1,60 @@
 """Compliance services: audit exports and retention enforcement"""
-from io import BytesIO
+import time
+from datetime import datetime
 from typing import Dict, List
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Func, JSONField, Q
 from django.utils import timezone
-from django.db.models import Q
-from django.core.files.base import ContentFile
-
-import pandas as pd
 
 from apps.core.models import AuditLog
+from apps.core.signals import disable_audit_signals
+from .exports import AuditLogExporter
 from .models import DataRetentionPolicy, AuditExportRequest, RetentionExecution
 
 
 class AuditExportService:
     """Generate audit exports based on filters"""
 
+    @staticmethod
+    def build_queryset(export_request: AuditExportRequest, user):
+        qs = AuditLog.objects.all()
+        org_id = export_request.organization_id
+        if not org_id and hasattr(user, 'get_organization'):
+            org = user.get_organization()
+            org_id = org.id if org else None
+        if org_id:
+            qs = qs.filter(organization_id=str(org_id))
+
+        filters = export_request.filters or {}
+        if filters.get('action'):
+            qs = qs.filter(action=filters['action'])
+        if filters.get('resource_type'):
+            qs = qs.filter(resource_type=filters['resource_type'])
+        if filters.get('user_email'):
+            qs = qs.filter(user_email__icontains=filters['user_email'])
+        if filters.get('date_from'):
+            qs = qs.filter(timestamp__gte=filters['date_from'])
+        if filters.get('date_to'):
+            qs = qs.filter(timestamp__lte=filters['date_to'])
+        return qs
+
     @staticmethod
     def run_export(export_request: AuditExportRequest, user):
+        """
+        Stream the export to storage. Calling this again for a failed or
+        interrupted export resumes from its last checkpoint.
+        """
         export_request.status = AuditExportRequest.STATUS_RUNNING
-        export_request.started_at = timezone.now()
-        export_request.save(update_fields=['status', 'started_at'])
+        export_request.started_at = export_request.started_at or timezone.now()
+        export_request.completed_at = None
+        export_request.save(update_fields=['status', 'started_at', 'completed_at'])
 
         try:
-            qs = AuditLog.objects.all()
-            org = user.get_organization() if hasattr(user, 'get_organization') else None
-            if org:
-                qs = qs.filter(organization_id=str(org.id))
-
-            filters = export_request.filters or {}
-            if filters.get('action'):
-                qs = qs.filter(action=filters['action'])
-            if filters.get('resource_type'):
-                qs = qs.filter(resource_type=filters['resource_type'])
-            if filters.get('user_email'):
-                qs = qs.filter(user_email__icontains=filters['user_email'])
-            if filters.get('date_from'):
-                qs = qs.filter(timestamp__gte=filters['date_from'])
-            if filters.get('date_to'):
-                qs = qs.filter(timestamp__lte=filters['date_to'])
-
-            data = list(qs.values())
-            df = pd.DataFrame(data)
-
-            format_choice = filters.get('format', 'csv')
-            timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
-
-            if format_choice == 'xlsx':
-                buffer = BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False)
-                buffer.seek(0)
-                export_request.file.save(
-                    f"audit_export_{timestamp}.xlsx",
-                    ContentFile(buffer.read()),
-                    save=False
-                )
-            else:
-                csv_bytes = df.to_csv(index=False).encode('utf-8')
-                export_request.file.save(
-                    f"audit_export_{timestamp}.csv",
-                    ContentFile(csv_bytes),
-                    save=False
-                )
-
-            export_request.row_count = len(data)
+            qs = AuditExportService.build_queryset(export_request, user)
+            AuditLogExporter(export_request, qs).run()
             export_request.status = AuditExportRequest.STATUS_COMPLETED
+            export_request.error_message = ''
         except Exception as exc:
             export_request.status = AuditExportRequest.STATUS_FAILED
             export_request.error_message = str(exc)
@@ -88,40 +79,70 @@ class RetentionService:
         'job_applications': ('apps.recruitment.models', 'JobApplication'),
     }
 
+    BATCH_SIZE = getattr(settings, 'RETENTION_BATCH_SIZE', 1000)
+    # Pause between batches so replicas keep up and other writers get the locks
+    BATCH_SLEEP = getattr(settings, 'RETENTION_BATCH_SLEEP', 0.05)
+
+    PII_FIELDS = (
+        'first_name', 'last_name', 'email', 'phone', 'mobile', 'name',
+        'date_of_birth', 'pan_number', 'aadhaar_number', 'passport_number', 'passport_expiry',
+        'uan_number', 'pf_number', 'esi_number', 'bio', 'linkedin_url',
+    )
+
     @classmethod
     def run_execution(cls, execution: RetentionExecution, user=None):
+        """
+        Apply (or, for dry runs, measure) a retention policy. Non-dry runs
+        update matching rows in keyset batches of BATCH_SIZE; each batch is
+        one UPDATE, one summary audit entry and a checkpoint, committed
+        together. Re-running a failed or interrupted execution resumes
+        after the last committed batch.
+        """
         execution.status = RetentionExecution.STATUS_RUNNING
-        execution.started_at = timezone.now()
-        execution.save(update_fields=['status', 'started_at'])
+        execution.started_at = execution.started_at or timezone.now()
+        execution.completed_at = None
+        execution.save(update_fields=['status', 'started_at', 'completed_at'])
 
         try:
             policy = execution.policy
             model = cls._resolve_model(policy.entity_type)
 
-            qs = model.objects.all()
-            qs = cls._apply_org_filter(qs, user, execution.policy.organization)
-            qs = cls._apply_policy_filters(qs, policy)
+            checkpoint = execution.checkpoint or {}
+            if checkpoint.get('done'):
+                checkpoint = {}
+            cutoff = (
+                datetime.fromisoformat(checkpoint['cutoff']) if checkpoint.get('cutoff')
+                else timezone.now() - timezone.timedelta(days=policy.retention_days)
+            )
+
+            scope = cls._apply_org_filter(model.objects.all(), user, execution.policy.organization)
+            qs = cls._apply_policy_filters(scope, policy)
 
-            cutoff = timezone.now() - timezone.timedelta(days=policy.retention_days)
             date_field = policy.date_field or 'created_at'
             if cls._has_field(model, date_field):
                 qs = qs.filter(**{f"{date_field}__lt": cutoff})
 
-            affected_count = qs.count()
-
             details = {
                 'entity_type': policy.entity_type,
                 'cutoff': cutoff.isoformat(),
                 'action': policy.action,
-                'sample_ids': list(qs.values_list('id', flat=True)[:25]),
+                'sample_ids': [str(pk) for pk in qs.values_list('id', flat=True)[:25]],
             }
 
-            if not execution.dry_run:
-                cls._apply_action(qs, policy.action)
+            if execution.dry_run:
+                execution.affected_count = qs.count()
+            else:
+                checkpoint.setdefault('cutoff', cutoff.isoformat())
+                checkpoint.setdefault('processed', 0)
+                checkpoint.setdefault('batches', 0)
+                with disable_audit_signals():
+                    cls._apply_in_batches(execution, scope, qs, policy.action, checkpoint, user)
+                details['batches'] = checkpoint['batches']
+                execution.affected_count = checkpoint['processed']
 
-            execution.affected_count = affected_count
             execution.details = details
             execution.status = RetentionExecution.STATUS_COMPLETED
+            execution.error_message = ''
         except Exception as exc:
             execution.status = RetentionExecution.STATUS_FAILED
             execution.error_message = str(exc)
@@ -131,6 +152,121 @@ class RetentionService:
 
         return execution
 
+    @classmethod
+    def _apply_in_batches(cls, execution, scope, queryset, action: str, checkpoint: dict, user=None):
+        """
+        Walk the organization's rows (scope) in primary-key windows of
+        BATCH_SIZE rows and apply the policy to the matching rows (queryset)
+        of each window with one UPDATE. Windows ignore the policy filters,
+        so each batch costs the same however selective they are.
+        """
+        model = queryset.model
+        values = cls._action_values(model, action)
+        if values:
+            pk_field = model._meta.pk
+            while True:
+                window = scope.order_by('pk')
+                last_pk = pk_field.to_python(checkpoint['last_pk']) if checkpoint.get('last_pk') else None
+                if last_pk is not None:
+                    window = window.filter(pk__gt=last_pk)
+                bounds = list(window.values_list('pk', flat=True)[:cls.BATCH_SIZE])
+                if not bounds:
+                    break
+
+                batch = queryset.filter(pk__lte=bounds[-1])
+                if last_pk is not None:
+                    batch = batch.filter(pk__gt=last_pk)
+                with transaction.atomic():
+                    updated = batch.update(**values)
+                    checkpoint.update(last_pk=str(bounds[-1]), processed=checkpoint['processed'] + updated)
+                    if updated:
+                        checkpoint['batches'] += 1
+                        cls._log_batch(
+                            execution, model, action, (bounds[0], bounds[-1]), updated, values,
+                            checkpoint['batches'], user,
+                        )
+                    cls._save_checkpoint(execution, checkpoint)
+
+                if len(bounds) < cls.BATCH_SIZE:
+                    break
+                if updated and cls.BATCH_SLEEP:
+                    time.sleep(cls.BATCH_SLEEP)
+
+        checkpoint['done'] = True
+        cls._save_checkpoint(execution, checkpoint)
+
+    @classmethod
+    def _action_values(cls, model, action: str) -> Dict:
+        """Column assignments for one set-based UPDATE implementing the action"""
+        now = timezone.now()
+        values = {}
+        if action == 'archive':
+            if cls._has_field(model, 'is_active'):
+                values['is_active'] = False
+        elif action == 'delete':
+            if cls._has_field(model, 'is_deleted'):
+                values.update(is_deleted=True, deleted_at=now)
+        elif action == 'anonymize':
+            for field in model._meta.concrete_fields:
+                if field.name not in cls.PII_FIELDS:
+                    continue
+                if field.null:
+                    values[field.name] = None
+                elif field.blank or getattr(field, 'max_length', None) and field.max_length < len('REDACTED'):
+                    values[field.name] = ''
+                else:
+                    values[field.name] = 'REDACTED'
+            if cls._has_field(model, 'metadata'):
+                flag = cls._anonymized_flag()
+                if flag is not None:
+                    values['metadata'] = flag
+            if cls._has_field(model, 'is_active'):
+                values['is_active'] = False
+            if cls._has_field(model, 'is_deleted'):
+                values.update(is_deleted=True, deleted_at=now)
+        return values
+
+    @staticmethod
+    def _anonymized_flag():
+        """``metadata['anonymized'] = True`` as an SQL expression, where the backend supports it"""
+        if connection.vendor == 'postgresql':
+            template = "COALESCE(%(expressions)s, '{}'::jsonb) || jsonb_build_object('anonymized', true)"
+        elif connection.vendor == 'sqlite':
+            template = "JSON_SET(COALESCE(%(expressions)s, '{}'), '$.anonymized', JSON('true'))"
+        else:
+            return None
+        return Func(F('metadata'), template=template, output_field=JSONField())
+
+    @staticmethod
+    def _log_batch(execution, model, action, pk_range, updated, values, batch, user=None):
+        """One audit entry per batch in place of per-row signal entries"""
+        AuditLog.objects.create(
+            user=user if getattr(user, 'is_authenticated', False) else None,
+            user_email=user.email if getattr(user, 'is_authenticated', False) else 'system',
+            action=f'retention_{action}',
+            resource_type=model.__name__,
+            resource_id=str(execution.id),
+            resource_repr=f"{execution.policy.name} batch {batch}"[:255],
+            new_values={
+                'policy_id': str(execution.policy_id),
+                'count': updated,
+                'first_id': str(pk_range[0]),
+                'last_id': str(pk_range[1]),
+            },
+            changed_fields=sorted(values),
+            organization_id=str(execution.organization_id) if execution.organization_id else None,
+        )
+
+    @staticmethod
+    def _save_checkpoint(execution, checkpoint: dict):
+        execution.checkpoint = dict(checkpoint)
+        execution.affected_count = checkpoint.get('processed', 0)
+        RetentionExecution.all_objects.filter(pk=execution.pk).update(
+            checkpoint=execution.checkpoint,
+            affected_count=execution.affected_count,
+            updated_at=timezone.now(),
+        )
+
     @classmethod
     def _resolve_model(cls, entity_type: str):
         if entity_type not in cls.ALLOWED_MODEL_MAP:
@@ -165,48 +301,3 @@ class RetentionService:
             else:
                 queryset = queryset.filter(**{key: value})
         return queryset
-
-    @classmethod
-    def _apply_action(cls, queryset, action: str):
-        model = queryset.model
-        now = timezone.now()
-        if action == 'archive':
-            if cls._has_field(model, 'is_active'):
-                queryset.update(is_active=False)
-            return
-        if action == 'delete':
-            if cls._has_field(model, 'is_deleted'):
-                queryset.update(is_deleted=True, deleted_at=now)
-            return
-        if action == 'anonymize':
-            for obj in queryset.iterator():
-                cls._anonymize_instance(obj)
-            return
-
-    @classmethod
-    def _anonymize_instance(cls, obj):
-        pii_fields = ['first_name', 'last_name', 'email', 'phone', 'mobile', 'name']
-        updated = False
-        for field in obj._meta.fields:
-            if field.name in pii_fields:
-                if field.null:
-                    setattr(obj, field.name, None)
-                else:
-                    setattr(obj, field.name, 'REDACTED')
-                updated = True
-
-        if hasattr(obj, 'metadata') and isinstance(getattr(obj, 'metadata', None), dict):
-            obj.metadata['anonymized'] = True
-            updated = True
-
-        if hasattr(obj, 'is_active'):
-            obj.is_active = False
-            updated = True
-
-        if hasattr(obj, 'is_deleted'):
-            obj.is_deleted = True
-            obj.deleted_at = timezone.now()
-            updated = True
-
-        if updated:
-            obj.save()
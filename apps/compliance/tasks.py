@@ -4,8 +4,9 @@ from .models import AuditExportRequest, RetentionExecution
 from .services import AuditExportService, RetentionService
 
 
-@shared_task
+@shared_task(acks_late=True, reject_on_worker_lost=True)
 def run_audit_export(export_id: str):
+    """Redelivered if the worker dies mid-export; the rerun resumes from the checkpoint"""
     export_request = AuditExportRequest.objects.filter(id=export_id).first()
     if not export_request:
         return None
@@ -13,8 +14,9 @@ def run_audit_export(export_id: str):
     return AuditExportService.run_export(export_request, user)
 
 
-@shared_task
+@shared_task(acks_late=True, reject_on_worker_lost=True)
 def run_retention_execution(execution_id: str):
+    """Redelivered if the worker dies mid-run; the rerun resumes after the last committed batch"""
     execution = RetentionExecution.objects.filter(id=execution_id).first()
     if not execution:
         return None
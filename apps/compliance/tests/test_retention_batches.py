@@ -0,0 +1,140 @@
+"""
+Tests for batched, resumable retention enforcement
+"""
+
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.compliance.models import DataRetentionPolicy, RetentionExecution
+from apps.compliance.services import RetentionService
+from apps.core.models import AuditLog, Organization
+from apps.employees.models import Employee
+
+
+class RetentionBatchTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Retention Org', email='retention@example.com')
+        self.admin = User.objects.create_user(
+            email='dpo@example.com', password='pass',
+            first_name='Data', last_name='Officer', organization=self.org,
+        )
+        self.employees = [self._employee(f'R{n:03d}') for n in range(7)]
+        Employee.all_objects.filter(id__in=[e.id for e in self.employees]).update(
+            created_at=timezone.now() - timedelta(days=90)
+        )
+        self.recent = self._employee('NEW')
+        self.policy = DataRetentionPolicy.all_objects.create(
+            organization=self.org, name='Leavers', entity_type='employees',
+            retention_days=30, action='anonymize',
+        )
+        patcher = mock.patch.multiple(RetentionService, BATCH_SIZE=3, BATCH_SLEEP=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _employee(self, code):
+        user = User.objects.create_user(
+            email=f'{code.lower()}@example.com', password='pass',
+            first_name='Emp', last_name=code, organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=code, date_of_joining=date(2020, 1, 1),
+            pan_number='ABCDE1234F', bio='Likes hiking', date_of_birth=date(1990, 5, 1),
+            metadata={'source': 'import'},
+        )
+
+    def _execution(self, dry_run=False):
+        return RetentionExecution.all_objects.create(
+            organization=self.org, policy=self.policy, requested_by=self.admin, dry_run=dry_run,
+        )
+
+    def test_anonymize_runs_one_update_and_one_audit_entry_per_window(self):
+        execution = self._execution()
+
+        with CaptureQueriesContext(connection) as queries:
+            RetentionService.run_execution(execution, self.admin)
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, RetentionExecution.STATUS_COMPLETED)
+        self.assertEqual((execution.affected_count, execution.details['batches']), (7, 3))
+        self.assertTrue(execution.checkpoint['done'])
+
+        updates = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE "employees_employee"')]
+        self.assertEqual(len(updates), 3)
+        summaries = AuditLog.objects.filter(action='retention_anonymize', resource_id=str(execution.id))
+        self.assertEqual(len(summaries), 3)
+        self.assertEqual(sum(entry.new_values['count'] for entry in summaries), 7)
+
+        employee = Employee.all_objects.get(pk=self.employees[0].pk)
+        self.assertEqual((employee.pan_number, employee.bio, employee.date_of_birth), ('', '', None))
+        self.assertEqual(employee.metadata, {'source': 'import', 'anonymized': True})
+        self.assertTrue(employee.is_deleted)
+        self.assertFalse(employee.is_active)
+
+        untouched = Employee.all_objects.get(pk=self.recent.pk)
+        self.assertEqual(untouched.pan_number, 'ABCDE1234F')
+
+    def test_failed_run_resumes_after_last_committed_batch(self):
+        execution = self._execution()
+        original = RetentionService._log_batch
+
+        def fail_second_batch(*args, **kwargs):
+            if args[6] == 2:
+                raise RuntimeError('connection reset')
+            return original(*args, **kwargs)
+
+        with mock.patch.object(RetentionService, '_log_batch', side_effect=fail_second_batch):
+            RetentionService.run_execution(execution, self.admin)
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, RetentionExecution.STATUS_FAILED)
+        self.assertEqual(execution.checkpoint['batches'], 1)
+        # The failed batch rolled back together with its audit entry
+        self.assertEqual(Employee.all_objects.filter(is_deleted=True).count(), execution.checkpoint['processed'])
+        self.assertEqual(AuditLog.objects.filter(action='retention_anonymize').count(), 1)
+
+        RetentionService.run_execution(execution, self.admin)
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, RetentionExecution.STATUS_COMPLETED)
+        self.assertEqual(execution.affected_count, 7)
+        self.assertEqual(Employee.all_objects.filter(is_deleted=True).count(), 7)
+        self.assertEqual(AuditLog.objects.filter(action='retention_anonymize').count(), 3)
+
+    def test_dry_run_counts_without_changing_rows(self):
+        execution = self._execution(dry_run=True)
+
+        RetentionService.run_execution(execution, self.admin)
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.affected_count, 7)
+        self.assertEqual(len(execution.details['sample_ids']), 7)
+        self.assertFalse(Employee.all_objects.filter(is_deleted=True).exists())
+        self.assertFalse(AuditLog.objects.filter(action='retention_anonymize').exists())
+
+    def test_windows_only_cover_the_policy_organization(self):
+        other = Organization.objects.create(name='Other Org', email='other@example.com')
+        for n in range(9):
+            user = User.objects.create_user(
+                email=f'other{n}@example.com', password='pass',
+                first_name='Other', last_name=str(n), organization=other,
+            )
+            Employee.all_objects.create(
+                organization=other, user=user, employee_id=f'O{n:03d}', date_of_joining=date(2020, 1, 1),
+            )
+        execution = self._execution()
+
+        with CaptureQueriesContext(connection) as queries:
+            RetentionService.run_execution(execution, self.admin)
+
+        updates = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE "employees_employee"')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(Employee.all_objects.filter(organization=other, is_deleted=True).count(), 0)
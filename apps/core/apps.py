@@ -8,7 +8,12 @@ class CoreConfig(AppConfig):
     verbose_name = 'Core'
     
     def ready(self):
-        """Import signals when app is ready"""
+        """Import signals and install the query metrics wrapper when app is ready"""
+        from django.db.backends.signals import connection_created
+        from .metrics import install_query_metrics
+
+        connection_created.connect(install_query_metrics, dispatch_uid='core.install_query_metrics')
+
         try:
             from . import signals  # noqa
         except ImportError:
@@ -0,0 +1,38 @@
+"""
+Benchmarking - Shared scaffolding for the benchmark management commands
+
+Benchmarks seed a throwaway organization and measure against it inside
+rolled_back(), so nothing they write is kept:
+
+    with rolled_back():
+        org = Organization.objects.create(...)
+        self._measure(org)
+
+Query counts go through a QueryCounter execute wrapper, because
+connection.queries is capped at 9000 entries.
+"""
+
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def rolled_back(using=None):
+    """Run the block in a transaction (or savepoint) that is always rolled back"""
+    with transaction.atomic(using=using):
+        try:
+            yield
+        finally:
+            transaction.set_rollback(True, using=using)
+
+
+class QueryCounter:
+    """Execute wrapper counting the queries run inside connection.execute_wrapper()"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
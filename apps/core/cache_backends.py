@@ -0,0 +1,23 @@
+"""
+Cache Backends - Django cache backends that report hit/miss metrics
+"""
+
+from django.core.cache.backends.locmem import LocMemCache as _LocMemCache
+
+from .metrics import CacheMetricsMixin
+
+try:
+    from django_redis.cache import RedisCache as _RedisCache
+except ImportError:  # django-redis is only needed when REDIS_CACHE_URL is configured
+    _RedisCache = None
+
+
+class LocMemCache(CacheMetricsMixin, _LocMemCache):
+    """Local-memory cache with metrics"""
+
+
+if _RedisCache is not None:
+    class RedisCache(CacheMetricsMixin, _RedisCache):
+        """django-redis cache with metrics"""
+
+        COUNT_GET_MANY = True
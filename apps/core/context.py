@@ -4,7 +4,8 @@ Uses contextvars instead of threading.local for async compatibility
 """
 
 from contextvars import ContextVar
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, FrozenSet, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,36 @@ current_branch_var: ContextVar = ContextVar('current_branch', default=None)
 client_ip_var: ContextVar = ContextVar('client_ip', default=None)
 user_agent_var: ContextVar = ContextVar('user_agent', default=None)
 device_id_var: ContextVar = ContextVar('device_id', default=None)
+request_context_var: ContextVar = ContextVar('request_context', default=None)
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    """
+    Tenant facts about the authenticated user of a request, resolved once
+    by apps.core.request_context.RequestContextCache.
+    """
+    user: Any
+    organization: Any = None
+    membership_role: Optional[str] = None
+    role_codes: Tuple[str, ...] = ()
+    branch_ids: FrozenSet[str] = frozenset()
+
+    @property
+    def user_id(self):
+        return self.user.pk
+
+    @property
+    def organization_id(self):
+        return self.organization.id if self.organization is not None else None
+
+    @property
+    def is_org_admin(self) -> bool:
+        return self.membership_role == 'ORG_ADMIN' or bool(getattr(self.user, 'is_org_admin', False))
+
+    def has_branch(self, branch_id) -> bool:
+        """Whether the user has an active membership in the branch"""
+        return str(branch_id) in self.branch_ids
 
 
 def get_current_organization():
@@ -78,14 +109,39 @@ def set_device_id(device_id: str) -> None:
     device_id_var.set(device_id)
 
 
-def clear_context() -> None:
+def get_request_context() -> Optional[RequestContext]:
+    """Get the resolved request context, if any."""
+    return request_context_var.get()
+
+
+def set_request_context(context: Optional[RequestContext]) -> None:
     """
-    Clear all context variables.
-    Called at the end of each request.
+    Set the resolved request context, along with the current user and
+    organization it carries.
+    """
+    request_context_var.set(context)
+    if context is not None:
+        set_current_user(context.user)
+        set_current_organization(context.organization)
+
+
+def clear_tenant_context() -> None:
+    """
+    Clear user, organization, branch and request context, keeping the
+    client metadata captured by AuditMiddleware.
     """
+    request_context_var.set(None)
     set_current_organization(None)
     set_current_user(None)
     set_current_branch(None)
+
+
+def clear_context() -> None:
+    """
+    Clear all context variables.
+    Called at the end of each request.
+    """
+    clear_tenant_context()
     set_client_ip(None)
     set_user_agent(None)
     set_device_id(None)
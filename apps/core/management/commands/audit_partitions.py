@@ -0,0 +1,72 @@
+"""
+Management command: Inspect, create, archive and restore audit log partitions
+Usage:
+    python manage.py audit_partitions list
+    python manage.py audit_partitions ensure [--months-ahead N]
+    python manage.py audit_partitions archive (--older-than MONTHS | --partition NAME) [--archive-root DIR]
+    python manage.py audit_partitions restore PATH [PATH ...]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.partitioning import AuditLogPartitions
+
+
+class Command(BaseCommand):
+    help = 'Manage monthly audit log partitions and their compressed archives'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+        subparsers.add_parser('list', help='List partitions (or monthly ranges on unpartitioned databases)')
+
+        ensure = subparsers.add_parser('ensure', help='Create partitions ahead of time')
+        ensure.add_argument('--months-ahead', type=int, default=None)
+
+        archive = subparsers.add_parser('archive', help='Archive partitions to .jsonl.gz files and drop them')
+        target = archive.add_mutually_exclusive_group(required=True)
+        target.add_argument('--older-than', type=int, metavar='MONTHS',
+                            help='Archive partitions that ended more than MONTHS months ago')
+        target.add_argument('--partition', help='Archive one partition by name')
+        archive.add_argument('--archive-root', default=None)
+
+        restore = subparsers.add_parser('restore', help='Load archived partitions back into the table')
+        restore.add_argument('paths', nargs='+', metavar='PATH')
+
+    def handle(self, *args, **options):
+        getattr(self, f"_{options['action']}")(options)
+
+    def _list(self, options):
+        mode = 'partitioned' if AuditLogPartitions.is_partitioned() else 'not partitioned'
+        self.stdout.write(f'core_auditlog is {mode}')
+        for partition in AuditLogPartitions.partitions():
+            start = partition.start.date() if partition.start else '-'
+            self.stdout.write(f'{partition.name:<32} {start} .. {partition.end.date()}')
+
+    def _ensure(self, options):
+        if not AuditLogPartitions.is_partitioned():
+            self.stdout.write(self.style.WARNING('core_auditlog is not partitioned on this database; nothing to do'))
+            return
+        created = AuditLogPartitions.ensure_partitions(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partition(s) {' '.join(created)}"))
+
+    def _archive(self, options):
+        if options['partition']:
+            partitions = [p for p in AuditLogPartitions.partitions() if p.name == options['partition']]
+            if not partitions:
+                raise CommandError(f"Unknown partition: {options['partition']}")
+        else:
+            partitions = AuditLogPartitions.expired(options['older_than'])
+
+        for partition in partitions:
+            result = AuditLogPartitions.archive(partition, options['archive_root'])
+            self.stdout.write(self.style.SUCCESS(f"{result['partition']}: {result['rows']} rows -> {result['path']}"))
+        if not partitions:
+            self.stdout.write('Nothing to archive')
+
+    def _restore(self, options):
+        for path in options['paths']:
+            try:
+                rows = AuditLogPartitions.restore(path)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'{path}: {exc}')
+            self.stdout.write(self.style.SUCCESS(f'{path}: restored {rows} rows'))
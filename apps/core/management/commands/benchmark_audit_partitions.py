@@ -0,0 +1,150 @@
+"""
+Management command to compare audit log insert and range-query latency on a
+plain table vs a monthly partitioned one (PostgreSQL only)
+Usage: python manage.py benchmark_audit_partitions [--rows N] [--months N] [--samples N] [--keep]
+
+Builds two scratch tables shaped like core_auditlog (bench_auditlog_plain and
+bench_auditlog_part), loads the same synthetic rows into both and drops them
+afterwards unless --keep is given. Loading 50M rows takes a while and needs
+roughly 2 x 15 GB of disk.
+"""
+
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.partitioning import Partition, add_months, month_start
+
+PLAIN = 'bench_auditlog_plain'
+PARTITIONED = 'bench_auditlog_part'
+ORGS = 50
+
+
+class Command(BaseCommand):
+    help = 'Benchmark audit log inserts and range queries: unpartitioned vs monthly partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000_000)
+        parser.add_argument('--months', type=int, default=24, help='Months of history the rows are spread over')
+        parser.add_argument('--samples', type=int, default=500, help='Timed inserts and queries per table')
+        parser.add_argument('--batch', type=int, default=1_000_000, help='Rows per load statement')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch tables')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                'Audit log partitioning is PostgreSQL-only; on this database queries run '
+                'against the single core_auditlog table, so there is nothing to compare.'
+            ))
+            return
+
+        end = add_months(month_start(timezone.now()), 1)
+        start = add_months(end, -options['months'])
+        try:
+            self._create_tables(start, end)
+            for table in (PLAIN, PARTITIONED):
+                self._load(table, options['rows'], options['batch'], start, end)
+            self.stdout.write(self.style.SUCCESS(
+                f"=== {options['rows']:,} rows over {options['months']} months, {options['samples']} samples ==="
+            ))
+            for table in (PLAIN, PARTITIONED):
+                label = 'plain' if table == PLAIN else 'partitioned'
+                self._report(label, 'insert', self._inserts(table, options['samples']))
+                self._report(label, 'month', self._range_queries(table, options['samples'], start, end, 'count'))
+                self._report(label, 'latest 50', self._range_queries(table, options['samples'], start, end, 'page'))
+        finally:
+            if not options['keep']:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED} CASCADE")
+
+    def _create_tables(self, start, end):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED} CASCADE")
+            cursor.execute(f"CREATE TABLE {PLAIN} (LIKE core_auditlog INCLUDING DEFAULTS)")
+            cursor.execute(f"ALTER TABLE {PLAIN} ADD PRIMARY KEY (id)")
+            cursor.execute(
+                f"CREATE TABLE {PARTITIONED} (LIKE core_auditlog INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp)"
+            )
+            cursor.execute(f"ALTER TABLE {PARTITIONED} ADD PRIMARY KEY (id, timestamp)")
+            month = start
+            while month < add_months(end, 1):
+                partition = Partition.for_month(month)
+                name = partition.name.replace('core_auditlog', PARTITIONED)
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF {PARTITIONED} FOR VALUES FROM (%s) TO (%s)",
+                    [partition.start, partition.end],
+                )
+                month = partition.end
+            for table in (PLAIN, PARTITIONED):
+                cursor.execute(f"CREATE INDEX ON {table} (organization_id, timestamp)")
+                cursor.execute(f"CREATE INDEX ON {table} (resource_type, resource_id)")
+                cursor.execute(f"CREATE INDEX ON {table} (timestamp)")
+
+    def _load(self, table, rows, batch, start, end):
+        span = (end - start).total_seconds()
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for offset in range(0, rows, batch):
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (id, timestamp, user_email, action, resource_type, resource_id,
+                                         changed_fields, organization_id)
+                    SELECT gen_random_uuid(),
+                           %s::timestamptz + (random() * %s) * interval '1 second',
+                           'bench@example.com',
+                           (ARRAY['create', 'update', 'delete'])[1 + i %% 3],
+                           (ARRAY['Employee', 'LeaveRequest', 'AttendanceRecord', 'Payslip'])[1 + i %% 4],
+                           (i %% 100000)::text,
+                           '[]'::jsonb,
+                           'org-' || (i %% {ORGS})
+                    FROM generate_series(%s, %s) AS i
+                    """,
+                    [start, span, offset + 1, min(offset + batch, rows)],
+                )
+            cursor.execute(f"ANALYZE {table}")
+        self.stdout.write(f'loaded {table} in {time.perf_counter() - started:.0f} s')
+
+    def _inserts(self, table, samples):
+        timings = []
+        with connection.cursor() as cursor:
+            for n in range(samples):
+                began = time.perf_counter()
+                cursor.execute(
+                    f"INSERT INTO {table} (id, timestamp, user_email, action, resource_type, resource_id, "
+                    f"changed_fields, organization_id) VALUES (%s, now(), 'bench@example.com', 'update', "
+                    f"'Employee', %s, '[]'::jsonb, %s)",
+                    [uuid.uuid4(), str(n), f'org-{n % ORGS}'],
+                )
+                timings.append(time.perf_counter() - began)
+        return timings
+
+    def _range_queries(self, table, samples, start, end, kind):
+        months = max(1, round((end - start) / timedelta(days=30.44)))
+        timings = []
+        with connection.cursor() as cursor:
+            for _ in range(samples):
+                window = add_months(start, random.randrange(months))
+                params = [f'org-{random.randrange(ORGS)}', window, add_months(window, 1)]
+                if kind == 'count':
+                    sql = (f"SELECT COUNT(*) FROM {table} WHERE organization_id = %s "
+                           f"AND timestamp >= %s AND timestamp < %s")
+                else:
+                    sql = (f"SELECT * FROM {table} WHERE organization_id = %s AND timestamp >= %s "
+                           f"AND timestamp < %s ORDER BY timestamp DESC LIMIT 50")
+                began = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                timings.append(time.perf_counter() - began)
+        return timings
+
+    def _report(self, label, operation, timings):
+        cuts = statistics.quantiles([t * 1000 for t in timings], n=100)
+        self.stdout.write(
+            f'{label:<12} {operation:<10} p50 {cuts[49]:8.2f} ms  p95 {cuts[94]:8.2f} ms  p99 {cuts[98]:8.2f} ms'
+        )
@@ -0,0 +1,91 @@
+"""
+Management command to measure the per-request cost of the metrics hooks
+Usage: python manage.py benchmark_metrics [--requests N] [--queries N]
+
+Times MetricsMiddleware around a trivial view against the bare view, once
+without queries and once with N queries per request (query metrics wrapper
+installed vs removed). Run with PROMETHEUS_MULTIPROC_DIR set to measure the
+multiprocess mode.
+"""
+
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from apps.core import metrics
+from apps.core.middleware import MetricsMiddleware
+
+BUDGET_US = 50
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the overhead of request and DB metrics per request'
+
+    ROUNDS = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=5, help='Queries per request in the second run')
+
+    def handle(self, *args, **options):
+        path = '/api/v1/assets/categories/'
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        request.user = AnonymousUser()
+        connection.ensure_connection()
+
+        mode = 'multiprocess' if metrics.MULTIPROCESS else 'single process'
+        self.stdout.write(self.style.SUCCESS(
+            f"=== Metrics overhead, {options['requests']} requests ({mode}) ==="
+        ))
+        for queries in (0, options['queries']):
+            self._compare(request, options['requests'], queries)
+
+    def _view(self, queries):
+        def view(request):
+            for _ in range(queries):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            return HttpResponse()
+        return view
+
+    def _compare(self, request, count, queries):
+        view = self._view(queries)
+        middleware = MetricsMiddleware(view)
+        wrappers = [w for w in connection.execute_wrappers if isinstance(w, metrics.QueryMetricsWrapper)]
+
+        if not wrappers:
+            metrics.install_query_metrics(connection=connection)
+            wrappers = connection.execute_wrappers[:1]
+
+        # Best of interleaved rounds, so drift in the database timing hits both sides
+        bare = instrumented = float('inf')
+        for _ in range(self.ROUNDS):
+            for w in wrappers:
+                connection.execute_wrappers.remove(w)
+            try:
+                bare = min(bare, self._time(view, request, count // self.ROUNDS))
+            finally:
+                connection.execute_wrappers[:0] = wrappers
+            instrumented = min(instrumented, self._time(middleware, request, count // self.ROUNDS))
+        count //= self.ROUNDS
+
+        overhead = (instrumented - bare) / count * 1e6
+        verdict = 'ok' if overhead < BUDGET_US else f'over the {BUDGET_US}us budget'
+        self.stdout.write(
+            f"{queries} queries/request  bare {bare / count * 1e6:8.2f} us  "
+            f"instrumented {instrumented / count * 1e6:8.2f} us  overhead {overhead:6.2f} us  ({verdict})"
+        )
+
+    def _time(self, handler, request, count):
+        for _ in range(min(count, 200)):
+            handler(request)
+        started = time.perf_counter()
+        for _ in range(count):
+            handler(request)
+        return time.perf_counter() - started
@@ -253,3 +253,52 @@ class OrganizationScopedManager(models.Manager):
 
     def for_organization(self, organization):
         return self.get_queryset().for_organization(organization)
+
+
+# ============================================================================
+# AUDIT LOG QUERYSET
+# ============================================================================
+
+class AuditLogQuerySet(models.QuerySet):
+    """
+    Audit log queries that keep a bound on ``timestamp``. On PostgreSQL the
+    table is partitioned by month, so a bounded query only reads the
+    partitions it covers (see apps.core.partitioning).
+    """
+
+    def in_range(self, start=None, end=None):
+        """Rows with ``start <= timestamp < end``; either bound may be omitted"""
+        qs = self
+        if start:
+            qs = qs.filter(timestamp__gte=start)
+        if end:
+            qs = qs.filter(timestamp__lt=end)
+        return qs
+
+    def for_month(self, year: int, month: int):
+        from datetime import datetime, timezone as dt_timezone
+        from .partitioning import add_months
+
+        start = datetime(year, month, 1, tzinfo=dt_timezone.utc)
+        return self.in_range(start, add_months(start, 1))
+
+    def recent(self, days: int = 30):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        return self.in_range(timezone.now() - timedelta(days=days))
+
+    def for_organization(self, organization):
+        org_id = organization.id if hasattr(organization, 'id') else organization
+        return self.filter(organization_id=str(org_id))
+
+    def for_object(self, resource_type: str, resource_id, since=None):
+        """History of one object, optionally bounded so old partitions are skipped"""
+        return self.filter(resource_type=resource_type, resource_id=str(resource_id)).in_range(since)
+
+    def by_month(self, start, end):
+        """``(month_start, queryset)`` pairs, one per partition between start and end"""
+        from .partitioning import month_ranges
+
+        for window_start, window_end in month_ranges(start, end):
+            yield window_start, self.in_range(window_start, window_end)
@@ -0,0 +1,285 @@
+"""
+Metrics - Prometheus counters, gauges and histograms for requests, DB, cache, Channels and Celery
+
+Metrics live in the prometheus_client default registry. With
+PROMETHEUS_MULTIPROC_DIR set (gunicorn/uvicorn workers), every process
+writes its values to mmap files in that directory and the /metrics view
+aggregates them; the directory must be emptied before the server starts,
+and the server's child-exit hook should call mark_worker_dead(pid).
+"""
+
+import os
+import re
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+# Request path
+HTTP_REQUESTS = Counter(
+    'hrms_http_requests_total', 'HTTP requests', ['method', 'view', 'status']
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'hrms_http_request_duration_seconds', 'HTTP request latency', ['method', 'view'],
+    buckets=REQUEST_BUCKETS,
+)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    'hrms_http_request_db_seconds', 'Database time per HTTP request', ['view'],
+    buckets=QUERY_BUCKETS,
+)
+HTTP_REQUEST_QUERIES = Histogram(
+    'hrms_http_request_queries', 'Database queries per HTTP request', ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'hrms_http_requests_in_progress', 'HTTP requests being served', multiprocess_mode='livesum'
+)
+
+# Database
+DB_QUERIES = Counter('hrms_db_queries_total', 'Database queries', ['alias'])
+DB_QUERY_ERRORS = Counter('hrms_db_query_errors_total', 'Database queries that raised', ['alias'])
+DB_QUERY_SECONDS = Counter('hrms_db_query_seconds_total', 'Time spent executing queries', ['alias'])
+
+# Cache
+CACHE_REQUESTS = Counter('hrms_cache_requests_total', 'Cache reads', ['cache', 'result'])
+CACHE_WRITES = Counter('hrms_cache_writes_total', 'Cache writes and deletes', ['cache', 'operation'])
+
+# Channels
+CHANNELS_CONNECTIONS = Gauge(
+    'hrms_channels_connections', 'Open WebSocket connections', ['route'], multiprocess_mode='livesum'
+)
+CHANNELS_MESSAGES = Counter(
+    'hrms_channels_messages_total', 'WebSocket messages', ['route', 'direction']
+)
+
+# Celery
+CELERY_TASKS = Counter('hrms_celery_tasks_total', 'Finished Celery tasks', ['task', 'state'])
+CELERY_TASK_DURATION = Histogram(
+    'hrms_celery_task_duration_seconds', 'Celery task run time', ['task'], buckets=TASK_BUCKETS
+)
+CELERY_TASK_QUEUE_TIME = Histogram(
+    'hrms_celery_task_queue_seconds', 'Time from publish to start', ['task'], buckets=TASK_BUCKETS
+)
+
+# Per-connection [queries, seconds] of the current request
+_request_db_totals: ContextVar = ContextVar('metrics_request_db_totals', default=None)
+
+# (method, view) -> labelled request children; labels() takes a lock per call
+_request_children = {}
+
+_ID_SEGMENT = re.compile(r'/(?:\d+|[0-9a-fA-F-]{32,36})(?=/|$)')
+
+
+def exposition():
+    """(body, content type) for the /metrics endpoint"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid):
+    """Drop a dead worker's live gauges (call from the server's child-exit hook)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
+# ---------------------------------------------------------------------------
+# Request path
+# ---------------------------------------------------------------------------
+
+def view_label(request):
+    """Bounded label for a request: the resolved view name, never the raw path"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+def start_request():
+    """Begin DB accounting for a request; returns the token for finish_request"""
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    return _request_db_totals.set({})
+
+
+def finish_request(token, request, status, duration):
+    """Record one finished request and end its DB accounting"""
+    totals = _request_db_totals.get() or {}
+    _request_db_totals.reset(token)
+    HTTP_REQUESTS_IN_PROGRESS.dec()
+
+    queries, db_seconds = 0, 0.0
+    for wrapper, (count, seconds) in totals.items():
+        wrapper.flush(count, seconds)
+        queries += count
+        db_seconds += seconds
+
+    key = (request.method, view_label(request))
+    children = _request_children.get(key)
+    if children is None:
+        method, view = key
+        children = _request_children[key] = (
+            {},
+            HTTP_REQUEST_DURATION.labels(method, view),
+            HTTP_REQUEST_QUERIES.labels(view),
+            HTTP_REQUEST_DB_DURATION.labels(view),
+        )
+    by_status, latency, query_count, db_time = children
+    counter = by_status.get(status)
+    if counter is None:
+        counter = by_status[status] = HTTP_REQUESTS.labels(key[0], key[1], status)
+    counter.inc()
+    latency.observe(duration)
+    query_count.observe(queries)
+    db_time.observe(db_seconds)
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+class QueryMetricsWrapper:
+    """
+    Execute wrapper timing every query on one connection. Inside a request
+    the time is only added to the request's totals and the counters are
+    updated once in finish_request; elsewhere (tasks, commands) each query
+    updates them directly.
+    """
+
+    def __init__(self, alias):
+        self.queries = DB_QUERIES.labels(alias)
+        self.errors = DB_QUERY_ERRORS.labels(alias)
+        self.seconds = DB_QUERY_SECONDS.labels(alias)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except Exception:
+            self.errors.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            totals = _request_db_totals.get()
+            if totals is None:
+                self.flush(1, elapsed)
+            else:
+                entry = totals.get(self)
+                if entry is None:
+                    totals[self] = [1, elapsed]
+                else:
+                    entry[0] += 1
+                    entry[1] += elapsed
+
+    def flush(self, count, seconds):
+        self.queries.inc(count)
+        self.seconds.inc(seconds)
+
+
+def install_query_metrics(sender=None, connection=None, **kwargs):
+    """connection_created receiver: wrap the new connection once"""
+    if not any(isinstance(wrapper, QueryMetricsWrapper) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.insert(0, QueryMetricsWrapper(connection.alias))
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class CacheMetricsMixin:
+    """
+    Counts hits and misses of a Django cache backend. Backends whose
+    get_many() is implemented natively set COUNT_GET_MANY; the BaseCache
+    implementation goes through get() and is counted there.
+    """
+
+    COUNT_GET_MANY = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        name = self.__class__.__name__
+        self._metric_hit = CACHE_REQUESTS.labels(name, 'hit')
+        self._metric_miss = CACHE_REQUESTS.labels(name, 'miss')
+        self._metric_set = CACHE_WRITES.labels(name, 'set')
+        self._metric_delete = CACHE_WRITES.labels(name, 'delete')
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, self._missing_key, version=version, **kwargs)
+        if value is self._missing_key:
+            self._metric_miss.inc()
+            return default
+        self._metric_hit.inc()
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        found = super().get_many(keys, version=version, **kwargs)
+        if self.COUNT_GET_MANY:
+            self._metric_hit.inc(len(found))
+            self._metric_miss.inc(len(keys) - len(found))
+        return found
+
+    def set(self, *args, **kwargs):
+        self._metric_set.inc()
+        return super().set(*args, **kwargs)
+
+    def set_many(self, data, *args, **kwargs):
+        self._metric_set.inc(len(data))
+        return super().set_many(data, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._metric_delete.inc()
+        return super().delete(*args, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Channels
+# ---------------------------------------------------------------------------
+
+def channels_route_label(path):
+    """WebSocket path with numeric and UUID segments collapsed"""
+    return _ID_SEGMENT.sub('/:id', path or '') or '/'
+
+
+# ---------------------------------------------------------------------------
+# Celery
+# ---------------------------------------------------------------------------
+
+def celery_task_published(headers):
+    """before_task_publish: stamp the publish time for queue latency"""
+    if headers is not None:
+        headers['published_at'] = time.time()
+
+
+def celery_task_started(task):
+    """task_prerun: record queue latency and the start time"""
+    published_at = (task.request.headers or {}).get('published_at') or getattr(task.request, 'published_at', None)
+    if published_at:
+        CELERY_TASK_QUEUE_TIME.labels(task.name).observe(max(time.time() - float(published_at), 0.0))
+    task.request._metrics_started = time.perf_counter()
+
+
+def celery_task_finished(task, state):
+    """task_postrun: record run time and the final state"""
+    started = getattr(task.request, '_metrics_started', None)
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task.name).observe(time.perf_counter() - started)
+    CELERY_TASKS.labels(task.name, state or 'UNKNOWN').inc()
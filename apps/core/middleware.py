@@ -4,6 +4,7 @@ SECURITY: This middleware handles context resolution and safety guards.
 """
 
 import logging
+import random
 import uuid
 import re
 import time
@@ -11,7 +12,9 @@ from typing import Any, Optional
 from django.conf import settings
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 from django.core.exceptions import ValidationError, ImproperlyConfigured, PermissionDenied
+from apps.core import metrics, query_profiler
 from apps.core.logging import set_correlation_id
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
@@ -195,47 +198,33 @@ class BranchContextMiddleware(MiddlewareMixin):
         if not hasattr(request, 'user') or not request.user.is_authenticated:
             return
 
-        # NEW: Skip if Organization context is missing (prevents 500)
+        # Skip if Organization context is missing (prevents 500)
         if not getattr(request, 'organization', None):
-            # This is normal for initial Requests before Auth, or if Auth failed
-            # But wait, request.user IS authenticated here?
-            # If so, it might be Session Auth without Organization Context
-            logger.info("TRACE: BranchContextMiddleware skipping - No Organization Context")
             return
 
         try:
-            logger.info(f"TRACE: BranchContextMiddleware processing for user {request.user.email}")
-            
-            # Helper to set branch context
-            from apps.core.context import set_current_branch
+            # Membership comes from the request context resolved by OrganizationMiddleware
+            context = getattr(request, 'request_context', None)
             
             # 1. Check if user has a specific branch set in session
             branch_id = request.session.get('current_branch_id')
             
-            if branch_id:
-                from apps.authentication.models import Branch
-                try:
-                    logger.info(f"TRACE: BranchContextMiddleware looking up branch {branch_id}")
-                    # Validate branch belongs to current organization
-                    branch = Branch.objects.get(
-                        id=branch_id,
-                        organization=request.organization,
-                        is_active=True
-                    )
-                    
-                    # Verify user has access to this branch
-                    if request.user.branches.filter(id=branch.id).exists():
-                        request.branch = branch
-                        set_current_branch(branch)
-                        logger.info(f"TRACE: BranchContextMiddleware set branch {branch.name}")
-                        return
-                    else:
-                         logger.warning(f"TRACE: BranchContextMiddleware user {request.user.email} has no access to branch {branch_id}")
-                except Branch.DoesNotExist:
-                    logger.warning(f"TRACE: BranchContextMiddleware branch {branch_id} not found or inactive")
-                    pass
-                except Exception as e:
-                    logger.error(f"TRACE: BranchContextMiddleware error looking up branch: {e}")
+            if branch_id and context is not None:
+                if context.has_branch(branch_id):
+                    from apps.authentication.models import Branch
+                    organization_id = request.organization.id
+                    # Loaded only if something reads the branch; a branch deactivated
+                    # or deleted since the session selected it reads as None
+                    branch = SimpleLazyObject(lambda: Branch.objects.filter(
+                        id=branch_id, organization_id=organization_id, is_active=True
+                    ).first())
+                    request.branch = branch
+                    set_current_branch(branch)
+                    return
+                logger.warning(
+                    "BranchContextMiddleware: user %s has no active membership in branch %s",
+                    request.user.pk, branch_id
+                )
 
             # 2. Fallback: Use user's primary/default branch if available
             # Note: We don't automatically set a tailored default here yet,
@@ -243,10 +232,9 @@ class BranchContextMiddleware(MiddlewareMixin):
             # If we wanted to, we could pick the first available branch.
             
             request.branch = None
-            logger.info("TRACE: BranchContextMiddleware finished (no branch set)")
             
         except Exception as e:
-            logger.error(f"TRACE: BranchContextMiddleware critical error: {e}")
+            logger.error(f"BranchContextMiddleware error: {e}")
             # Do not crash the request
 
     def _get_user_primary_branch(self, user):
@@ -299,7 +287,8 @@ class RequestIDMiddleware:
 
 class MetricsMiddleware:
     """
-    Log basic request metrics (latency, status, user, org).
+    Record request metrics (count, latency, DB queries and time per view)
+    and log a summary line.
     Additive-only: does not modify request behavior.
     """
 
@@ -307,14 +296,20 @@ class MetricsMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        start = time.monotonic()
-        response = self.get_response(request)
-        duration_ms = int((time.monotonic() - start) * 1000)
+        start = time.perf_counter()
+        token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            metrics.finish_request(token, request, 500, time.perf_counter() - start)
+            raise
+        duration = time.perf_counter() - start
+        metrics.finish_request(token, request, response.status_code, duration)
+        duration_ms = int(duration * 1000)
 
         user = getattr(request, 'user', None)
-        org = None
-        if user and hasattr(user, 'get_organization'):
-            org = user.get_organization()
+        # Resolved during the request; never queried here
+        org = getattr(request, 'organization', None)
 
         logger.info(
             "request_metrics method=%s path=%s status=%s duration_ms=%s user_id=%s org_id=%s",
@@ -328,3 +323,61 @@ class MetricsMiddleware:
 
         response['X-Response-Time-ms'] = str(duration_ms)
         return response
+
+
+# ============================================================================
+# QUERY PROFILING
+# ============================================================================
+
+class QueryProfilerMiddleware:
+    """
+    Profile the SQL of a request: query count and time, duplicate-query
+    fingerprints and N+1 patterns with their call sites.
+
+    Runs for a QUERY_PROFILER_SAMPLE_RATE fraction of requests, for requests
+    sending "X-Profile-Queries: 1" when QUERY_PROFILER_HEADER_ENABLED (default:
+    DEBUG), and for every request while a test declares a query budget.
+    Profiled responses carry X-Query-* headers; the full report, stacks
+    included, goes to the structured log only.
+    """
+
+    SAMPLE_RATE = getattr(settings, 'QUERY_PROFILER_SAMPLE_RATE', 0.0)
+    HEADER_ENABLED = getattr(settings, 'QUERY_PROFILER_HEADER_ENABLED', settings.DEBUG)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _should_profile(self, request):
+        if query_profiler.collecting():
+            return True
+        if self.HEADER_ENABLED and request.headers.get('X-Profile-Queries') == '1':
+            return True
+        return self.SAMPLE_RATE > 0 and random.random() < self.SAMPLE_RATE
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+
+        with query_profiler.profile_queries() as profile:
+            response = self.get_response(request)
+
+        summary = profile.summary()
+        query_profiler.collect(request.method, request.path, summary)
+
+        response['X-Query-Count'] = str(summary['query_count'])
+        response['X-Query-Time-ms'] = str(summary['query_time_ms'])
+        response['X-Query-Duplicates'] = str(summary['duplicate_queries'])
+        response['X-Query-N-Plus-One'] = str(len(summary['n_plus_one']))
+
+        log = logger.warning if summary['n_plus_one'] else logger.info
+        log(
+            "query_profile",
+            extra={
+                'event': 'query_profile',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **summary,
+            }
+        )
+        return response
@@ -7,6 +7,7 @@ import logging
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from apps.core.context import set_current_organization, set_current_user, clear_context
+from apps.core.metrics import CHANNELS_CONNECTIONS, CHANNELS_MESSAGES, channels_route_label
 
 logger = logging.getLogger(__name__)
 
@@ -55,3 +56,36 @@ class OrganizationChannelsMiddleware(BaseMiddleware):
         except Exception as e:
             logger.error(f"Error resolving organization for WebSocket: {e}")
             return None
+
+
+class MetricsChannelsMiddleware(BaseMiddleware):
+    """
+    Counts open WebSocket connections and messages in each direction per
+    route (numeric and UUID path segments collapsed).
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope.get('type') != 'websocket':
+            return await super().__call__(scope, receive, send)
+
+        route = channels_route_label(scope.get('path'))
+        received = CHANNELS_MESSAGES.labels(route, 'received')
+        sent = CHANNELS_MESSAGES.labels(route, 'sent')
+        connections = CHANNELS_CONNECTIONS.labels(route)
+
+        async def counted_receive():
+            message = await receive()
+            if message.get('type') == 'websocket.receive':
+                received.inc()
+            return message
+
+        async def counted_send(message):
+            if message.get('type') == 'websocket.send':
+                sent.inc()
+            await send(message)
+
+        connections.inc()
+        try:
+            return await super().__call__(scope, counted_receive, counted_send)
+        finally:
+            connections.dec()
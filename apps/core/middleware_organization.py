@@ -51,6 +51,7 @@ def is_public_path(path: str) -> bool:
         '/admin',
         '/static',
         '/media',
+        '/metrics',
     )
     return any(
         path == p or path.startswith(p + '/')
@@ -87,14 +88,11 @@ class OrganizationMiddleware(MiddlewareMixin):
     """
 
     def process_request(self, request):
-        from apps.core.context import (
-            set_current_organization,
-            set_current_user,
-            clear_context,
-        )
+        from apps.core.context import clear_tenant_context, set_current_user, set_request_context
+        from apps.core.request_context import RequestContextCache
 
-        # Always start clean (async-safe)
-        clear_context()
+        # Always start clean (async-safe); client metadata from AuditMiddleware is kept
+        clear_tenant_context()
         request.organization = None
 
         # ------------------------------------------------------------------
@@ -124,13 +122,20 @@ class OrganizationMiddleware(MiddlewareMixin):
         set_current_user(request.user)
         logger.debug("Authenticated user: %s", request.user.email)
 
-        from apps.core.models import Organization
+        session = getattr(request, 'session', None)
+        token_id = RequestContextCache.token_id(getattr(session, 'session_key', None))
 
         # ------------------------------------------------------------------
         # User has organization
         # ------------------------------------------------------------------
-        if getattr(request.user, 'organization', None):
-            org = request.user.organization
+        context = None
+        if request.user.organization_id:
+            context = RequestContextCache.get(
+                request.user.pk, token_id, request.user.organization_id, user=request.user
+            )
+
+        if context is not None and context.organization is not None:
+            org = context.organization
 
             if not org.is_active:
                 logger.warning(
@@ -165,7 +170,8 @@ class OrganizationMiddleware(MiddlewareMixin):
                     status=403,
                 )
 
-            set_current_organization(org)
+            set_request_context(context)
+            request.request_context = context
             request.organization = org
 
             # PostgreSQL RLS support
@@ -190,26 +196,11 @@ class OrganizationMiddleware(MiddlewareMixin):
                 or request.headers.get('X-Tenant-Id')
             )
 
-            if org_id:
-                try:
-                    org = Organization.objects.get(id=org_id, is_active=True)
-
-                    log_superuser_org_switch(request.user, org, request)
-
-                    set_current_organization(org)
-                    request.organization = org
-
-                    if getattr(settings, 'ENABLE_POSTGRESQL_RLS', False):
-                        try:
-                            with connection.cursor() as cursor:
-                                cursor.execute(
-                                    "SET LOCAL app.current_organization_id = %s",
-                                    [str(org.id)],
-                                )
-                        except Exception:
-                            logger.exception("Failed to set RLS for superuser")
+            context = RequestContextCache.get(request.user.pk, token_id, org_id, user=request.user)
+            org = context.organization
 
-                except Organization.DoesNotExist:
+            if org_id:
+                if org is None or not org.is_active:
                     logger.warning(
                         "invalid_org_switch",
                         extra={
@@ -223,7 +214,22 @@ class OrganizationMiddleware(MiddlewareMixin):
                         status=400,
                     )
 
+                log_superuser_org_switch(request.user, org, request)
+                request.organization = org
+
+                if getattr(settings, 'ENABLE_POSTGRESQL_RLS', False):
+                    try:
+                        with connection.cursor() as cursor:
+                            cursor.execute(
+                                "SET LOCAL app.current_organization_id = %s",
+                                [str(org.id)],
+                            )
+                    except Exception:
+                        logger.exception("Failed to set RLS for superuser")
+
             # Superuser allowed without org
+            set_request_context(context)
+            request.request_context = context
             return None
 
         # ------------------------------------------------------------------
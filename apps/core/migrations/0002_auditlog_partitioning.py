@@ -0,0 +1,102 @@
+"""
+Partition core_auditlog by month on PostgreSQL.
+
+The existing table is renamed and attached, unchanged, as the partition for
+everything before the first monthly boundary, so no rows are copied. New
+months get their own partitions (created ahead by the
+maintain_audit_partitions task) plus a default partition as a safety net.
+Other databases are left alone.
+"""
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'core_auditlog'
+LEGACY = f'{TABLE}_legacy'
+
+
+def partition_auditlog(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    from apps.core.partitioning import AuditLogPartitions, Partition, add_months, month_start
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [TABLE]
+        )
+        if cursor.fetchone()[0]:
+            return
+
+        cursor.execute(f"SELECT MAX(timestamp) FROM {TABLE}")
+        latest = cursor.fetchone()[0]
+        now = timezone.now()
+        boundary = add_months(month_start(max(latest, now) if latest else now), 1)
+
+        # Index and foreign key definitions, recreated on the parent under their original names
+        cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [TABLE])
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')
+            """,
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+        for name, contype, _ in constraints:
+            cursor.execute(f"ALTER TABLE {LEGACY} RENAME CONSTRAINT {name} TO {name[:55]}_legacy")
+        constraint_names = {name for name, _, _ in constraints}
+        for name, _ in indexes:
+            if name not in constraint_names:
+                cursor.execute(f"ALTER INDEX {name} RENAME TO {name[:55]}_legacy")
+
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+            f"INCLUDING STORAGE) PARTITION BY RANGE (timestamp)"
+        )
+        # The partition key has to be part of the primary key
+        for name, contype, definition in constraints:
+            if contype == 'p':
+                cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} PRIMARY KEY (id, timestamp)")
+            else:
+                cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+        for name, definition in indexes:
+            if name not in constraint_names and 'UNIQUE' not in definition:
+                cursor.execute(definition)
+
+        # ATTACH skips its full-table check when a validated CHECK constraint
+        # already implies the partition bound; it is dropped once attached
+        check = f"{LEGACY}_bound"
+        cursor.execute(
+            f"ALTER TABLE {LEGACY} ADD CONSTRAINT {check} "
+            f"CHECK (timestamp IS NOT NULL AND timestamp < %s) NOT VALID",
+            [boundary],
+        )
+        cursor.execute(f"ALTER TABLE {LEGACY} VALIDATE CONSTRAINT {check}")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY} FOR VALUES FROM (MINVALUE) TO (%s)", [boundary]
+        )
+        cursor.execute(f"ALTER TABLE {LEGACY} DROP CONSTRAINT {check}")
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        for offset in range(AuditLogPartitions.MONTHS_AHEAD + 1):
+            partition = Partition.for_month(add_months(boundary, offset))
+            cursor.execute(
+                f"CREATE TABLE {partition.name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [partition.start, partition.end],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        # Not reversed: the partitioned table behaves the same for the ORM
+        migrations.RunPython(partition_auditlog, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,7 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from .context import get_current_organization
+from .managers import AuditLogQuerySet
 import logging
 
 logger = logging.getLogger(__name__)
@@ -368,6 +369,8 @@ class AuditLog(models.Model):
     
     # Organization context
     organization_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+
+    objects = AuditLogQuerySet.as_manager()
     
     class Meta:
         ordering = ['-timestamp']
@@ -0,0 +1,345 @@
+"""
+Audit Log Partitioning - Monthly range partitions for ``core_auditlog``
+
+On PostgreSQL the table is declaratively partitioned by ``timestamp`` (see
+migration 0002). Partitions are created ahead of time, and old months are
+detached into gzip-compressed JSON-lines archives that can be restored.
+
+Other backends have a single table. There the same calls degrade to
+month-sized ranges of that table: nothing is created, and archiving
+exports and deletes the month's rows.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'core_auditlog'
+LEGACY_PARTITION = f'{TABLE}_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant of the month containing ``value``, in UTC"""
+    value = value.astimezone(dt_timezone.utc) if timezone.is_aware(value) else value.replace(tzinfo=dt_timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def month_ranges(start: datetime, end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+    """``[month_start, next_month_start)`` windows covering ``[start, end)``"""
+    current = month_start(start)
+    while current < end:
+        following = add_months(current, 1)
+        yield max(current, start), min(following, end)
+        current = following
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One month of audit log; ``start`` is None for the open-ended legacy range"""
+    name: str
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+    @classmethod
+    def for_month(cls, start: datetime) -> 'Partition':
+        start = month_start(start)
+        return cls(f'{TABLE}_p{start:%Y%m}', start, add_months(start, 1))
+
+
+class AuditLogPartitions:
+    """
+    Create, list, archive and restore monthly audit log partitions.
+    """
+
+    MONTHS_AHEAD = getattr(settings, 'AUDIT_PARTITION_MONTHS_AHEAD', 3)
+    # Months kept in the live table; None disables automatic archiving
+    RETAIN_MONTHS = getattr(settings, 'AUDIT_PARTITION_RETAIN_MONTHS', None)
+    ARCHIVE_ROOT = getattr(settings, 'AUDIT_ARCHIVE_ROOT', os.path.join(settings.BASE_DIR, 'archive', 'audit'))
+    CHUNK_SIZE = 5000
+
+    _BOUND_RE = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \((?:'([^']+)'|MAXVALUE)\)")
+
+    # ----- Introspection -----
+
+    @staticmethod
+    def is_partitioned() -> bool:
+        """True when ``core_auditlog`` is a partitioned PostgreSQL table"""
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+                [TABLE],
+            )
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def partitions(cls) -> List[Partition]:
+        """Attached range partitions, oldest first (the default partition is excluded)"""
+        if not cls.is_partitioned():
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT MIN(timestamp), MAX(timestamp) FROM {TABLE}")
+                first, last = cursor.fetchone()
+            if first is None:
+                return []
+            first, last = cls._as_datetime(first), cls._as_datetime(last)
+            return [Partition.for_month(start) for start, _ in month_ranges(first, last + timedelta(microseconds=1))]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(%s)
+                """,
+                [TABLE],
+            )
+            rows = cursor.fetchall()
+        result = []
+        for name, bound in rows:
+            match = cls._BOUND_RE.search(bound or '')
+            if not match:
+                continue
+            start, end = (cls._as_datetime(v) if v else None for v in match.groups())
+            result.append(Partition(name, start, end))
+        return sorted(result, key=lambda p: p.start or datetime.min.replace(tzinfo=dt_timezone.utc))
+
+    @staticmethod
+    def _as_datetime(value) -> datetime:
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace(' ', 'T'))
+        return value if timezone.is_aware(value) else value.replace(tzinfo=dt_timezone.utc)
+
+    # ----- Creation -----
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead: Optional[int] = None, now: Optional[datetime] = None) -> List[str]:
+        """Create partitions from the current month through ``months_ahead`` months ahead"""
+        if not cls.is_partitioned():
+            return []
+        months_ahead = cls.MONTHS_AHEAD if months_ahead is None else months_ahead
+        current = month_start(now or timezone.now())
+        existing = cls.partitions()
+        created = []
+        for offset in range(months_ahead + 1):
+            partition = Partition.for_month(add_months(current, offset))
+            if not any(cls._overlaps(partition, other) for other in existing):
+                cls.create_partition(partition)
+                created.append(partition.name)
+        return created
+
+    @staticmethod
+    def _overlaps(partition: Partition, other: Partition) -> bool:
+        """True if ``other`` (possibly open-ended, like the legacy range) covers part of ``partition``"""
+        return (
+            (other.start is None or other.start < partition.end)
+            and (other.end is None or other.end > partition.start)
+        )
+
+    @classmethod
+    def create_partition(cls, partition: Partition) -> None:
+        """
+        Attach a new monthly partition. Rows that landed in the default
+        partition for that month are moved into it in the same transaction.
+        """
+        bounds = [partition.start, partition.end]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= %s AND timestamp < %s)",
+                bounds,
+            )
+            stray = cursor.fetchone()[0]
+            if stray:
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+            cursor.execute(
+                f"CREATE TABLE {partition.name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+            if stray:
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= %s AND timestamp < %s "
+                    f"RETURNING *) INSERT INTO {TABLE} SELECT * FROM moved",
+                    bounds,
+                )
+                cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+        logger.info("Created audit log partition %s", partition.name)
+
+    # ----- Archiving -----
+
+    @classmethod
+    def expired(cls, retain_months: Optional[int] = None, now: Optional[datetime] = None) -> List[Partition]:
+        """Partitions that end before the retention window"""
+        retain_months = cls.RETAIN_MONTHS if retain_months is None else retain_months
+        if retain_months is None:
+            return []
+        cutoff = add_months(month_start(now or timezone.now()), -retain_months)
+        return [p for p in cls.partitions() if p.end is not None and p.end <= cutoff]
+
+    @classmethod
+    def archive(cls, partition: Partition, archive_root: Optional[str] = None) -> dict:
+        """
+        Write a partition to ``<name>.jsonl.gz`` plus a manifest, then drop it
+        from the live table. The data is only dropped after the archive has
+        been written, fsynced and its row count checked.
+        """
+        archive_root = archive_root or cls.ARCHIVE_ROOT
+        os.makedirs(archive_root, exist_ok=True)
+        data_path = os.path.join(archive_root, f'{partition.name}.jsonl.gz')
+        partitioned = cls.is_partitioned()
+        columns = [field.attname for field in cls._fields()]
+
+        # On PostgreSQL the range filter prunes to the one partition being archived
+        rows_qs = cls._range(partition).order_by().values_list(*columns)
+        digest = hashlib.sha256()
+        rows = 0
+        with open(data_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as archive, transaction.atomic():
+                batch = []
+                for row in rows_qs.iterator(chunk_size=cls.CHUNK_SIZE):
+                    batch.append(row)
+                    if len(batch) >= cls.CHUNK_SIZE:
+                        rows += cls._write_lines(archive, digest, columns, batch)
+                        batch = []
+                rows += cls._write_lines(archive, digest, columns, batch)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        manifest = {
+            'table': TABLE,
+            'partition': partition.name,
+            'start': partition.start.isoformat() if partition.start else None,
+            'end': partition.end.isoformat() if partition.end else None,
+            'rows': rows,
+            'sha256': digest.hexdigest(),
+            'columns': columns,
+            'archived_at': timezone.now().isoformat(),
+        }
+        with open(cls.manifest_path(data_path), 'w') as handle:
+            json.dump(manifest, handle, indent=2)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if partitioned:
+                cursor.execute(f"SELECT COUNT(*) FROM {partition.name}")
+                if cursor.fetchone()[0] != rows:
+                    raise RuntimeError(f"{partition.name} changed while it was being archived")
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {partition.name}")
+                cursor.execute(f"DROP TABLE {partition.name}")
+            else:
+                where, params = cls._range_sql(partition)
+                cursor.execute(f"DELETE FROM {TABLE} WHERE {where}", params)
+                if cursor.rowcount != rows:
+                    raise RuntimeError(f"{partition.name} changed while it was being archived")
+
+        logger.info("Archived %s audit log rows from %s to %s", rows, partition.name, data_path)
+        return {**manifest, 'path': data_path}
+
+    @staticmethod
+    def _write_lines(archive, digest, columns, batch) -> int:
+        data = ''.join(
+            json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n' for row in batch
+        ).encode('utf-8')
+        digest.update(data)
+        archive.write(data)
+        return len(batch)
+
+    @staticmethod
+    def _range(partition: Partition):
+        from .models import AuditLog
+        qs = AuditLog.objects.filter(timestamp__lt=partition.end)
+        return qs.filter(timestamp__gte=partition.start) if partition.start else qs
+
+    @staticmethod
+    def _range_sql(partition: Partition) -> Tuple[str, list]:
+        adapt = connection.ops.adapt_datetimefield_value
+        if partition.start is None:
+            return 'timestamp < %s', [adapt(partition.end)]
+        return 'timestamp >= %s AND timestamp < %s', [adapt(partition.start), adapt(partition.end)]
+
+    @classmethod
+    def archive_expired(cls, retain_months: Optional[int] = None, archive_root: Optional[str] = None) -> List[dict]:
+        return [cls.archive(partition, archive_root) for partition in cls.expired(retain_months)]
+
+    @staticmethod
+    def manifest_path(data_path: str) -> str:
+        return re.sub(r'\.jsonl\.gz$', '', data_path) + '.manifest.json'
+
+    @classmethod
+    def restore(cls, data_path: str) -> int:
+        """
+        Load an archive back into the live table. On PostgreSQL its monthly
+        partition is recreated first (the legacy range goes to the default
+        partition). Returns the number of rows restored.
+        """
+        with open(cls.manifest_path(data_path)) as handle:
+            manifest = json.load(handle)
+
+        fields = {field.attname: field for field in cls._fields()}
+        columns = [column for column in manifest['columns'] if column in fields]
+        insert = (
+            f"INSERT INTO {TABLE} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+
+        # Verify the whole file before touching the table
+        digest = hashlib.sha256()
+        with gzip.open(data_path, 'rb') as archive:
+            lines = 0
+            for line in archive:
+                digest.update(line)
+                lines += 1
+        if digest.hexdigest() != manifest['sha256'] or lines != manifest['rows']:
+            raise ValueError(f"{data_path} does not match its manifest")
+
+        rows = 0
+        with transaction.atomic():
+            start = manifest.get('start')
+            if cls.is_partitioned() and start:
+                partition = Partition.for_month(cls._as_datetime(start))
+                if not any(cls._overlaps(partition, other) for other in cls.partitions()):
+                    cls.create_partition(partition)
+
+            with gzip.open(data_path, 'rb') as archive, connection.cursor() as cursor:
+                batch = []
+                for line in archive:
+                    record = json.loads(line)
+                    batch.append([cls._prepare(fields[column], record.get(column)) for column in columns])
+                    if len(batch) >= cls.CHUNK_SIZE:
+                        cursor.executemany(insert, batch)
+                        rows += len(batch)
+                        batch = []
+                if batch:
+                    cursor.executemany(insert, batch)
+                    rows += len(batch)
+
+        logger.info("Restored %s audit log rows from %s", rows, data_path)
+        return rows
+
+    @staticmethod
+    def _fields():
+        from .models import AuditLog
+        return AuditLog._meta.concrete_fields
+
+    @staticmethod
+    def _prepare(field, value):
+        if value is not None and field.get_internal_type() != 'JSONField':
+            value = field.to_python(value)
+        return field.get_db_prep_save(value, connection)
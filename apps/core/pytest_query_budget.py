@@ -0,0 +1,54 @@
+"""
+Pytest plugin - Per-request query budgets
+
+Registered in the root conftest.py. A test declares the most queries any
+request it makes may run:
+
+    @pytest.mark.query_budget(8)
+    def test_list_conversations(self): ...
+
+Every request served through the test client while the test runs is
+profiled by QueryProfilerMiddleware; the test fails when one exceeds the
+budget or, unless n_plus_one=True is passed, shows an N+1 pattern. The
+report lists the offending fingerprints with their call sites.
+"""
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries, n_plus_one=False): fail when a request made by the test '
+        'runs more than max_queries queries or repeats a query N+1 style',
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        return (yield)
+
+    from apps.core.query_profiler import collect_request_profiles, format_summary
+
+    max_queries = marker.args[0] if marker.args else marker.kwargs['max_queries']
+    allow_n_plus_one = marker.kwargs.get('n_plus_one', False)
+
+    with collect_request_profiles() as profiles:
+        result = yield
+
+    if not profiles:
+        pytest.fail('query_budget declared but the test made no requests', pytrace=False)
+
+    problems = [
+        f"{method} {path}: {format_summary(summary)}"
+        for method, path, summary in profiles
+        if summary['query_count'] > max_queries or (summary['n_plus_one'] and not allow_n_plus_one)
+    ]
+    if problems:
+        pytest.fail(
+            f"Query budget of {max_queries} exceeded:\n" + '\n'.join(problems),
+            pytrace=False,
+        )
+    return result
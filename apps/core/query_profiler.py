@@ -0,0 +1,167 @@
+"""
+Query Profiler - Per-request SQL recording and N+1 detection
+
+A QueryProfiler is a DB execute wrapper recording the count and time of
+every query, grouped by a normalized fingerprint (literals, placeholders and
+IN lists collapsed), with the application call site of the first occurrence.
+A fingerprint executed N_PLUS_ONE_THRESHOLD times or more in one profile is
+reported as an N+1 pattern.
+
+Used by QueryProfilerMiddleware (header or sampling), by the query_budget
+pytest plugin and directly in tests:
+
+    with profile_queries() as profile:
+        serializer.data
+    assert not profile.n_plus_one()
+"""
+
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?|%\(\w+\)s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+_THIS_FILE = __file__
+
+# Per-request summaries collected while a test declares a query budget
+_collector: ContextVar = ContextVar('query_profile_collector', default=None)
+
+
+def fingerprint(sql):
+    """SQL with literals and placeholders replaced, so repeats of one query compare equal"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def call_site(depth=None):
+    """Innermost project frames (outside site-packages and this module), outermost first"""
+    depth = depth or getattr(settings, 'QUERY_PROFILER_STACK_DEPTH', 5)
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(_PROJECT_ROOT) and 'site-packages' not in filename
+                and filename != _THIS_FILE):
+            frames.append(
+                f"{filename[len(_PROJECT_ROOT) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class QueryProfiler:
+    """
+    Execute wrapper collecting queries by fingerprint. One instance can wrap
+    several connections.
+    """
+
+    N_PLUS_ONE_THRESHOLD = getattr(settings, 'QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold or self.N_PLUS_ONE_THRESHOLD
+        self.count = 0
+        self.duration = 0.0
+        # fingerprint -> {'count', 'duration', 'sql', 'stack'}
+        self.fingerprints = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            key = fingerprint(sql)
+            entry = self.fingerprints.get(key)
+            if entry is None:
+                self.fingerprints[key] = {'count': 1, 'duration': elapsed, 'sql': sql, 'stack': call_site()}
+            else:
+                entry['count'] += 1
+                entry['duration'] += elapsed
+
+    def duplicates(self):
+        """Fingerprints executed more than once, most repeated first"""
+        repeated = [
+            {'fingerprint': key, **entry} for key, entry in self.fingerprints.items() if entry['count'] > 1
+        ]
+        return sorted(repeated, key=lambda item: item['count'], reverse=True)
+
+    def n_plus_one(self):
+        """Duplicates at or above the N+1 threshold"""
+        return [item for item in self.duplicates() if item['count'] >= self.threshold]
+
+    def summary(self):
+        """Plain-dict report for headers, logs and test failures"""
+        duplicates = self.duplicates()
+        return {
+            'query_count': self.count,
+            'query_time_ms': round(self.duration * 1000, 2),
+            'duplicate_queries': sum(item['count'] - 1 for item in duplicates),
+            'n_plus_one': [
+                {
+                    'fingerprint': item['fingerprint'],
+                    'count': item['count'],
+                    'time_ms': round(item['duration'] * 1000, 2),
+                    'stack': item['stack'],
+                }
+                for item in duplicates if item['count'] >= self.threshold
+            ],
+        }
+
+
+@contextmanager
+def profile_queries(threshold=None, using=None):
+    """Profile every query on the given aliases (default: all databases) inside the block"""
+    profiler = QueryProfiler(threshold)
+    with ExitStack() as stack:
+        for alias in using or connections:
+            stack.enter_context(connections[alias].execute_wrapper(profiler))
+        yield profiler
+
+
+def collecting():
+    """True while a query budget is collecting request profiles"""
+    return _collector.get() is not None
+
+
+def collect(method, path, summary):
+    """Hand a finished request's profile to the active query budget, if any"""
+    collector = _collector.get()
+    if collector is not None:
+        collector.append((method, path, summary))
+
+
+@contextmanager
+def collect_request_profiles():
+    """Profile every request served inside the block; yields the (method, path, summary) list"""
+    profiles = []
+    token = _collector.set(profiles)
+    try:
+        yield profiles
+    finally:
+        _collector.reset(token)
+
+
+def format_summary(summary):
+    """Human-readable N+1 report"""
+    lines = [f"{summary['query_count']} queries in {summary['query_time_ms']}ms"]
+    for item in summary['n_plus_one']:
+        lines.append(f"  N+1 x{item['count']}: {item['fingerprint'][:200]}")
+        lines.extend(f"      {frame}" for frame in item['stack'])
+    return '\n'.join(lines)
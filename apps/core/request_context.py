@@ -0,0 +1,162 @@
+"""
+Request Context - Tenant facts for an authenticated user, resolved once per request
+"""
+
+import hashlib
+import logging
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .context import RequestContext
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContextCache:
+    """
+    RequestContext cached per user, token and requested organization for
+    CACHE_TTL seconds, so authentication and the middlewares share one
+    resolution instead of querying separately.
+
+    Saving or deleting a user, their organization or branch memberships or
+    their role assignments bumps the user's generation, which retires every
+    cached context of that user. Edits to the organization or branch rows
+    themselves age out with the TTL.
+    """
+
+    CACHE_TTL = getattr(settings, 'REQUEST_CONTEXT_CACHE_TTL', 60)
+    CACHE_PREFIX = 'core:request_context:'
+
+    @classmethod
+    def _make_key(cls, *parts):
+        """Generate cache key"""
+        return f"{cls.CACHE_PREFIX}{':'.join(str(p) for p in parts)}"
+
+    @staticmethod
+    def token_id(token) -> str:
+        """Stable identifier of a JWT (its jti) or session key"""
+        if token is None:
+            return '-'
+        if isinstance(token, str):
+            return token
+        jti = token.get('jti') if hasattr(token, 'get') else None
+        return jti or hashlib.sha256(str(token).encode()).hexdigest()
+
+    @classmethod
+    def get(cls, user_id, token_id, organization_id=None, user=None) -> Optional[RequestContext]:
+        """
+        Context of user_id for one token, optionally for an explicit
+        organization (token claim or superuser switch). Other users fall
+        back to their own or membership organization; superusers stay
+        unscoped. Pass the user instance when the caller already has it.
+        Returns None for an unknown user.
+        """
+        entry_key = cls._make_key(user_id, token_id or '-', organization_id or '-')
+        return cls._get_or_load(
+            user_id, entry_key, lambda: cls._load(user_id, organization_id, user=user), cache_none=False
+        )
+
+    @classmethod
+    def remember(cls, user_id, name, loader):
+        """
+        Per-user value (organization, admin flag, role codes, permissions)
+        cached under the same generation as the user's contexts, so the same
+        signals retire both.
+        """
+        return cls._get_or_load(user_id, cls._make_key('user', user_id, name), loader)
+
+    @classmethod
+    def _get_or_load(cls, user_id, entry_key, loader, cache_none=True):
+        generation_key = cls._make_key('generation', user_id)
+        cached = cache.get_many([entry_key, generation_key])
+        generation = cached.get(generation_key)
+        entry = cached.get(entry_key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+
+        value = loader()
+        if value is not None or cache_none:
+            cache.set(entry_key, (generation, value), cls.CACHE_TTL)
+        return value
+
+    @classmethod
+    def invalidate_user(cls, *user_ids) -> None:
+        """Retire every cached context of the given users"""
+        # Outlives any entry written under the previous generation
+        cache.set_many(
+            {cls._make_key('generation', user_id): uuid.uuid4().hex for user_id in user_ids if user_id},
+            cls.CACHE_TTL * 2,
+        )
+
+    @staticmethod
+    def _load(user_id, organization_id=None, user=None) -> Optional[RequestContext]:
+        from apps.abac.models import RoleAssignment
+        from apps.authentication.models import User
+        from apps.authentication.models_hierarchy import BranchUser, OrganizationUser
+        from apps.core.models import Organization
+
+        if user is None:
+            user = User.objects.filter(pk=user_id).first()
+            if user is None:
+                return None
+
+        membership = OrganizationUser.objects.filter(
+            user_id=user.pk, is_active=True
+        ).values_list('organization_id', 'role').first()
+
+        # Superusers are only scoped to an organization they asked for
+        if not user.is_superuser:
+            organization_id = organization_id or user.organization_id or (membership[0] if membership else None)
+        organization = None
+        if organization_id:
+            try:
+                organization = Organization.objects.filter(id=uuid.UUID(str(organization_id))).first()
+            except ValueError:
+                logger.warning("Malformed organization id in request context: %s", organization_id)
+
+        role_codes = set()
+        if user.is_superuser:
+            role_codes.add('superuser')
+        if user.is_org_admin:
+            role_codes.add('org_admin')
+        branch_ids = frozenset()
+
+        if organization is not None or user.is_superuser:
+            now = timezone.now()
+            assignments = RoleAssignment.objects.filter(user_id=user.pk, is_active=True).filter(
+                Q(valid_from__isnull=True) | Q(valid_from__lte=now),
+                Q(valid_until__isnull=True) | Q(valid_until__gte=now),
+            )
+            if organization is not None:
+                assignments = assignments.filter(
+                    Q(scope=RoleAssignment.SCOPE_GLOBAL) |
+                    Q(scope=RoleAssignment.SCOPE_ORGANIZATION, scope_id=organization.id)
+                )
+            role_codes.update(code for code in assignments.values_list('role__code', flat=True) if code)
+
+        if organization is not None:
+            branch_ids = frozenset(
+                str(branch_id) for branch_id in BranchUser.objects.filter(
+                    user_id=user.pk,
+                    is_active=True,
+                    branch__is_active=True,
+                    branch__organization_id=organization.id,
+                ).values_list('branch_id', flat=True)
+            )
+
+        membership_role = None
+        if membership and organization is not None and str(membership[0]) == str(organization.id):
+            membership_role = membership[1]
+
+        return RequestContext(
+            user=user,
+            organization=organization,
+            membership_role=membership_role,
+            role_codes=tuple(sorted(role_codes)),
+            branch_ids=branch_ids,
+        )
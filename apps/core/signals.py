@@ -6,7 +6,7 @@ import sys
 import threading
 import logging
 from contextlib import contextmanager
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 from django.forms.models import model_to_dict
@@ -379,3 +379,82 @@ def auto_set_org_user_permissions(sender, instance, created, **kwargs):
                 }
             )
 
+
+
+# ---------------------------------------------------------------------------
+# Request context invalidation
+# ---------------------------------------------------------------------------
+
+def _invalidate_request_context(user_id):
+    from django.db import transaction
+    from .request_context import RequestContextCache
+
+    if user_id:
+        transaction.on_commit(lambda: RequestContextCache.invalidate_user(user_id))
+
+
+@receiver(post_save, sender='authentication.User')
+@receiver(post_delete, sender='authentication.User')
+def invalidate_request_context_of_user(sender, instance, **kwargs):
+    """Retire cached request contexts and tenant facts when the user changes"""
+    instance.forget_cached_access()
+    _invalidate_request_context(instance.pk)
+
+
+@receiver(post_save, sender='authentication.OrganizationUser')
+@receiver(post_delete, sender='authentication.OrganizationUser')
+@receiver(post_save, sender='authentication.BranchUser')
+@receiver(post_delete, sender='authentication.BranchUser')
+@receiver(post_save, sender='abac.RoleAssignment')
+@receiver(post_delete, sender='abac.RoleAssignment')
+def invalidate_request_context_of_member(sender, instance, **kwargs):
+    """Retire cached request contexts and tenant facts when memberships or role assignments change"""
+    # The user object the caller holds would otherwise keep its memoized facts
+    if sender.user.is_cached(instance):
+        instance.user.forget_cached_access()
+    _invalidate_request_context(instance.user_id)
+
+
+def _invalidate_request_context_of_roles(role_ids):
+    """Retire the cached facts, including permissions, of every user assigned one of the roles"""
+    from django.db import transaction
+    from apps.abac.models import RoleAssignment
+    from .request_context import RequestContextCache
+
+    user_ids = list(
+        RoleAssignment.all_objects.filter(role_id__in=list(role_ids)).values_list('user_id', flat=True).distinct()
+    )
+    if user_ids:
+        transaction.on_commit(lambda: RequestContextCache.invalidate_user(*user_ids))
+
+
+@receiver(post_save, sender='abac.Role')
+def invalidate_request_context_of_role(sender, instance, created, **kwargs):
+    """A role's permissions or active flag changed"""
+    if not created:
+        _invalidate_request_context_of_roles([instance.pk])
+
+
+@receiver(post_save, sender='abac.RolePermission')
+@receiver(post_delete, sender='abac.RolePermission')
+def invalidate_request_context_of_role_permission(sender, instance, **kwargs):
+    """A permission was granted to or revoked from a role"""
+    _invalidate_request_context_of_roles([instance.role_id])
+
+
+@receiver(m2m_changed, sender='abac.Role_policies')
+def invalidate_request_context_of_role_policies(sender, instance, action, reverse, pk_set, **kwargs):
+    """Policies were added to or removed from a role"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _invalidate_request_context_of_roles([instance.pk])
+        return
+
+    # Changed from the policy side: pk_set holds role ids, except on clear
+    if action in ('post_add', 'post_remove'):
+        role_ids = pk_set
+    elif action == 'pre_clear':
+        role_ids = instance.legacy_roles.values_list('pk', flat=True)
+    else:
+        return
+    _invalidate_request_context_of_roles(role_ids)
@@ -3,7 +3,7 @@ Base Task Classes for Organization-Aware Celery Tasks
 """
 
 import logging
-from celery import Task
+from celery import Task, shared_task
 from .context import set_current_organization
 
 logger = logging.getLogger(__name__)
@@ -60,3 +60,21 @@ class BaseTask(Task):
     """Base task for non-organization specific tasks"""
     def __call__(self, *args, **kwargs):
         return super().__call__(*args, **kwargs)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def maintain_audit_partitions(self):
+    """
+    Create upcoming monthly audit log partitions and archive months past
+    AUDIT_PARTITION_RETAIN_MONTHS. Schedule daily via celery beat; a run
+    that has nothing to do is cheap.
+    """
+    from .partitioning import AuditLogPartitions
+
+    try:
+        created = AuditLogPartitions.ensure_partitions()
+        archived = [entry['partition'] for entry in AuditLogPartitions.archive_expired()]
+    except Exception as exc:
+        logger.exception("Audit partition maintenance failed")
+        raise self.retry(exc=exc)
+    return {'created': created, 'archived': archived}
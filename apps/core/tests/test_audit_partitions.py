@@ -0,0 +1,122 @@
+"""
+Tests for audit log partition helpers, archiving and restore (unpartitioned fallback)
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.authentication.models import User
+from apps.core.models import AuditLog
+from apps.core.partitioning import AuditLogPartitions, Partition, add_months, month_ranges
+from apps.core.views import AuditLogViewSet
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class AuditPartitionTests(TestCase):
+
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root, ignore_errors=True)
+        for n, timestamp in enumerate([utc(2025, 1, 3), utc(2025, 1, 31, 23, 59), utc(2025, 2, 14), utc(2025, 4, 1)]):
+            log = AuditLog.objects.create(
+                action='update', resource_type='Employee', resource_id=str(n),
+                old_values={'status': 'active'}, new_values={'status': 'exited'},
+                changed_fields=['status'], organization_id='org-1', ip_address='10.0.0.1',
+            )
+            AuditLog.objects.filter(pk=log.pk).update(timestamp=timestamp)
+
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(utc(2025, 11, 1), 2), utc(2026, 1, 1))
+        self.assertEqual(add_months(utc(2025, 1, 1), -1), utc(2024, 12, 1))
+        self.assertEqual(
+            list(month_ranges(utc(2025, 1, 15), utc(2025, 3, 1))),
+            [(utc(2025, 1, 15), utc(2025, 2, 1)), (utc(2025, 2, 1), utc(2025, 3, 1))],
+        )
+        self.assertEqual(Partition.for_month(utc(2025, 2, 14, 8)).name, 'core_auditlog_p202502')
+
+    def test_queryset_helpers_bound_the_timestamp(self):
+        self.assertEqual(AuditLog.objects.for_month(2025, 1).count(), 2)
+        self.assertEqual(AuditLog.objects.in_range(utc(2025, 2, 1), utc(2025, 4, 1)).count(), 1)
+        self.assertEqual(AuditLog.objects.for_object('Employee', 3, since=utc(2025, 3, 1)).count(), 1)
+        counts = [(start.month, qs.count()) for start, qs in AuditLog.objects.by_month(utc(2025, 1, 1), utc(2025, 5, 1))]
+        self.assertEqual(counts, [(1, 2), (2, 1), (3, 0), (4, 1)])
+
+    def test_audit_log_date_bounds_are_parsed(self):
+        request = Request(APIRequestFactory().get('/', {'date_from': '2025-01-01', 'date_to': '2025-01-31'}))
+        view = AuditLogViewSet(request=request)
+        # A date-only date_to covers that whole day
+        with timezone.override(dt_timezone.utc):
+            bounds = view._parse_bound('date_from'), view._parse_bound('date_to', inclusive_day=True)
+        self.assertEqual(AuditLog.objects.in_range(*bounds).count(), 2)
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_superuser(
+            email='auditor@example.com', password='pass', first_name='Audit', last_name='Or',
+        ))
+        url = '/api/v1/core/audit-logs/'
+        self.assertEqual(client.get(url, {'date_from': '2025-01-01T00:00:00Z'}).status_code, 200)
+        self.assertEqual(client.get(url, {'date_to': '2025-31-01'}).status_code, 400)
+        self.assertEqual(client.get(url, {'date_from': 'yesterday'}).status_code, 400)
+
+    def test_unpartitioned_database_degrades_to_monthly_ranges(self):
+        self.assertFalse(AuditLogPartitions.is_partitioned())
+        self.assertEqual(AuditLogPartitions.ensure_partitions(), [])
+        self.assertEqual(
+            [p.name for p in AuditLogPartitions.partitions()],
+            ['core_auditlog_p202501', 'core_auditlog_p202502', 'core_auditlog_p202503', 'core_auditlog_p202504'],
+        )
+        expired = AuditLogPartitions.expired(retain_months=2, now=utc(2025, 4, 10))
+        self.assertEqual([p.name for p in expired], ['core_auditlog_p202501'])
+
+    def test_archive_and_restore_round_trip(self):
+        before = {row['id']: row for row in AuditLog.objects.for_month(2025, 1).values()}
+
+        result = AuditLogPartitions.archive(Partition.for_month(utc(2025, 1, 1)), self.archive_root)
+
+        self.assertEqual(result['rows'], 2)
+        self.assertEqual(AuditLog.objects.count(), 2)
+        with gzip.open(result['path'], 'rt') as handle:
+            self.assertEqual(len(handle.readlines()), 2)
+        with open(AuditLogPartitions.manifest_path(result['path'])) as handle:
+            self.assertEqual(json.load(handle)['partition'], 'core_auditlog_p202501')
+
+        out = StringIO()
+        call_command('audit_partitions', 'restore', result['path'], stdout=out)
+
+        self.assertIn('restored 2 rows', out.getvalue())
+        after = {row['id']: row for row in AuditLog.objects.for_month(2025, 1).values()}
+        self.assertEqual(after, before)
+
+    def test_restore_rejects_tampered_archive(self):
+        result = AuditLogPartitions.archive(Partition.for_month(utc(2025, 2, 1)), self.archive_root)
+        with gzip.open(result['path'], 'at') as handle:
+            handle.write('{"id": "00000000-0000-0000-0000-000000000000"}\n')
+
+        with self.assertRaises(ValueError):
+            AuditLogPartitions.restore(result['path'])
+        self.assertFalse(AuditLog.objects.for_month(2025, 2).exists())
+
+    def test_archive_command_archives_expired_months(self):
+        out = StringIO()
+        call_command('audit_partitions', 'archive', '--older-than', '1', '--archive-root', self.archive_root, stdout=out)
+
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.archive_root) if name.endswith('.gz')),
+            ['core_auditlog_p202501.jsonl.gz', 'core_auditlog_p202502.jsonl.gz',
+             'core_auditlog_p202503.jsonl.gz', 'core_auditlog_p202504.jsonl.gz'],
+        )
@@ -0,0 +1,107 @@
+"""
+Tests for the Prometheus metrics subsystem
+"""
+
+from types import SimpleNamespace
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+from prometheus_client import REGISTRY
+
+from apps.core import metrics
+from apps.core.cache_backends import LocMemCache
+from apps.core.middleware import MetricsMiddleware
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class RequestMetricsTests(TestCase):
+
+    def _request(self, path='/api/v1/assets/categories/'):
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        return request
+
+    def test_request_is_counted_per_view_with_its_queries(self):
+        request = self._request()
+        view = request.resolver_match.view_name
+        requests_before = sample('hrms_http_requests_total', method='GET', view=view, status='200')
+        queries_before = sample('hrms_http_request_queries_sum', view=view)
+
+        def get_response(request):
+            for _ in range(3):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            return HttpResponse()
+
+        response = MetricsMiddleware(get_response)(request)
+
+        self.assertIn('X-Response-Time-ms', response)
+        self.assertEqual(sample('hrms_http_requests_total', method='GET', view=view, status='200'),
+                         requests_before + 1)
+        self.assertEqual(sample('hrms_http_request_queries_sum', view=view), queries_before + 3)
+
+    def test_unhandled_exception_is_recorded_as_500(self):
+        request = self._request()
+        view = request.resolver_match.view_name
+        before = sample('hrms_http_requests_total', method='GET', view=view, status='500')
+
+        def get_response(request):
+            raise RuntimeError('boom')
+
+        with self.assertRaises(RuntimeError):
+            MetricsMiddleware(get_response)(request)
+
+        self.assertEqual(sample('hrms_http_requests_total', method='GET', view=view, status='500'), before + 1)
+        self.assertEqual(sample('hrms_http_requests_in_progress'), 0)
+
+    def test_metrics_endpoint_requires_the_token(self):
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'hrms_http_requests_total', response.content)
+
+
+class InstrumentationHookTests(TestCase):
+
+    def test_cache_hits_and_misses_are_counted_once(self):
+        cache = LocMemCache('metrics-test', {})
+        hits = sample('hrms_cache_requests_total', cache='LocMemCache', result='hit')
+        misses = sample('hrms_cache_requests_total', cache='LocMemCache', result='miss')
+
+        cache.set('present', None)
+        self.assertIsNone(cache.get('present', 'default'))
+        self.assertEqual(cache.get('absent', 'default'), 'default')
+        self.assertEqual(cache.get_many(['present', 'absent']), {'present': None})
+
+        self.assertEqual(sample('hrms_cache_requests_total', cache='LocMemCache', result='hit'), hits + 2)
+        self.assertEqual(sample('hrms_cache_requests_total', cache='LocMemCache', result='miss'), misses + 2)
+
+    def test_celery_hooks_record_queue_time_and_outcome(self):
+        headers = {}
+        metrics.celery_task_published(headers)
+        task = SimpleNamespace(name='apps.tests.metrics_task', request=SimpleNamespace(headers=headers))
+        count_before = sample('hrms_celery_task_queue_seconds_count', task=task.name)
+
+        metrics.celery_task_started(task)
+        metrics.celery_task_finished(task, 'SUCCESS')
+
+        self.assertEqual(sample('hrms_celery_task_queue_seconds_count', task=task.name), count_before + 1)
+        self.assertEqual(sample('hrms_celery_tasks_total', task=task.name, state='SUCCESS'), 1)
+        self.assertEqual(sample('hrms_celery_task_duration_seconds_count', task=task.name), 1)
+
+    def test_channels_routes_collapse_identifiers(self):
+        self.assertEqual(
+            metrics.channels_route_label('/ws/chat/42/'),
+            '/ws/chat/:id/',
+        )
+        self.assertEqual(
+            metrics.channels_route_label('/ws/notifications/3f2b8c1e-9a4d-4e2b-8f3a-1c2d3e4f5a6b/'),
+            '/ws/notifications/:id/',
+        )
@@ -0,0 +1,119 @@
+"""
+Tests for the SQL profiler, N+1 detection and the query budget plugin
+"""
+
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.authentication.models import User
+from apps.authentication.models_hierarchy import OrganizationUser
+from apps.core.middleware import QueryProfilerMiddleware
+from apps.core.models import Organization
+from apps.core.pytest_query_budget import pytest_runtest_call
+from apps.core.query_profiler import collect_request_profiles, fingerprint, profile_queries
+
+
+def _organization_names_one_by_one(users):
+    """The N+1 shape: one query per row"""
+    return [Organization.objects.filter(pk=user.organization_id).values_list('name', flat=True).first()
+            for user in users]
+
+
+class QueryProfilerTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Profile Org', email='profile@example.com')
+        self.user = User.objects.create_user(
+            email='profile.user@example.com', password='pass',
+            first_name='Profile', last_name='User', organization=self.org,
+        )
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id = 42 AND name = \'x\'  AND k IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND k IN (...)',
+        )
+        self.assertEqual(fingerprint('SELECT 1 WHERE a = %s'), fingerprint('SELECT 7 WHERE a = %s'))
+
+    def test_per_row_query_loop_is_reported_with_its_call_site(self):
+        users = [self.user] + [
+            User.objects.create_user(
+                email=f'profile.{i}@example.com', password='pass',
+                first_name='Profile', last_name=str(i), organization=self.org,
+            )
+            for i in range(5)
+        ]
+
+        with profile_queries() as profile:
+            _organization_names_one_by_one(users)
+
+        flagged = profile.n_plus_one()
+        self.assertEqual(len(flagged), 1)
+        self.assertEqual(flagged[0]['count'], 6)
+        self.assertTrue(any(
+            'apps/core/tests/test_query_profiler.py' in frame and '_organization_names_one_by_one' in frame
+            for frame in flagged[0]['stack']
+        ))
+        self.assertEqual(profile.summary()['query_count'], profile.count)
+
+    def test_middleware_reports_profile_in_headers_when_requested(self):
+        def view(request):
+            for _ in range(5):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT %s', [1])
+            return HttpResponse()
+
+        middleware = QueryProfilerMiddleware(view)
+        with mock.patch.object(QueryProfilerMiddleware, 'HEADER_ENABLED', True):
+            response = middleware(RequestFactory().get('/', HTTP_X_PROFILE_QUERIES='1'))
+        self.assertEqual(response['X-Query-Count'], '5')
+        self.assertEqual(response['X-Query-Duplicates'], '4')
+        self.assertEqual(response['X-Query-N-Plus-One'], '1')
+
+        with mock.patch.object(QueryProfilerMiddleware, 'HEADER_ENABLED', False):
+            response = middleware(RequestFactory().get('/', HTTP_X_PROFILE_QUERIES='1'))
+        self.assertNotIn('X-Query-Count', response)
+
+        with collect_request_profiles() as profiles:
+            middleware(RequestFactory().get('/'))
+        self.assertEqual(profiles[0][2]['query_count'], 5)
+
+
+class QueryBudgetTests(APITestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Budget Org', email='budget@example.com')
+        self.user = User.objects.create_user(
+            email='budget.user@example.com', password='pass',
+            first_name='Budget', last_name='User', organization=self.org,
+        )
+        OrganizationUser.objects.create(user=self.user, organization_id=self.org.id)
+        token = AccessToken.for_user(self.user)
+        token['organization_id'] = str(self.org.id)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @pytest.mark.query_budget(5)
+    def test_endpoint_within_budget(self):
+        response = self.client.get('/api/v1/assets/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Query-N-Plus-One'], '0')
+
+    def test_request_over_budget_fails_the_test(self):
+        item = mock.Mock()
+        item.get_closest_marker.return_value = pytest.mark.query_budget(1).mark
+
+        # Drive the hook wrapper around a test body by hand
+        hook = pytest_runtest_call(item)
+        next(hook)
+        self.assertEqual(self.client.get('/api/v1/assets/categories/').status_code, 200)
+
+        with self.assertRaises(pytest.fail.Exception) as failure:
+            hook.send(None)
+        self.assertIn('Query budget of 1 exceeded', str(failure.exception))
+        self.assertIn('GET /api/v1/assets/categories/', str(failure.exception))
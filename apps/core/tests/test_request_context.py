@@ -0,0 +1,180 @@
+"""
+Tests for single-pass request context resolution
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.abac.models import Permission, Policy, Role, RoleAssignment, RolePermission
+from apps.assets.models import AssetCategory
+from apps.authentication.models import User
+from apps.authentication.models_hierarchy import Branch, BranchUser, OrganizationUser
+from apps.core.context import clear_tenant_context, set_current_organization
+from apps.core.middleware import BranchContextMiddleware
+from apps.core.models import Organization
+from apps.core.request_context import RequestContextCache
+
+
+class RequestContextTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Context Org', email='context@example.com')
+        self.user = User.objects.create_user(
+            email='context.user@example.com', password='pass',
+            first_name='Context', last_name='User', organization=self.org,
+        )
+        OrganizationUser.objects.create(user=self.user, organization_id=self.org.id)
+        self.branch = Branch.objects.create(organization_id=self.org.id, name='HQ', code='HQ')
+        BranchUser.objects.create(user=self.user, branch=self.branch)
+        AssetCategory.all_objects.create(organization=self.org, name='Laptops', code='CTX-LAP')
+
+    def _token(self):
+        token = AccessToken.for_user(self.user)
+        token['organization_id'] = str(self.org.id)
+        return str(token)
+
+    def test_authenticated_get_runs_a_fixed_number_of_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self._token()}')
+        url = '/api/v1/assets/categories/'
+
+        with CaptureQueriesContext(connection) as cold:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        # One resolution: user, membership, organization, roles, branches
+        self.assertEqual(len(cold.captured_queries), 5)
+
+        # Context cached: authentication and the middlewares add no queries
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_context_carries_membership_roles_and_branches(self):
+        role = Role.objects.create(name='Payroll Admin', code='payroll_admin')
+        RoleAssignment.objects.create(user=self.user, role=role, scope_id=self.org.id)
+
+        context = RequestContextCache.get(self.user.pk, 'jti-1', str(self.org.id))
+
+        self.assertEqual(context.organization, self.org)
+        self.assertEqual(context.membership_role, OrganizationUser.RoleChoices.EMPLOYEE)
+        self.assertIn('payroll_admin', context.role_codes)
+        self.assertTrue(context.has_branch(self.branch.id))
+
+    def test_membership_changes_retire_cached_contexts(self):
+        self.assertTrue(RequestContextCache.get(self.user.pk, 'jti-1').has_branch(self.branch.id))
+
+        with self.assertNumQueries(0):
+            RequestContextCache.get(self.user.pk, 'jti-1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BranchUser.objects.filter(user=self.user).update(is_active=False)
+            BranchUser.objects.get(user=self.user).save()
+
+        self.assertFalse(RequestContextCache.get(self.user.pk, 'jti-1').has_branch(self.branch.id))
+
+    def test_selected_branch_is_loaded_lazily_within_the_organization(self):
+        def branch_request():
+            request = RequestFactory().get('/api/v1/assets/categories/')
+            request.user, request.organization = self.user, self.org
+            request.request_context = RequestContextCache.get(self.user.pk, 'jti-1', str(self.org.id))
+            request.session = {'current_branch_id': str(self.branch.id)}
+            with self.assertNumQueries(0):
+                BranchContextMiddleware(lambda r: None).process_request(request)
+            return request
+
+        self.assertEqual(branch_request().branch, self.branch)
+
+        # Deactivated after it was selected: reads as no branch instead of failing
+        request = branch_request()
+        Branch.objects.filter(pk=self.branch.pk).update(is_active=False)
+        self.assertFalse(request.branch)
+        clear_tenant_context()
+
+    def test_superuser_is_only_scoped_to_a_requested_organization(self):
+        admin = User.objects.create_superuser(
+            email='root@example.com', password='pass', first_name='Root', last_name='Admin',
+        )
+        OrganizationUser.objects.create(user=admin, organization_id=self.org.id)
+        token = AccessToken.for_user(admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = self.client.get('/api/v1/assets/categories/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.wsgi_request.organization)
+        self.assertIsNone(RequestContextCache.get(admin.pk, 'jti-1').organization)
+        self.assertEqual(RequestContextCache.get(admin.pk, 'jti-1', str(self.org.id)).organization, self.org)
+
+
+class UserTenantFactCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Facts Org', email='facts@example.com')
+        self.user = User.objects.create_user(
+            email='facts.user@example.com', password='pass',
+            first_name='Facts', last_name='User', organization=self.org,
+        )
+        OrganizationUser.objects.create(
+            user=self.user, organization_id=self.org.id, role=OrganizationUser.RoleChoices.ORG_ADMIN
+        )
+        self.role = Role.objects.create(name='Payroll Admin', code='payroll_admin')
+
+    def _facts(self, user):
+        return user.get_organization(), user.is_organization_admin(), sorted(user.get_role_codes())
+
+    def test_facts_are_memoized_per_instance_and_shared_across_instances(self):
+        set_current_organization(self.org)
+        try:
+            facts = self._facts(self.user)
+            self.assertEqual(facts, (self.org, True, []))
+
+            with self.assertNumQueries(0):
+                self.assertEqual(self._facts(self.user), facts)
+
+            fresh = User.objects.get(pk=self.user.pk)
+            with self.assertNumQueries(0):
+                self.assertEqual(self._facts(fresh), facts)
+        finally:
+            clear_tenant_context()
+
+    def test_role_and_membership_changes_retire_cached_facts(self):
+        set_current_organization(self.org)
+        try:
+            self.assertEqual(self._facts(self.user)[1:], (True, []))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                RoleAssignment.objects.create(user=self.user, role=self.role, scope_id=self.org.id)
+                OrganizationUser.objects.filter(user=self.user).update(role=OrganizationUser.RoleChoices.EMPLOYEE)
+                OrganizationUser.objects.get(user=self.user).save()
+
+            self.assertEqual(self._facts(self.user)[1:], (False, ['payroll_admin']))
+            self.assertEqual(self._facts(User.objects.get(pk=self.user.pk))[1:], (False, ['payroll_admin']))
+        finally:
+            clear_tenant_context()
+
+    def test_role_permission_changes_retire_cached_facts_of_its_users(self):
+        RoleAssignment.objects.create(user=self.user, role=self.role, scope_id=self.org.id)
+        permission = Permission.objects.create(name='Run payroll', code='payroll.run', module='payroll')
+        policy = Policy.objects.create(name='Payroll', code='payroll')
+
+        with mock.patch.object(RequestContextCache, 'invalidate_user') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                RolePermission.objects.create(role=self.role, permission=permission)
+            invalidate.assert_called_once_with(self.user.pk)
+
+            invalidate.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.role.policies.add(policy)
+            invalidate.assert_called_once_with(self.user.pk)
+
+            invalidate.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                policy.legacy_roles.clear()
+            invalidate.assert_called_once_with(self.user.pk)
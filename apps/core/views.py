@@ -1,12 +1,18 @@
 from rest_framework import viewsets, permissions
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework import status
 from .models import AuditLog, FeatureFlag, Organization
 from .serializers import AuditLogSerializer, FeatureFlagSerializer, OrganizationSerializer
 from apps.core.tenant_guards import OrganizationViewSetMixin
 
-from django.http import JsonResponse
+import hmac
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.http import HttpResponse, JsonResponse
 from rest_framework.throttling import AnonRateThrottle
 from .throttling import LoginRateThrottle
 
@@ -16,6 +22,27 @@ def api_404_view(request, exception=None):
         status=404
     )
 
+
+def metrics_view(request):
+    """
+    Prometheus exposition of the process (or, in multiprocess mode, all
+    workers) metrics. Requires "Authorization: Bearer <METRICS_TOKEN>", or a
+    superuser session when no token is configured.
+    """
+    from .metrics import exposition
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        allowed = hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        user = getattr(request, 'user', None)
+        allowed = bool(user and user.is_authenticated and user.is_superuser)
+    if not allowed:
+        return JsonResponse({'detail': 'Not authorized to read metrics'}, status=403)
+
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
+
 # =============================================================================
 # ORGANIZATION VIEWSET - SUPERUSER ONLY
 # =============================================================================
@@ -142,9 +169,40 @@ class AuditLogViewSet(OrganizationViewSetMixin, viewsets.ReadOnlyModelViewSet):
         action = self.request.query_params.get('action')
         if action:
             queryset = queryset.filter(action=action)
+
+        # Bounded ranges let PostgreSQL skip whole monthly partitions
+        queryset = queryset.in_range(
+            self._parse_bound('date_from'),
+            self._parse_bound('date_to', inclusive_day=True),
+        )
             
         return queryset
 
+    def _parse_bound(self, param, inclusive_day=False):
+        """
+        ISO datetime or date query parameter as an aware datetime. A date is
+        the start of that day, or with inclusive_day the start of the next
+        one, so date_to covers the whole day.
+        """
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+            if day is not None:
+                if inclusive_day:
+                    day += timedelta(days=1)
+                parsed = datetime.combine(day, time.min)
+            else:
+                parsed = parse_datetime(value)
+                if parsed is None:
+                    raise ValueError(value)
+        except ValueError:
+            raise ValidationError({param: 'Expected an ISO 8601 date or datetime'})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
             
 class IsSuperuserOnly(permissions.BasePermission):
     """Only allow superusers to modify feature flags."""
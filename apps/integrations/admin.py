@@ -1,6 +1,6 @@
 """Integrations Admin"""
 from django.contrib import admin
-from .models import Integration, Webhook, APIKey
+from .models import Integration, Webhook, WebhookDelivery, APIKey
 
 @admin.register(Integration)
 class IntegrationAdmin(admin.ModelAdmin):
@@ -10,9 +10,15 @@ class IntegrationAdmin(admin.ModelAdmin):
 
 @admin.register(Webhook)
 class WebhookAdmin(admin.ModelAdmin):
-    list_display = ['name', 'url', 'is_active']
+    list_display = ['name', 'url', 'is_active', 'consecutive_failures', 'disabled_at']
     list_filter = ['is_active']
 
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['event', 'webhook', 'status', 'attempts', 'last_status_code', 'next_attempt_at', 'created_at']
+    list_filter = ['status', 'event']
+    search_fields = ['event', 'event_id']
+
 @admin.register(APIKey)
 class APIKeyAdmin(admin.ModelAdmin):
     list_display = ['name', 'rate_limit', 'expires_at', 'last_used', 'is_active']
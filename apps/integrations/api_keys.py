@@ -0,0 +1,347 @@
+"""
+API Keys - Hashed keys, cached lookup, sliding-window quotas and batched usage
+"""
+
+import hashlib
+import hmac
+import logging
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_NAMESPACE = 'hrms'
+PREFIX_BYTES = 6  # 12 hex characters
+
+
+def hash_key(raw_key: str) -> str:
+    """Keyed SHA-256 of a raw API key (keys are high-entropy, so no slow KDF is needed)"""
+    return hmac.new(settings.SECRET_KEY.encode(), raw_key.encode(), hashlib.sha256).hexdigest()
+
+
+def generate_key() -> Tuple[str, str, str]:
+    """
+    New API key as (raw_key, prefix, key_hash).
+    Only the prefix and the hash are stored; the raw key is shown once.
+    """
+    prefix = secrets.token_hex(PREFIX_BYTES)
+    raw_key = f"{KEY_NAMESPACE}_{prefix}_{secrets.token_urlsafe(32)}"
+    return raw_key, prefix, hash_key(raw_key)
+
+
+def split_key(raw_key: str) -> Optional[str]:
+    """Prefix of a well-formed raw key, else None"""
+    parts = (raw_key or '').split('_', 2)
+    if len(parts) != 3 or parts[0] != KEY_NAMESPACE or len(parts[1]) != PREFIX_BYTES * 2:
+        return None
+    return parts[1]
+
+
+@dataclass(frozen=True)
+class CachedAPIKey:
+    """Everything authentication needs about a key, detached from the ORM"""
+    id: Any
+    prefix: str
+    key_hash: str
+    organization_id: Any
+    user: Any
+    organization: Any
+    permissions: Tuple[str, ...] = ()
+    rate_limit: int = 0
+    expires_at: Optional[datetime] = None
+    is_active: bool = True
+    revoked: bool = False
+
+    def is_expired(self, now=None) -> bool:
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
+    def allows(self, module: str, action: str) -> bool:
+        """
+        Whether the key's scopes cover ``<module>.<action>`` (action is read
+        or write); ``<module>.*`` and ``*`` are wildcards. A key without
+        scopes allows nothing.
+        """
+        return not {'*', f'{module}.*', f'{module}.{action}'}.isdisjoint(self.permissions)
+
+
+class APIKeyCache:
+    """
+    Key records cached by prefix in the shared cache and memoized per process
+    for LOCAL_TTL seconds. Unknown prefixes are cached too, so guessing keys
+    does not reach the database. Saving, revoking or deleting a key (or
+    changing its user or organization) deletes its entries.
+    """
+
+    CACHE_TTL = getattr(settings, 'API_KEY_CACHE_TTL', 300)  # 5 minutes
+    MISS_TTL = 30
+    LOCAL_TTL = getattr(settings, 'API_KEY_LOCAL_CACHE_TTL', 5)
+    LOCAL_MAXSIZE = 1024
+    CACHE_PREFIX = 'integrations:api_keys:'
+
+    _MISSING = 'missing'
+    _local: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _make_key(cls, prefix):
+        """Generate cache key"""
+        return f"{cls.CACHE_PREFIX}{prefix}"
+
+    @classmethod
+    def get(cls, prefix) -> Optional[CachedAPIKey]:
+        key = cls._make_key(prefix)
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._local.get(key)
+            if entry is not None and entry[0] > now:
+                cls._local.move_to_end(key)
+                return None if entry[1] == cls._MISSING else entry[1]
+
+        record = cache.get(key)
+        if record is None:
+            record = cls._load(prefix)
+            cache.set(key, record or cls._MISSING, cls.CACHE_TTL if record else cls.MISS_TTL)
+        elif record == cls._MISSING:
+            record = None
+
+        with cls._lock:
+            cls._local[key] = (now + cls.LOCAL_TTL, record or cls._MISSING)
+            cls._local.move_to_end(key)
+            while len(cls._local) > cls.LOCAL_MAXSIZE:
+                cls._local.popitem(last=False)
+        return record
+
+    @staticmethod
+    def _load(prefix) -> Optional[CachedAPIKey]:
+        from .models import APIKey
+
+        api_key = APIKey.all_objects.select_related('user', 'organization').filter(
+            prefix=prefix, is_deleted=False
+        ).first()
+        if api_key is None:
+            return None
+        return CachedAPIKey(
+            id=api_key.id,
+            prefix=api_key.prefix,
+            key_hash=api_key.key_hash,
+            organization_id=api_key.organization_id,
+            user=api_key.user,
+            organization=api_key.organization,
+            permissions=tuple(api_key.permissions or ()),
+            rate_limit=api_key.rate_limit,
+            expires_at=api_key.expires_at,
+            is_active=api_key.is_active,
+            revoked=api_key.revoked_at is not None,
+        )
+
+    @classmethod
+    def invalidate(cls, *prefixes) -> None:
+        keys = [cls._make_key(p) for p in prefixes if p]
+        if not keys:
+            return
+        cache.delete_many(keys)
+        with cls._lock:
+            for key in keys:
+                cls._local.pop(key, None)
+
+
+# ----- Quotas -----
+
+class RedisQuotaStore:
+    """
+    Sliding-window counters in Redis. Each hit increments the current
+    window bucket and reads the previous one inside MULTI/EXEC, so
+    concurrent requests across workers are counted exactly once.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def hit(self, current_key, previous_key, ttl_ms: int) -> Tuple[int, int]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incr(current_key)
+        pipe.pexpire(current_key, ttl_ms)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+    def undo(self, current_key) -> None:
+        self.client.decr(current_key)
+
+
+class LocalQuotaStore:
+    """Process-local fallback; exact within one process only"""
+
+    def __init__(self):
+        self._counts: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, current_key, previous_key, ttl_ms: int) -> Tuple[int, int]:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._counts) > 10000:
+                self._counts = {k: v for k, v in self._counts.items() if v[1] > now}
+            count, expires = self._counts.get(current_key, (0, 0))
+            count = count + 1 if expires > now else 1
+            self._counts[current_key] = (count, now + ttl_ms / 1000)
+            previous, previous_expires = self._counts.get(previous_key, (0, 0))
+            return count, previous if previous_expires > now else 0
+
+    def undo(self, current_key) -> None:
+        with self._lock:
+            count, expires = self._counts.get(current_key, (0, 0))
+            if count:
+                self._counts[current_key] = (count - 1, expires)
+
+
+@dataclass
+class QuotaResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+
+class APIKeyQuota:
+    """
+    Per-key request quotas (``APIKey.rate_limit`` requests per WINDOW
+    seconds) using the sliding-window counter approximation: the previous
+    window's count is weighted by how much of it still overlaps the sliding
+    window. Redis is used when configured; if it is missing or unreachable
+    the process-local store takes over until RETRY_REDIS_AFTER seconds pass.
+    """
+
+    WINDOW = getattr(settings, 'API_KEY_QUOTA_WINDOW', 3600)  # seconds
+    CACHE_PREFIX = 'integrations:quota:'
+    RETRY_REDIS_AFTER = 30
+
+    _store = None
+    _fallback = LocalQuotaStore()
+    _redis_down_until = 0.0
+
+    @classmethod
+    def get_store(cls):
+        if cls._store is None:
+            url = getattr(settings, 'API_KEY_QUOTA_REDIS_URL', None) or getattr(settings, 'REDIS_URL', None)
+            if url:
+                import redis
+                cls._store = RedisQuotaStore(redis.Redis.from_url(url, socket_timeout=0.25))
+            else:
+                cls._store = cls._fallback
+        return cls._store
+
+    @classmethod
+    def set_store(cls, store) -> None:
+        """Swap the backing store (e.g. a fakeredis-backed RedisQuotaStore in tests)"""
+        cls._store = store
+        cls._redis_down_until = 0.0
+
+    @classmethod
+    def hit(cls, key_id, limit: int, now: Optional[float] = None) -> QuotaResult:
+        """Count one request against a key and report whether it is allowed"""
+        if not limit:
+            return QuotaResult(allowed=True, limit=0, remaining=0)
+
+        now = time.time() if now is None else now
+        window = int(now // cls.WINDOW)
+        elapsed = (now % cls.WINDOW) / cls.WINDOW
+        current_key = f"{cls.CACHE_PREFIX}{key_id}:{window}"
+        previous_key = f"{cls.CACHE_PREFIX}{key_id}:{window - 1}"
+        ttl_ms = cls.WINDOW * 2 * 1000
+
+        store = cls.get_store()
+        if store is not cls._fallback and time.monotonic() < cls._redis_down_until:
+            store = cls._fallback
+        try:
+            current, previous = store.hit(current_key, previous_key, ttl_ms)
+        except Exception as exc:
+            logger.warning("API key quota store unavailable, using local counters: %s", exc)
+            cls._redis_down_until = time.monotonic() + cls.RETRY_REDIS_AFTER
+            store = cls._fallback
+            current, previous = store.hit(current_key, previous_key, ttl_ms)
+
+        estimated = previous * (1 - elapsed) + current
+        if estimated <= limit:
+            return QuotaResult(allowed=True, limit=limit, remaining=int(limit - estimated))
+
+        # Rejected calls do not consume quota
+        try:
+            store.undo(current_key)
+        except Exception:
+            pass
+        if previous:
+            # Time until the weighted previous window has decayed enough for one more call
+            needed = (estimated - limit) / previous
+            retry_after = needed * cls.WINDOW
+        else:
+            retry_after = (1 - elapsed) * cls.WINDOW
+        return QuotaResult(allowed=False, limit=limit, remaining=0, retry_after=math.ceil(retry_after))
+
+
+# ----- Usage -----
+
+class APIKeyUsage:
+    """
+    Buffers last-used timestamps per process and writes them with one
+    UPDATE at most every FLUSH_INTERVAL seconds, instead of one write per
+    authenticated request. ``last_used`` never moves backwards.
+    """
+
+    FLUSH_INTERVAL = getattr(settings, 'API_KEY_LAST_USED_FLUSH_INTERVAL', 60)
+
+    _pending: Dict[Any, datetime] = {}
+    _last_flush = time.monotonic()
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(cls, key_id, used_at: Optional[datetime] = None) -> None:
+        used_at = used_at or timezone.now()
+        with cls._lock:
+            current = cls._pending.get(key_id)
+            if current is None or used_at > current:
+                cls._pending[key_id] = used_at
+            due = time.monotonic() - cls._last_flush >= cls.FLUSH_INTERVAL
+        if due:
+            cls.flush()
+
+    @classmethod
+    def take(cls) -> Dict[Any, datetime]:
+        with cls._lock:
+            entries, cls._pending = cls._pending, {}
+            cls._last_flush = time.monotonic()
+        return entries
+
+    @classmethod
+    def flush(cls) -> int:
+        entries = cls.take()
+        if not entries:
+            return 0
+        try:
+            return cls.write(entries)
+        except Exception:
+            logger.exception("Failed to record API key usage")
+            return 0
+
+    @staticmethod
+    def write(entries: Dict[Any, datetime]) -> int:
+        from .models import APIKey
+
+        stale = Q()
+        whens = []
+        for key_id, used_at in entries.items():
+            stale |= Q(id=key_id) & (Q(last_used__isnull=True) | Q(last_used__lt=used_at))
+            whens.append(When(id=key_id, then=Value(used_at)))
+        return APIKey.all_objects.filter(stale).update(
+            last_used=Case(*whens, output_field=DateTimeField())
+        )
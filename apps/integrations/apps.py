@@ -4,3 +4,6 @@ class IntegrationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.integrations'
     verbose_name = 'Integrations Hub'
+
+    def ready(self):
+        import apps.integrations.signals  # noqa
@@ -0,0 +1,92 @@
+"""
+Management command to measure webhook delivery throughput against a local receiver
+Usage: python manage.py benchmark_webhook_delivery [--events N] [--endpoints N] [--latency MS]
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from apps.core.benchmarking import rolled_back
+from apps.core.models import Organization
+from apps.integrations.models import Webhook, WebhookDelivery
+from apps.integrations.webhooks import WebhookDispatcher
+
+
+class _Receiver(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark webhook delivery: one request at a time vs the pooled outbox drain'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=500)
+        parser.add_argument('--endpoints', type=int, default=4)
+        parser.add_argument('--latency', type=float, default=20, help='Receiver latency in ms')
+
+    def handle(self, *args, **options):
+        _Receiver.latency = options['latency'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Receiver)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/hook'
+
+        try:
+            with rolled_back():
+                org = Organization.objects.create(name='Webhook Benchmark', email='webhook-benchmark@example.com')
+                for i in range(options['endpoints']):
+                    Webhook.all_objects.create(
+                        organization=org, name=f'Receiver {i}', url=f'{url}/{i}',
+                        secret='benchmark', events=['benchmark.event'], max_concurrency=8,
+                    )
+                per_endpoint = max(1, options['events'] // options['endpoints'])
+                for n in range(per_endpoint):
+                    WebhookDispatcher.enqueue('benchmark.event', {'n': n}, org.id)
+                total = WebhookDelivery.all_objects.filter(organization=org).count()
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"=== {total} deliveries to {options['endpoints']} endpoints, "
+                    f"{options['latency']:.0f} ms receiver latency ==="
+                ))
+                self._sequential(org)
+                self._outbox()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _report(self, label, count, elapsed):
+        self.stdout.write(f'{label:<12} {count:>6} delivered  {elapsed:7.2f} s  {count / elapsed:8.1f} events/s')
+
+    def _sequential(self, org):
+        """Previous behaviour made synchronous: one unpooled POST per delivery"""
+        deliveries = list(WebhookDelivery.all_objects.filter(organization=org).select_related('webhook'))
+        started = time.perf_counter()
+        for delivery in deliveries:
+            body, headers = WebhookDispatcher.build_request(delivery)
+            requests.post(delivery.webhook.url, data=body, headers=headers, timeout=WebhookDispatcher.TIMEOUT)
+        self._report('sequential', len(deliveries), time.perf_counter() - started)
+
+    def _outbox(self):
+        delivered = 0
+        started = time.perf_counter()
+        while True:
+            counts = WebhookDispatcher.drain()
+            if not counts['claimed']:
+                break
+            delivered += counts['delivered']
+        self._report('outbox', delivered, time.perf_counter() - started)
@@ -1,5 +1,9 @@
 """Integration Models"""
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from apps.core.models import OrganizationEntity
 
 class Integration(OrganizationEntity):
@@ -26,16 +30,86 @@ class Webhook(OrganizationEntity):
     headers = models.JSONField(default=dict)
     is_active = models.BooleanField(default=True)
     
+    # Delivery tuning and circuit breaker state
+    max_concurrency = models.PositiveSmallIntegerField(default=4)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    disabled_at = models.DateTimeField(null=True, blank=True)
+    disabled_reason = models.CharField(max_length=255, blank=True)
+    
     def __str__(self):
         return self.name
 
+
+class WebhookDelivery(OrganizationEntity):
+    """
+    Outbox row for one event sent to one webhook.
+    
+    Rows are claimed by workers when ``next_attempt_at`` is due; a claimed
+    row is leased by pushing ``next_attempt_at`` forward, so deliveries of
+    a crashed worker become due again once the lease expires.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('in_progress', 'In Progress'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    ]
+    
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries')
+    event = models.CharField(max_length=100)
+    event_id = models.UUIDField(default=uuid.uuid4, editable=False)
+    payload = models.JSONField(default=dict)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_outbox_due_idx'),
+            models.Index(fields=['webhook', '-created_at'], name='webhook_delivery_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} -> {self.webhook_id} ({self.status})"
+
+
+class WebhookDeliveryAttempt(OrganizationEntity):
+    """One HTTP attempt of a webhook delivery"""
+    delivery = models.ForeignKey(WebhookDelivery, on_delete=models.CASCADE, related_name='attempt_log')
+    attempt = models.PositiveSmallIntegerField()
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['delivery', 'attempt']
+    
+    def __str__(self):
+        return f"{self.delivery_id} #{self.attempt}: {self.status_code or self.error}"
+
 class APIKey(OrganizationEntity):
-    """API key management"""
+    """
+    API key management.
+    Only the lookup prefix and a keyed hash of the key are stored; the raw
+    key is returned once when it is created or rotated.
+    """
     name = models.CharField(max_length=100)
-    key = models.CharField(max_length=64, unique=True)
+    prefix = models.CharField(max_length=16, unique=True)
+    key_hash = models.CharField(max_length=64)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='api_keys', help_text="User the key authenticates as"
+    )
     permissions = models.JSONField(default=list)
-    rate_limit = models.PositiveIntegerField(default=1000)
+    rate_limit = models.PositiveIntegerField(default=1000)  # requests per quota window (1 hour)
     expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
     last_used = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
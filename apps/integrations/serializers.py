@@ -1,6 +1,6 @@
 """Integration Serializers"""
 from rest_framework import serializers
-from .models import Integration, Webhook, APIKey
+from .models import Integration, Webhook, WebhookDelivery, WebhookDeliveryAttempt, APIKey
 
 
 class IntegrationSerializer(serializers.ModelSerializer):
@@ -19,17 +19,64 @@ class WebhookSerializer(serializers.ModelSerializer):
         model = Webhook
         fields = [
             'id', 'organization', 'name', 'url', 'secret', 'events', 'headers',
+            'max_concurrency', 'consecutive_failures', 'disabled_at', 'disabled_reason',
             'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'organization', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'organization', 'consecutive_failures', 'disabled_at', 'disabled_reason',
+            'created_at', 'updated_at'
+        ]
         extra_kwargs = {'secret': {'write_only': True}}
 
 
+class WebhookDeliveryAttemptSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookDeliveryAttempt
+        fields = ['attempt', 'status_code', 'response_body', 'error', 'duration_ms', 'created_at']
+        read_only_fields = fields
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    attempt_log = WebhookDeliveryAttemptSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = WebhookDelivery
+        fields = [
+            'id', 'webhook', 'event', 'event_id', 'payload', 'status', 'attempts',
+            'next_attempt_at', 'last_status_code', 'last_error', 'delivered_at',
+            'attempt_log', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class APIKeySerializer(serializers.ModelSerializer):
+    key = serializers.SerializerMethodField()
+
     class Meta:
         model = APIKey
         fields = [
-            'id', 'organization', 'name', 'key', 'permissions', 'rate_limit',
-            'expires_at', 'last_used', 'is_active', 'created_at', 'updated_at'
+            'id', 'organization', 'name', 'prefix', 'key', 'user', 'permissions', 'rate_limit',
+            'expires_at', 'revoked_at', 'last_used', 'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'organization', 'key', 'last_used', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'organization', 'prefix', 'revoked_at', 'last_used', 'created_at', 'updated_at'
+        ]
+        extra_kwargs = {'user': {'required': True, 'allow_null': False}}
+
+    def get_key(self, obj):
+        """Raw key, only present right after it was generated"""
+        return getattr(obj, 'raw_key', None)
+
+    def validate_user(self, user):
+        """The key acts as an ordinary, active user of the organization"""
+        if user.is_superuser:
+            raise serializers.ValidationError("An API key cannot act as a superuser.")
+        if not user.is_active:
+            raise serializers.ValidationError("User is inactive.")
+        if not user.organization_id:
+            raise serializers.ValidationError("User does not belong to an organization.")
+        request = self.context.get('request')
+        organization = getattr(request, 'organization', None) if request else None
+        if organization and user.organization_id != organization.id:
+            raise serializers.ValidationError("User does not belong to this organization.")
+        return user
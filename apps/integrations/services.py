@@ -2,11 +2,8 @@
 Integration Services - Webhooks and API management
 """
 
-import requests
-import hmac
-import hashlib
-import json
-from .models import Webhook, Integration
+from .models import Integration
+from .webhooks import WebhookDispatcher
 
 class IntegrationService:
     """
@@ -17,35 +14,15 @@ class IntegrationService:
     def trigger_webhook(event_name, payload, organization):
         """
         Dispatch an outgoing webhook for a specific event.
+        Deliveries are written to the outbox and sent by Celery workers
+        once the current transaction commits.
         """
-        webhooks = Webhook.objects.filter(
-            organization=organization,
-            is_active=True,
-            events__contains=[event_name]
-        )
-        
-        results = []
-        for webhook in webhooks:
-            # Generate signature
-            signature = hmac.new(
-                webhook.secret.encode(),
-                json.dumps(payload).encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
-            headers = webhook.headers or {}
-            headers['X-HRMS-Event'] = event_name
-            headers['X-HRMS-Signature'] = signature
-            
-            try:
-                # In production, this would be an async task (Celery)
-                # response = requests.post(webhook.url, json=payload, headers=headers, timeout=5)
-                # results.append({'webhook': webhook.name, 'status': response.status_code})
-                results.append({'webhook': webhook.name, 'status': 'skipped_in_dev'})
-            except Exception as e:
-                results.append({'webhook': webhook.name, 'error': str(e)})
-                
-        return results
+        organization_id = getattr(organization, 'pk', organization)
+        deliveries = WebhookDispatcher.enqueue(event_name, payload, organization_id)
+        return [
+            {'webhook': str(delivery.webhook_id), 'delivery': str(delivery.id), 'status': delivery.status}
+            for delivery in deliveries
+        ]
 
     @staticmethod
     def sync_slack(organization, message):
@@ -0,0 +1,70 @@
+"""
+Integration Signals - API key cache invalidation
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from apps.core.models import Organization
+from .api_keys import APIKeyCache
+from .models import APIKey
+
+
+def _invalidate_on_commit(prefixes):
+    prefixes = [p for p in prefixes if p]
+    if prefixes:
+        transaction.on_commit(lambda: APIKeyCache.invalidate(*prefixes))
+
+
+@receiver(post_init, sender=APIKey)
+def remember_api_key_prefix(sender, instance, **kwargs):
+    """Keep the loaded prefix so a rotated key's old cache entry can be dropped"""
+    instance._loaded_prefix = instance.__dict__.get('prefix')
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_api_key(sender, instance, **kwargs):
+    """Revocation, rotation and edits take effect on the next request"""
+    _invalidate_on_commit({instance.prefix, getattr(instance, '_loaded_prefix', None)})
+    instance._loaded_prefix = instance.prefix
+
+
+# User fields authentication reads from a cached key's user
+USER_AUTH_FIELDS = ('is_active', 'is_superuser', 'is_staff', 'is_org_admin', 'organization_id', 'email')
+
+
+def _user_auth_state(user):
+    return tuple(user.__dict__.get(field) for field in USER_AUTH_FIELDS)
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_user_auth_state(sender, instance, **kwargs):
+    """Keep the loaded auth fields so unrelated user saves skip the key lookup"""
+    instance._api_key_auth_state = _user_auth_state(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_api_keys_of_user(sender, instance, created, **kwargs):
+    """Cached keys carry their user; drop them when the user's auth fields change"""
+    state = _user_auth_state(instance)
+    previous = getattr(instance, '_api_key_auth_state', None)
+    instance._api_key_auth_state = state
+    if created or state == previous:
+        return
+    _invalidate_on_commit(APIKey.all_objects.filter(user_id=instance.pk).values_list('prefix', flat=True))
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_api_keys_of_deleted_user(sender, instance, **kwargs):
+    """Keys of a deleted user must stop authenticating at once"""
+    _invalidate_on_commit(APIKey.all_objects.filter(user_id=instance.pk).values_list('prefix', flat=True))
+
+
+@receiver(post_save, sender=Organization)
+def invalidate_api_keys_of_organization(sender, instance, **kwargs):
+    """Cached keys carry their organization (activity and subscription checks)"""
+    _invalidate_on_commit(
+        APIKey.all_objects.filter(organization_id=instance.pk).values_list('prefix', flat=True)
+    )
@@ -0,0 +1,27 @@
+"""
+Integration Tasks - Webhook outbox draining
+"""
+
+import time
+
+from celery import shared_task
+
+
+@shared_task(bind=True, ignore_result=True)
+def drain_webhook_outbox(self, time_limit: float = 50.0):
+    """
+    Deliver due webhook deliveries batch by batch until the outbox is empty
+    or the time budget is spent.
+    Queued after every enqueue and scheduled every minute to pick up retries.
+    """
+    from apps.integrations.webhooks import WebhookDispatcher
+
+    deadline = time.monotonic() + time_limit
+    totals = {}
+    while time.monotonic() < deadline:
+        counts = WebhookDispatcher.drain()
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+        if not counts['claimed']:
+            break
+    return totals
@@ -0,0 +1,157 @@
+"""
+Tests for hashed API key authentication, quotas and batched usage tracking
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.integrations.api_keys import (
+    APIKeyCache, APIKeyQuota, APIKeyUsage, LocalQuotaStore, RedisQuotaStore, generate_key,
+)
+from apps.integrations.models import APIKey
+
+URL = '/api/v1/workflows/definitions/'
+
+
+class APIKeyAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        APIKeyCache._local.clear()
+        APIKeyQuota.set_store(RedisQuotaStore(fakeredis.FakeRedis()))
+        self.addCleanup(APIKeyQuota.set_store, None)
+        self.addCleanup(APIKeyUsage.take)
+
+        self.org = Organization.objects.create(name='Key Org', email='keys@example.com')
+        self.user = User.objects.create_user(
+            email='machine@example.com', password='pass',
+            first_name='Machine', last_name='User', organization=self.org,
+        )
+        self.raw_key, prefix, key_hash = generate_key()
+        self.api_key = APIKey.all_objects.create(
+            organization=self.org, user=self.user, name='ERP sync',
+            prefix=prefix, key_hash=key_hash, rate_limit=3, permissions=['workflows.read'],
+        )
+        self.client = APIClient()
+
+    def _get(self, raw_key=None):
+        return self.client.get(URL, HTTP_X_API_KEY=raw_key or self.raw_key)
+
+    def test_key_is_stored_hashed_and_looked_up_once(self):
+        self.assertNotIn(self.raw_key, (self.api_key.prefix, self.api_key.key_hash))
+
+        with mock.patch.object(APIKeyCache, '_load', wraps=APIKeyCache._load) as load:
+            self.assertEqual(self._get().status_code, 200)
+            response = self.client.get(URL, HTTP_AUTHORIZATION=f'Api-Key {self.raw_key}')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(load.call_count, 1)
+
+        tampered = self.raw_key[:-2] + ('AA' if not self.raw_key.endswith('AA') else 'BB')
+        self.assertEqual(self._get(tampered).status_code, 401)
+        self.assertEqual(self._get('hrms_notakey').status_code, 401)
+
+    def test_revoking_a_key_invalidates_the_cached_lookup(self):
+        self.assertEqual(self._get().status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_key.revoked_at = timezone.now()
+            self.api_key.save()
+
+        self.assertEqual(self._get().status_code, 401)
+
+    def test_key_scopes_limit_modules_and_writes(self):
+        self.assertEqual(self._get().status_code, 200)
+        self.assertEqual(
+            self.client.post(URL, {}, HTTP_X_API_KEY=self.raw_key).status_code, 403
+        )
+        self.assertEqual(
+            self.client.get('/api/v1/employees/', HTTP_X_API_KEY=self.raw_key).status_code, 403
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_key.permissions = []
+            self.api_key.save()
+        self.assertEqual(self._get().status_code, 403)
+
+    def test_only_auth_relevant_user_changes_drop_cached_keys(self):
+        self.assertEqual(self._get().status_code, 200)
+
+        with mock.patch.object(APIKeyCache, 'invalidate') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=['last_login'])
+        invalidate.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self._get().status_code, 401)
+
+    def test_keys_act_as_an_organization_user_and_never_a_superuser(self):
+        admin = User.objects.create_superuser(
+            email='root@example.com', password='pass', first_name='Root', last_name='User',
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        url = '/api/v1/integrations/api-keys/'
+
+        self.assertEqual(client.post(url, {'name': 'No user'}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'name': 'Root', 'user': str(admin.id)}, format='json').status_code, 400)
+        response = client.post(url, {'name': 'Payroll', 'user': str(self.user.id)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        created = APIKey.all_objects.get(name='Payroll')
+        self.assertEqual((created.user_id, created.organization_id), (self.user.id, self.org.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_superuser = True
+            self.user.save()
+        self.assertEqual(self._get().status_code, 401)
+
+    def test_quota_is_enforced_per_key(self):
+        statuses = [self._get().status_code for _ in range(4)]
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertIn('Retry-After', self._get())
+
+    def test_sliding_window_weights_the_previous_window(self):
+        window = APIKeyQuota.WINDOW
+        start = 1000 * window
+        for _ in range(3):
+            self.assertTrue(APIKeyQuota.hit('k', 4, now=start + window * 0.9).allowed)
+
+        # Half way into the next window, 3 * 0.5 = 1.5 of the old calls still count
+        results = [APIKeyQuota.hit('k', 4, now=start + window * 1.5).allowed for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertTrue(APIKeyQuota.hit('k', 4, now=start + window * 2.5).allowed)
+
+    def test_unreachable_redis_falls_back_to_local_counters(self):
+        broken = mock.Mock(spec=RedisQuotaStore)
+        broken.hit.side_effect = ConnectionError('redis down')
+        APIKeyQuota.set_store(broken)
+
+        with mock.patch.object(APIKeyQuota, '_fallback', LocalQuotaStore()):
+            results = [APIKeyQuota.hit('fallback', 2).allowed for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(broken.hit.call_count, 1)
+
+    def test_last_used_is_written_in_one_batched_update(self):
+        with mock.patch.object(APIKeyUsage, 'FLUSH_INTERVAL', 3600):
+            for _ in range(3):
+                self.assertEqual(self._get().status_code, 200)
+        self.api_key.refresh_from_db()
+        self.assertIsNone(self.api_key.last_used)
+
+        earlier = timezone.now() - timedelta(hours=1)
+        APIKeyUsage.record(self.api_key.id, earlier)
+        with self.assertNumQueries(1):
+            self.assertEqual(APIKeyUsage.flush(), 1)
+        self.api_key.refresh_from_db()
+        self.assertGreater(self.api_key.last_used, earlier)
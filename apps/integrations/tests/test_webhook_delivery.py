@@ -0,0 +1,145 @@
+"""
+Tests for outbox-backed webhook delivery against a local HTTP server
+"""
+
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.models import Organization
+from apps.integrations.models import Webhook, WebhookDelivery, WebhookDeliveryAttempt
+from apps.integrations.services import IntegrationService
+from apps.integrations.webhooks import WebhookDispatcher, verify_signature
+
+
+class StubServer:
+    """Records requests and answers with queued status codes (default 200)"""
+
+    def __init__(self, delay=0.0):
+        self.requests = []
+        self.statuses = []
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                with stub.lock:
+                    stub.requests.append((dict(self.headers), body))
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+                self.send_response(status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/hook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class WebhookDeliveryTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Hook Org', email='hook@example.com')
+        self.stub = StubServer()
+        self.addCleanup(self.stub.close)
+        self.webhook = self._webhook(['leave.approved'])
+
+    def _webhook(self, events, url=None, **extra):
+        return Webhook.all_objects.create(
+            organization=self.org, name='Receiver', url=url or self.stub.url,
+            secret='s3cret', events=events, **extra,
+        )
+
+    def _make_due(self):
+        WebhookDelivery.all_objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_event_is_signed_and_delivered_after_commit(self):
+        self._webhook(['employee.created'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            results = IntegrationService.trigger_webhook('leave.approved', {'days': 2}, self.org)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(self.stub.requests), 1)
+        headers, body = self.stub.requests[0]
+        self.assertEqual(headers['X-HRMS-Event'], 'leave.approved')
+        self.assertTrue(verify_signature('s3cret', body, headers['X-HRMS-Timestamp'], headers['X-HRMS-Signature']))
+        self.assertFalse(verify_signature('wrong', body, headers['X-HRMS-Timestamp'], headers['X-HRMS-Signature']))
+
+        delivery = WebhookDelivery.all_objects.get()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.last_status_code), ('delivered', 1, 200))
+        self.assertEqual(WebhookDeliveryAttempt.all_objects.filter(delivery=delivery).count(), 1)
+
+    def test_server_errors_are_retried_with_backoff_and_client_errors_fail(self):
+        self.stub.statuses = [503, 400]
+        WebhookDispatcher.enqueue('leave.approved', {'n': 1}, self.org.id)
+        WebhookDispatcher.enqueue('leave.approved', {'n': 2}, self.org.id)
+
+        before = timezone.now()
+        counts = WebhookDispatcher.drain()
+        self.assertEqual((counts['retrying'], counts['failed']), (1, 1))
+
+        retrying = WebhookDelivery.all_objects.get(status='pending')
+        delay = (retrying.next_attempt_at - before).total_seconds()
+        self.assertGreaterEqual(delay, WebhookDispatcher.BACKOFF_BASE / 2)
+        self.assertLessEqual(delay, WebhookDispatcher.BACKOFF_BASE + 1)
+        self.assertEqual(WebhookDispatcher.drain()['claimed'], 0)
+
+        self._make_due()
+        self.assertEqual(WebhookDispatcher.drain()['delivered'], 1)
+        retrying.refresh_from_db()
+        self.assertEqual((retrying.status, retrying.attempts), ('delivered', 2))
+        self.webhook.refresh_from_db()
+        self.assertEqual(self.webhook.consecutive_failures, 0)
+
+    def test_circuit_breaker_disables_failing_endpoint_until_enabled(self):
+        self.stub.statuses = [500] * 3
+        for n in range(3):
+            WebhookDispatcher.enqueue('leave.approved', {'n': n}, self.org.id)
+
+        with mock.patch.object(WebhookDispatcher, 'FAILURE_THRESHOLD', 3):
+            self.assertEqual(WebhookDispatcher.drain()['disabled'], 1)
+
+        self.webhook.refresh_from_db()
+        self.assertFalse(self.webhook.is_active)
+        self.assertIsNotNone(self.webhook.disabled_at)
+
+        self._make_due()
+        self.assertEqual(WebhookDispatcher.drain()['claimed'], 0)
+
+        WebhookDispatcher.enable(self.webhook)
+        self.assertEqual(WebhookDispatcher.drain()['delivered'], 3)
+
+    def test_concurrency_is_limited_per_endpoint(self):
+        slow = StubServer(delay=0.05)
+        self.addCleanup(slow.close)
+        self._webhook(['leave.approved'], url=slow.url, max_concurrency=2)
+        for n in range(8):
+            WebhookDispatcher.enqueue('leave.approved', {'n': n}, self.org.id)
+
+        counts = WebhookDispatcher.drain()
+
+        self.assertEqual(counts['delivered'], 16)
+        self.assertEqual(len(slow.requests), 8)
+        self.assertLessEqual(slow.max_in_flight, 2)
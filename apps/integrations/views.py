@@ -10,8 +10,10 @@ from django.utils import timezone
 import secrets
 import requests
 from rest_framework.exceptions import PermissionDenied
-from .models import Integration, Webhook, APIKey
-from .serializers import IntegrationSerializer, WebhookSerializer, APIKeySerializer
+from .models import Integration, Webhook, WebhookDelivery, APIKey
+from .serializers import IntegrationSerializer, WebhookSerializer, WebhookDeliverySerializer, APIKeySerializer
+from .api_keys import generate_key
+from .webhooks import WebhookDispatcher
 from apps.core.tenant_guards import OrganizationViewSetMixin
 
 
@@ -104,6 +106,26 @@ class WebhookViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         webhook.save(update_fields=['secret'])
         return Response({'success': True, 'data': self.get_serializer(webhook).data})
 
+    @action(detail=True, methods=['get'])
+    def deliveries(self, request, pk=None):
+        """Recent deliveries of the webhook with their attempt log"""
+        webhook = self.get_object()
+        queryset = WebhookDelivery.all_objects.filter(webhook=webhook).prefetch_related('attempt_log')
+        delivery_status = request.query_params.get('status')
+        if delivery_status:
+            queryset = queryset.filter(status=delivery_status)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(WebhookDeliverySerializer(page, many=True).data)
+        return Response({'success': True, 'data': WebhookDeliverySerializer(queryset[:50], many=True).data})
+
+    @action(detail=True, methods=['post'])
+    def enable(self, request, pk=None):
+        """Re-enable a webhook disabled by the circuit breaker"""
+        webhook = WebhookDispatcher.enable(self.get_object())
+        return Response({'success': True, 'data': self.get_serializer(webhook).data})
+
 
 class APIKeyViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
     """API Key management - Superuser only"""
@@ -115,13 +137,24 @@ class APIKeyViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         return super().get_queryset()
 
     def perform_create(self, serializer):
-        key = secrets.token_hex(32)
-        org = self.request.user.get_organization() if hasattr(self.request.user, 'get_organization') else None
-        serializer.save(key=key, organization=org)
+        raw_key, prefix, key_hash = generate_key()
+        # The key belongs to the organization of the user it acts as
+        org = serializer.validated_data['user'].get_organization()
+        api_key = serializer.save(prefix=prefix, key_hash=key_hash, organization=org)
+        api_key.raw_key = raw_key
 
     @action(detail=True, methods=['post'])
     def rotate(self, request, pk=None):
         api_key = self.get_object()
-        api_key.key = secrets.token_hex(32)
-        api_key.save(update_fields=['key'])
+        raw_key, api_key.prefix, api_key.key_hash = generate_key()
+        api_key.save(update_fields=['prefix', 'key_hash', 'updated_at'])
+        api_key.raw_key = raw_key
+        return Response({'success': True, 'data': self.get_serializer(api_key).data})
+
+    @action(detail=True, methods=['post'])
+    def revoke(self, request, pk=None):
+        api_key = self.get_object()
+        api_key.revoked_at = timezone.now()
+        api_key.is_active = False
+        api_key.save(update_fields=['revoked_at', 'is_active', 'updated_at'])
         return Response({'success': True, 'data': self.get_serializer(api_key).data})
@@ -0,0 +1,325 @@
+"""
+Webhook Delivery - Outbox-backed, signed and retried webhook dispatch
+"""
+
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Webhook, WebhookDelivery, WebhookDeliveryAttempt
+
+logger = logging.getLogger(__name__)
+
+
+def sign_payload(secret: str, body: bytes, timestamp: int) -> str:
+    """HMAC-SHA256 of ``<timestamp>.<body>`` with the webhook secret, hex encoded"""
+    message = str(timestamp).encode() + b'.' + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, timestamp, signature: str, tolerance: int = 300) -> bool:
+    """Receiver-side check of an ``X-HRMS-Signature`` header (``sha256=<hex>``)"""
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    expected = f"sha256={sign_payload(secret, body, timestamp)}"
+    return hmac.compare_digest(expected, signature or '')
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of one HTTP attempt"""
+    status_code: Optional[int] = None
+    response_body: str = ''
+    error: str = ''
+    duration_ms: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+
+class WebhookDispatcher:
+    """
+    Delivers webhook events through the WebhookDelivery outbox.
+
+    ``enqueue`` writes one outbox row per subscribed webhook in the caller's
+    transaction and schedules a drain after commit. ``drain`` claims due
+    rows, posts them concurrently over a pooled HTTP session (at most
+    ``Webhook.max_concurrency`` requests in flight per endpoint and worker),
+    logs every attempt and reschedules failures with exponential backoff and
+    jitter. An endpoint that keeps failing trips the circuit breaker and is
+    disabled until it is re-enabled; its pending deliveries are kept.
+    """
+
+    TIMEOUT = getattr(settings, 'WEBHOOK_TIMEOUT', 10)
+    MAX_ATTEMPTS = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 8)
+    BACKOFF_BASE = getattr(settings, 'WEBHOOK_BACKOFF_BASE', 30)  # seconds
+    BACKOFF_MAX = getattr(settings, 'WEBHOOK_BACKOFF_MAX', 6 * 3600)  # 6 hours
+    LEASE_SECONDS = getattr(settings, 'WEBHOOK_LEASE_SECONDS', 300)
+    FAILURE_THRESHOLD = getattr(settings, 'WEBHOOK_FAILURE_THRESHOLD', 20)
+    BATCH_SIZE = getattr(settings, 'WEBHOOK_BATCH_SIZE', 200)
+    POOL_SIZE = getattr(settings, 'WEBHOOK_POOL_SIZE', 32)
+    RESPONSE_SNIPPET = 1000
+    RETRYABLE_STATUS = (408, 425, 429)
+
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """Process-wide HTTP session; connections are kept alive and reused"""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=cls.POOL_SIZE, pool_maxsize=cls.POOL_SIZE, max_retries=0
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    cls._session = session
+        return cls._session
+
+    # ----- Enqueue -----
+
+    @staticmethod
+    def subscribers(organization_id, event_name) -> List[Webhook]:
+        """Active webhooks of an organization subscribed to an event ('*' matches all)"""
+        webhooks = Webhook.all_objects.filter(
+            organization_id=organization_id, is_active=True, is_deleted=False
+        ).only('id', 'organization_id', 'events')
+        return [w for w in webhooks if event_name in (w.events or []) or '*' in (w.events or [])]
+
+    @classmethod
+    def enqueue(cls, event_name, payload, organization_id) -> List[WebhookDelivery]:
+        """Write outbox rows for every subscriber and drain them after commit"""
+        from .tasks import drain_webhook_outbox
+
+        webhooks = cls.subscribers(organization_id, event_name)
+        if not webhooks:
+            return []
+
+        payload = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+        deliveries = WebhookDelivery.all_objects.bulk_create([
+            WebhookDelivery(
+                organization_id=organization_id, webhook=webhook,
+                event=event_name, payload=payload,
+            )
+            for webhook in webhooks
+        ])
+        transaction.on_commit(lambda: drain_webhook_outbox.delay())
+        return deliveries
+
+    # ----- Drain -----
+
+    @classmethod
+    def claim(cls, batch_size=None) -> List[WebhookDelivery]:
+        """
+        Lease due deliveries of enabled webhooks. Locked rows are skipped so
+        concurrent workers never claim the same delivery.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            deliveries = list(
+                WebhookDelivery.all_objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('webhook')
+                .filter(
+                    status__in=('pending', 'in_progress'),
+                    next_attempt_at__lte=now,
+                    webhook__is_active=True,
+                )
+                .order_by('next_attempt_at')[:batch_size or cls.BATCH_SIZE]
+            )
+            if deliveries:
+                WebhookDelivery.all_objects.filter(id__in=[d.id for d in deliveries]).update(
+                    status='in_progress',
+                    next_attempt_at=now + timedelta(seconds=cls.LEASE_SECONDS),
+                )
+        return deliveries
+
+    @classmethod
+    def drain(cls, batch_size=None) -> Dict[str, int]:
+        """
+        Claim one batch, deliver it and record the outcomes.
+
+        Returns:
+            {'claimed', 'delivered', 'retrying', 'failed', 'disabled'}
+        """
+        deliveries = cls.claim(batch_size)
+        if not deliveries:
+            return {'claimed': 0, 'delivered': 0, 'retrying': 0, 'failed': 0, 'disabled': 0}
+        results = cls.send_all(deliveries)
+        return cls.record(deliveries, results)
+
+    @classmethod
+    def build_request(cls, delivery):
+        """Serialized body and signed headers of a delivery"""
+        webhook = delivery.webhook
+        body = json.dumps({
+            'id': str(delivery.event_id),
+            'event': delivery.event,
+            'created_at': delivery.created_at,
+            'data': delivery.payload,
+        }, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        timestamp = int(time.time())
+
+        headers = {str(k): str(v) for k, v in (webhook.headers or {}).items()}
+        headers.update({
+            'Content-Type': 'application/json',
+            'User-Agent': 'HRMS-Webhooks/1.0',
+            'X-HRMS-Event': delivery.event,
+            'X-HRMS-Delivery': str(delivery.event_id),
+            'X-HRMS-Timestamp': str(timestamp),
+            'X-HRMS-Signature': f"sha256={sign_payload(webhook.secret, body, timestamp)}",
+        })
+        return body, headers
+
+    @classmethod
+    def send(cls, delivery) -> DeliveryResult:
+        """POST one delivery (no database access, safe to run in worker threads)"""
+        body, headers = cls.build_request(delivery)
+        started = time.perf_counter()
+        try:
+            response = cls.session().post(delivery.webhook.url, data=body, headers=headers, timeout=cls.TIMEOUT)
+            result = DeliveryResult(
+                status_code=response.status_code,
+                response_body=response.text[:cls.RESPONSE_SNIPPET],
+            )
+        except requests.RequestException as exc:
+            result = DeliveryResult(error=str(exc)[:cls.RESPONSE_SNIPPET])
+        result.duration_ms = int((time.perf_counter() - started) * 1000)
+        return result
+
+    @classmethod
+    def send_all(cls, deliveries) -> List[DeliveryResult]:
+        """Send deliveries concurrently, bounded per endpoint by its max_concurrency"""
+        limits = {
+            d.webhook_id: threading.BoundedSemaphore(max(1, d.webhook.max_concurrency))
+            for d in deliveries
+        }
+
+        def run(delivery):
+            with limits[delivery.webhook_id]:
+                return cls.send(delivery)
+
+        # Interleave endpoints so one slow endpoint does not occupy every worker
+        by_webhook = {}
+        for delivery in deliveries:
+            by_webhook.setdefault(delivery.webhook_id, []).append(delivery)
+        ordered = [d for d in itertools.chain(*itertools.zip_longest(*by_webhook.values())) if d]
+
+        with ThreadPoolExecutor(max_workers=min(cls.POOL_SIZE, len(ordered))) as executor:
+            results = dict(zip((d.id for d in ordered), executor.map(run, ordered)))
+        return [results[d.id] for d in deliveries]
+
+    @classmethod
+    def backoff(cls, attempt) -> timedelta:
+        """Exponential delay before retry ``attempt + 1``, with equal jitter"""
+        delay = min(cls.BACKOFF_MAX, cls.BACKOFF_BASE * 2 ** max(0, attempt - 1))
+        return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+    @classmethod
+    def is_retryable(cls, result) -> bool:
+        return result.status_code is None or result.status_code >= 500 or \
+            result.status_code in cls.RETRYABLE_STATUS
+
+    @classmethod
+    def record(cls, deliveries, results) -> Dict[str, int]:
+        """Persist attempts, delivery states and circuit breaker counters in bulk"""
+        now = timezone.now()
+        counts = {'claimed': len(deliveries), 'delivered': 0, 'retrying': 0, 'failed': 0, 'disabled': 0}
+        attempts = []
+        # Per webhook: failures after the last success, and whether any succeeded
+        streaks: Dict = {}
+
+        for delivery, result in zip(deliveries, results):
+            delivery.attempts += 1
+            delivery.updated_at = now
+            delivery.last_status_code = result.status_code
+            delivery.last_error = result.error or ('' if result.ok else f"HTTP {result.status_code}")
+            attempts.append(WebhookDeliveryAttempt(
+                organization_id=delivery.organization_id,
+                delivery=delivery,
+                attempt=delivery.attempts,
+                status_code=result.status_code,
+                response_body=result.response_body,
+                error=result.error,
+                duration_ms=result.duration_ms,
+            ))
+
+            failures, succeeded = streaks.get(delivery.webhook_id, (0, False))
+            if result.ok:
+                delivery.status = 'delivered'
+                delivery.delivered_at = now
+                streaks[delivery.webhook_id] = (0, True)
+                counts['delivered'] += 1
+                continue
+
+            streaks[delivery.webhook_id] = (failures + 1, succeeded)
+            if cls.is_retryable(result) and delivery.attempts < cls.MAX_ATTEMPTS:
+                delivery.status = 'pending'
+                delivery.next_attempt_at = now + cls.backoff(delivery.attempts)
+                counts['retrying'] += 1
+            else:
+                delivery.status = 'failed'
+                counts['failed'] += 1
+
+        with transaction.atomic():
+            WebhookDeliveryAttempt.all_objects.bulk_create(attempts)
+            WebhookDelivery.all_objects.bulk_update(deliveries, [
+                'status', 'attempts', 'next_attempt_at', 'last_status_code',
+                'last_error', 'delivered_at', 'updated_at',
+            ])
+
+            # A success resets the streak; otherwise failures accumulate
+            resets, increments = {}, {}
+            for webhook_id, (failures, succeeded) in streaks.items():
+                (resets if succeeded else increments).setdefault(failures, []).append(webhook_id)
+            for failures, ids in resets.items():
+                Webhook.all_objects.filter(id__in=ids).update(consecutive_failures=failures)
+            for failures, ids in increments.items():
+                Webhook.all_objects.filter(id__in=ids).update(
+                    consecutive_failures=F('consecutive_failures') + failures
+                )
+
+            counts['disabled'] = Webhook.all_objects.filter(
+                id__in=list(streaks), is_active=True, consecutive_failures__gte=cls.FAILURE_THRESHOLD,
+            ).update(
+                is_active=False,
+                disabled_at=now,
+                disabled_reason=f"Circuit opened after {cls.FAILURE_THRESHOLD} consecutive failures",
+            )
+        if counts['disabled']:
+            logger.warning("Disabled %s failing webhook endpoint(s)", counts['disabled'])
+        return counts
+
+    @staticmethod
+    def enable(webhook) -> Webhook:
+        """Close the circuit of a disabled webhook; its pending deliveries resume"""
+        webhook.is_active = True
+        webhook.consecutive_failures = 0
+        webhook.disabled_at = None
+        webhook.disabled_reason = ''
+        webhook.save(update_fields=['is_active', 'consecutive_failures', 'disabled_at', 'disabled_reason', 'updated_at'])
+        return webhook
@@ -0,0 +1,82 @@
+"""
+Leave Balance Cache - Cached per-employee balance snapshots
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class LeaveBalanceCache:
+    """
+    Per-employee leave balance snapshots for the my_balance endpoint.
+
+    A snapshot holds the serialized balances of every year read so far and is
+    stamped with its organization's generation token. Single-balance changes
+    delete the employee's snapshot; batch jobs and leave type changes rotate
+    the generation so every snapshot of the organization goes stale at once.
+    """
+
+    CACHE_TTL = getattr(settings, 'LEAVE_BALANCE_CACHE_TTL', 300)  # 5 minutes
+    CACHE_PREFIX = 'leave:balances:'
+
+    @classmethod
+    def _make_key(cls, *parts):
+        """Generate cache key"""
+        key = ':'.join(str(p) for p in parts)
+        return f"{cls.CACHE_PREFIX}{key}"
+
+    @classmethod
+    def _generation_key(cls, organization_id):
+        return cls._make_key('org', organization_id or 'global', 'generation')
+
+    @classmethod
+    def _snapshot_key(cls, employee_id):
+        return cls._make_key('employee', employee_id)
+
+    @classmethod
+    def _get_generation(cls, organization_id) -> str:
+        key = cls._generation_key(organization_id)
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            generation = cache.get(key)
+        return generation
+
+    @classmethod
+    def get(cls, employee, year: int):
+        """Get cached serialized balances, or None on a miss"""
+        gen_key = cls._generation_key(employee.organization_id)
+        snap_key = cls._snapshot_key(employee.id)
+        values = cache.get_many([gen_key, snap_key])
+
+        snapshot = values.get(snap_key)
+        if not snapshot or snapshot['generation'] != values.get(gen_key):
+            return None
+        return snapshot['years'].get(year)
+
+    @classmethod
+    def set(cls, employee, year: int, data) -> None:
+        """Cache serialized balances for an employee and year"""
+        generation = cls._get_generation(employee.organization_id)
+        snap_key = cls._snapshot_key(employee.id)
+
+        snapshot = cache.get(snap_key)
+        if not snapshot or snapshot['generation'] != generation:
+            snapshot = {'generation': generation, 'years': {}}
+        snapshot['years'][year] = list(data)
+        cache.set(snap_key, snapshot, cls.CACHE_TTL)
+
+    @classmethod
+    def invalidate(cls, employee_id) -> None:
+        """Drop an employee's snapshot once the current transaction commits"""
+        key = cls._snapshot_key(employee_id)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @classmethod
+    def invalidate_organization(cls, organization_id) -> None:
+        """Drop every snapshot of an organization once the current transaction commits"""
+        key = cls._generation_key(organization_id)
+        transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
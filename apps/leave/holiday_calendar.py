@@ -0,0 +1,339 @@
+"""
+Holiday Calendar - Cached per-org/per-location year calendars and O(1) working-day counts
+"""
+
+import threading
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+# Day kinds (bit 0 = weekend, bit 1 = holiday)
+KIND_WORKING = 0
+KIND_WEEKEND = 1
+KIND_HOLIDAY = 2
+KIND_WEEKEND_HOLIDAY = 3
+
+_KINDS = (KIND_WORKING, KIND_WEEKEND, KIND_HOLIDAY, KIND_WEEKEND_HOLIDAY)
+
+
+class YearCalendar:
+    """
+    Immutable day-kind calendar for one organization/location/year.
+
+    Keeps one prefix-sum array per day kind so the number of working days,
+    weekends or holidays between any two dates of the year is O(1).
+    """
+
+    __slots__ = ('year', 'holidays', '_jan1', '_kinds', '_prefix')
+
+    def __init__(self, year: int, holidays: Iterable[date]):
+        self.year = year
+        self.holidays = tuple(sorted(d for d in set(holidays) if d.year == year))
+        self._jan1 = date(year, 1, 1).toordinal()
+
+        days_in_year = date(year + 1, 1, 1).toordinal() - self._jan1
+        holiday_offsets = {d.toordinal() - self._jan1 for d in self.holidays}
+        first_weekday = date(year, 1, 1).weekday()
+
+        kinds = bytearray(days_in_year)
+        for offset in range(days_in_year):
+            kind = KIND_WEEKEND if (first_weekday + offset) % 7 >= 5 else KIND_WORKING
+            if offset in holiday_offsets:
+                kind |= KIND_HOLIDAY
+            kinds[offset] = kind
+        self._kinds = bytes(kinds)
+
+        prefix = []
+        for kind in _KINDS:
+            sums = array('H', [0]) * (days_in_year + 1)
+            running = 0
+            for offset, day_kind in enumerate(kinds):
+                if day_kind == kind:
+                    running += 1
+                sums[offset + 1] = running
+            prefix.append(sums)
+        self._prefix = tuple(prefix)
+
+    def kind(self, day: date) -> int:
+        """Day kind of a date within this year"""
+        return self._kinds[day.toordinal() - self._jan1]
+
+    def counts(self, start: date, end: date) -> Tuple[int, int, int, int]:
+        """Per-kind day counts for the inclusive range [start, end] within this year"""
+        lo = start.toordinal() - self._jan1
+        hi = end.toordinal() - self._jan1 + 1
+        return tuple(sums[hi] - sums[lo] for sums in self._prefix)
+
+
+class HolidayCalendarCache:
+    """
+    Holiday calendars loaded once per organization/location/year.
+
+    The sorted holiday dates live in the shared cache; built prefix-sum
+    calendars are memoized per process. Every key embeds a per-organization
+    version token that is rotated whenever a Holiday changes.
+    """
+
+    CACHE_TTL = getattr(settings, 'HOLIDAY_CALENDAR_CACHE_TTL', 86400)  # 1 day
+    CACHE_PREFIX = 'leave:holidays:'
+    LOCAL_MAXSIZE = 512
+
+    _local: 'OrderedDict[str, YearCalendar]' = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _make_key(cls, *parts):
+        """Generate cache key"""
+        key = ':'.join(str(p) for p in parts)
+        return f"{cls.CACHE_PREFIX}{key}"
+
+    @classmethod
+    def get_version(cls, organization_id) -> str:
+        """Current calendar version token for an organization"""
+        key = cls._make_key(organization_id or 'global', 'version')
+        version = cache.get(key)
+        if version is None:
+            # Never fall back to a fixed token: a stale calendar cached under
+            # it before an eviction would become reachable again.
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def invalidate(cls, organization_id) -> None:
+        """Rotate the version token so every cached calendar of the org is dropped"""
+        key = cls._make_key(organization_id or 'global', 'version')
+        cache.set(key, uuid.uuid4().hex, None)
+
+    @classmethod
+    def get_year(cls, organization_id, location_id, year: int) -> YearCalendar:
+        """Get the calendar for an organization/location/year"""
+        version = cls.get_version(organization_id)
+        key = cls._make_key(
+            organization_id or 'global', location_id or 'all', year, version
+        )
+
+        with cls._lock:
+            calendar = cls._local.get(key)
+            if calendar is not None:
+                cls._local.move_to_end(key)
+                return calendar
+
+        holiday_ordinals = cache.get(key)
+        if holiday_ordinals is None:
+            holidays = cls._load_holidays(organization_id, location_id, year)
+            cache.set(key, [d.toordinal() for d in holidays], cls.CACHE_TTL)
+        else:
+            holidays = [date.fromordinal(o) for o in holiday_ordinals]
+
+        calendar = YearCalendar(year, holidays)
+        with cls._lock:
+            cls._local[key] = calendar
+            while len(cls._local) > cls.LOCAL_MAXSIZE:
+                cls._local.popitem(last=False)
+        return calendar
+
+    @classmethod
+    def _load_holidays(cls, organization_id, location_id, year: int) -> List[date]:
+        """Load active holiday dates for a year (one query)"""
+        from apps.leave.models import Holiday
+
+        if organization_id:
+            holidays_qs = Holiday.all_objects.filter(organization_id=organization_id)
+        else:
+            holidays_qs = Holiday.objects.all()
+
+        holidays_qs = holidays_qs.filter(
+            date__gte=date(year, 1, 1),
+            date__lte=date(year, 12, 31),
+            is_active=True
+        )
+
+        if location_id:
+            holidays_qs = holidays_qs.filter(
+                Q(locations__isnull=True) | Q(locations=location_id)
+            )
+
+        return sorted(set(holidays_qs.values_list('date', flat=True)))
+
+
+class WorkingDayCalculator:
+    """
+    Working-day and leave-day arithmetic over cached holiday calendars.
+
+    Counts are computed from per-year prefix sums, so the cost of a count does
+    not depend on the length of the range.
+    """
+
+    def __init__(self, organization_id=None, location_id=None):
+        self.organization_id = organization_id
+        self.location_id = location_id
+
+    @classmethod
+    def for_employee(cls, employee=None) -> 'WorkingDayCalculator':
+        """Calculator scoped to the current organization and employee location"""
+        from apps.core.context import get_current_organization
+
+        org = get_current_organization()
+        organization_id = org.id if org else getattr(employee, 'organization_id', None)
+        location_id = getattr(employee, 'location_id', None) if employee else None
+        return cls(organization_id, location_id)
+
+    def year(self, year: int) -> YearCalendar:
+        return HolidayCalendarCache.get_year(self.organization_id, self.location_id, year)
+
+    def kind(self, day: date) -> int:
+        return self.year(day.year).kind(day)
+
+    def is_holiday(self, day: date) -> bool:
+        return bool(self.kind(day) & KIND_HOLIDAY)
+
+    def counts(self, start: date, end: date) -> List[int]:
+        """Per-kind day counts for [start, end], one O(1) lookup per calendar year"""
+        totals = [0, 0, 0, 0]
+        if start > end:
+            return totals
+
+        for year in range(start.year, end.year + 1):
+            seg_start = max(start, date(year, 1, 1))
+            seg_end = min(end, date(year, 12, 31))
+            for kind, count in enumerate(self.year(year).counts(seg_start, seg_end)):
+                totals[kind] += count
+        return totals
+
+    def count_working_days(self, start: date, end: date) -> int:
+        """Number of non-weekend, non-holiday days in [start, end]"""
+        return self.counts(start, end)[KIND_WORKING]
+
+    def holidays_between(self, start: date, end: date) -> Set[date]:
+        """Holiday dates in [start, end]"""
+        holidays = set()
+        for year in range(start.year, end.year + 1):
+            holidays.update(
+                d for d in self.year(year).holidays if start <= d <= end
+            )
+        return holidays
+
+    @staticmethod
+    def _counted_kinds(leave_policy=None) -> Tuple[Set[int], Set[int]]:
+        """
+        Split day kinds into those that always count as leave and those that
+        count only when sandwiched between the first and last leave day.
+        """
+        if leave_policy is None:
+            return {KIND_WORKING}, set()
+
+        always = {KIND_WORKING}
+        sandwiched = set()
+        sandwich_rule = leave_policy.sandwich_rule
+
+        rules = (
+            (KIND_WEEKEND, leave_policy.count_weekends),
+            (KIND_HOLIDAY, leave_policy.count_holidays),
+            (KIND_WEEKEND_HOLIDAY, leave_policy.count_weekends and leave_policy.count_holidays),
+        )
+        for kind, counted in rules:
+            if counted:
+                always.add(kind)
+            elif sandwich_rule:
+                sandwiched.add(kind)
+
+        return always, sandwiched
+
+    def count_leave_days(
+        self,
+        start_date: date,
+        end_date: date,
+        start_day_type: str = 'full',
+        end_day_type: str = 'full',
+        leave_policy=None,
+    ) -> Decimal:
+        """Leave days for a request, honouring half days and the sandwich rule"""
+        if start_date > end_date:
+            return Decimal('0')
+
+        always, sandwiched = self._counted_kinds(leave_policy)
+
+        full = self.counts(start_date, end_date)
+        total = sum(full[kind] for kind in always)
+        if sandwiched and (end_date - start_date).days >= 2:
+            interior = self.counts(start_date + timedelta(days=1), end_date - timedelta(days=1))
+            total += sum(interior[kind] for kind in sandwiched)
+
+        total_days = Decimal(total)
+        start_counted = self.kind(start_date) in always
+
+        if start_date == end_date:
+            if start_counted and (start_day_type != 'full' or end_day_type != 'full'):
+                total_days -= Decimal('0.5')
+            return total_days
+
+        if start_counted and start_day_type != 'full':
+            total_days -= Decimal('0.5')
+        if end_day_type != 'full' and self.kind(end_date) in always:
+            total_days -= Decimal('0.5')
+
+        return total_days
+
+    def leave_dates(self, start_date: date, end_date: date, leave_policy=None) -> List[date]:
+        """Dates that count as leave in [start_date, end_date]"""
+        always, sandwiched = self._counted_kinds(leave_policy)
+
+        dates = []
+        current = start_date
+        while current <= end_date:
+            kind = self.kind(current)
+            if kind in always or (
+                kind in sandwiched and start_date < current < end_date
+            ):
+                dates.append(current)
+            current += timedelta(days=1)
+        return dates
+
+
+def count_leave_days_bulk(leave_requests, leave_policy=None) -> Dict:
+    """
+    Count leave days for many leave requests at once.
+
+    Employee locations are resolved in one query and each distinct
+    organization/location/year calendar is loaded once, so payroll can size
+    thousands of requests without per-request holiday queries.
+
+    Returns:
+        {leave_request.id: Decimal}
+    """
+    from apps.employees.models import Employee
+
+    leave_requests = list(leave_requests)
+    employee_ids = {lr.employee_id for lr in leave_requests}
+    employee_scope = {
+        emp_id: (org_id, loc_id)
+        for emp_id, org_id, loc_id in Employee.all_objects.filter(
+            id__in=employee_ids
+        ).values_list('id', 'organization_id', 'location_id')
+    }
+
+    calculators = {}
+    results = {}
+    for lr in leave_requests:
+        scope = employee_scope.get(lr.employee_id, (lr.organization_id, None))
+        calculator = calculators.get(scope)
+        if calculator is None:
+            calculator = calculators[scope] = WorkingDayCalculator(*scope)
+
+        results[lr.id] = calculator.count_leave_days(
+            lr.start_date,
+            lr.end_date,
+            lr.start_day_type,
+            lr.end_day_type,
+            leave_policy,
+        )
+    return results
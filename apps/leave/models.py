@@ -99,7 +99,19 @@ class LeaveBalance(OrganizationEntity):
     adjustment = models.DecimalField(max_digits=5, decimal_places=1, default=0)
     carry_forward = models.DecimalField(max_digits=5, decimal_places=1, default=0)
     encashed = models.DecimalField(max_digits=5, decimal_places=1, default=0)
-    
+
+    # Batch job idempotency markers
+    last_accrual_period = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Last accrual period applied (YYYYMM)"
+    )
+    carried_forward_from = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Year whose closing balance was carried into this balance"
+    )
+
     class Meta:
         unique_together = ['employee', 'leave_type', 'year']
         ordering = ['-year', 'leave_type']
@@ -0,0 +1,41 @@
+"""Leave Signals"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Holiday, LeaveBalance, LeaveType
+from .balance_cache import LeaveBalanceCache
+from .holiday_calendar import HolidayCalendarCache
+
+
+def _invalidate_holiday_calendar(organization_id):
+    transaction.on_commit(lambda: HolidayCalendarCache.invalidate(organization_id))
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_holiday_calendar(sender, instance, **kwargs):
+    """Drop cached holiday calendars when a holiday changes"""
+    _invalidate_holiday_calendar(instance.organization_id)
+
+
+@receiver(m2m_changed, sender=Holiday.locations.through)
+def invalidate_holiday_calendar_locations(sender, instance, action, **kwargs):
+    """Drop cached holiday calendars when holiday locations change"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_holiday_calendar(instance.organization_id)
+
+
+@receiver(post_save, sender=LeaveBalance)
+@receiver(post_delete, sender=LeaveBalance)
+def invalidate_leave_balance_snapshot(sender, instance, **kwargs):
+    """Drop the employee's cached balance snapshot when a balance changes"""
+    LeaveBalanceCache.invalidate(instance.employee_id)
+
+
+@receiver(post_save, sender=LeaveType)
+@receiver(post_delete, sender=LeaveType)
+def invalidate_leave_type_snapshots(sender, instance, **kwargs):
+    """Leave types are part of every snapshot of the organization"""
+    LeaveBalanceCache.invalidate_organization(instance.organization_id)
@@ -21,7 +21,7 @@ def run_monthly_accrual():
     for org in organizations:
         set_current_organization(org)
         try:
-            LeaveBalanceService.run_monthly_accrual()
+            LeaveBalanceService.run_monthly_accrual(tenant=org)
         except Exception as e:
             # Log error but continue with other organizations
             print(f"Accrual failed for {org.name}: {e}")
@@ -48,7 +48,7 @@ def run_year_end_carryforward():
     for org in organizations:
         set_current_organization(org)
         try:
-            LeaveBalanceService.run_year_end_carryforward(previous_year, current_year)
+            LeaveBalanceService.run_year_end_carryforward(previous_year, current_year, tenant=org)
         except Exception as e:
             print(f"Carry forward failed for {org.name}: {e}")
             
@@ -60,89 +60,53 @@ def run_year_end_carryforward():
 def send_leave_reminder():
     """
     Send reminder to approvers for pending leave requests.
-    Runs daily.
+    Runs daily; fans out one task per organization.
     """
-    from apps.leave.models import LeaveRequest
     from apps.core.models import Organization
-    from apps.core.context import set_current_organization
-    from datetime import timedelta
     
-    cutoff = timezone.now() - timedelta(days=2)  # Pending for 2+ days
+    organization_ids = list(
+        Organization.objects.filter(is_active=True).values_list('id', flat=True)
+    )
+    for organization_id in organization_ids:
+        send_leave_reminders_for_organization.delay(str(organization_id))
     
-    organizations = Organization.objects.filter(is_active=True)
+    return f"Reminders dispatched for {len(organization_ids)} organizations"
+
+
+@shared_task
+def send_leave_reminders_for_organization(organization_id: str):
+    """Send one consolidated reminder per approver of an organization"""
+    from apps.core.celery_tasks import TenantAwareTask
+    from apps.leave.services import LeaveSLAService
     
-    for org in organizations:
-        set_current_organization(org)
-        pending = LeaveRequest.objects.filter(
-            status=LeaveRequest.STATUS_PENDING,
-            created_at__lt=cutoff,
-            current_approver__isnull=False
-        ).select_related('current_approver', 'employee')
-        
-        for leave in pending:
-            # Send notification to approver
-            from apps.notifications.services import NotificationService
-            
-            if leave.current_approver:
-                NotificationService.notify(
-                    user=leave.current_approver.user,
-                    title='Leave Request Pending Approval',
-                    message=f'Leave request from {leave.employee} for {leave.start_date} to {leave.end_date} is pending your approval',
-                    notification_type='warning',
-                    entity_type='leave_request',
-                    entity_id=leave.id
-                )
-            
-    set_current_organization(None)
-    return "Reminders sent"
+    organization = TenantAwareTask.get_organization(organization_id)
+    notified = LeaveSLAService.send_reminders(organization)
+    return f"Reminded {notified} approvers"
 
 
 @shared_task
 def process_leave_escalation():
     """
     Escalate pending leave requests after timeout.
-    Runs daily.
+    Runs daily; fans out one task per organization.
     """
-    from apps.leave.models import LeaveRequest
-    from apps.leave.services import LeaveApprovalService
     from apps.core.models import Organization
-    from apps.core.context import set_current_organization
-    from datetime import timedelta
     
-    # Escalate if pending for more than 3 days
-    escalation_cutoff = timezone.now() - timedelta(days=3)
+    organization_ids = list(
+        Organization.objects.filter(is_active=True).values_list('id', flat=True)
+    )
+    for organization_id in organization_ids:
+        process_leave_escalation_for_organization.delay(str(organization_id))
     
-    organizations = Organization.objects.filter(is_active=True)
+    return f"Escalations dispatched for {len(organization_ids)} organizations"
+
+
+@shared_task
+def process_leave_escalation_for_organization(organization_id: str):
+    """Escalate overdue leave requests of an organization in one batch"""
+    from apps.core.celery_tasks import TenantAwareTask
+    from apps.leave.services import LeaveSLAService
     
-    for org in organizations:
-        set_current_organization(org)
-        pending = LeaveRequest.objects.filter(
-            status=LeaveRequest.STATUS_PENDING,
-            created_at__lt=escalation_cutoff,
-            current_approver__isnull=False
-        )
-        
-        for leave in pending:
-            # Get next level approver
-            current_level = leave.approvals.count() + 1
-            next_approver = LeaveApprovalService.get_approver(
-                leave.employee, level=current_level + 1
-            )
-            
-            if next_approver:
-                leave.current_approver = next_approver
-                leave.save()
-                
-                # Send escalation notification
-                from apps.notifications.services import NotificationService
-                NotificationService.notify(
-                    user=next_approver.user,
-                    title='Leave Request Escalated',
-                    message=f'Leave request from {leave.employee} has been escalated to you for approval',
-                    notification_type='warning',
-                    entity_type='leave_request',
-                    entity_id=leave.id
-                )
-                
-    set_current_organization(None)
-    return "Escalations processed"
+    organization = TenantAwareTask.get_organization(organization_id)
+    escalated = LeaveSLAService.process_escalations(organization)
+    return f"Escalated {escalated} leave requests"
@@ -0,0 +1,86 @@
+"""
+Tests for set-based leave accrual and carry-forward jobs
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Employee
+from apps.leave.models import LeaveBalance, LeaveType
+from apps.leave.services import LeaveBalanceService
+
+
+class LeaveBalanceJobTests(TestCase):
+    """Monthly accrual and year-end carry forward are idempotent batch jobs"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Accrual Org', email='accrual@example.com')
+        self.leave_type = LeaveType.all_objects.create(
+            organization=self.org, name='Earned', code='EL',
+            annual_quota=Decimal('12'), accrual_type='monthly',
+            carry_forward_allowed=True, max_carry_forward=Decimal('5'),
+        )
+        self.employees = []
+        for i in range(5):
+            user = User.objects.create_user(
+                email=f'accrual{i}@example.com', password='pass',
+                first_name='Emp', last_name=str(i), organization=self.org,
+            )
+            self.employees.append(Employee.all_objects.create(
+                organization=self.org, user=user, employee_id=f'ACC{i}',
+                date_of_joining=date(2020, 1, 1),
+            ))
+
+    def test_monthly_accrual_is_idempotent(self):
+        period = date(2026, 3, 1)
+
+        first = LeaveBalanceService.run_monthly_accrual(self.org, period=period, chunk_size=2)
+        second = LeaveBalanceService.run_monthly_accrual(self.org, period=period, chunk_size=2)
+
+        self.assertEqual(first, 5)
+        self.assertEqual(second, 0)
+        balances = LeaveBalance.all_objects.filter(leave_type=self.leave_type, year=2026)
+        self.assertEqual(balances.count(), 5)
+        self.assertEqual({b.accrued for b in balances}, {Decimal('1.0')})
+
+        LeaveBalanceService.run_monthly_accrual(self.org, period=date(2026, 4, 1), chunk_size=2)
+        self.assertEqual({b.accrued for b in balances.all()}, {Decimal('2.0')})
+
+    def test_probation_excludes_recent_joiners(self):
+        self.leave_type.applicable_after_months = 6
+        self.leave_type.save()
+        Employee.all_objects.filter(id=self.employees[0].id).update(date_of_joining=date(2026, 2, 1))
+
+        accrued = LeaveBalanceService.run_monthly_accrual(self.org, period=date(2026, 3, 1))
+
+        self.assertEqual(accrued, 4)
+
+    def test_year_end_carry_forward_is_idempotent(self):
+        for employee, accrued in zip(self.employees, ['2', '8', '0', '3', '10']):
+            LeaveBalance.all_objects.create(
+                organization=self.org, employee=employee, leave_type=self.leave_type,
+                year=2025, accrued=Decimal(accrued),
+            )
+        # Balance already created for the new year by an accrual run
+        LeaveBalance.all_objects.create(
+            organization=self.org, employee=self.employees[1], leave_type=self.leave_type,
+            year=2026, accrued=Decimal('1'),
+        )
+
+        first = LeaveBalanceService.run_year_end_carryforward(2025, 2026, self.org, chunk_size=2)
+        second = LeaveBalanceService.run_year_end_carryforward(2025, 2026, self.org, chunk_size=2)
+
+        self.assertEqual(first, 5)
+        self.assertEqual(second, 0)
+        carried = dict(
+            LeaveBalance.all_objects.filter(leave_type=self.leave_type, year=2026)
+            .values_list('employee__employee_id', 'carry_forward')
+        )
+        self.assertEqual(carried, {
+            'ACC0': Decimal('2.0'), 'ACC1': Decimal('5.0'), 'ACC2': Decimal('0.0'),
+            'ACC3': Decimal('3.0'), 'ACC4': Decimal('5.0'),
+        })
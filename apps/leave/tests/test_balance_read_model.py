@@ -0,0 +1,75 @@
+"""
+Tests for the leave balance read model
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.authentication.models import User
+from apps.core.context import set_current_organization
+from apps.core.models import Organization
+from apps.employees.models import Employee
+from apps.leave.balance_cache import LeaveBalanceCache
+from apps.leave.models import LeaveBalance, LeaveType
+from apps.leave.services import LeaveBalanceService
+
+
+class LeaveBalanceReadModelTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Balance Org', email='balance@example.com')
+        set_current_organization(self.org)
+        self.addCleanup(set_current_organization, None)
+
+        user = User.objects.create_user(
+            email='balance@example.com', password='pass',
+            first_name='Bal', last_name='Ance', organization=self.org,
+        )
+        self.employee = Employee.objects.create(
+            organization=self.org, user=user, employee_id='BAL1',
+            date_of_joining=date(2020, 1, 1),
+        )
+        self.casual = LeaveType.objects.create(organization=self.org, name='Casual', code='CL')
+        self.sick = LeaveType.objects.create(organization=self.org, name='Sick', code='SL')
+        LeaveBalance.objects.create(
+            organization=self.org, employee=self.employee, leave_type=self.casual,
+            year=2026, accrued=Decimal('6'),
+        )
+
+    def test_get_all_balances_single_query_without_inserts(self):
+        with self.assertNumQueries(1):
+            balances = LeaveBalanceService.get_all_balances(self.employee, 2026)
+
+        by_code = {b['leave_type_code']: b for b in balances}
+        self.assertEqual(by_code['CL']['available'], Decimal('6'))
+        self.assertEqual(by_code['SL']['available'], Decimal('0'))
+        self.assertFalse(LeaveBalance.objects.filter(leave_type=self.sick).exists())
+
+    def test_deduct_and_restore_are_atomic_updates(self):
+        LeaveBalanceService.deduct_balance(self.employee, self.casual, Decimal('2'), 2026)
+        LeaveBalanceService.deduct_balance(self.employee, self.casual, Decimal('1.5'), 2026)
+        balance = LeaveBalanceService.restore_balance(self.employee, self.casual, Decimal('5'), 2026)
+
+        self.assertEqual(balance.taken, Decimal('0'))
+        LeaveBalanceService.deduct_balance(self.employee, self.casual, Decimal('2'), 2026)
+        self.assertEqual(
+            LeaveBalance.objects.get(leave_type=self.casual, year=2026).taken, Decimal('2')
+        )
+
+    def test_snapshot_invalidated_on_balance_change(self):
+        LeaveBalanceCache.set(self.employee, 2026, [{'leave_type_code': 'CL'}])
+        self.assertEqual(LeaveBalanceCache.get(self.employee, 2026), [{'leave_type_code': 'CL'}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaveBalanceService.deduct_balance(self.employee, self.casual, Decimal('1'), 2026)
+        self.assertIsNone(LeaveBalanceCache.get(self.employee, 2026))
+
+        LeaveType.objects.filter(id=self.casual.id).update(accrual_type='monthly', annual_quota=12)
+        LeaveBalanceCache.set(self.employee, 2026, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaveBalanceService.run_monthly_accrual(self.org, period=date(2026, 5, 1))
+        self.assertIsNone(LeaveBalanceCache.get(self.employee, 2026))
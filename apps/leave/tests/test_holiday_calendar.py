@@ -0,0 +1,119 @@
+"""
+Tests for the cached holiday calendar and working-day calculator
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import Organization
+from apps.leave.holiday_calendar import (
+    HolidayCalendarCache, WorkingDayCalculator, YearCalendar,
+    KIND_WORKING, KIND_WEEKEND, KIND_HOLIDAY, KIND_WEEKEND_HOLIDAY,
+)
+from apps.leave.models import Holiday
+
+
+def reference_leave_days(start_date, end_date, start_day_type, end_day_type, leave_policy, holidays):
+    """Day-by-day algorithm the calculator replaces"""
+    total_days = Decimal('0')
+    current_date = start_date
+    while current_date <= end_date:
+        is_weekend = current_date.weekday() >= 5
+        is_holiday = current_date in holidays
+        sandwiched = start_date < current_date < end_date
+        should_count = True
+        if leave_policy:
+            if not leave_policy.count_weekends and is_weekend:
+                should_count = leave_policy.sandwich_rule and sandwiched
+            if not leave_policy.count_holidays and is_holiday:
+                should_count = leave_policy.sandwich_rule and sandwiched
+        elif is_weekend or is_holiday:
+            should_count = False
+        if should_count:
+            if current_date == start_date and start_day_type != 'full':
+                total_days += Decimal('0.5')
+            elif current_date == end_date and end_day_type != 'full':
+                total_days += Decimal('0.5')
+            else:
+                total_days += Decimal('1')
+        current_date += timedelta(days=1)
+    return total_days
+
+
+class YearCalendarTests(TestCase):
+    """Prefix-sum calendar without database access"""
+
+    def test_kinds_and_counts(self):
+        # 2026-01-01 is a Thursday; 2026-01-03 is a Saturday
+        calendar = YearCalendar(2026, [date(2026, 1, 1), date(2026, 1, 3)])
+
+        self.assertEqual(calendar.kind(date(2026, 1, 1)), KIND_HOLIDAY)
+        self.assertEqual(calendar.kind(date(2026, 1, 2)), KIND_WORKING)
+        self.assertEqual(calendar.kind(date(2026, 1, 3)), KIND_WEEKEND_HOLIDAY)
+        self.assertEqual(calendar.kind(date(2026, 1, 4)), KIND_WEEKEND)
+
+        counts = calendar.counts(date(2026, 1, 1), date(2026, 1, 31))
+        self.assertEqual(sum(counts), 31)
+        self.assertEqual(counts[KIND_HOLIDAY], 1)
+        self.assertEqual(counts[KIND_WEEKEND_HOLIDAY], 1)
+        self.assertEqual(counts[KIND_WORKING], 21)
+
+
+class WorkingDayCalculatorTests(TestCase):
+    """Calculator results match the day-by-day algorithm"""
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Calendar Org', email='cal@example.com')
+        self.holidays = {
+            date(2026, 1, 26), date(2026, 3, 14), date(2026, 8, 15),
+            date(2026, 10, 2), date(2026, 12, 25), date(2027, 1, 1),
+        }
+        for day in self.holidays:
+            Holiday.all_objects.create(organization=self.org, name=str(day), date=day)
+
+    def test_matches_reference_algorithm(self):
+        calculator = WorkingDayCalculator(self.org.id)
+        policies = [None] + [
+            SimpleNamespace(count_weekends=cw, count_holidays=ch, sandwich_rule=sw)
+            for cw in (False, True) for ch in (False, True) for sw in (False, True)
+        ]
+        rng = random.Random(42)
+
+        for _ in range(300):
+            start = date(2026, 1, 1) + timedelta(days=rng.randrange(380))
+            end = start + timedelta(days=rng.randrange(20))
+            start_type = rng.choice(['full', 'first_half', 'second_half'])
+            end_type = rng.choice(['full', 'first_half', 'second_half'])
+            policy = rng.choice(policies)
+
+            self.assertEqual(
+                calculator.count_leave_days(start, end, start_type, end_type, policy),
+                reference_leave_days(start, end, start_type, end_type, policy, self.holidays),
+                msg=f"{start}..{end} {start_type}/{end_type} {policy}",
+            )
+
+    def test_calendar_loaded_once_per_year(self):
+        calculator = WorkingDayCalculator(self.org.id)
+        calculator.count_working_days(date(2026, 1, 1), date(2026, 12, 31))
+
+        with self.assertNumQueries(0):
+            calculator.count_working_days(date(2026, 2, 1), date(2026, 11, 30))
+
+    def test_holiday_change_invalidates_calendar(self):
+        calculator = WorkingDayCalculator(self.org.id)
+        before = calculator.count_working_days(date(2026, 6, 1), date(2026, 6, 30))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.all_objects.create(organization=self.org, name='Extra', date=date(2026, 6, 10))
+
+        self.assertEqual(
+            calculator.count_working_days(date(2026, 6, 1), date(2026, 6, 30)),
+            before - 1,
+        )
+        self.assertIn(date(2026, 6, 10), HolidayCalendarCache.get_year(self.org.id, None, 2026).holidays)
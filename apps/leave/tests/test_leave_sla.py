@@ -0,0 +1,67 @@
+"""
+Tests for batched leave reminders and escalations
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Employee
+from apps.leave.models import LeaveRequest, LeaveType
+from apps.leave.services import LeaveSLAService
+from apps.notifications.models import Notification
+
+
+class LeaveSLAServiceTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='SLA Org', email='sla@example.com')
+        self.director = self._employee('director')
+        self.manager = self._employee('manager', reporting_manager=self.director)
+        self.reports = [self._employee(f'report{i}', reporting_manager=self.manager) for i in range(3)]
+        self.leave_type = LeaveType.all_objects.create(organization=self.org, name='Casual', code='CL')
+
+        for employee in self.reports:
+            leave = LeaveRequest.all_objects.create(
+                organization=self.org, employee=employee, leave_type=self.leave_type,
+                start_date=date(2026, 11, 2), end_date=date(2026, 11, 3),
+                total_days=Decimal('2'), reason='Trip', current_approver=self.manager,
+            )
+            LeaveRequest.all_objects.filter(id=leave.id).update(
+                created_at=timezone.now() - timedelta(days=4)
+            )
+
+    def _employee(self, name, reporting_manager=None):
+        user = User.objects.create_user(
+            email=f'{name}@sla.example.com', password='pass',
+            first_name=name, last_name='SLA', organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=name.upper(),
+            date_of_joining=date(2020, 1, 1), reporting_manager=reporting_manager,
+        )
+
+    def test_one_reminder_per_approver(self):
+        with self.assertNumQueries(2):
+            notified = LeaveSLAService.send_reminders(self.org)
+
+        self.assertEqual(notified, 1)
+        reminder = Notification.all_objects.get(recipient=self.manager)
+        self.assertIn('3 leave request(s)', reminder.body)
+
+    def test_escalation_is_grouped_and_not_repeated(self):
+        escalated = LeaveSLAService.process_escalations(self.org)
+
+        self.assertEqual(escalated, 3)
+        self.assertEqual(
+            set(LeaveRequest.all_objects.values_list('current_approver_id', flat=True)),
+            {self.director.id},
+        )
+        self.assertEqual(Notification.all_objects.filter(recipient=self.director).count(), 1)
+
+        self.assertEqual(LeaveSLAService.process_escalations(self.org), 0)
+        self.assertEqual(Notification.all_objects.filter(recipient=self.director).count(), 1)
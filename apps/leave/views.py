@@ -26,6 +26,7 @@ from .serializers import (
     HolidayBulkImportSerializer
 )
 from .services import LeaveCalculationService, LeaveBalanceService, LeaveApprovalService
+from .balance_cache import LeaveBalanceCache
 
 
 class LeaveTypeViewSet(BulkImportExportMixin, OrganizationViewSetMixin, viewsets.ModelViewSet):
@@ -149,7 +150,7 @@ class LeaveRequestViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         
         # Calculate leave days
         leave_policy = LeavePolicy.objects.filter(is_active=True).first()
-        total_days, leave_dates = LeaveCalculationService.calculate_leave_days(
+        total_days = LeaveCalculationService.count_leave_days(
             data['start_date'],
             data['end_date'],
             data.get('start_day_type', 'full'),
@@ -369,13 +370,14 @@ class LeaveRequestViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         if not employee:
             return Response({'error': 'No employee profile'}, status=400)
         
-        year = request.query_params.get('year', timezone.now().year)
-        balances = LeaveBalanceService.get_all_balances(
-            employee, int(year)
-        )
+        year = int(request.query_params.get('year', timezone.now().year))
+        data = LeaveBalanceCache.get(employee, year)
+        if data is None:
+            balances = LeaveBalanceService.get_all_balances(employee, year)
+            data = LeaveBalanceSummarySerializer(balances, many=True).data
+            LeaveBalanceCache.set(employee, year, data)
         
-        serializer = LeaveBalanceSummarySerializer(balances, many=True)
-        return Response(serializer.data)
+        return Response(data)
     
     @action(detail=False, methods=['post'])
     def calculate(self, request):
@@ -887,7 +889,6 @@ class LeaveBalanceViewSet(OrganizationViewSetMixin, viewsets.ReadOnlyModelViewSe
         return queryset.none()
 
     @action(detail=False, methods=['post'], url_path='process-carry-forward')
-    @transaction.atomic
     def process_carry_forward(self, request):
         """Process year-end carry forward for all employees"""
         if not request.user.has_permission_for('leave.manage_balances'):
@@ -906,13 +907,7 @@ class LeaveBalanceViewSet(OrganizationViewSetMixin, viewsets.ReadOnlyModelViewSe
             )
         
         try:
-            LeaveBalanceService.run_year_end_carryforward(from_year, to_year)
-            
-            # Get count of processed balances
-            processed_count = LeaveBalance.objects.filter(
-                year=to_year,
-                carry_forward__gt=0
-            ).count()
+            processed_count = LeaveBalanceService.run_year_end_carryforward(from_year, to_year)
             
             return Response({
                 'success': True,
@@ -926,7 +921,6 @@ class LeaveBalanceViewSet(OrganizationViewSetMixin, viewsets.ReadOnlyModelViewSe
             )
 
     @action(detail=False, methods=['post'], url_path='process-accrual')
-    @transaction.atomic
     def process_accrual(self, request):
         """Process monthly leave accrual for all employees"""
         if not request.user.has_permission_for('leave.manage_balances'):
@@ -939,7 +933,7 @@ class LeaveBalanceViewSet(OrganizationViewSetMixin, viewsets.ReadOnlyModelViewSe
         
         try:
             if accrual_type == 'monthly':
-                LeaveBalanceService.run_monthly_accrual()
+                processed_count = LeaveBalanceService.run_monthly_accrual()
             else:
                 return Response(
                     {'error': f'Unsupported accrual type: {accrual_type}'},
@@ -949,6 +943,7 @@ class LeaveBalanceViewSet(OrganizationViewSetMixin, viewsets.ReadOnlyModelViewSe
             return Response({
                 'success': True,
                 'message': f'{accrual_type.capitalize()} accrual processed successfully',
+                'balances_processed': processed_count,
                 'processed_at': timezone.now().isoformat()
             })
         except Exception as e:
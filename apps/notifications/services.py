@@ -2,6 +2,7 @@
 Notification Services - In-app and Multi-channel notifications
 """
 
+from django.conf import settings
 from django.utils import timezone
 from .models import Notification
 
@@ -9,6 +10,17 @@ class NotificationService:
     """
     Service to handle creation and delivery of notifications.
     """
+    
+    BULK_CHUNK_SIZE = getattr(settings, 'NOTIFICATION_BULK_CHUNK_SIZE', 1000)
+    DELIVERY_BATCH_SIZE = getattr(settings, 'NOTIFICATION_DELIVERY_BATCH_SIZE', 500)
+    DELIVERY_CHANNELS = ('email', 'push')
+    
+    @staticmethod
+    def render(text, context):
+        """Basic jinja2-style variable replacement"""
+        for key, value in context.items():
+            text = text.replace(f"{{{{ {key} }}}}", str(value))
+        return text
 
     @staticmethod
     def notify(user, title, message, notification_type='info', entity_type=None, entity_id=None, priority='medium'):
@@ -66,14 +78,8 @@ class NotificationService:
             print(f"Template {template_code} not found")
             return None
             
-        # Basic jinja2-style variable replacement
-        subject = template.subject
-        body = template.body
-        
-        for key, value in context.items():
-            placeholder = f"{{{{ {key} }}}}"
-            subject = subject.replace(placeholder, str(value))
-            body = body.replace(placeholder, str(value))
+        subject = cls.render(template.subject, context)
+        body = cls.render(template.body, context)
             
         return cls.notify(
             user=user, 
@@ -86,8 +92,200 @@ class NotificationService:
             channel=template.channel
         )
 
+    @classmethod
+    def notify_many(cls, recipients, template, context=None, recipient_contexts=None,
+                    entity_type=None, entity_id=None):
+        """
+        Fan a template notification out to many employees.
+        
+        Recipients and their notification preferences are resolved in one
+        query, the template is rendered once per distinct context, rows are
+        inserted with bulk_create in chunks and email/push delivery is
+        queued as batched Celery tasks. Recipients that disabled the
+        template's channel get an in-app notification instead.
+        
+        Args:
+            recipients: Employee instances or IDs
+            template: NotificationTemplate instance or template code
+            context: Variables shared by every recipient
+            recipient_contexts: Optional {employee_id: variables} overrides
+        
+        Returns:
+            {'notifications': [Notification], 'queued': {channel: int},
+             'skipped': [employee_id]}
+        """
+        from apps.employees.models import Employee
+        from .models import NotificationTemplate
+        
+        if isinstance(template, str):
+            template = NotificationTemplate.objects.filter(code=template).first()
+            if template is None:
+                return {'notifications': [], 'queued': {}, 'skipped': []}
+        
+        context = context or {}
+        recipient_contexts = {str(k): v for k, v in (recipient_contexts or {}).items()}
+        recipient_ids = {str(getattr(r, 'pk', r)) for r in recipients}
+        
+        rows = Employee.objects.filter(
+            id__in=recipient_ids,
+            is_active=True
+        ).values(
+            'id', 'organization_id',
+            'user__notification_prefs__email_enabled',
+            'user__notification_prefs__push_enabled',
+        )
+        
+        rendered = {}
+        notifications = []
+        for row in rows:
+            recipient_context = {**context, **recipient_contexts.get(str(row['id']), {})}
+            cache_key = tuple(sorted((k, str(v)) for k, v in recipient_context.items()))
+            if cache_key not in rendered:
+                rendered[cache_key] = (
+                    cls.render(template.subject, recipient_context),
+                    cls.render(template.body, recipient_context),
+                )
+            subject, body = rendered[cache_key]
+            
+            channel = template.channel
+            if channel in cls.DELIVERY_CHANNELS and \
+                    row[f'user__notification_prefs__{channel}_enabled'] is False:
+                channel = 'in_app'
+            
+            notifications.append(Notification(
+                organization_id=row['organization_id'],
+                recipient_id=row['id'],
+                template=None if template._state.adding else template,
+                subject=subject[:255],
+                body=body,
+                channel=channel,
+                entity_type=entity_type or '',
+                entity_id=entity_id,
+            ))
+        
+        for start in range(0, len(notifications), cls.BULK_CHUNK_SIZE):
+            Notification.all_objects.bulk_create(
+                notifications[start:start + cls.BULK_CHUNK_SIZE]
+            )
+        
+        found = {str(n.recipient_id) for n in notifications}
+        return {
+            'notifications': notifications,
+            'queued': cls.enqueue_delivery(notifications),
+            'skipped': sorted(recipient_ids - found),
+        }
+    
+    @classmethod
+    def enqueue_delivery(cls, notifications):
+        """
+        Queue email/push delivery in batches of DELIVERY_BATCH_SIZE,
+        one Celery task per organization, channel and batch.
+        
+        Returns:
+            {channel: number of notifications queued}
+        """
+        from django.db import transaction
+        from .tasks import deliver_notifications
+        
+        grouped = {}
+        for notification in notifications:
+            if notification.channel in cls.DELIVERY_CHANNELS:
+                key = (str(notification.organization_id), notification.channel)
+                grouped.setdefault(key, []).append(str(notification.id))
+        
+        queued = {}
+        for (organization_id, channel), ids in grouped.items():
+            for start in range(0, len(ids), cls.DELIVERY_BATCH_SIZE):
+                batch = ids[start:start + cls.DELIVERY_BATCH_SIZE]
+                transaction.on_commit(
+                    lambda org=organization_id, ch=channel, b=batch:
+                        deliver_notifications.delay(org, ch, b)
+                )
+            queued[channel] = queued.get(channel, 0) + len(ids)
+        return queued
+    
+    @classmethod
+    def notify_workflow_approvers(cls, organization_id, instance_ids):
+        """
+        Notify the current approvers of many workflow instances at once.
+
+        Bulk workflow actions advance instances with queryset updates, so the
+        per-save approver signal never fires; this builds the same in-app
+        notifications with one read and chunked bulk inserts.
+
+        Returns:
+            Number of notifications created
+        """
+        from apps.workflows.models import WorkflowInstance
+
+        rows = WorkflowInstance.all_objects.filter(
+            organization_id=organization_id,
+            id__in=instance_ids,
+            status='in_progress',
+            current_approver__isnull=False,
+        ).values_list('id', 'entity_type', 'current_approver_id', 'workflow__name')
+
+        notifications = [
+            Notification(
+                organization_id=organization_id,
+                recipient_id=approver_id,
+                subject=f"New Approval Required: {workflow_name}"[:255],
+                body=f"A new {entity_type} request requires your approval.",
+                channel='in_app',
+                entity_type='workflow_instance',
+                entity_id=instance_id,
+            )
+            for instance_id, entity_type, approver_id, workflow_name in rows
+        ]
+        for start in range(0, len(notifications), cls.BULK_CHUNK_SIZE):
+            Notification.all_objects.bulk_create(
+                notifications[start:start + cls.BULK_CHUNK_SIZE]
+            )
+        return len(notifications)
+
+    @classmethod
+    def deliver(cls, organization_id, channel, notification_ids):
+        """
+        Deliver a batch of queued notifications. Emails share one SMTP
+        connection and are marked sent one by one as they go out; an SMTP
+        error propagates so the task retries the rows still pending.
+        Emails without an address and push notifications (a stub until a
+        provider such as FCM/OneSignal is integrated) are marked failed.
+        
+        Returns:
+            Number of notifications marked sent
+        """
+        from django.core.mail import get_connection, EmailMessage
+        
+        pending = Notification.all_objects.filter(
+            organization_id=organization_id,
+            id__in=notification_ids,
+            channel=channel,
+            status='pending',
+        )
+        
+        if channel != 'email':
+            pending.update(status='failed')
+            return 0
+        
+        rows = list(pending.values_list('id', 'subject', 'body', 'recipient__user__email'))
+        pending.filter(id__in=[row[0] for row in rows if not row[3]]).update(status='failed')
+        deliverable = [row for row in rows if row[3]]
+        
+        sent_ids = []
+        try:
+            if deliverable:
+                with get_connection(fail_silently=False) as connection:
+                    for notification_id, subject, body, email in deliverable:
+                        connection.send_messages([EmailMessage(subject, body, to=[email])])
+                        sent_ids.append(notification_id)
+        finally:
+            if sent_ids:
+                Notification.all_objects.filter(id__in=sent_ids).update(status='sent', sent_at=timezone.now())
+        return len(sent_ids)
+
     @staticmethod
-    def notify(user, title, message, notification_type='info', entity_type=None, entity_id=None, priority='medium', channel='in_app'):
+    def notify(user, title, message, notification_type='info', entity_type=None, entity_id=None, priority='medium', channel='in_app', organization_id=None):
         """
         Create an in-app notification. 
         Email/SMS logic can be added here.
@@ -110,6 +308,7 @@ class NotificationService:
             channel=channel,
             entity_type=entity_type or '',
             entity_id=entity_id,
+            organization_id=organization_id,
         )
         
         # Email logic would be triggered here (e.g., via Celery)
@@ -129,40 +328,34 @@ class NotificationService:
         except Notification.DoesNotExist:
             return False
 
-    @staticmethod
-    def send_push_notifications(recipient_ids, title, body, data=None, priority='normal'):
+    @classmethod
+    def send_push_notifications(cls, recipient_ids, title, body, data=None, priority='normal'):
         """
         Send push notifications to specified recipients.
-        This is a stub implementation - integrate with actual push service
+        Rows are bulk-inserted and delivery is queued in batches; the
+        delivery task is a stub until a push provider is integrated
         (Firebase FCM, OneSignal, AWS SNS, etc.)
         """
-        from apps.employees.models import Employee
+        from .models import NotificationTemplate
         
         data = data or {}
+        template = NotificationTemplate(subject=title, body=body, channel='push')
+        outcome = cls.notify_many(recipient_ids, template)
+        
         results = {
             'sent': [],
             'failed': [],
             'message': 'Push notification stub - integrate with FCM/OneSignal for production'
         }
         
-        employees = Employee.objects.filter(id__in=recipient_ids, is_active=True)
-        
-        for employee in employees:
-            notification = Notification.objects.create(
-                recipient=employee,
-                subject=title,
-                body=body,
-                channel='push',
-                status='pending',
-            )
+        for notification in outcome['notifications']:
             results['sent'].append({
-                'employee_id': str(employee.id),
+                'employee_id': str(notification.recipient_id),
                 'notification_id': str(notification.id),
                 'status': 'queued'
             })
         
-        not_found = set(str(rid) for rid in recipient_ids) - set(str(e.id) for e in employees)
-        for rid in not_found:
+        for rid in outcome['skipped']:
             results['failed'].append({
                 'employee_id': rid,
                 'error': 'Employee not found or inactive'
@@ -170,12 +363,18 @@ class NotificationService:
         
         return results
 
-    @staticmethod
-    def send_digest(digest_type='daily', recipient_ids=None):
+    @classmethod
+    def send_digest(cls, digest_type='daily', recipient_ids=None):
         """
         Send digest notifications - batch of unread notifications.
         Can be called by scheduler for daily/weekly digests.
+        
+        Unread counts come from one grouped aggregation query and the
+        latest subjects from one windowed query; digests are bulk-inserted
+        and their email delivery queued in batches.
         """
+        from django.db.models import Count, F, Window
+        from django.db.models.functions import RowNumber
         from apps.employees.models import Employee
         from datetime import timedelta
         
@@ -196,34 +395,55 @@ class NotificationService:
             employees = Employee.objects.filter(
                 is_active=True,
                 user__notification_prefs__email_enabled=True
-            ).distinct()
+            )
         
-        for employee in employees:
-            unread_notifications = Notification.objects.filter(
-                recipient=employee,
-                created_at__gte=cutoff
-            ).exclude(status='read').order_by('-created_at')
-            
-            if unread_notifications.exists():
-                count = unread_notifications.count()
-                subjects = list(unread_notifications.values_list('subject', flat=True)[:5])
-                
-                digest_body = f"You have {count} unread notification(s):\n"
-                for subject in subjects:
-                    digest_body += f"- {subject}\n"
-                if count > 5:
-                    digest_body += f"...and {count - 5} more"
-                
-                Notification.objects.create(
-                    recipient=employee,
-                    subject=f"{digest_type.title()} Digest: {count} notifications",
-                    body=digest_body,
-                    channel='email',
-                    status='pending',
-                )
-                
-                results['notifications_sent'] += 1
+        unread = Notification.objects.filter(
+            recipient__in=employees,
+            created_at__gte=cutoff
+        ).exclude(status='read').exclude(entity_type='digest')
+        
+        counts = {
+            row['recipient_id']: row
+            for row in unread.order_by().values('recipient_id', 'organization_id').annotate(
+                unread_count=Count('id')
+            )
+        }
+        
+        subjects = {}
+        latest = unread.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('recipient_id')],
+                order_by=F('created_at').desc(),
+            )
+        ).filter(position__lte=5).order_by('recipient_id', 'position')
+        for recipient_id, subject in latest.values_list('recipient_id', 'subject'):
+            subjects.setdefault(recipient_id, []).append(subject)
+        
+        digests = []
+        for recipient_id, row in counts.items():
+            count = row['unread_count']
+            digest_body = f"You have {count} unread notification(s):\n"
+            for subject in subjects.get(recipient_id, []):
+                digest_body += f"- {subject}\n"
+            if count > 5:
+                digest_body += f"...and {count - 5} more"
             
-            results['processed'] += 1
+            digests.append(Notification(
+                organization_id=row['organization_id'],
+                recipient_id=recipient_id,
+                subject=f"{digest_type.title()} Digest: {count} notifications",
+                body=digest_body,
+                channel='email',
+                status='pending',
+                entity_type='digest',
+            ))
+        
+        for start in range(0, len(digests), cls.BULK_CHUNK_SIZE):
+            Notification.all_objects.bulk_create(digests[start:start + cls.BULK_CHUNK_SIZE])
+        cls.enqueue_delivery(digests)
+        
+        results['notifications_sent'] = len(digests)
+        results['processed'] = employees.count()
         
         return results
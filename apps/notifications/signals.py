@@ -49,7 +49,7 @@ def notify_initiator_on_action(sender, instance, created, **kwargs):
     if not created:
         return
 
-    workflow = instance.workflow_instance
+    workflow = instance.instance
     if not workflow or not workflow.organization:
         return
 
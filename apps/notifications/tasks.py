@@ -21,3 +21,27 @@ def send_notification(self, organization_id: str, notification_id: str):
         return
 
     notification.send()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def deliver_notifications(self, organization_id: str, channel: str, notification_ids: list):
+    """Deliver one batch of email/push notifications"""
+    from apps.notifications.services import NotificationService
+
+    organization = TenantAwareTask.get_organization(organization_id)
+    try:
+        return NotificationService.deliver(organization.id, channel, notification_ids)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def notify_workflow_approvers(self, organization_id: str, instance_ids: list):
+    """Notify the new approvers of a batch of workflow instances"""
+    from apps.notifications.services import NotificationService
+
+    organization = TenantAwareTask.get_organization(organization_id)
+    try:
+        return NotificationService.notify_workflow_approvers(organization.id, instance_ids)
+    except Exception as exc:
+        raise self.retry(exc=exc)
@@ -0,0 +1,115 @@
+"""
+Tests for bulk notification fan-out and digests
+"""
+
+from datetime import date
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Employee
+from apps.notifications.models import Notification, NotificationPreference, NotificationTemplate
+from apps.notifications.services import NotificationService
+
+
+class NotifyManyTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Notify Org', email='notify@example.com')
+        self.employees = []
+        for i in range(4):
+            user = User.objects.create_user(
+                email=f'notify{i}@example.com', password='pass',
+                first_name=f'N{i}', last_name='Tify', organization=self.org,
+            )
+            self.employees.append(Employee.all_objects.create(
+                organization=self.org, user=user, employee_id=f'NT{i}',
+                date_of_joining=date(2020, 1, 1),
+            ))
+        NotificationPreference.all_objects.create(
+            organization=self.org, user=self.employees[0].user, email_enabled=False,
+        )
+        self.template = NotificationTemplate.all_objects.create(
+            organization=self.org, name='Announcement', code='announce',
+            subject='News for {{ team }}', body='Hello {{ team }}', channel='email',
+        )
+
+    def test_fan_out_respects_preferences(self):
+        with self.assertNumQueries(2), self.captureOnCommitCallbacks() as callbacks:
+            outcome = NotificationService.notify_many(
+                self.employees + ['00000000-0000-0000-0000-000000000000'],
+                self.template,
+                context={'team': 'Everyone'},
+                recipient_contexts={self.employees[3].id: {'team': 'Ops'}},
+            )
+
+        self.assertEqual(len(outcome['notifications']), 4)
+        self.assertEqual(outcome['queued'], {'email': 3})
+        self.assertEqual(outcome['skipped'], ['00000000-0000-0000-0000-000000000000'])
+        self.assertEqual(len(callbacks), 1)
+
+        channels = dict(Notification.all_objects.values_list('recipient__employee_id', 'channel'))
+        self.assertEqual(channels['NT0'], 'in_app')
+        self.assertEqual(channels['NT1'], 'email')
+        self.assertEqual(
+            Notification.all_objects.get(recipient=self.employees[3]).subject, 'News for Ops'
+        )
+
+    def test_deliver_sends_email_batch(self):
+        outcome = NotificationService.notify_many(self.employees[1:], self.template, {'team': 'All'})
+        ids = [str(n.id) for n in outcome['notifications']]
+
+        sent = NotificationService.deliver(self.org.id, 'email', ids)
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(Notification.all_objects.filter(status='pending').exists())
+
+    def test_deliver_marks_only_sent_rows_and_raises_on_smtp_error(self):
+        outcome = NotificationService.notify_many(self.employees[1:], self.template, {'team': 'All'})
+        ids = [str(n.id) for n in outcome['notifications']]
+        push = Notification.all_objects.create(
+            organization=self.org, recipient=self.employees[1], subject='Ping', body='...', channel='push',
+        )
+
+        original = mail.get_connection().__class__.send_messages
+        calls = []
+
+        def flaky(backend, messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise SMTPException('connection dropped')
+            return original(backend, messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', flaky):
+            with self.assertRaises(SMTPException):
+                NotificationService.deliver(self.org.id, 'email', ids)
+
+        statuses = sorted(Notification.all_objects.filter(id__in=ids).values_list('status', flat=True))
+        self.assertEqual(statuses, ['pending', 'pending', 'sent'])
+
+        self.assertEqual(NotificationService.deliver(self.org.id, 'email', ids), 2)
+        self.assertEqual(NotificationService.deliver(self.org.id, 'push', [str(push.id)]), 0)
+        push.refresh_from_db()
+        self.assertEqual(push.status, 'failed')
+
+    def test_digest_groups_unread_per_recipient(self):
+        for i in range(7):
+            Notification.all_objects.create(
+                organization=self.org, recipient=self.employees[1],
+                subject=f'Update {i}', body='...', channel='in_app',
+            )
+
+        results = NotificationService.send_digest(
+            'daily', recipient_ids=[e.id for e in self.employees]
+        )
+
+        self.assertEqual(results['notifications_sent'], 1)
+        self.assertEqual(results['processed'], 4)
+        digest = Notification.all_objects.get(entity_type='digest')
+        self.assertIn('7 unread', digest.body)
+        self.assertIn('...and 2 more', digest.body)
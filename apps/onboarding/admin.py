@@ -53,7 +53,7 @@ class EmployeeOnboardingAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'template', 'joining_date']
     search_fields = ['employee__employee_id', 'employee__user__first_name', 'employee__user__last_name']
-    readonly_fields = ['total_tasks', 'completed_tasks', 'progress_percentage']
+    readonly_fields = ['total_tasks', 'completed_tasks', 'skipped_tasks', 'progress_percentage']
     inlines = [OnboardingTaskProgressInline, OnboardingDocumentInline]
     
     fieldsets = (
@@ -64,7 +64,7 @@ class EmployeeOnboardingAdmin(admin.ModelAdmin):
             'fields': ('joining_date', 'start_date', 'target_completion_date', 'actual_completion_date')
         }),
         ('Status', {
-            'fields': ('status', 'total_tasks', 'completed_tasks', 'progress_percentage')
+            'fields': ('status', 'total_tasks', 'completed_tasks', 'skipped_tasks', 'progress_percentage')
         }),
         ('Assignment', {
             'fields': ('hr_responsible', 'buddy')
@@ -0,0 +1,95 @@
+"""
+Management command to compare per-hire onboarding initiation with the bulk path
+Usage: python manage.py benchmark_bulk_onboarding [--hires N] [--tasks N]
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.authentication.models import User
+from apps.core.benchmarking import QueryCounter, rolled_back
+from apps.core.models import Organization
+from apps.employees.models import Department, Designation, Employee
+from apps.onboarding.models import OnboardingTaskTemplate, OnboardingTemplate
+from apps.onboarding.services import OnboardingService
+
+
+class Command(BaseCommand):
+    help = 'Benchmark onboarding N new hires: initiate_onboarding loop vs bulk_initiate_onboarding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hires', type=int, default=1000)
+        parser.add_argument('--tasks', type=int, default=15, help='Tasks per template')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            org, hr, hires = self._seed(options['hires'], options['tasks'])
+            self.stdout.write(self.style.SUCCESS(
+                f"=== Onboarding {len(hires)} hires ({options['tasks']} tasks per template) ==="
+            ))
+            self._measure('sequential', lambda: self._sequential(hr, hires))
+            self._measure('bulk', lambda: OnboardingService.bulk_initiate_onboarding(
+                org, [{'employee_id': e.id, 'hr_responsible_id': hr.id} for e in hires]
+            ))
+
+    def _seed(self, count, tasks):
+        org = Organization.objects.create(name='Onboarding Benchmark', email='onboarding-benchmark@example.com')
+        departments = [
+            Department.all_objects.create(organization=org, name=f'Dept {n}', code=f'D{n}') for n in range(5)
+        ]
+        designations = [
+            Designation.all_objects.create(organization=org, name=f'Grade {n}', code=f'G{n}') for n in range(3)
+        ]
+
+        # Default, per-department and department+designation templates
+        targets = [{'is_default': True}] + [{'department': d} for d in departments] + [
+            {'department': departments[0], 'designation': g} for g in designations
+        ]
+        assignees = [choice for choice, _ in OnboardingTaskTemplate.ASSIGNEE_CHOICES]
+        for n, target in enumerate(targets):
+            template = OnboardingTemplate.all_objects.create(
+                organization=org, name=f'Template {n}', code=f'T{n}', **target
+            )
+            OnboardingTaskTemplate.all_objects.bulk_create([
+                OnboardingTaskTemplate(
+                    organization=org, template=template, title=f'Task {t}', order=t,
+                    assigned_to_type=assignees[t % len(assignees)], due_days_offset=t - 3,
+                )
+                for t in range(tasks)
+            ])
+
+        codes = ['HR', 'MGR'] + [f'H{n:05d}' for n in range(count)]
+        users = User.objects.bulk_create([
+            User(email=f'{code.lower()}@onboarding-bench.example.com', password='!',
+                 slug=f'onboarding-bench-{code.lower()}', first_name='Bench', last_name=code, organization=org)
+            for code in codes
+        ])
+        hr, manager = Employee.all_objects.bulk_create([
+            Employee(organization=org, user=user, employee_id=code, date_of_joining=date(2020, 1, 1))
+            for user, code in zip(users[:2], codes[:2])
+        ])
+        hires = Employee.all_objects.bulk_create([
+            Employee(
+                organization=org, user=user, employee_id=code, date_of_joining=date(2025, 7, 1),
+                department=departments[n % len(departments)], designation=designations[n % len(designations)],
+                reporting_manager=manager,
+            )
+            for n, (user, code) in enumerate(zip(users[2:], codes[2:]))
+        ])
+        return org, hr, hires
+
+    def _sequential(self, hr, hires):
+        for employee in hires:
+            OnboardingService.initiate_onboarding(employee, hr_responsible=hr)
+
+    def _measure(self, label, fn):
+        counter = QueryCounter()
+        with rolled_back():
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                fn()
+                elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{label:<12} {counter.queries:>6} queries  {elapsed:9.1f} ms')
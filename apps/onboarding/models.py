@@ -188,6 +188,7 @@ class EmployeeOnboarding(OrganizationEntity):
     # Progress tracking
     total_tasks = models.PositiveSmallIntegerField(default=0)
     completed_tasks = models.PositiveSmallIntegerField(default=0)
+    skipped_tasks = models.PositiveSmallIntegerField(default=0)
     progress_percentage = models.PositiveSmallIntegerField(default=0)
     
     # HR assignment
@@ -218,14 +219,43 @@ class EmployeeOnboarding(OrganizationEntity):
     
     def update_progress(self):
         """Update progress statistics based on completed tasks"""
-        tasks = self.task_progress.all()
-        self.total_tasks = tasks.count()
-        self.completed_tasks = tasks.filter(status='completed').count()
+        counts = self.task_progress.aggregate(
+            total=models.Count('id'),
+            completed=models.Count('id', filter=models.Q(status='completed')),
+            skipped=models.Count('id', filter=models.Q(status='skipped')),
+        )
+        self.total_tasks = counts['total']
+        self.completed_tasks = counts['completed']
+        self.skipped_tasks = counts['skipped']
         if self.total_tasks > 0:
-            self.progress_percentage = int((self.completed_tasks / self.total_tasks) * 100)
+            self.progress_percentage = self.completed_tasks * 100 // self.total_tasks
         else:
             self.progress_percentage = 0
-        self.save(update_fields=['total_tasks', 'completed_tasks', 'progress_percentage'])
+        self.save(update_fields=['total_tasks', 'completed_tasks', 'skipped_tasks', 'progress_percentage'])
+    
+    def record_task_transition(self, old_status, new_status):
+        """
+        Adjust the progress counters for one task changing status with a
+        single UPDATE, instead of recounting every task.
+        """
+        completed = (new_status == 'completed') - (old_status == 'completed')
+        skipped = (new_status == 'skipped') - (old_status == 'skipped')
+        if not completed and not skipped:
+            return
+        
+        completed_tasks = models.F('completed_tasks') + completed
+        EmployeeOnboarding.all_objects.filter(pk=self.pk).update(
+            completed_tasks=completed_tasks,
+            skipped_tasks=models.F('skipped_tasks') + skipped,
+            progress_percentage=models.Case(
+                models.When(total_tasks=0, then=models.Value(0)),
+                default=completed_tasks * 100 / models.F('total_tasks'),
+            ),
+        )
+        self.completed_tasks += completed
+        self.skipped_tasks += skipped
+        if self.total_tasks > 0:
+            self.progress_percentage = self.completed_tasks * 100 // self.total_tasks
 
 
 class OnboardingTaskProgress(OrganizationEntity):
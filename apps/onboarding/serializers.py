@@ -7,6 +7,7 @@ from .models import (
     OnboardingTemplate, OnboardingTaskTemplate,
     EmployeeOnboarding, OnboardingTaskProgress, OnboardingDocument
 )
+from .services import OnboardingService
 
 
 class OnboardingTaskTemplateSerializer(serializers.ModelSerializer):
@@ -179,13 +180,13 @@ class EmployeeOnboardingListSerializer(serializers.ModelSerializer):
             'template', 'template_name',
             'joining_date', 'start_date', 'target_completion_date', 'actual_completion_date',
             'status', 'status_display',
-            'total_tasks', 'completed_tasks', 'progress_percentage',
+            'total_tasks', 'completed_tasks', 'skipped_tasks', 'progress_percentage',
             'hr_responsible', 'hr_responsible_name',
             'buddy', 'buddy_name',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'total_tasks', 'completed_tasks', 'progress_percentage',
+            'id', 'total_tasks', 'completed_tasks', 'skipped_tasks', 'progress_percentage',
             'created_at', 'updated_at'
         ]
 
@@ -226,6 +227,20 @@ class InitiateOnboardingSerializer(serializers.Serializer):
     buddy_id = serializers.UUIDField(required=False, allow_null=True)
 
 
+class BulkHireSerializer(serializers.Serializer):
+    """One hire in a bulk initiation; joining date defaults to the employee's"""
+    employee_id = serializers.UUIDField()
+    template_id = serializers.UUIDField(required=False, allow_null=True)
+    joining_date = serializers.DateField(required=False, allow_null=True)
+    hr_responsible_id = serializers.UUIDField(required=False, allow_null=True)
+    buddy_id = serializers.UUIDField(required=False, allow_null=True)
+
+
+class BulkInitiateOnboardingSerializer(serializers.Serializer):
+    """Serializer for initiating onboarding for a batch of hires"""
+    hires = BulkHireSerializer(many=True, allow_empty=False, max_length=OnboardingService.BULK_MAX_ITEMS)
+
+
 class CompleteTaskSerializer(serializers.Serializer):
     """Serializer for completing an onboarding task"""
     notes = serializers.CharField(required=False, allow_blank=True)
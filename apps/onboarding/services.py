@@ -3,6 +3,7 @@
 from datetime import timedelta
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Prefetch
 from .models import (
     OnboardingTemplate, OnboardingTaskTemplate,
     EmployeeOnboarding, OnboardingTaskProgress, OnboardingDocument
@@ -12,51 +13,45 @@ from .models import (
 class OnboardingService:
     """Service class for onboarding operations"""
     
+    BULK_MAX_ITEMS = 1000
+
     @staticmethod
     def find_template_for_employee(employee):
         """
         Find the most appropriate onboarding template for an employee.
         Priority: Department+Designation > Department > Designation > Default
         """
-        # Try exact match: department + designation
-        template = OnboardingTemplate.objects.filter(
-            organization=employee.organization,
-            department=employee.department,
-            designation=employee.designation,
-            is_active=True
-        ).first()
-        
-        if template:
-            return template
-        
-        # Try department only
-        template = OnboardingTemplate.objects.filter(
-            organization=employee.organization,
-            department=employee.department,
-            designation__isnull=True,
-            is_active=True
-        ).first()
-        
-        if template:
-            return template
-        
-        # Try designation only
-        template = OnboardingTemplate.objects.filter(
-            organization=employee.organization,
-            department__isnull=True,
-            designation=employee.designation,
-            is_active=True
-        ).first()
-        
-        if template:
-            return template
-        
-        # Fall back to default
-        return OnboardingTemplate.objects.filter(
-            organization=employee.organization,
-            is_default=True,
+        templates = OnboardingService.active_templates(employee.organization_id)
+        return OnboardingService.match_template(templates, employee)
+
+    @staticmethod
+    def active_templates(organization_id):
+        """All active templates of an organization, in the model's ordering"""
+        return list(OnboardingTemplate.objects.filter(
+            organization_id=organization_id,
             is_active=True
-        ).first()
+        ))
+
+    @staticmethod
+    def match_template(templates, employee):
+        """
+        Pick the best template for an employee from already loaded templates.
+        Same priority as find_template_for_employee; ties go to the first
+        template in the given order.
+        """
+        department_id = employee.department_id
+        designation_id = employee.designation_id
+        candidates = (
+            lambda t: t.department_id == department_id and t.designation_id == designation_id,
+            lambda t: t.department_id == department_id and t.designation_id is None,
+            lambda t: t.department_id is None and t.designation_id == designation_id,
+            lambda t: t.is_default,
+        )
+        for matches in candidates:
+            for template in templates:
+                if matches(template):
+                    return template
+        return None
     
     @staticmethod
     @transaction.atomic
@@ -140,11 +135,161 @@ class OnboardingService:
         # For now, return HR responsible as fallback
         return hr_responsible
     
+    @staticmethod
+    def _resolve_assignee_id(employee, task_template, hr_responsible_id=None):
+        """_resolve_assignee on ids, so bulk initiation needs no related lookups"""
+        assignee_type = task_template.assigned_to_type
+        
+        if assignee_type == OnboardingTaskTemplate.ASSIGNEE_EMPLOYEE:
+            return employee.id
+        elif assignee_type == OnboardingTaskTemplate.ASSIGNEE_MANAGER:
+            return employee.reporting_manager_id
+        return hr_responsible_id
+    
+    @staticmethod
+    def bulk_initiate_onboarding(organization, hires):
+        """
+        Initiate onboarding for many employees in one transaction.
+
+        Each hire is a dict with employee_id and optional template_id,
+        joining_date, hr_responsible_id and buddy_id. Employees, templates
+        (with their tasks) and existing onboardings are each loaded with one
+        query, templates are matched in memory and all onboarding and task
+        progress rows are inserted with bulk_create. Hires that fail a check
+        are reported and skipped; the rest are still initiated.
+
+        Returns:
+            {'results': [{'employee_id', 'success', 'onboarding_id',
+              'template_id', 'total_tasks', 'error'}], 'succeeded': int, 'failed': int}
+        """
+        from apps.employees.models import Employee
+
+        hires = list(hires)
+        if len(hires) > OnboardingService.BULK_MAX_ITEMS:
+            raise ValueError(f"At most {OnboardingService.BULK_MAX_ITEMS} hires per batch")
+
+        organization_id = getattr(organization, 'id', organization)
+        employee_ids = {str(hire['employee_id']) for hire in hires}
+        people_ids = employee_ids | {
+            str(hire[key]) for hire in hires for key in ('hr_responsible_id', 'buddy_id') if hire.get(key)
+        }
+
+        with transaction.atomic():
+            people = {
+                str(employee.id): employee
+                for employee in Employee.all_objects.filter(
+                    organization_id=organization_id, id__in=people_ids, is_deleted=False
+                ).only(
+                    'id', 'organization_id', 'employee_id', 'date_of_joining',
+                    'department_id', 'designation_id', 'reporting_manager_id'
+                )
+            }
+            templates = list(
+                OnboardingTemplate.all_objects.filter(
+                    organization_id=organization_id, is_active=True, is_deleted=False
+                ).prefetch_related(Prefetch(
+                    'tasks',
+                    queryset=OnboardingTaskTemplate.all_objects.filter(is_deleted=False).order_by('stage', 'order', 'due_days_offset')
+                ))
+            )
+            templates_by_id = {str(template.id): template for template in templates}
+            onboarded = {
+                str(employee_id)
+                for employee_id in EmployeeOnboarding.all_objects.filter(
+                    employee_id__in=[people[e].id for e in employee_ids if e in people]
+                ).values_list('employee_id', flat=True)
+            }
+
+            results = []
+            planned = []
+            seen = set()
+            for hire in hires:
+                key = str(hire['employee_id'])
+                employee = people.get(key) if key in employee_ids else None
+                template_id = hire.get('template_id')
+                hr_id = str(hire['hr_responsible_id']) if hire.get('hr_responsible_id') else None
+                buddy_id = str(hire['buddy_id']) if hire.get('buddy_id') else None
+                joining_date = hire.get('joining_date') or (employee.date_of_joining if employee else None)
+
+                if employee is None:
+                    error = 'Employee not found'
+                elif key in onboarded or key in seen:
+                    error = 'Onboarding already exists for employee'
+                elif (hr_id and hr_id not in people) or (buddy_id and buddy_id not in people):
+                    error = 'HR responsible or buddy not found'
+                elif template_id and str(template_id) not in templates_by_id:
+                    error = 'Onboarding template not found'
+                elif joining_date is None:
+                    error = 'Joining date is required'
+                else:
+                    template = (
+                        templates_by_id[str(template_id)] if template_id
+                        else OnboardingService.match_template(templates, employee)
+                    )
+                    if template is None:
+                        error = 'No onboarding template found for employee'
+                    else:
+                        seen.add(key)
+                        planned.append((employee, template, joining_date, hr_id, buddy_id))
+                        results.append({'employee_id': key})
+                        continue
+                results.append({'employee_id': key, 'success': False, 'error': error})
+
+            onboardings = EmployeeOnboarding.all_objects.bulk_create([
+                EmployeeOnboarding(
+                    organization_id=organization_id,
+                    employee=employee,
+                    template=template,
+                    joining_date=joining_date,
+                    start_date=joining_date - timedelta(days=template.days_before_joining),
+                    target_completion_date=joining_date + timedelta(days=template.days_to_complete),
+                    status=EmployeeOnboarding.STATUS_IN_PROGRESS,
+                    total_tasks=len(template.tasks.all()),
+                    hr_responsible_id=hr_id,
+                    buddy_id=buddy_id,
+                )
+                for employee, template, joining_date, hr_id, buddy_id in planned
+            ])
+
+            OnboardingTaskProgress.all_objects.bulk_create([
+                OnboardingTaskProgress(
+                    organization_id=organization_id,
+                    onboarding=onboarding,
+                    task_template=task_template,
+                    title=task_template.title,
+                    description=task_template.description,
+                    stage=task_template.stage,
+                    is_mandatory=task_template.is_mandatory,
+                    assigned_to_id=OnboardingService._resolve_assignee_id(employee, task_template, hr_id),
+                    due_date=joining_date + timedelta(days=task_template.due_days_offset),
+                    status=OnboardingTaskProgress.STATUS_PENDING
+                )
+                for onboarding, (employee, template, joining_date, hr_id, _) in zip(onboardings, planned)
+                for task_template in template.tasks.all()
+            ], batch_size=1000)
+
+        created = iter(onboardings)
+        for result in results:
+            if 'success' in result:
+                continue
+            onboarding = next(created)
+            result.update({
+                'success': True,
+                'onboarding_id': str(onboarding.id),
+                'template_id': str(onboarding.template_id),
+                'total_tasks': onboarding.total_tasks,
+                'error': None,
+            })
+
+        succeeded = len(onboardings)
+        return {'results': results, 'succeeded': succeeded, 'failed': len(results) - succeeded}
+    
     @staticmethod
     @transaction.atomic
     def complete_task(task_progress, completed_by, notes='', attachment=None, acknowledged=False):
         """Mark an onboarding task as completed"""
         now = timezone.now()
+        previous = OnboardingService._lock_status(task_progress)
         
         task_progress.status = OnboardingTaskProgress.STATUS_COMPLETED
         task_progress.completed_at = now
@@ -158,7 +303,7 @@ class OnboardingService:
         task_progress.save()
         
         # Update onboarding progress
-        task_progress.onboarding.update_progress()
+        task_progress.onboarding.record_task_transition(previous, task_progress.status)
         
         # Check if all mandatory tasks are completed
         OnboardingService._check_completion(task_progress.onboarding)
@@ -183,20 +328,29 @@ class OnboardingService:
             onboarding.save(update_fields=['status', 'actual_completion_date'])
     
     @staticmethod
+    @transaction.atomic
     def skip_task(task_progress, skipped_by, reason=''):
         """Skip a non-mandatory task"""
         if task_progress.is_mandatory:
             raise ValueError("Cannot skip mandatory tasks")
         
+        previous = OnboardingService._lock_status(task_progress)
         task_progress.status = OnboardingTaskProgress.STATUS_SKIPPED
         task_progress.completed_by = skipped_by
         task_progress.notes = reason
         task_progress.save()
         
-        task_progress.onboarding.update_progress()
+        task_progress.onboarding.record_task_transition(previous, task_progress.status)
         
         return task_progress
     
+    @staticmethod
+    def _lock_status(task_progress):
+        """Lock the task row and return its stored status, so counters move once per transition"""
+        return OnboardingTaskProgress.all_objects.select_for_update().values_list(
+            'status', flat=True
+        ).get(pk=task_progress.pk)
+    
     @staticmethod
     @transaction.atomic
     def verify_document(document, verified_by, action='verify', rejection_reason=''):
@@ -217,41 +371,61 @@ class OnboardingService:
     @staticmethod
     def get_onboarding_summary(onboarding):
         """Get summary statistics for an onboarding"""
-        tasks = onboarding.task_progress.all()
-        documents = onboarding.documents.all()
-        
-        task_stats = {
-            'total': tasks.count(),
-            'completed': tasks.filter(status='completed').count(),
-            'pending': tasks.filter(status='pending').count(),
-            'overdue': tasks.filter(status='overdue').count(),
-            'skipped': tasks.filter(status='skipped').count(),
-        }
-        
-        doc_stats = {
-            'total': documents.count(),
-            'verified': documents.filter(status='verified').count(),
-            'pending': documents.filter(status__in=['pending', 'uploaded']).count(),
-            'rejected': documents.filter(status='rejected').count(),
-        }
-        
-        # Group tasks by stage
-        stages = {}
-        for stage_code, stage_name in OnboardingTaskProgress._meta.get_field('stage').choices:
-            stage_tasks = tasks.filter(stage=stage_code)
-            stages[stage_code] = {
-                'name': stage_name,
-                'total': stage_tasks.count(),
-                'completed': stage_tasks.filter(status='completed').count(),
+        return OnboardingService.get_onboarding_summaries([onboarding])[onboarding.id]
+    
+    @staticmethod
+    def get_onboarding_summaries(onboardings):
+        """
+        Summary statistics for many onboardings, keyed by onboarding id.
+        Uses one grouped query over their tasks and one over their documents,
+        however many onboardings are passed.
+        """
+        onboardings = list(onboardings)
+        stage_choices = OnboardingTaskTemplate.STAGE_CHOICES
+        today = timezone.now().date()
+        summaries = {}
+        for onboarding in onboardings:
+            summaries[onboarding.id] = {
+                'tasks': {'total': 0, 'completed': 0, 'pending': 0, 'overdue': 0, 'skipped': 0},
+                'documents': {'total': 0, 'verified': 0, 'pending': 0, 'rejected': 0},
+                'stages': {
+                    code: {'name': name, 'total': 0, 'completed': 0} for code, name in stage_choices
+                },
+                'progress_percentage': onboarding.progress_percentage,
+                'days_remaining': (onboarding.target_completion_date - today).days
             }
-        
-        return {
-            'tasks': task_stats,
-            'documents': doc_stats,
-            'stages': stages,
-            'progress_percentage': onboarding.progress_percentage,
-            'days_remaining': (onboarding.target_completion_date - timezone.now().date()).days
-        }
+        if not summaries:
+            return summaries
+        
+        task_rows = OnboardingTaskProgress.all_objects.filter(
+            onboarding_id__in=summaries
+        ).values('onboarding_id', 'stage', 'status').annotate(count=Count('id')).order_by()
+        for row in task_rows:
+            summary = summaries[row['onboarding_id']]
+            tasks = summary['tasks']
+            tasks['total'] += row['count']
+            if row['status'] in tasks:
+                tasks[row['status']] += row['count']
+            stage = summary['stages'].get(row['stage'])
+            if stage is not None:
+                stage['total'] += row['count']
+                if row['status'] == OnboardingTaskProgress.STATUS_COMPLETED:
+                    stage['completed'] += row['count']
+        
+        document_rows = OnboardingDocument.all_objects.filter(
+            onboarding_id__in=summaries
+        ).values('onboarding_id', 'status').annotate(count=Count('id')).order_by()
+        for row in document_rows:
+            documents = summaries[row['onboarding_id']]['documents']
+            documents['total'] += row['count']
+            if row['status'] == OnboardingDocument.STATUS_VERIFIED:
+                documents['verified'] += row['count']
+            elif row['status'] == OnboardingDocument.STATUS_REJECTED:
+                documents['rejected'] += row['count']
+            else:
+                documents['pending'] += row['count']
+        
+        return summaries
     
     @staticmethod
     def get_pending_tasks_for_user(user_employee):
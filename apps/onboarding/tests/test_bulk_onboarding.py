@@ -0,0 +1,115 @@
+"""
+Tests for bulk onboarding initiation and in-memory template matching
+"""
+
+import uuid
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Department, Designation, Employee
+from apps.onboarding.models import (
+    EmployeeOnboarding, OnboardingTaskProgress, OnboardingTaskTemplate, OnboardingTemplate
+)
+from apps.onboarding.services import OnboardingService
+
+
+class BulkOnboardingTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Campus Org', email='campus@example.com')
+        self.engineering = Department.all_objects.create(organization=self.org, name='Engineering', code='ENG')
+        self.sales = Department.all_objects.create(organization=self.org, name='Sales', code='SAL')
+        self.intern = Designation.all_objects.create(organization=self.org, name='Intern', code='INT')
+        self.manager = self._employee('MGR')
+        self.hr = self._employee('HR1')
+
+        self.default = self._template('Default', is_default=True, tasks=1)
+        self.eng = self._template('Engineering', department=self.engineering, tasks=3)
+        self.eng_intern = self._template('Engineering Interns', department=self.engineering,
+                                         designation=self.intern, tasks=2)
+        self._template('Inactive', department=self.sales, is_active=False, tasks=1)
+
+    def _employee(self, code, **extra):
+        user = User.objects.create_user(
+            email=f'{code.lower()}@campus.example.com', password='pass',
+            first_name='Hire', last_name=code, organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=code, date_of_joining=date(2025, 7, 1), **extra,
+        )
+
+    def _template(self, name, tasks, **extra):
+        template = OnboardingTemplate.all_objects.create(
+            organization=self.org, name=name, code=name[:20].upper(), **extra,
+        )
+        assignees = ['employee', 'manager', 'hr']
+        for n in range(tasks):
+            OnboardingTaskTemplate.all_objects.create(
+                organization=self.org, template=template, title=f'{name} task {n}',
+                assigned_to_type=assignees[n % 3], due_days_offset=n, order=n,
+            )
+        return template
+
+    def test_match_template_follows_priority_in_memory(self):
+        templates = OnboardingService.active_templates(self.org.id)
+        cases = [
+            (self._employee('E1', department=self.engineering, designation=self.intern), self.eng_intern),
+            (self._employee('E2', department=self.engineering), self.eng),
+            (self._employee('E3', department=self.sales), self.default),
+        ]
+        with self.assertNumQueries(0):
+            matched = [OnboardingService.match_template(templates, employee) for employee, _ in cases]
+        self.assertEqual(matched, [expected for _, expected in cases])
+
+    def test_bulk_initiate_creates_onboardings_and_tasks_in_constant_queries(self):
+        hires = [
+            self._employee(f'C{n:02d}', department=self.engineering, reporting_manager=self.manager)
+            for n in range(20)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = OnboardingService.bulk_initiate_onboarding(
+                self.org, [{'employee_id': e.id, 'hr_responsible_id': self.hr.id} for e in hires]
+            )
+
+        self.assertEqual((result['succeeded'], result['failed']), (20, 0))
+        self.assertLessEqual(len(queries.captured_queries), 10)
+        self.assertEqual(OnboardingTaskProgress.all_objects.filter(onboarding__template=self.eng).count(), 60)
+
+        onboarding = EmployeeOnboarding.all_objects.get(employee=hires[0])
+        self.assertEqual(onboarding.total_tasks, 3)
+        self.assertEqual(onboarding.start_date, date(2025, 6, 24))
+        self.assertEqual(onboarding.target_completion_date, date(2025, 7, 31))
+        assigned = dict(onboarding.task_progress.values_list('title', 'assigned_to_id'))
+        self.assertEqual(assigned, {
+            'Engineering task 0': hires[0].id,
+            'Engineering task 1': self.manager.id,
+            'Engineering task 2': self.hr.id,
+        })
+
+    def test_bulk_initiate_reports_failures_and_continues(self):
+        fresh = self._employee('NEW', department=self.sales)
+        already = self._employee('OLD')
+        OnboardingService.initiate_onboarding(already, template=self.default)
+
+        result = OnboardingService.bulk_initiate_onboarding(self.org, [
+            {'employee_id': fresh.id, 'joining_date': date(2025, 9, 1)},
+            {'employee_id': already.id},
+            {'employee_id': uuid.uuid4()},
+            {'employee_id': fresh.id},
+        ])
+
+        self.assertEqual((result['succeeded'], result['failed']), (1, 3))
+        self.assertTrue(result['results'][0]['success'])
+        self.assertEqual(result['results'][0]['template_id'], str(self.default.id))
+        self.assertEqual([r['error'] for r in result['results'][1:]], [
+            'Onboarding already exists for employee',
+            'Employee not found',
+            'Onboarding already exists for employee',
+        ])
+        self.assertEqual(EmployeeOnboarding.all_objects.get(employee=fresh).joining_date, date(2025, 9, 1))
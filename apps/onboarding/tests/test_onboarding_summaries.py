@@ -0,0 +1,87 @@
+"""
+Tests for grouped onboarding summaries and incremental progress counters
+"""
+
+from datetime import date
+
+from django.test import TestCase
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Employee
+from apps.onboarding.models import (
+    EmployeeOnboarding, OnboardingDocument, OnboardingTaskProgress, OnboardingTaskTemplate, OnboardingTemplate
+)
+from apps.onboarding.services import OnboardingService
+
+
+class OnboardingSummaryTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Summary Org', email='summary@example.com')
+        self.template = OnboardingTemplate.all_objects.create(
+            organization=self.org, name='Default', code='DEF', is_default=True,
+        )
+        stages = ['pre_joining', 'day_one', 'day_one', 'first_week']
+        for n, stage in enumerate(stages):
+            OnboardingTaskTemplate.all_objects.create(
+                organization=self.org, template=self.template, title=f'Task {n}', stage=stage,
+                order=n, is_mandatory=n != 3,
+            )
+        self.onboardings = [
+            OnboardingService.initiate_onboarding(self._employee(f'S{n}'), template=self.template)
+            for n in range(3)
+        ]
+
+    def _employee(self, code):
+        user = User.objects.create_user(
+            email=f'{code.lower()}@summary.example.com', password='pass',
+            first_name='Hire', last_name=code, organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=code, date_of_joining=date(2025, 7, 1),
+        )
+
+    def _tasks(self, onboarding):
+        return list(OnboardingTaskProgress.all_objects.filter(onboarding=onboarding).order_by('title'))
+
+    def test_bulk_summaries_use_two_queries(self):
+        first = self.onboardings[0]
+        OnboardingService.complete_task(self._tasks(first)[1], completed_by=None)
+        for status in ('verified', 'uploaded'):
+            OnboardingDocument.all_objects.create(
+                organization=self.org, onboarding=first, document_type='pan_card', status=status,
+            )
+
+        with self.assertNumQueries(2):
+            summaries = OnboardingService.get_onboarding_summaries(self.onboardings)
+
+        summary = summaries[first.id]
+        self.assertEqual(summary['tasks'], {'total': 4, 'completed': 1, 'pending': 3, 'overdue': 0, 'skipped': 0})
+        self.assertEqual(summary['documents'], {'total': 2, 'verified': 1, 'pending': 1, 'rejected': 0})
+        self.assertEqual(summary['stages']['day_one'], {'name': 'Day One', 'total': 2, 'completed': 1})
+        self.assertEqual(summaries[self.onboardings[1].id]['documents']['total'], 0)
+        self.assertEqual(OnboardingService.get_onboarding_summary(first), summary)
+
+    def test_complete_and_skip_move_counters_once_per_transition(self):
+        onboarding = self.onboardings[0]
+        tasks = self._tasks(onboarding)
+
+        OnboardingService.complete_task(tasks[0], completed_by=None)
+        OnboardingService.complete_task(tasks[0], completed_by=None)
+        OnboardingService.skip_task(tasks[3], skipped_by=None, reason='Not needed')
+
+        stored = EmployeeOnboarding.all_objects.get(pk=onboarding.pk)
+        self.assertEqual(
+            (stored.total_tasks, stored.completed_tasks, stored.skipped_tasks, stored.progress_percentage),
+            (4, 1, 1, 25),
+        )
+        self.assertEqual(tasks[0].onboarding.completed_tasks, 1)
+
+        OnboardingService.complete_task(tasks[3], completed_by=None)
+        stored.refresh_from_db()
+        self.assertEqual((stored.completed_tasks, stored.skipped_tasks, stored.progress_percentage), (2, 0, 50))
+
+        # The counters match a full recount
+        stored.update_progress()
+        self.assertEqual((stored.completed_tasks, stored.skipped_tasks, stored.progress_percentage), (2, 0, 50))
@@ -17,7 +17,7 @@ from .serializers import (
     OnboardingTaskTemplateSerializer,
     EmployeeOnboardingListSerializer, EmployeeOnboardingDetailSerializer,
     OnboardingTaskProgressSerializer, OnboardingDocumentSerializer,
-    InitiateOnboardingSerializer, CompleteTaskSerializer, VerifyDocumentSerializer
+    InitiateOnboardingSerializer, BulkInitiateOnboardingSerializer, CompleteTaskSerializer, VerifyDocumentSerializer
 )
 from .services import OnboardingService
 
@@ -130,6 +130,8 @@ class EmployeeOnboardingViewSet(OrganizationViewSetMixin, FilterByPermissionMixi
         'update': ['onboarding.manage'],
         'partial_update': ['onboarding.manage'],
         'destroy': ['onboarding.manage'],
+        'bulk_initiate': ['onboarding.manage'],
+        'summaries': ['onboarding.view'],
     }
     scope_field = 'employee'
     
@@ -151,9 +153,13 @@ class EmployeeOnboardingViewSet(OrganizationViewSetMixin, FilterByPermissionMixi
         if hr_responsible:
             queryset = queryset.filter(hr_responsible_id=hr_responsible)
         
-        return queryset.select_related(
-            'employee', 'template', 'hr_responsible', 'buddy'
-        ).prefetch_related('task_progress', 'documents')
+        queryset = queryset.select_related(
+            'employee__user', 'template', 'hr_responsible__user', 'buddy__user'
+        )
+        if self.action == 'retrieve':
+            # List rows use the stored progress counters; only the detail view nests tasks
+            queryset = queryset.prefetch_related('task_progress', 'documents')
+        return queryset
     
     @action(detail=False, methods=['post'])
     def initiate(self, request):
@@ -209,6 +215,25 @@ class EmployeeOnboardingViewSet(OrganizationViewSetMixin, FilterByPermissionMixi
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], url_path='bulk-initiate')
+    def bulk_initiate(self, request):
+        """
+        Initiate onboarding for a batch of hires.
+        Returns one result per hire; failures do not block the rest.
+        """
+        serializer = BulkInitiateOnboardingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        result = OnboardingService.bulk_initiate_onboarding(
+            request.organization,
+            serializer.validated_data['hires']
+        )
+        
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['succeeded'] else status.HTTP_400_BAD_REQUEST
+        )
+    
     @action(detail=False, methods=['get'])
     def my_onboarding(self, request):
         """Get current user's onboarding"""
@@ -244,6 +269,34 @@ class EmployeeOnboardingViewSet(OrganizationViewSetMixin, FilterByPermissionMixi
         summary = OnboardingService.get_onboarding_summary(onboarding)
         return Response(summary)
     
+    @action(detail=False, methods=['get'])
+    def summaries(self, request):
+        """
+        Summary statistics for a page of onboardings (in progress by default).
+        Computed with two grouped queries for the whole page.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if not request.query_params.get('status'):
+            queryset = queryset.filter(status=EmployeeOnboarding.STATUS_IN_PROGRESS)
+        
+        page = self.paginate_queryset(queryset)
+        onboardings = page if page is not None else list(queryset)
+        summaries = OnboardingService.get_onboarding_summaries(onboardings)
+        data = [
+            {
+                'id': str(onboarding.id),
+                'employee_id': onboarding.employee.employee_id,
+                'employee_name': onboarding.employee.full_name,
+                'status': onboarding.status,
+                **summaries[onboarding.id],
+            }
+            for onboarding in onboardings
+        ]
+        
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+    
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel an onboarding"""
@@ -6,6 +6,7 @@ from .models import (
     TrainingMaterial,
     TrainingEnrollment,
     TrainingCompletion,
+    TrainingProgramStats,
 )
 
 
@@ -41,3 +42,13 @@ class TrainingEnrollmentAdmin(admin.ModelAdmin):
 class TrainingCompletionAdmin(admin.ModelAdmin):
     list_display = ['enrollment', 'completed_at', 'score']
     search_fields = ['enrollment__program__name', 'enrollment__employee__user__first_name']
+
+
+@admin.register(TrainingProgramStats)
+class TrainingProgramStatsAdmin(admin.ModelAdmin):
+    list_display = ['program', 'enrolled_count', 'started_count', 'completed_count', 'overdue_count', 'overdue_as_of']
+    search_fields = ['program__name']
+    readonly_fields = [
+        'program', 'enrolled_count', 'started_count', 'completed_count',
+        'cancelled_count', 'overdue_count', 'overdue_as_of'
+    ]
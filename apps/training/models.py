@@ -187,3 +187,51 @@ class TrainingCompletion(OrganizationEntity):
 
     def __str__(self) -> str:
         return f"Completion - {self.enrollment}"
+
+
+class TrainingProgramStats(OrganizationEntity):
+    """
+    Enrollment counters for a program, kept up to date by the enrollment
+    actions so program lists never aggregate at read time.
+    Overdue counts are as of overdue_as_of and refreshed daily.
+    """
+    program = models.OneToOneField(
+        TrainingProgram,
+        on_delete=models.CASCADE,
+        related_name='stats'
+    )
+    enrolled_count = models.PositiveIntegerField(default=0)
+    started_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    overdue_count = models.PositiveIntegerField(default=0)
+    overdue_as_of = models.DateField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Stats - {self.program}"
+
+
+class TrainingDepartmentStats(OrganizationEntity):
+    """Per-department enrollment counters: one cell of the program x department completion matrix"""
+    program = models.ForeignKey(
+        TrainingProgram,
+        on_delete=models.CASCADE,
+        related_name='department_stats'
+    )
+    department = models.ForeignKey(
+        'employees.Department',
+        on_delete=models.CASCADE,
+        related_name='training_stats'
+    )
+    enrolled_count = models.PositiveIntegerField(default=0)
+    started_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    overdue_count = models.PositiveIntegerField(default=0)
+    overdue_as_of = models.DateField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [('program', 'department')]
+
+    def __str__(self) -> str:
+        return f"Stats - {self.program} / {self.department}"
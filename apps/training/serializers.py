@@ -1,4 +1,6 @@
 """Training Serializers"""
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from .models import (
     TrainingCategory,
@@ -24,7 +26,10 @@ class TrainingCategorySerializer(serializers.ModelSerializer):
 class TrainingProgramSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    enrollment_count = serializers.IntegerField(read_only=True)
+    enrollment_count = serializers.SerializerMethodField()
+    started_count = serializers.SerializerMethodField()
+    completed_count = serializers.SerializerMethodField()
+    overdue_count = serializers.SerializerMethodField()
 
     class Meta:
         model = TrainingProgram
@@ -34,9 +39,34 @@ class TrainingProgramSerializer(serializers.ModelSerializer):
             'enrollment_deadline', 'duration_hours', 'capacity',
             'is_mandatory', 'status', 'status_display',
             'prerequisites', 'tags', 'metadata',
-            'is_active', 'created_at', 'updated_at', 'enrollment_count'
+            'is_active', 'created_at', 'updated_at',
+            'enrollment_count', 'started_count', 'completed_count', 'overdue_count'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'status_display', 'enrollment_count']
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'status_display',
+            'enrollment_count', 'started_count', 'completed_count', 'overdue_count'
+        ]
+
+    def _stat(self, obj, field):
+        # Programs without a counter row yet have no enrollments
+        stats = getattr(obj, 'stats', None)
+        return getattr(stats, field) if stats is not None else 0
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_enrollment_count(self, obj):
+        return self._stat(obj, 'enrolled_count')
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_started_count(self, obj):
+        return self._stat(obj, 'started_count')
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_completed_count(self, obj):
+        return self._stat(obj, 'completed_count')
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_overdue_count(self, obj):
+        return self._stat(obj, 'overdue_count')
 
 
 class TrainingMaterialSerializer(serializers.ModelSerializer):
@@ -88,3 +118,19 @@ class TrainingCompletionSerializer(serializers.ModelSerializer):
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'completed_at', 'created_at', 'updated_at']
+
+
+class BulkEnrollSerializer(serializers.Serializer):
+    """Targets for enrolling many employees into a program at once"""
+    department_ids = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    designation_ids = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    branch_ids = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    employee_ids = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    due_date = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not any(attrs[key] for key in ('department_ids', 'designation_ids', 'branch_ids', 'employee_ids')):
+            raise serializers.ValidationError(
+                'Provide at least one of department_ids, designation_ids, branch_ids or employee_ids'
+            )
+        return attrs
@@ -0,0 +1,336 @@
+"""Training Services - Business Logic"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from .models import (
+    TrainingProgram,
+    TrainingEnrollment,
+    TrainingCompletion,
+    TrainingProgramStats,
+    TrainingDepartmentStats,
+)
+
+ACTIVE_STATUSES = (TrainingEnrollment.STATUS_ENROLLED, TrainingEnrollment.STATUS_IN_PROGRESS)
+
+
+class TrainingStatsService:
+    """
+    Maintains the per-program and per-department enrollment counters.
+
+    Every status change moves the counters with F() updates. When a counter
+    row is missing, the program's rows are rebuilt from the enrollments
+    instead. Overdue counts depend on the date, so refresh_training_stats
+    rebuilds everything daily; in between, changes to enrollments that were
+    already overdue at the last rebuild are applied incrementally.
+    """
+
+    COUNTERS = ('enrolled_count', 'started_count', 'completed_count', 'cancelled_count')
+
+    @staticmethod
+    def _contribution(status):
+        """Counter values one enrollment in this status adds (None = no enrollment)"""
+        if status is None:
+            return dict.fromkeys(TrainingStatsService.COUNTERS, 0)
+        return {
+            'enrolled_count': 1,
+            'started_count': int(status == TrainingEnrollment.STATUS_IN_PROGRESS),
+            'completed_count': int(status == TrainingEnrollment.STATUS_COMPLETED),
+            'cancelled_count': int(status == TrainingEnrollment.STATUS_CANCELLED),
+        }
+
+    @staticmethod
+    def record_transition(enrollment, old_status, new_status):
+        """Move the counters for one enrollment going from old_status to new_status"""
+        before = TrainingStatsService._contribution(old_status)
+        after = TrainingStatsService._contribution(new_status)
+        TrainingStatsService._apply(
+            enrollment.program_id,
+            {enrollment.employee.department_id: 1},
+            {field: after[field] - before[field] for field in TrainingStatsService.COUNTERS},
+            active=int(new_status in ACTIVE_STATUSES) - int(old_status in ACTIVE_STATUSES),
+            due_date=enrollment.due_date,
+        )
+
+    @staticmethod
+    def _apply(program_id, departments, deltas, active=0, due_date=None):
+        """
+        Add deltas (per enrollment) to the program row and, multiplied by
+        each department's enrollment count, to the department rows.
+        """
+        def values(times):
+            changes = {field: F(field) + delta * times for field, delta in deltas.items() if delta}
+            if active and due_date is not None:
+                # Counted as overdue only if the last refresh already saw it overdue
+                changes['overdue_count'] = F('overdue_count') + Case(
+                    When(overdue_as_of__gt=due_date, then=Value(active * times)),
+                    default=Value(0),
+                )
+            return changes
+
+        total = sum(departments.values())
+        if not values(total):
+            return
+        complete = TrainingProgramStats.all_objects.filter(program_id=program_id).update(**values(total))
+        for department_id, times in departments.items():
+            if complete and department_id:
+                complete = TrainingDepartmentStats.all_objects.filter(
+                    program_id=program_id, department_id=department_id
+                ).update(**values(times))
+        if not complete:
+            TrainingStatsService.rebuild([program_id])
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(program_ids, as_of=None):
+        """Recompute the counter rows of the given programs from their enrollments"""
+        as_of = as_of or timezone.now().date()
+        programs = dict(
+            TrainingProgram.all_objects.filter(id__in=program_ids).values_list('id', 'organization_id')
+        )
+        rows = TrainingEnrollment.all_objects.filter(
+            program_id__in=programs, is_deleted=False
+        ).values('program_id', 'employee__department_id').annotate(
+            enrolled_count=Count('id'),
+            started_count=Count('id', filter=Q(status=TrainingEnrollment.STATUS_IN_PROGRESS)),
+            completed_count=Count('id', filter=Q(status=TrainingEnrollment.STATUS_COMPLETED)),
+            cancelled_count=Count('id', filter=Q(status=TrainingEnrollment.STATUS_CANCELLED)),
+            overdue_count=Count('id', filter=Q(status__in=ACTIVE_STATUSES, due_date__lt=as_of)),
+        ).order_by()
+
+        fields = TrainingStatsService.COUNTERS + ('overdue_count',)
+        totals = {program_id: Counter() for program_id in programs}
+        cells = []
+        for row in rows:
+            counts = {field: row[field] for field in fields}
+            totals[row['program_id']].update(counts)
+            if row['employee__department_id']:
+                cells.append(TrainingDepartmentStats(
+                    organization_id=programs[row['program_id']],
+                    program_id=row['program_id'],
+                    department_id=row['employee__department_id'],
+                    overdue_as_of=as_of,
+                    **counts
+                ))
+
+        TrainingProgramStats.all_objects.filter(program_id__in=programs).delete()
+        TrainingDepartmentStats.all_objects.filter(program_id__in=programs).delete()
+        TrainingProgramStats.all_objects.bulk_create([
+            TrainingProgramStats(
+                organization_id=organization_id,
+                program_id=program_id,
+                overdue_as_of=as_of,
+                **{field: totals[program_id][field] for field in fields}
+            )
+            for program_id, organization_id in programs.items()
+        ])
+        TrainingDepartmentStats.all_objects.bulk_create(cells, batch_size=1000)
+        return len(programs)
+
+    @staticmethod
+    def completion_matrix(programs):
+        """
+        Program x department completion matrix from the stored counters.
+        Returns {'programs': [...], 'departments': [...], 'cells': [...]}.
+        """
+        programs = list(programs)
+        program_stats = {
+            stats.program_id: stats
+            for stats in TrainingProgramStats.all_objects.filter(program__in=programs)
+        }
+        cells = TrainingDepartmentStats.all_objects.filter(
+            program__in=programs
+        ).select_related('department').order_by('department__name')
+
+        departments = {}
+        matrix = []
+        for cell in cells:
+            departments[cell.department_id] = {'id': str(cell.department_id), 'name': cell.department.name}
+            matrix.append({
+                'program': str(cell.program_id),
+                'department': str(cell.department_id),
+                **TrainingStatsService._serialize(cell),
+            })
+
+        return {
+            'programs': [
+                {
+                    'id': str(program.id),
+                    'name': program.name,
+                    'code': program.code,
+                    **TrainingStatsService._serialize(program_stats.get(program.id)),
+                }
+                for program in programs
+            ],
+            'departments': list(departments.values()),
+            'cells': matrix,
+        }
+
+    @staticmethod
+    def _serialize(stats):
+        counts = {
+            'enrolled': getattr(stats, 'enrolled_count', 0),
+            'started': getattr(stats, 'started_count', 0),
+            'completed': getattr(stats, 'completed_count', 0),
+            'cancelled': getattr(stats, 'cancelled_count', 0),
+            'overdue': getattr(stats, 'overdue_count', 0),
+        }
+        active = counts['enrolled'] - counts['cancelled']
+        counts['completion_rate'] = round(counts['completed'] * 100 / active, 1) if active else 0.0
+        return counts
+
+
+class TrainingService:
+    """Enrollment operations; every status change also moves the program counters"""
+
+    BULK_BATCH_SIZE = 1000
+
+    @staticmethod
+    @transaction.atomic
+    def enroll(program, employee, assigned_by=None, due_date=None):
+        """Enroll one employee; returns (enrollment, created)"""
+        enrollment, created = TrainingEnrollment.objects.get_or_create(
+            program=program,
+            employee=employee,
+            defaults={
+                'organization': employee.organization if hasattr(employee, 'organization') else None,
+                'assigned_by': assigned_by,
+                'due_date': due_date or program.enrollment_deadline
+            }
+        )
+        if created:
+            TrainingStatsService.record_transition(enrollment, None, enrollment.status)
+        return enrollment, created
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_enroll(program, department_ids=(), designation_ids=(), branch_ids=(), employee_ids=(),
+                    assigned_by=None, due_date=None):
+        """
+        Enroll every active employee matching any of the targets.
+
+        Targets are resolved with one query, existing enrollments are
+        skipped using one set query over the program's enrollments and the
+        new rows are inserted with bulk_create. Counters move by one UPDATE
+        per touched department.
+
+        Returns:
+            {'targeted': int, 'enrolled': int, 'already_enrolled': int}
+        """
+        from apps.employees.models import Employee
+
+        targets = Q()
+        for lookup, ids in (('department_id__in', department_ids), ('designation_id__in', designation_ids),
+                            ('branch_id__in', branch_ids), ('id__in', employee_ids)):
+            if ids:
+                targets |= Q(**{lookup: list(ids)})
+        if not targets:
+            raise ValueError("At least one department, designation, branch or employee is required")
+
+        employees = list(
+            Employee.all_objects.filter(
+                targets, organization_id=program.organization_id, is_active=True, is_deleted=False
+            ).values_list('id', 'department_id')
+        )
+        existing = set(
+            TrainingEnrollment.all_objects.filter(program=program).values_list('employee_id', flat=True)
+        )
+        new = [(employee_id, department_id) for employee_id, department_id in employees
+               if employee_id not in existing]
+
+        due_date = due_date or program.enrollment_deadline
+        TrainingEnrollment.all_objects.bulk_create([
+            TrainingEnrollment(
+                organization_id=program.organization_id,
+                program=program,
+                employee_id=employee_id,
+                assigned_by=assigned_by,
+                due_date=due_date,
+            )
+            for employee_id, _ in new
+        ], batch_size=TrainingService.BULK_BATCH_SIZE)
+
+        if new:
+            contribution = TrainingStatsService._contribution(TrainingEnrollment.STATUS_ENROLLED)
+            TrainingStatsService._apply(
+                program.id,
+                Counter(department_id for _, department_id in new),
+                contribution,
+                active=1,
+                due_date=due_date,
+            )
+
+        return {
+            'targeted': len(employees),
+            'enrolled': len(new),
+            'already_enrolled': len(employees) - len(new),
+        }
+
+    @staticmethod
+    def _lock_status(enrollment):
+        """Lock the enrollment row and return its stored status"""
+        return TrainingEnrollment.all_objects.select_for_update().values_list(
+            'status', flat=True
+        ).get(pk=enrollment.pk)
+
+    @staticmethod
+    @transaction.atomic
+    def start_enrollment(enrollment):
+        previous = TrainingService._lock_status(enrollment)
+        enrollment.status = TrainingEnrollment.STATUS_IN_PROGRESS
+        if not enrollment.started_at:
+            enrollment.started_at = timezone.now()
+        enrollment.save(update_fields=['status', 'started_at'])
+        TrainingStatsService.record_transition(enrollment, previous, enrollment.status)
+        return enrollment
+
+    @staticmethod
+    @transaction.atomic
+    def update_progress(enrollment, progress):
+        previous = TrainingService._lock_status(enrollment)
+        enrollment.progress_percent = max(0, min(100, progress))
+        if enrollment.progress_percent > 0 and enrollment.status == TrainingEnrollment.STATUS_ENROLLED:
+            enrollment.status = TrainingEnrollment.STATUS_IN_PROGRESS
+            if not enrollment.started_at:
+                enrollment.started_at = timezone.now()
+        enrollment.save(update_fields=['progress_percent', 'status', 'started_at'])
+        TrainingStatsService.record_transition(enrollment, previous, enrollment.status)
+        return enrollment
+
+    @staticmethod
+    @transaction.atomic
+    def complete_enrollment(enrollment, score=None, certificate_file=None, feedback=''):
+        """Mark an enrollment completed; returns (enrollment, completion)"""
+        previous = TrainingService._lock_status(enrollment)
+        enrollment.status = TrainingEnrollment.STATUS_COMPLETED
+        enrollment.completed_at = timezone.now()
+        enrollment.progress_percent = 100
+        if score is not None:
+            enrollment.score = score
+        if certificate_file:
+            enrollment.certificate_file = certificate_file
+        enrollment.save()
+
+        completion, _ = TrainingCompletion.objects.get_or_create(
+            enrollment=enrollment,
+            defaults={
+                'organization': enrollment.organization,
+                'score': enrollment.score,
+                'feedback': feedback,
+                'certificate_file': enrollment.certificate_file
+            }
+        )
+        TrainingStatsService.record_transition(enrollment, previous, enrollment.status)
+        return enrollment, completion
+
+    @staticmethod
+    @transaction.atomic
+    def cancel_enrollment(enrollment):
+        previous = TrainingService._lock_status(enrollment)
+        enrollment.status = TrainingEnrollment.STATUS_CANCELLED
+        enrollment.save(update_fields=['status'])
+        TrainingStatsService.record_transition(enrollment, previous, enrollment.status)
+        return enrollment
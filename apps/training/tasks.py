@@ -0,0 +1,19 @@
+"""Training background tasks"""
+from celery import shared_task
+from .models import TrainingProgram
+from .services import TrainingStatsService
+
+
+@shared_task
+def refresh_training_stats(chunk_size: int = 500):
+    """
+    Rebuild program and department training counters (run daily, after midnight).
+    Brings overdue counts up to date and repairs any drift from edits made
+    outside the enrollment actions.
+    """
+    program_ids = list(
+        TrainingProgram.all_objects.filter(is_deleted=False).order_by('id').values_list('id', flat=True)
+    )
+    for start in range(0, len(program_ids), chunk_size):
+        TrainingStatsService.rebuild(program_ids[start:start + chunk_size])
+    return len(program_ids)
@@ -0,0 +1,136 @@
+"""
+Tests for bulk training enrollment and the maintained completion counters
+"""
+
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Department, Designation, Employee
+from apps.training.models import (
+    TrainingDepartmentStats, TrainingEnrollment, TrainingProgram, TrainingProgramStats
+)
+from apps.training.serializers import TrainingProgramSerializer
+from apps.training.services import TrainingService, TrainingStatsService
+
+
+class TrainingStatsTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Training Org', email='training@example.com')
+        self.finance = Department.all_objects.create(organization=self.org, name='Finance', code='FIN')
+        self.ops = Department.all_objects.create(organization=self.org, name='Operations', code='OPS')
+        self.analyst = Designation.all_objects.create(organization=self.org, name='Analyst', code='ANL')
+        self.finance_staff = [self._employee(f'F{n}', department=self.finance) for n in range(3)]
+        self.ops_staff = [self._employee(f'O{n}', department=self.ops) for n in range(2)]
+        self.ops_analyst = self._employee('OA', department=self.ops, designation=self.analyst)
+        self._employee('GONE', department=self.finance, is_active=False)
+        self.program = TrainingProgram.all_objects.create(
+            organization=self.org, name='Anti-bribery', code='ABC', is_mandatory=True,
+        )
+
+    def _employee(self, code, **extra):
+        user = User.objects.create_user(
+            email=f'{code.lower()}@training.example.com', password='pass',
+            first_name='Staff', last_name=code, organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=code, date_of_joining=date(2020, 1, 1), **extra,
+        )
+
+    def _counts(self, stats):
+        return (stats.enrolled_count, stats.started_count, stats.completed_count,
+                stats.cancelled_count, stats.overdue_count)
+
+    def _snapshot(self):
+        program = self._counts(TrainingProgramStats.all_objects.get(program=self.program))
+        cells = {
+            cell.department_id: self._counts(cell)
+            for cell in TrainingDepartmentStats.all_objects.filter(program=self.program)
+        }
+        return program, cells
+
+    def test_bulk_enroll_targets_and_dedupes(self):
+        TrainingService.enroll(self.program, self.finance_staff[0])
+        TrainingService.enroll(self.program, self.ops_staff[0])
+
+        # Targets, existing enrollments, insert, program row, two department rows (+ savepoint)
+        with self.assertNumQueries(8):
+            result = TrainingService.bulk_enroll(
+                self.program, department_ids=[self.finance.id], designation_ids=[self.analyst.id],
+                employee_ids=[self.ops_staff[1].id],
+            )
+
+        self.assertEqual(result, {'targeted': 5, 'enrolled': 4, 'already_enrolled': 1})
+        self.assertEqual(TrainingEnrollment.all_objects.filter(program=self.program).count(), 6)
+        program, cells = self._snapshot()
+        self.assertEqual(program, (6, 0, 0, 0, 0))
+        self.assertEqual(cells, {self.finance.id: (3, 0, 0, 0, 0), self.ops.id: (3, 0, 0, 0, 0)})
+
+    def test_actions_keep_counters_equal_to_a_rebuild(self):
+        TrainingService.bulk_enroll(self.program, department_ids=[self.finance.id, self.ops.id])
+        enrollments = {
+            e.employee_id: e for e in TrainingEnrollment.all_objects.filter(program=self.program)
+            .select_related('employee')
+        }
+        first, second, third, fourth = (enrollments[e.id] for e in self.finance_staff[:2] + self.ops_staff)
+
+        TrainingService.start_enrollment(first)
+        TrainingService.update_progress(second, 40)
+        TrainingService.complete_enrollment(first, score=90)
+        TrainingService.complete_enrollment(third)
+        TrainingService.cancel_enrollment(fourth)
+
+        incremental = self._snapshot()
+        self.assertEqual(incremental[0], (6, 1, 2, 1, 0))
+        self.assertEqual(incremental[1][self.finance.id], (3, 1, 1, 0, 0))
+
+        TrainingStatsService.rebuild([self.program.id])
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_overdue_counts_follow_the_daily_refresh(self):
+        # The first enrollment creates the counter rows as of today
+        TrainingService.enroll(self.program, self.ops_staff[0])
+        past_due = timezone.now().date() - timedelta(days=3)
+
+        TrainingService.bulk_enroll(self.program, department_ids=[self.ops.id], due_date=past_due)
+        self.assertEqual(self._snapshot()[1][self.ops.id][4], 2)
+
+        enrollment = TrainingEnrollment.all_objects.select_related('employee').get(
+            program=self.program, employee=self.ops_analyst
+        )
+        TrainingService.complete_enrollment(enrollment)
+        program, cells = self._snapshot()
+        self.assertEqual((program[4], cells[self.ops.id][4]), (1, 1))
+
+        # Due today: not overdue until a later refresh sees the date pass
+        TrainingService.enroll(self.program, self.finance_staff[0], due_date=timezone.now().date())
+        self.assertEqual(self._snapshot()[0][4], 1)
+        TrainingStatsService.rebuild([self.program.id], as_of=timezone.now().date() + timedelta(days=1))
+        self.assertEqual(self._snapshot()[0][4], 2)
+
+    def test_completion_matrix_reads_stored_counters(self):
+        TrainingService.bulk_enroll(self.program, department_ids=[self.finance.id, self.ops.id])
+        enrollment = TrainingEnrollment.all_objects.select_related('employee').get(
+            program=self.program, employee=self.ops_analyst
+        )
+        TrainingService.complete_enrollment(enrollment)
+
+        with self.assertNumQueries(2):
+            matrix = TrainingStatsService.completion_matrix([self.program])
+
+        self.assertEqual([d['name'] for d in matrix['departments']], ['Finance', 'Operations'])
+        self.assertEqual(matrix['programs'][0]['enrolled'], 6)
+        ops = next(cell for cell in matrix['cells'] if cell['department'] == str(self.ops.id))
+        self.assertEqual((ops['enrolled'], ops['completed'], ops['completion_rate']), (3, 1, 33.3))
+
+    def test_program_without_counters_serializes_zero_counts(self):
+        self.assertFalse(TrainingProgramStats.all_objects.filter(program=self.program).exists())
+        data = TrainingProgramSerializer(TrainingProgram.all_objects.get(pk=self.program.pk)).data
+        self.assertEqual(
+            [data[f] for f in ('enrollment_count', 'started_count', 'completed_count', 'overdue_count')],
+            [0, 0, 0, 0],
+        )
@@ -1,6 +1,6 @@
 """Training ViewSets"""
+from django.db import transaction
 from django.db.models import Count, Q
-from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -25,8 +25,10 @@ from .serializers import (
     TrainingMaterialSerializer,
     TrainingEnrollmentSerializer,
     TrainingCompletionSerializer,
+    BulkEnrollSerializer,
 )
 from .permissions import TrainingManagePermission
+from .services import TrainingService, TrainingStatsService
 
 
 class TrainingCategoryViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
@@ -58,8 +60,8 @@ class TrainingProgramViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
     ordering_fields = ['name', 'start_date', 'created_at']
 
     def get_queryset(self):
-        queryset = TrainingProgram.objects.filter(is_deleted=False).select_related('category')
-        return queryset.annotate(enrollment_count=Count('enrollments'))
+        # Enrollment counts come from the maintained TrainingProgramStats row
+        return TrainingProgram.objects.filter(is_deleted=False).select_related('category', 'stats')
 
     def perform_create(self, serializer):
         org = self.request.user.get_organization() if hasattr(self.request.user, 'get_organization') else None
@@ -84,14 +86,11 @@ class TrainingProgramViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        enrollment, created = TrainingEnrollment.objects.get_or_create(
-            program=program,
-            employee=employee,
-            defaults={
-                'organization': employee.organization if hasattr(employee, 'organization') else None,
-                'assigned_by': getattr(request.user, 'employee', None),
-                'due_date': request.data.get('due_date') or program.enrollment_deadline
-            }
+        enrollment, created = TrainingService.enroll(
+            program,
+            employee,
+            assigned_by=getattr(request.user, 'employee', None),
+            due_date=request.data.get('due_date')
         )
 
         if not created:
@@ -105,6 +104,31 @@ class TrainingProgramViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @action(detail=True, methods=['post'], url_path='bulk-enroll')
+    def bulk_enroll(self, request, pk=None):
+        """Enroll whole departments, designations, branches or a list of employees"""
+        program = self.get_object()
+        serializer = BulkEnrollSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = TrainingService.bulk_enroll(
+            program,
+            assigned_by=getattr(request.user, 'employee', None),
+            **serializer.validated_data
+        )
+        return Response({'success': True, 'data': result}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='completion-matrix')
+    def completion_matrix(self, request):
+        """Program x department completion counts for the filtered programs"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        programs = page if page is not None else queryset
+        data = TrainingStatsService.completion_matrix(programs)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response({'success': True, 'data': data})
+
 
 class TrainingMaterialViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
     """Manage training materials"""
@@ -139,7 +163,7 @@ class TrainingEnrollmentViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet)
     ordering_fields = ['enrolled_at', 'completed_at', 'created_at']
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(is_deleted=False).select_related('program', 'employee')
+        queryset = super().get_queryset().filter(is_deleted=False).select_related('program', 'employee__user')
 
         if self.request.user.is_superuser or self.request.user.is_org_admin or self.request.user.is_organization_admin():
             return queryset
@@ -150,9 +174,28 @@ class TrainingEnrollmentViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet)
 
         return queryset.none()
 
+    @transaction.atomic
     def perform_create(self, serializer):
         org = self.request.user.get_organization() if hasattr(self.request.user, 'get_organization') else None
-        serializer.save(organization=org)
+        enrollment = serializer.save(organization=org)
+        TrainingStatsService.record_transition(enrollment, None, enrollment.status)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        previous = (instance.program_id, instance.employee_id, instance.status)
+        enrollment = serializer.save()
+        if previous[:2] != (enrollment.program_id, enrollment.employee_id):
+            # Moved to another program or employee: recount both programs
+            TrainingStatsService.rebuild({previous[0], enrollment.program_id})
+            return
+        TrainingStatsService.record_transition(enrollment, previous[2], enrollment.status)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        previous = instance.status
+        instance.delete()
+        TrainingStatsService.record_transition(instance, previous, None)
 
     @action(detail=True, methods=['post'])
     def start(self, request, pk=None):
@@ -160,10 +203,7 @@ class TrainingEnrollmentViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet)
         if enrollment.status == TrainingEnrollment.STATUS_COMPLETED:
             return Response({'success': False, 'message': 'Already completed'}, status=status.HTTP_400_BAD_REQUEST)
 
-        enrollment.status = TrainingEnrollment.STATUS_IN_PROGRESS
-        if not enrollment.started_at:
-            enrollment.started_at = timezone.now()
-        enrollment.save(update_fields=['status', 'started_at'])
+        enrollment = TrainingService.start_enrollment(enrollment)
         return Response({'success': True, 'data': TrainingEnrollmentSerializer(enrollment).data})
 
     @action(detail=True, methods=['post'])
@@ -178,12 +218,7 @@ class TrainingEnrollmentViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet)
         except (TypeError, ValueError):
             return Response({'success': False, 'message': 'Invalid progress_percent'}, status=status.HTTP_400_BAD_REQUEST)
 
-        enrollment.progress_percent = max(0, min(100, progress_val))
-        if enrollment.progress_percent > 0 and enrollment.status == TrainingEnrollment.STATUS_ENROLLED:
-            enrollment.status = TrainingEnrollment.STATUS_IN_PROGRESS
-            if not enrollment.started_at:
-                enrollment.started_at = timezone.now()
-        enrollment.save(update_fields=['progress_percent', 'status', 'started_at'])
+        enrollment = TrainingService.update_progress(enrollment, progress_val)
         return Response({'success': True, 'data': TrainingEnrollmentSerializer(enrollment).data})
 
     @action(detail=True, methods=['post'])
@@ -192,23 +227,11 @@ class TrainingEnrollmentViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet)
         if enrollment.status == TrainingEnrollment.STATUS_COMPLETED:
             return Response({'success': False, 'message': 'Already completed'}, status=status.HTTP_400_BAD_REQUEST)
 
-        enrollment.status = TrainingEnrollment.STATUS_COMPLETED
-        enrollment.completed_at = timezone.now()
-        enrollment.progress_percent = 100
-        if request.data.get('score') is not None:
-            enrollment.score = request.data.get('score')
-        if request.FILES.get('certificate_file'):
-            enrollment.certificate_file = request.FILES['certificate_file']
-        enrollment.save()
-
-        completion, _ = TrainingCompletion.objects.get_or_create(
-            enrollment=enrollment,
-            defaults={
-                'organization': enrollment.organization,
-                'score': enrollment.score,
-                'feedback': request.data.get('feedback', ''),
-                'certificate_file': enrollment.certificate_file
-            }
+        enrollment, completion = TrainingService.complete_enrollment(
+            enrollment,
+            score=request.data.get('score'),
+            certificate_file=request.FILES.get('certificate_file'),
+            feedback=request.data.get('feedback', '')
         )
 
         return Response({
@@ -220,8 +243,7 @@ class TrainingEnrollmentViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet)
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         enrollment = self.get_object()
-        enrollment.status = TrainingEnrollment.STATUS_CANCELLED
-        enrollment.save(update_fields=['status'])
+        enrollment = TrainingService.cancel_enrollment(enrollment)
         return Response({'success': True, 'data': TrainingEnrollmentSerializer(enrollment).data})
 
 
@@ -0,0 +1,189 @@
+"""
+Approver Resolution - Memoized per-organization approver lookups for workflow steps
+"""
+
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class ApproverResolver:
+    """
+    Resolves the approver of a workflow step for a subject employee.
+
+    Employee relations (reporting manager, HR manager, department), department
+    heads and role holders are loaded with set-based queries, memoized on the
+    resolver and shared through the cache under a per-organization version
+    token. Employee, department and role assignment signals rotate the token.
+    """
+
+    CACHE_TTL = getattr(settings, 'WORKFLOW_APPROVER_CACHE_TTL', 900)  # 15 minutes
+    CACHE_PREFIX = 'workflows:approvers:'
+
+    def __init__(self, organization_id=None):
+        self.organization_id = organization_id
+        self._version = None
+        self._relations: Dict[uuid.UUID, Tuple] = {}
+        self._department_heads: Optional[Dict] = None
+        self._role_holders: Dict[uuid.UUID, Dict] = {}
+
+    @classmethod
+    def _make_key(cls, *parts):
+        """Generate cache key"""
+        key = ':'.join(str(p) for p in parts)
+        return f"{cls.CACHE_PREFIX}{key}"
+
+    @classmethod
+    def get_version(cls, organization_id) -> str:
+        key = cls._make_key(organization_id or 'global', 'version')
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def invalidate(cls, organization_id) -> None:
+        """Rotate the version token so every cached lookup of the org is dropped"""
+        key = cls._make_key(organization_id or 'global', 'version')
+        cache.set(key, uuid.uuid4().hex, None)
+
+    def _key(self, *parts):
+        if self._version is None:
+            self._version = self.get_version(self.organization_id)
+        return self._make_key(self.organization_id or 'global', self._version, *parts)
+
+    def _employees(self):
+        from apps.employees.models import Employee
+
+        queryset = Employee.all_objects.filter(is_deleted=False)
+        if self.organization_id:
+            queryset = queryset.filter(organization_id=self.organization_id)
+        return queryset
+
+    # ----- Lookups -----
+
+    def relations(self, employee_ids: Iterable) -> Dict[uuid.UUID, Tuple]:
+        """
+        (reporting_manager_id, hr_manager_id, department_id) per employee,
+        loading everything not memoized or cached with one query.
+        """
+        wanted = {e for e in employee_ids if e}
+        missing = wanted - self._relations.keys()
+        if missing:
+            keys = {self._key('employee', e): e for e in missing}
+            for key, value in cache.get_many(list(keys)).items():
+                self._relations[keys[key]] = value
+            missing -= self._relations.keys()
+
+        if missing:
+            loaded = {
+                emp_id: (manager_id, hr_id, dept_id)
+                for emp_id, manager_id, hr_id, dept_id in self._employees().filter(
+                    id__in=missing
+                ).values_list('id', 'reporting_manager_id', 'hr_manager_id', 'department_id')
+            }
+            self._relations.update(loaded)
+            cache.set_many(
+                {self._key('employee', e): value for e, value in loaded.items()}, self.CACHE_TTL
+            )
+
+        return {e: self._relations[e] for e in wanted if e in self._relations}
+
+    def department_heads(self) -> Dict:
+        """{department_id: head_id} for the organization (one query)"""
+        if self._department_heads is None:
+            key = self._key('department_heads')
+            heads = cache.get(key)
+            if heads is None:
+                from apps.employees.models import Department
+
+                departments = Department.all_objects.filter(is_deleted=False, head__isnull=False)
+                if self.organization_id:
+                    departments = departments.filter(organization_id=self.organization_id)
+                heads = dict(departments.values_list('id', 'head_id'))
+                cache.set(key, heads, self.CACHE_TTL)
+            self._department_heads = heads
+        return self._department_heads
+
+    def role_holders(self, role_id) -> Dict:
+        """{department_id: [employee_id, ...]} of active employees holding a role (one query)"""
+        if role_id not in self._role_holders:
+            key = self._key('role', role_id)
+            holders = cache.get(key)
+            if holders is None:
+                holders = {}
+                rows = self._employees().filter(
+                    is_active=True,
+                    user__user_roles__role_id=role_id,
+                    user__user_roles__is_active=True,
+                ).values_list('department_id', 'id').distinct()
+                for department_id, employee_id in rows:
+                    holders.setdefault(department_id, []).append(employee_id)
+                cache.set(key, holders, self.CACHE_TTL)
+            self._role_holders[role_id] = holders
+        return self._role_holders[role_id]
+
+    # ----- Resolution -----
+
+    def resolve(self, step, employee_id=None) -> Optional[uuid.UUID]:
+        """Approver employee id of ``step`` for the subject employee"""
+        return self.resolve_many(step, [employee_id]).get(employee_id)
+
+    def resolve_many(self, step, employee_ids: Iterable) -> Dict:
+        """
+        Approver employee ids of ``step`` for many subject employees.
+
+        ``step`` may be a CompiledStep or a WorkflowStep.
+
+        Returns:
+            {employee_id: approver_id or None}
+        """
+        employee_ids = list(employee_ids)
+        approver_type = step.approver_type
+
+        if approver_type == 'user':
+            return {e: step.approver_user_id for e in employee_ids}
+
+        relations = self.relations(employee_ids)
+        results = {}
+        for employee_id in employee_ids:
+            manager_id, hr_id, department_id = relations.get(employee_id, (None, None, None))
+            approver_id = None
+            if approver_type == 'reporting_manager':
+                approver_id = manager_id
+            elif approver_type == 'hr_manager':
+                approver_id = hr_id
+            elif approver_type == 'department_head':
+                approver_id = self.department_heads().get(department_id) if department_id else None
+            elif approver_type == 'role' and step.approver_role_id and employee_id in relations:
+                holders = self.role_holders(step.approver_role_id).get(department_id)
+                approver_id = holders[0] if holders else None
+            results[employee_id] = approver_id
+        return results
+
+    def eligible(self, step, employee_id) -> Set:
+        """
+        Employees with approval authority over the subject on ``step``: its
+        reporting manager, HR manager and department head, plus the step's
+        approver user or the holders of its role in the subject's department.
+        Any of them may take part in a parallel step.
+        """
+        manager_id, hr_id, department_id = self.relations([employee_id]).get(employee_id, (None, None, None))
+        approver_ids = {manager_id, hr_id}
+        if department_id:
+            approver_ids.add(self.department_heads().get(department_id))
+        if step.approver_type == 'user':
+            approver_ids.add(step.approver_user_id)
+        elif step.approver_type == 'role' and step.approver_role_id and department_id:
+            approver_ids.update(self.role_holders(step.approver_role_id).get(department_id, ()))
+        approver_ids.discard(None)
+        return approver_ids
+
+    def approvers_for(self, steps_and_subjects: Iterable[Tuple]) -> List[Optional[uuid.UUID]]:
+        """Resolve a sequence of (step, employee_id) pairs, batching employee lookups"""
+        pairs = list(steps_and_subjects)
+        self.relations(employee_id for _, employee_id in pairs)
+        return [self.resolve(step, employee_id) for step, employee_id in pairs]
@@ -0,0 +1,182 @@
+"""
+Compiled Workflows - Immutable, cached step graphs for workflow definitions
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    """One approval step, detached from the ORM"""
+    order: int
+    name: str
+    approver_type: str
+    approver_role_id: Optional[uuid.UUID] = None
+    approver_user_id: Optional[uuid.UUID] = None
+    is_optional: bool = False
+    can_delegate: bool = True
+    sla_hours: Optional[int] = None
+    escalate_to_order: Optional[int] = None
+    required_approvers: int = 1
+
+
+@dataclass(frozen=True)
+class CompiledWorkflow:
+    """
+    Immutable step graph of a workflow definition.
+
+    ``version`` is the cache generation the graph was compiled under; a
+    definition or step change rotates it so stale graphs are never served.
+    """
+    id: uuid.UUID
+    code: str
+    organization_id: Optional[uuid.UUID]
+    entity_type: str
+    version: str
+    steps: Tuple[CompiledStep, ...]
+    _by_order: Dict[int, int] = field(default_factory=dict, compare=False, repr=False)
+
+    def __post_init__(self):
+        self._by_order.update({step.order: index for index, step in enumerate(self.steps)})
+
+    @property
+    def first_step(self) -> Optional[CompiledStep]:
+        return self.steps[0] if self.steps else None
+
+    def step(self, order: int) -> Optional[CompiledStep]:
+        index = self._by_order.get(order)
+        return None if index is None else self.steps[index]
+
+    def next_step(self, order: int) -> Optional[CompiledStep]:
+        """Step following ``order``, or None if ``order`` is the last one"""
+        index = self._by_order.get(order)
+        if index is None or index + 1 >= len(self.steps):
+            return None
+        return self.steps[index + 1]
+
+
+class WorkflowDefinitionCache:
+    """
+    Compiled workflow definitions, looked up by code or id.
+
+    Compiled graphs live in the shared cache and are memoized per process.
+    Keys embed a per-organization version token that is rotated whenever a
+    WorkflowDefinition or WorkflowStep of the organization changes.
+    """
+
+    CACHE_TTL = getattr(settings, 'WORKFLOW_DEFINITION_CACHE_TTL', 3600)  # 1 hour
+    CACHE_PREFIX = 'workflows:definitions:'
+    LOCAL_MAXSIZE = 256
+
+    _local: 'OrderedDict[str, CompiledWorkflow]' = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _make_key(cls, *parts):
+        """Generate cache key"""
+        key = ':'.join(str(p) for p in parts)
+        return f"{cls.CACHE_PREFIX}{key}"
+
+    @classmethod
+    def get_version(cls, organization_id) -> str:
+        """Current definition version token for an organization"""
+        key = cls._make_key(organization_id or 'global', 'version')
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def invalidate(cls, organization_id) -> None:
+        """Rotate the version token so every compiled definition of the org is dropped"""
+        key = cls._make_key(organization_id or 'global', 'version')
+        cache.set(key, uuid.uuid4().hex, None)
+
+    @classmethod
+    def get(cls, organization_id=None, code=None, definition_id=None) -> Optional[CompiledWorkflow]:
+        """Get a compiled definition by code or id, compiling it on a miss"""
+        version = cls.get_version(organization_id)
+        lookup = ('code', code) if code is not None else ('id', definition_id)
+        key = cls._make_key(organization_id or 'global', version, *lookup)
+
+        with cls._lock:
+            compiled = cls._local.get(key)
+            if compiled is not None:
+                cls._local.move_to_end(key)
+                return compiled
+
+        compiled = cache.get(key)
+        if compiled is None:
+            compiled = cls._compile(organization_id, version, code=code, definition_id=definition_id)
+            if compiled is None:
+                return None
+            cache.set_many({
+                cls._make_key(organization_id or 'global', version, 'code', compiled.code): compiled,
+                cls._make_key(organization_id or 'global', version, 'id', compiled.id): compiled,
+            }, cls.CACHE_TTL)
+
+        with cls._lock:
+            cls._local[key] = compiled
+            while len(cls._local) > cls.LOCAL_MAXSIZE:
+                cls._local.popitem(last=False)
+        return compiled
+
+    @classmethod
+    def _compile(cls, organization_id, version, code=None, definition_id=None) -> Optional[CompiledWorkflow]:
+        """Load a definition and its steps (two queries) into a CompiledWorkflow"""
+        from .models import WorkflowDefinition, WorkflowStep
+
+        definitions = WorkflowDefinition.all_objects.filter(is_deleted=False)
+        if organization_id:
+            definitions = definitions.filter(organization_id=organization_id)
+        if code is not None:
+            definitions = definitions.filter(code=code)
+        else:
+            definitions = definitions.filter(id=definition_id)
+
+        definition = definitions.first()
+        if definition is None:
+            return None
+
+        parallel = (definition.conditions or {}).get('parallel_steps', {})
+        rows = list(
+            WorkflowStep.all_objects.filter(workflow=definition, is_deleted=False)
+            .order_by('order')
+            .values(
+                'id', 'order', 'name', 'approver_type', 'approver_role_id', 'approver_user_id',
+                'is_optional', 'can_delegate', 'sla_hours', 'escalate_to_id',
+            )
+        )
+        order_by_id = {row['id']: row['order'] for row in rows}
+
+        steps = tuple(
+            CompiledStep(
+                order=row['order'],
+                name=row['name'],
+                approver_type=row['approver_type'],
+                approver_role_id=row['approver_role_id'],
+                approver_user_id=row['approver_user_id'],
+                is_optional=row['is_optional'],
+                can_delegate=row['can_delegate'],
+                sla_hours=row['sla_hours'],
+                escalate_to_order=order_by_id.get(row['escalate_to_id']),
+                required_approvers=int(parallel.get(str(row['order']), {}).get('required_approvers', 1)),
+            )
+            for row in rows
+        )
+        return CompiledWorkflow(
+            id=definition.id,
+            code=definition.code,
+            organization_id=definition.organization_id,
+            entity_type=definition.entity_type,
+            version=version,
+            steps=steps,
+        )
@@ -0,0 +1,91 @@
+"""
+Management command to compare one-by-one approvals with the bulk approval path
+Usage: python manage.py benchmark_bulk_approvals [--instances N]
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.core.benchmarking import rolled_back
+from apps.core.models import Organization
+from apps.employees.models import Department, Employee
+from apps.notifications.services import NotificationService
+from apps.workflows.models import WorkflowDefinition, WorkflowInstance, WorkflowStep
+from apps.workflows.services import WorkflowService
+
+
+class Command(BaseCommand):
+    help = 'Benchmark approving N pending workflow instances: take_action loop vs bulk_action'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instances', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            manager, instance_ids = self._seed(options['instances'])
+            self.stdout.write(self.style.SUCCESS(
+                f"=== Approving {len(instance_ids)} pending instances (2-step workflow) ==="
+            ))
+            self._measure('sequential', lambda: self._sequential(manager, instance_ids))
+            self._measure('bulk', lambda: self._bulk(manager, instance_ids))
+
+    def _seed(self, count):
+        org = Organization.objects.create(name='Approval Benchmark', email='approval-benchmark@example.com')
+        department = Department.all_objects.create(organization=org, name='Bench', code='BENCH')
+
+        def employee(code, **extra):
+            user = User.objects.create_user(
+                email=f'{code.lower()}@approval-bench.example.com', password=None,
+                first_name='Bench', last_name=code, organization=org,
+            )
+            return Employee.all_objects.create(
+                organization=org, user=user, employee_id=code,
+                date_of_joining=date(2020, 1, 1), department=department, **extra,
+            )
+
+        manager = employee('MGR')
+        department.head = employee('HEAD')
+        department.save()
+        subjects = [employee(f'E{i:05d}', reporting_manager=manager) for i in range(count)]
+
+        definition = WorkflowDefinition.all_objects.create(
+            organization=org, name='Leave', code='BENCH_LEAVE', entity_type='leave_request',
+        )
+        for order, approver_type in ((1, 'reporting_manager'), (2, 'department_head')):
+            WorkflowStep.all_objects.create(
+                organization=org, workflow=definition, order=order,
+                name=f'Step {order}', approver_type=approver_type,
+            )
+
+        instances = WorkflowInstance.all_objects.bulk_create([
+            WorkflowInstance(
+                organization=org, workflow=definition, entity_type='leaverequest',
+                entity_id=subject.id, current_step=1, status='in_progress',
+                current_approver=manager, employee=subject,
+            )
+            for subject in subjects
+        ])
+        return manager, [instance.id for instance in instances]
+
+    def _sequential(self, manager, instance_ids):
+        for instance in WorkflowInstance.all_objects.filter(id__in=instance_ids):
+            WorkflowService.take_action(instance, manager, 'approved')
+
+    def _bulk(self, manager, instance_ids):
+        result = WorkflowService.bulk_action(instance_ids, manager, 'approved')
+        pending = [item['id'] for item in result['results'] if item['success']]
+        # The notification job normally runs after commit; run it inline so it is measured
+        NotificationService.notify_workflow_approvers(manager.organization_id, pending)
+
+    def _measure(self, label, fn):
+        with rolled_back():
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{label:<12} {len(ctx.captured_queries):>6} queries  {elapsed:9.1f} ms')
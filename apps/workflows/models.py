@@ -79,6 +79,14 @@ class WorkflowInstance(OrganizationEntity):
     
     current_approver = models.ForeignKey('employees.Employee', on_delete=models.SET_NULL, null=True, blank=True)
     
+    # Employee the entity belongs to; approvers of later steps are resolved from it
+    employee = models.ForeignKey(
+        'employees.Employee', on_delete=models.SET_NULL, null=True, blank=True, related_name='workflow_instances'
+    )
+    
+    # Approvals recorded on the current step (parallel approval), reset on advance
+    step_approvals = models.PositiveSmallIntegerField(default=0)
+    
     class Meta:
         ordering = ['-started_at']
     
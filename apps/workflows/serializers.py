@@ -7,6 +7,7 @@ from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 from .models import WorkflowDefinition, WorkflowStep, WorkflowInstance, WorkflowAction
+from .services import WorkflowService
 from apps.employees.serializers import EmployeeListSerializer
 
 class WorkflowStepSerializer(serializers.ModelSerializer):
@@ -30,6 +31,23 @@ class EscalateSerializer(serializers.Serializer):
         help_text="Optional specific employee to escalate to"
     )
 
+
+class BulkWorkflowActionSerializer(serializers.Serializer):
+    """Serializer for approving or rejecting many instances at once"""
+    instance_ids = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        allow_empty=False,
+        max_length=WorkflowService.BULK_MAX_ITEMS,
+        help_text="Workflow instance IDs"
+    )
+    action = serializers.ChoiceField(choices=WorkflowService.BULK_ACTIONS)
+    comments = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if attrs['action'] == 'rejected' and not attrs['comments']:
+            raise serializers.ValidationError({'comments': 'Comments required for rejection'})
+        return attrs
+
 class WorkflowDefinitionSerializer(serializers.ModelSerializer):
     steps = WorkflowStepSerializer(many=True, read_only=True, source='workflow_steps')
     
@@ -175,8 +193,11 @@ class WorkflowInstanceSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(OpenApiTypes.INT)
     def get_total_steps(self, obj):
-        if obj.workflow:
-            return obj.workflow.workflow_steps.count()
+        if obj.workflow_id:
+            from .compiled import WorkflowDefinitionCache
+            definition = WorkflowDefinitionCache.get(obj.organization_id, definition_id=obj.workflow_id)
+            if definition:
+                return len(definition.steps)
         return 1
     
     @extend_schema_field({'type': 'string', 'enum': ['normal', 'urgent', 'high', 'low']})
@@ -2,10 +2,15 @@
 Workflow Services - Core Approval Engine Logic
 """
 
+import uuid
+from collections import defaultdict
+
 from django.utils import timezone
+from django.core.exceptions import FieldDoesNotExist
 from django.db import transaction
-from django.contrib.contenttypes.models import ContentType
-from .models import WorkflowDefinition, WorkflowStep, WorkflowInstance, WorkflowAction
+from .models import WorkflowInstance, WorkflowAction
+from .approvers import ApproverResolver
+from .compiled import WorkflowDefinitionCache
 from apps.employees.models import Employee
 
 class WorkflowService:
@@ -13,32 +18,59 @@ class WorkflowService:
     Service to manage workflow lifecycles, transitions, and actions.
     """
 
+    BULK_ACTIONS = ('approved', 'rejected')
+    BULK_MAX_ITEMS = 500
+
+    @staticmethod
+    def get_definition(workflow_code=None, organization_id=None, definition_id=None):
+        """Compiled (cached) workflow definition by code or id"""
+        return WorkflowDefinitionCache.get(
+            organization_id, code=workflow_code, definition_id=definition_id
+        )
+
+    @staticmethod
+    def _compiled_for(instance):
+        return WorkflowDefinitionCache.get(instance.organization_id, definition_id=instance.workflow_id)
+
+    @staticmethod
+    def _subject_employee_id(entity, initiator=None):
+        """Employee an entity belongs to (its ``employee`` FK), else the initiator"""
+        try:
+            field = entity._meta.get_field('employee')
+        except FieldDoesNotExist:
+            field = None
+        if field is not None and field.is_relation:
+            return getattr(entity, field.attname)
+        return getattr(initiator, 'id', None)
+
     @staticmethod
-    def start_workflow(entity, workflow_code, initiator=None):
+    def start_workflow(entity, workflow_code, initiator=None, organization_id=None):
         """
         Initialize a workflow instance for a given entity.
         """
-        try:
-            definition = WorkflowDefinition.objects.get(code=workflow_code)
-        except WorkflowDefinition.DoesNotExist:
+        organization_id = organization_id or getattr(entity, 'organization_id', None)
+        definition = WorkflowService.get_definition(workflow_code, organization_id)
+        if definition is None:
             return None
 
         # Get first step
-        first_step = definition.workflow_steps.filter(order=1).first()
+        first_step = definition.first_step
         if not first_step:
             return None
 
         # Determine initial approver
-        approver = WorkflowService.get_approver_for_step(first_step, entity, initiator)
+        employee_id = WorkflowService._subject_employee_id(entity, initiator)
+        approver_id = ApproverResolver(organization_id).resolve(first_step, employee_id)
 
         instance = WorkflowInstance.objects.create(
-            workflow=definition,
+            workflow_id=definition.id,
             entity_type=entity._meta.model_name,
             entity_id=entity.id,
-            current_step=1,
+            current_step=first_step.order,
             status='in_progress',
-            current_approver=approver,
-            organization=entity.organization  # Ensure organization is preserved
+            current_approver_id=approver_id,
+            employee_id=employee_id,
+            organization_id=organization_id  # Ensure organization is preserved
         )
         return instance
 
@@ -47,81 +79,109 @@ class WorkflowService:
         """
         Logic to resolve the specific employee who should approve a step.
         """
-        if step.approver_type == 'reporting_manager':
-            # Assuming entity has an 'employee' field (like LeaveRequest)
-            employee = getattr(entity, 'employee', None)
-            if employee and employee.reporting_manager:
-                return employee.reporting_manager
-        
-        elif step.approver_type == 'hr_manager':
-            employee = getattr(entity, 'employee', None)
-            if employee and employee.hr_manager:
-                return employee.hr_manager
-                
-        elif step.approver_type == 'user':
-            return step.approver_user
-            
-        elif step.approver_type == 'role':
-            # Simple implementation: pick first employee with this role in the same department
-            # Real implementation might be more complex
-            employee = getattr(entity, 'employee', None)
-            if employee:
-                approver = Employee.objects.filter(
-                    user__roles=step.approver_role,
-                    department=employee.department,
-                    is_active=True
-                ).first()
-                return approver
+        employee = getattr(entity, 'employee', None) or initiator
+        organization_id = getattr(entity, 'organization_id', None) or getattr(employee, 'organization_id', None)
+        approver_id = ApproverResolver(organization_id).resolve(step, getattr(employee, 'id', None))
+        if approver_id is None:
+            return None
+        return Employee.all_objects.filter(id=approver_id).first()
 
-        return None
+    @staticmethod
+    def _advance(instance, definition, resolver=None):
+        """Move an instance past its current step (to the next step or to approved)"""
+        next_step = definition.next_step(instance.current_step) if definition else None
+        instance.step_approvals = 0
+
+        if next_step:
+            resolver = resolver or ApproverResolver(instance.organization_id)
+            instance.current_step = next_step.order
+            instance.current_approver_id = resolver.resolve(next_step, instance.employee_id)
+        else:
+            # No more steps - Mark as Approved
+            instance.status = 'approved'
+            instance.completed_at = timezone.now()
+            instance.current_approver = None
+        return instance
 
     @staticmethod
-    @transaction.atomic
-    def take_action(instance, actor, action, comments=''):
+    def _authority_error(instance, step, actor_id, already_acted, resolver=None):
         """
-        Record an action (Approve/Reject) and transition the workflow.
+        Why actor_id may not act on the instance's current step, else None.
+        Nobody acts twice on a step; a parallel step (required_approvers > 1)
+        is open to the current approver and every eligible approver of the
+        subject (ApproverResolver.eligible), other steps only to the current
+        approver.
         """
         if instance.status != 'in_progress':
-            raise ValueError("Workflow instance is not in progress.")
+            return 'Workflow instance is not in progress.'
+        if already_acted:
+            return 'You have already taken action on this step'
+        if instance.current_approver_id == actor_id:
+            return None
+        if step is None or step.required_approvers <= 1:
+            return 'You are not the current approver'
+        resolver = resolver or ApproverResolver(instance.organization_id)
+        if actor_id not in resolver.eligible(step, instance.employee_id):
+            return 'You are not an approver of this step'
+        return None
+
+    @staticmethod
+    def _apply_decision(instance, definition, action, resolver=None, now=None):
+        """
+        Step transition shared by take_action, process_parallel_approval and
+        bulk_action: a rejection ends the workflow; an approval counts
+        towards the step and moves past it once the step's
+        required_approvers are in.
+        """
+        if action == 'rejected':
+            instance.status = 'rejected'
+            instance.completed_at = now or timezone.now()
+            return instance
+
+        current_step = definition.step(instance.current_step) if definition else None
+        instance.step_approvals += 1
+        if current_step is None or instance.step_approvals >= current_step.required_approvers:
+            WorkflowService._advance(instance, definition, resolver)
+        return instance
+
+    @staticmethod
+    def _act(instance, actor, action, comments, require_step=False):
+        """Lock the instance, check authority, record the action and transition"""
+        locked = WorkflowInstance.all_objects.select_for_update().get(pk=instance.pk)
+        for field in ('status', 'current_step', 'current_approver_id', 'step_approvals', 'completed_at'):
+            setattr(instance, field, getattr(locked, field))
+
+        definition = WorkflowService._compiled_for(instance)
+        current_step = definition.step(instance.current_step) if definition else None
+        if require_step and current_step is None and instance.status == 'in_progress':
+            raise ValueError("Current step not found")
+        already_acted = WorkflowAction.all_objects.filter(
+            instance_id=instance.pk, step=instance.current_step, actor=actor
+        ).exists()
+        error = WorkflowService._authority_error(instance, current_step, actor.id, already_acted)
+        if error:
+            raise ValueError(error)
 
-        # Record the action
         WorkflowAction.objects.create(
             instance=instance,
             step=instance.current_step,
             actor=actor,
             action=action,
             comments=comments,
-            organization=instance.organization
+            organization_id=instance.organization_id
         )
-
-        if action == 'rejected':
-            instance.status = 'rejected'
-            instance.completed_at = timezone.now()
-            instance.save()
-            # Callback to entity could be added here
-            return instance
-
-        # Move to next step
-        next_step = instance.workflow.workflow_steps.filter(order=instance.current_step + 1).first()
-        
-        if next_step:
-            instance.current_step += 1
-            instance.current_approver = WorkflowService.get_approver_for_step(
-                next_step, 
-                # In real app, we'd fetch the actual entity object here
-                None, 
-                actor
-            )
-            instance.save()
-        else:
-            # No more steps - Mark as Approved
-            instance.status = 'approved'
-            instance.completed_at = timezone.now()
-            instance.current_approver = None
-            instance.save()
-            
+        WorkflowService._apply_decision(instance, definition, action)
+        instance.save()
         return instance
 
+    @staticmethod
+    @transaction.atomic
+    def take_action(instance, actor, action, comments=''):
+        """
+        Record an action (Approve/Reject) and transition the workflow.
+        """
+        return WorkflowService._act(instance, actor, action, comments)
+
     @staticmethod
     @transaction.atomic
     def escalate_workflow(instance, actor, reason, escalate_to_id=None):
@@ -131,7 +191,8 @@ class WorkflowService:
         if instance.status != 'in_progress':
             raise ValueError("Only in-progress workflows can be escalated")
         
-        current_step = instance.workflow.workflow_steps.filter(order=instance.current_step).first()
+        definition = WorkflowService._compiled_for(instance)
+        current_step = definition.step(instance.current_step) if definition else None
         
         if escalate_to_id:
             try:
@@ -139,9 +200,14 @@ class WorkflowService:
             except Employee.DoesNotExist:
                 raise ValueError("Escalation target employee not found")
         else:
-            if current_step and current_step.escalate_to:
-                escalate_to_step = current_step.escalate_to
-                escalate_to = WorkflowService.get_approver_for_step(escalate_to_step, None, actor)
+            escalate_to_step = (
+                definition.step(current_step.escalate_to_order)
+                if current_step and current_step.escalate_to_order is not None else None
+            )
+            if escalate_to_step:
+                escalate_to = WorkflowService.get_approver_for_step(
+                    escalate_to_step, None, instance.employee or actor
+                )
             else:
                 current_approver = instance.current_approver
                 if current_approver and current_approver.reporting_manager:
@@ -174,58 +240,149 @@ class WorkflowService:
         Process parallel approval - multiple approvers can act on the same step.
         All approvers must approve for the step to pass (AND logic).
         Any rejection fails the entire workflow.
+
+        Approvals are tracked with the instance's step_approvals counter
+        (row-locked) instead of recounting actions.
         """
-        if instance.status != 'in_progress':
-            raise ValueError("Workflow instance is not in progress.")
-        
-        current_step = instance.workflow.workflow_steps.filter(order=instance.current_step).first()
-        if not current_step:
-            raise ValueError("Current step not found")
-        
-        existing_action = WorkflowAction.objects.filter(
-            instance=instance,
-            step=instance.current_step,
-            actor=actor
-        ).first()
-        
-        if existing_action:
-            raise ValueError("You have already taken action on this step")
-        
-        WorkflowAction.objects.create(
-            instance=instance,
-            step=instance.current_step,
-            actor=actor,
-            action=action,
-            comments=comments,
-            organization=instance.organization
-        )
-        
-        if action == 'rejected':
-            instance.status = 'rejected'
-            instance.completed_at = timezone.now()
-            instance.save()
-            return instance
-        
-        step_config = instance.workflow.conditions.get('parallel_steps', {})
-        required_approvers = step_config.get(str(instance.current_step), {}).get('required_approvers', 1)
-        
-        approval_count = WorkflowAction.objects.filter(
-            instance=instance,
-            step=instance.current_step,
-            action='approved'
-        ).count()
-        
-        if approval_count >= required_approvers:
-            next_step = instance.workflow.workflow_steps.filter(order=instance.current_step + 1).first()
-            
-            if next_step:
-                instance.current_step += 1
-                instance.current_approver = WorkflowService.get_approver_for_step(next_step, None, actor)
-                instance.save()
-            else:
-                instance.status = 'approved'
-                instance.completed_at = timezone.now()
-                instance.current_approver = None
-                instance.save()
-        
-        return instance
+        return WorkflowService._act(instance, actor, action, comments, require_step=True)
+
+    @staticmethod
+    def _parse_ids(instance_ids):
+        """
+        Split requested ids into ({UUID: raw string} in request order,
+        invalid strings). Spellings of one UUID after the first are dropped.
+        """
+        valid, invalid = {}, []
+        for raw in dict.fromkeys(str(i) for i in instance_ids):
+            try:
+                valid.setdefault(uuid.UUID(raw), raw)
+            except ValueError:
+                invalid.append(raw)
+        return valid, invalid
+
+    @staticmethod
+    def bulk_action(instance_ids, actor, action, comments='', visible=None):
+        """
+        Approve or reject many workflow instances in one transaction.
+
+        Authority is checked for every instance with two set-based queries
+        (the locked instances and the actor's existing actions), actions are
+        inserted with bulk_create and transitions are written as one UPDATE
+        per distinct target state. Approvers of the next steps are resolved
+        in bulk and notified by a single queued job. Instances that fail a
+        check are reported and skipped; the rest are still processed.
+
+        ``visible`` limits the instances to those the actor may see (the
+        viewset's queryset); others are reported as not found. Results carry
+        the ids as they were sent.
+
+        Returns:
+            {'results': [{'id', 'success', 'status', 'current_step',
+              'current_approver', 'error'}], 'succeeded': int, 'failed': int}
+        """
+        if action not in WorkflowService.BULK_ACTIONS:
+            raise ValueError(f"Unsupported bulk action: {action}")
+
+        ids, invalid = WorkflowService._parse_ids(instance_ids)
+        results = {raw: {'id': raw, 'success': False, 'error': 'Invalid workflow instance id'} for raw in invalid}
+        organization_id = actor.organization_id
+
+        with transaction.atomic():
+            queryset = WorkflowInstance.all_objects.select_for_update().filter(
+                id__in=list(ids), organization_id=organization_id, is_deleted=False
+            )
+            if visible is not None:
+                queryset = queryset.filter(id__in=visible.order_by().values('id'))
+            instances = {instance.id: instance for instance in queryset}
+            acted = set(
+                WorkflowAction.all_objects.filter(instance_id__in=instances, actor=actor)
+                .order_by().values_list('instance_id', 'step')
+            )
+
+            resolver = ApproverResolver(organization_id)
+            eligible = []
+            for instance_id, raw in ids.items():
+                instance = instances.get(instance_id)
+                if instance is None:
+                    error = 'Workflow instance not found'
+                else:
+                    definition = WorkflowService._compiled_for(instance)
+                    error = WorkflowService._authority_error(
+                        instance,
+                        definition.step(instance.current_step) if definition else None,
+                        actor.id,
+                        (instance.id, instance.current_step) in acted,
+                        resolver,
+                    )
+                if error is None:
+                    eligible.append(instance)
+                    continue
+                results[raw] = {'id': raw, 'success': False, 'error': error}
+
+            WorkflowAction.all_objects.bulk_create([
+                WorkflowAction(
+                    instance=instance,
+                    step=instance.current_step,
+                    actor=actor,
+                    action=action,
+                    comments=comments,
+                    organization_id=organization_id,
+                )
+                for instance in eligible
+            ])
+
+            now = timezone.now()
+            WorkflowService._decide_many(eligible, organization_id, action, now)
+
+            # One UPDATE per distinct target state
+            groups = defaultdict(list)
+            for instance in eligible:
+                state = (
+                    ('status', instance.status),
+                    ('current_step', instance.current_step),
+                    ('current_approver_id', instance.current_approver_id),
+                    ('step_approvals', instance.step_approvals),
+                    ('completed_at', instance.completed_at),
+                )
+                groups[state].append(instance.id)
+            for state, group_ids in groups.items():
+                WorkflowInstance.all_objects.filter(id__in=group_ids).update(updated_at=now, **dict(state))
+
+            pending = [str(i.id) for i in eligible if i.status == 'in_progress' and i.current_approver_id]
+            if pending:
+                from apps.notifications.tasks import notify_workflow_approvers
+
+                transaction.on_commit(
+                    lambda: notify_workflow_approvers.delay(str(organization_id), pending)
+                )
+
+        for instance in eligible:
+            raw = ids[instance.id]
+            results[raw] = {
+                'id': raw,
+                'success': True,
+                'status': instance.status,
+                'current_step': instance.current_step,
+                'current_approver': str(instance.current_approver_id) if instance.current_approver_id else None,
+                'error': None,
+            }
+
+        ordered = [results[raw] for raw in dict.fromkeys(str(i) for i in instance_ids) if raw in results]
+        succeeded = sum(1 for item in ordered if item['success'])
+        return {'results': ordered, 'succeeded': succeeded, 'failed': len(ordered) - succeeded}
+
+    @staticmethod
+    def _decide_many(instances, organization_id, action, now):
+        """
+        Apply one decision to each instance in memory with the shared step
+        rule, resolving every next-step approver through one resolver.
+        """
+        resolver = ApproverResolver(organization_id)
+        if action != 'rejected':
+            resolver.relations(instance.employee_id for instance in instances)
+
+        for instance in instances:
+            WorkflowService._apply_decision(
+                instance, WorkflowService._compiled_for(instance), action, resolver, now
+            )
+        return instances
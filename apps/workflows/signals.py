@@ -3,9 +3,15 @@ Workflow Signals - Integration with other modules
 SECURITY FIX: Explicit tenant propagation
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
+from apps.abac.models import RoleAssignment
+from apps.employees.models import Department, Employee
 from apps.leave.models import LeaveRequest
+from .approvers import ApproverResolver
+from .compiled import WorkflowDefinitionCache
+from .models import WorkflowDefinition, WorkflowStep
 from .services import WorkflowService
 
 
@@ -31,3 +37,76 @@ def trigger_leave_workflow(sender, instance, created, **kwargs):
         initiator=instance.employee,
         organization_id=organization.id
     )
+
+
+# ============================================================================
+# CACHE INVALIDATION
+# ============================================================================
+
+@receiver(post_save, sender=WorkflowDefinition)
+@receiver(post_delete, sender=WorkflowDefinition)
+@receiver(post_save, sender=WorkflowStep)
+@receiver(post_delete, sender=WorkflowStep)
+def invalidate_compiled_workflows(sender, instance, **kwargs):
+    """Recompile the organization's workflows after a definition or step change"""
+    organization_id = instance.organization_id
+    transaction.on_commit(lambda: WorkflowDefinitionCache.invalidate(organization_id))
+
+
+# Fields approver resolution reads, per model
+APPROVER_FIELDS = {
+    Employee: (
+        'organization_id', 'reporting_manager_id', 'hr_manager_id', 'department_id',
+        'user_id', 'is_active', 'is_deleted',
+    ),
+    Department: ('organization_id', 'head_id', 'is_deleted'),
+}
+
+
+def _invalidate_approvers(*organization_ids):
+    for organization_id in set(organization_ids):
+        transaction.on_commit(lambda organization_id=organization_id: ApproverResolver.invalidate(organization_id))
+
+
+def _approver_state(instance):
+    return tuple(instance.__dict__.get(field) for field in APPROVER_FIELDS[type(instance)])
+
+
+@receiver(post_init, sender=Employee)
+@receiver(post_init, sender=Department)
+def remember_approver_state(sender, instance, **kwargs):
+    """Keep the loaded approver fields so unrelated saves keep the cached lookups"""
+    instance._approver_state = _approver_state(instance)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Department)
+def invalidate_approvers_on_org_change(sender, instance, **kwargs):
+    """Managers, departments and heads feed approver resolution"""
+    state = _approver_state(instance)
+    previous = getattr(instance, '_approver_state', None)
+    instance._approver_state = state
+    if state != previous:
+        previous_organization_id = previous[0] if previous else None
+        _invalidate_approvers(instance.organization_id, previous_organization_id or instance.organization_id)
+
+
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=Department)
+def invalidate_approvers_on_org_delete(sender, instance, **kwargs):
+    """A removed employee or department no longer resolves as an approver"""
+    _invalidate_approvers(instance.organization_id)
+
+
+@receiver(post_save, sender=RoleAssignment)
+@receiver(post_delete, sender=RoleAssignment)
+def invalidate_approvers_on_role_change(sender, instance, **kwargs):
+    """Role holders feed approver resolution for role-based steps"""
+    if instance.scope == RoleAssignment.SCOPE_ORGANIZATION and instance.scope_id:
+        organization_id = instance.scope_id
+    elif RoleAssignment.user.is_cached(instance):
+        organization_id = instance.user.organization_id
+    else:
+        from apps.authentication.models import User
+        organization_id = User.objects.filter(pk=instance.user_id).values_list('organization_id', flat=True).first()
+    _invalidate_approvers(organization_id)
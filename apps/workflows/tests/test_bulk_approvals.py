@@ -0,0 +1,162 @@
+"""
+Tests for bulk workflow approvals
+"""
+
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Department, Employee
+from apps.notifications.models import Notification
+from apps.workflows.approvers import ApproverResolver
+from apps.workflows.compiled import WorkflowDefinitionCache
+from apps.workflows.models import WorkflowAction, WorkflowDefinition, WorkflowInstance, WorkflowStep
+from apps.workflows.services import WorkflowService
+
+
+class BulkApprovalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        WorkflowDefinitionCache._local.clear()
+        self.org = Organization.objects.create(name='Bulk Org', email='bulk@example.com')
+        self.department = Department.all_objects.create(organization=self.org, name='Ops', code='OPS')
+        self.manager = self._employee('MGR')
+        self.head = self._employee('HEAD')
+        self.department.head = self.head
+        self.department.save()
+        self.subjects = [self._employee(f'S{i}', reporting_manager=self.manager) for i in range(4)]
+
+        self.definition = WorkflowDefinition.all_objects.create(
+            organization=self.org, name='Leave', code='BULK_LEAVE', entity_type='leave_request',
+        )
+        for order, approver_type in ((1, 'reporting_manager'), (2, 'department_head')):
+            WorkflowStep.all_objects.create(
+                organization=self.org, workflow=self.definition, order=order,
+                name=f'Step {order}', approver_type=approver_type,
+            )
+        self.instances = [
+            WorkflowService.start_workflow(subject, 'BULK_LEAVE', initiator=subject, organization_id=self.org.id)
+            for subject in self.subjects
+        ]
+
+    def _employee(self, code, **extra):
+        user = User.objects.create_user(
+            email=f'{code.lower()}@bulk.example.com', password='pass',
+            first_name=code, last_name='Bulk', organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=code,
+            date_of_joining=date(2020, 1, 1), department=self.department, **extra,
+        )
+
+    def test_bulk_approve_advances_and_reports_partial_failures(self):
+        WorkflowService.take_action(self.instances[3], self.manager, 'approved')
+        missing = uuid.uuid4()
+        requested = [i.id for i in self.instances] + [missing, 'not-a-uuid']
+        notified_before = Notification.all_objects.filter(recipient=self.head).count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = WorkflowService.bulk_action(requested, self.manager, 'approved')
+
+        self.assertEqual((result['succeeded'], result['failed']), (3, 3))
+        self.assertEqual([item['id'] for item in result['results']], [str(i) for i in requested])
+        self.assertEqual(result['results'][3]['error'], 'You are not the current approver')
+        self.assertEqual(result['results'][4]['error'], 'Workflow instance not found')
+        self.assertEqual(result['results'][5]['error'], 'Invalid workflow instance id')
+
+        for instance in self.instances[:3]:
+            instance.refresh_from_db()
+            self.assertEqual((instance.current_step, instance.current_approver_id), (2, self.head.id))
+        self.assertEqual(WorkflowAction.all_objects.filter(actor=self.manager, action='approved').count(), 4)
+        self.assertEqual(Notification.all_objects.filter(recipient=self.head).count(), notified_before + 3)
+
+        # A second pass is rejected per item instead of double-approving
+        again = WorkflowService.bulk_action([self.instances[0].id], self.head, 'approved')
+        self.assertEqual(again['results'][0]['status'], 'approved')
+        repeat = WorkflowService.bulk_action([self.instances[0].id], self.head, 'approved')
+        self.assertEqual(repeat['results'][0]['error'], 'Workflow instance is not in progress.')
+
+    def test_bulk_completes_parallel_step_across_participants(self):
+        self.definition.conditions = {'parallel_steps': {'2': {'required_approvers': 2}}}
+        self.definition.save()
+        WorkflowDefinitionCache.invalidate(self.org.id)
+        WorkflowService.bulk_action([self.instances[0].id], self.manager, 'approved')
+
+        first = WorkflowService.bulk_action([self.instances[0].id], self.head, 'approved')
+        self.assertEqual(first['results'][0]['status'], 'in_progress')
+        repeat = WorkflowService.bulk_action([self.instances[0].id], self.head, 'approved')
+        self.assertEqual(repeat['results'][0]['error'], 'You have already taken action on this step')
+
+        # Not the current approver, but any participant may approve a parallel step
+        second = WorkflowService.bulk_action([self.instances[0].id], self.manager, 'approved')
+        self.assertEqual(second['results'][0]['status'], 'approved')
+
+    def test_bulk_parallel_step_refuses_employees_without_authority(self):
+        self.definition.conditions = {'parallel_steps': {'2': {'required_approvers': 2}}}
+        self.definition.save()
+        WorkflowDefinitionCache.invalidate(self.org.id)
+        WorkflowService.bulk_action([self.instances[0].id], self.manager, 'approved')
+        outsider = self._employee('OUT')
+
+        result = WorkflowService.bulk_action([self.instances[0].id], outsider, 'approved')
+
+        self.assertEqual(result['results'][0]['error'], 'You are not an approver of this step')
+        self.assertFalse(WorkflowAction.all_objects.filter(actor=outsider).exists())
+
+    def test_bulk_results_keep_ids_as_sent(self):
+        upper = str(self.instances[0].id).upper()
+        bare = self.instances[1].id.hex
+
+        result = WorkflowService.bulk_action([upper, bare], self.manager, 'approved')
+
+        self.assertEqual((result['succeeded'], result['failed']), (2, 0))
+        self.assertEqual([item['id'] for item in result['results']], [upper, bare])
+
+    def test_bulk_only_acts_on_visible_instances(self):
+        visible = WorkflowInstance.all_objects.filter(id=self.instances[1].id)
+        ids = [self.instances[0].id, self.instances[1].id]
+
+        result = WorkflowService.bulk_action(ids, self.manager, 'approved', visible=visible)
+
+        self.assertEqual(result['results'][0]['error'], 'Workflow instance not found')
+        self.assertEqual(result['results'][1]['status'], 'in_progress')
+
+        client = APIClient()
+        client.force_authenticate(user=self._employee('OUT').user)
+        response = client.post(
+            '/api/v1/workflows/instances/bulk-action/',
+            {'instance_ids': [str(self.instances[2].id)], 'action': 'approved'}, format='json',
+        )
+        self.assertEqual(response.data['results'][0]['error'], 'Workflow instance not found')
+
+    def test_bulk_queries_do_not_grow_with_instance_count(self):
+        ids = [i.id for i in self.instances]
+        # Warm the compiled definition and approver caches
+        WorkflowService.get_definition('BULK_LEAVE', self.org.id)
+        ApproverResolver(self.org.id).department_heads()
+        with self.assertNumQueries(6):
+            WorkflowService.bulk_action(ids[:2], self.manager, 'approved')
+        with self.assertNumQueries(6):
+            WorkflowService.bulk_action(ids[2:], self.manager, 'approved')
+
+    def test_bulk_reject_endpoint_requires_comments(self):
+        client = APIClient()
+        client.force_authenticate(user=self.manager.user)
+        url = '/api/v1/workflows/instances/bulk-action/'
+        payload = {'instance_ids': [str(i.id) for i in self.instances[:2]], 'action': 'rejected'}
+
+        self.assertEqual(client.post(url, payload, format='json').status_code, 400)
+
+        response = client.post(url, {**payload, 'comments': 'Overlapping dates'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertEqual(
+            set(WorkflowInstance.all_objects.filter(id__in=payload['instance_ids']).values_list('status', flat=True)),
+            {'rejected'},
+        )
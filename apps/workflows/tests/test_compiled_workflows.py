@@ -0,0 +1,128 @@
+"""
+Tests for compiled workflow definitions and cached approver resolution
+"""
+
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.abac.models import Role, RoleAssignment
+from apps.authentication.models import User
+from apps.core.models import Organization
+from apps.employees.models import Department, Employee
+from apps.workflows.approvers import ApproverResolver
+from apps.workflows.compiled import WorkflowDefinitionCache
+from apps.workflows.models import WorkflowDefinition, WorkflowStep
+from apps.workflows.services import WorkflowService
+
+
+class CompiledWorkflowTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        WorkflowDefinitionCache._local.clear()
+        self.org = Organization.objects.create(name='Flow Org', email='flow@example.com')
+        self.department = Department.all_objects.create(organization=self.org, name='Ops', code='OPS')
+
+        self.manager = self._employee('MGR')
+        self.head = self._employee('HEAD')
+        self.reviewer = self._employee('REV', department=self.department)
+        self.subject = self._employee('SUB', department=self.department, reporting_manager=self.manager)
+        self.department.head = self.head
+        self.department.save()
+
+        self.role = Role.objects.create(name='Reviewer', code='reviewer')
+        RoleAssignment.objects.create(user=self.reviewer.user, role=self.role)
+
+        self.definition = WorkflowDefinition.all_objects.create(
+            organization=self.org, name='Leave', code='LEAVE_FLOW', entity_type='leave_request',
+            conditions={'parallel_steps': {'2': {'required_approvers': 2}}},
+        )
+        for order, approver_type in ((1, 'reporting_manager'), (2, 'department_head'), (3, 'role')):
+            WorkflowStep.all_objects.create(
+                organization=self.org, workflow=self.definition, order=order,
+                name=f'Step {order}', approver_type=approver_type,
+                approver_role=self.role if approver_type == 'role' else None,
+            )
+
+    def _employee(self, code, **extra):
+        user = User.objects.create_user(
+            email=f'{code.lower()}@flow.example.com', password='pass',
+            first_name=code, last_name='Flow', organization=self.org,
+        )
+        return Employee.all_objects.create(
+            organization=self.org, user=user, employee_id=code,
+            date_of_joining=date(2020, 1, 1), **extra,
+        )
+
+    def test_definition_is_compiled_once_and_recompiled_after_change(self):
+        compiled = WorkflowService.get_definition('LEAVE_FLOW', self.org.id)
+        self.assertEqual([s.order for s in compiled.steps], [1, 2, 3])
+        self.assertEqual(compiled.step(2).required_approvers, 2)
+        self.assertIsNone(compiled.next_step(3))
+
+        with self.assertNumQueries(0):
+            self.assertIs(WorkflowService.get_definition('LEAVE_FLOW', self.org.id), compiled)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkflowStep.all_objects.create(
+                organization=self.org, workflow=self.definition, order=4,
+                name='Step 4', approver_type='user', approver_user=self.head,
+            )
+
+        recompiled = WorkflowService.get_definition('LEAVE_FLOW', self.org.id)
+        self.assertNotEqual(recompiled.version, compiled.version)
+        self.assertEqual(recompiled.next_step(3).approver_user_id, self.head.id)
+
+    def test_transitions_resolve_every_step_from_the_subject(self):
+        instance = WorkflowService.start_workflow(
+            self.subject, 'LEAVE_FLOW', initiator=self.subject, organization_id=self.org.id
+        )
+        self.assertEqual(instance.current_approver_id, self.manager.id)
+        self.assertEqual(instance.employee_id, self.subject.id)
+
+        WorkflowService.take_action(instance, self.manager, 'approved')
+        self.assertEqual((instance.current_step, instance.current_approver_id), (2, self.head.id))
+
+        WorkflowService.process_parallel_approval(instance, self.head, 'approved')
+        instance.refresh_from_db()
+        self.assertEqual((instance.current_step, instance.step_approvals), (2, 1))
+
+        instance = WorkflowService.process_parallel_approval(instance, self.manager, 'approved')
+        self.assertEqual((instance.current_step, instance.step_approvals), (3, 0))
+        self.assertEqual(instance.current_approver_id, self.reviewer.id)
+
+        WorkflowService.take_action(instance, self.reviewer, 'approved')
+        self.assertEqual(instance.status, 'approved')
+
+    def test_resolver_is_memoized_and_invalidated_by_employee_changes(self):
+        steps = WorkflowService.get_definition('LEAVE_FLOW', self.org.id).steps
+
+        resolver = ApproverResolver(self.org.id)
+        self.assertEqual(
+            resolver.approvers_for((step, self.subject.id) for step in steps),
+            [self.manager.id, self.head.id, self.reviewer.id],
+        )
+        with self.assertNumQueries(0):
+            ApproverResolver(self.org.id).approvers_for((step, self.subject.id) for step in steps)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.reporting_manager = self.head
+            self.subject.save()
+
+        self.assertEqual(ApproverResolver(self.org.id).resolve(steps[0], self.subject.id), self.head.id)
+
+    def test_unrelated_employee_saves_keep_the_resolver_cache(self):
+        version = ApproverResolver.get_version(self.org.id)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.subject.bio = 'Updated bio'
+            self.subject.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(ApproverResolver.get_version(self.org.id), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.department = None
+            self.subject.save()
+        self.assertNotEqual(ApproverResolver.get_version(self.org.id), version)
@@ -12,7 +12,8 @@ from django.db.models import Q
 from .models import WorkflowDefinition, WorkflowInstance, WorkflowAction, WorkflowStep
 from .serializers import (
     WorkflowDefinitionSerializer, WorkflowInstanceSerializer, 
-    WorkflowActionSerializer, WorkflowStepSerializer, EscalateSerializer
+    WorkflowActionSerializer, WorkflowStepSerializer, EscalateSerializer,
+    BulkWorkflowActionSerializer
 )
 from .services import WorkflowService
 from apps.core.permissions_branch import BranchFilterBackend, BranchPermission
@@ -92,7 +93,7 @@ class WorkflowInstanceViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
     Workflow Instances - Branch-filtered via current_approver's branch
     Tracks individual approval requests
     """
-    queryset = WorkflowInstance.objects.none()
+    queryset = WorkflowInstance.objects.all()
     serializer_class = WorkflowInstanceSerializer
     permission_classes = [IsAuthenticated, BranchPermission]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -112,7 +113,7 @@ class WorkflowInstanceViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
         from apps.authentication.models_hierarchy import BranchUser
         branch_ids = list(BranchUser.objects.filter(
             user=user, is_active=True,
-            organization=getattr(self.request, 'organization', None)
+            branch__organization_id=getattr(getattr(self.request, 'organization', None), 'id', None)
         ).values_list('branch_id', flat=True))
         
         # Get employee if exists
@@ -157,7 +158,10 @@ class WorkflowInstanceViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
             )
             
         comments = request.data.get('comments', '')
-        WorkflowService.take_action(instance, actor, 'approved', comments)
+        try:
+            WorkflowService.take_action(instance, actor, 'approved', comments)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(self.get_serializer(instance).data)
 
@@ -186,10 +190,38 @@ class WorkflowInstanceViewSet(OrganizationViewSetMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        WorkflowService.take_action(instance, actor, 'rejected', comments)
+        try:
+            WorkflowService.take_action(instance, actor, 'rejected', comments)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(self.get_serializer(instance).data)
 
+    @action(detail=False, methods=['post'], url_path='bulk-action')
+    def bulk_action(self, request):
+        """
+        Approve or reject many workflow instances at once.
+        Returns one result per instance; failures do not block the rest.
+        """
+        actor = self._get_employee(request)
+        if not actor:
+            return Response(
+                {"error": "No employee record found"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = BulkWorkflowActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = WorkflowService.bulk_action(
+            serializer.validated_data['instance_ids'],
+            actor,
+            serializer.validated_data['action'],
+            serializer.validated_data['comments'],
+            visible=self.get_queryset(),
+        )
+        return Response(result)
+
     @action(detail=True, methods=['post'])
     def delegate(self, request, pk=None):
         """Delegate approval to another user"""
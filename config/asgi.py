@@ -1,8 +1,9 @@
 import os
 from django.core.asgi import get_asgi_application
+from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from apps.chat.routing import websocket_urlpatterns
-from apps.core.middleware_channels import OrganizationChannelsMiddleware
+from apps.core.middleware_channels import MetricsChannelsMiddleware, OrganizationChannelsMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
 
@@ -10,10 +11,12 @@ django_asgi_app = get_asgi_application()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": OrganizationChannelsMiddleware(
-        AuthMiddlewareStack(
-            URLRouter(
-                websocket_urlpatterns
+    "websocket": MetricsChannelsMiddleware(
+        OrganizationChannelsMiddleware(
+            AuthMiddlewareStack(
+                URLRouter(
+                    websocket_urlpatterns
+                )
             )
         )
     ),
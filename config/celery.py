@@ -88,6 +88,31 @@ def task_postrun_handler(sender=None, task_id=None, task=None, **kwargs):
         logger.error(f"Task cleanup failed for {task.name} [{task_id}]: {e}")
 
 
+# Task metrics (queue latency, run time, final state)
+@before_task_publish.connect
+def metrics_task_published(sender=None, headers=None, **kwargs):
+    from apps.core.metrics import celery_task_published
+    celery_task_published(headers)
+
+
+@task_prerun.connect
+def metrics_task_started(sender=None, task=None, **kwargs):
+    from apps.core.metrics import celery_task_started
+    try:
+        celery_task_started(task)
+    except Exception as e:
+        logger.debug(f"Task metrics failed for {getattr(task, 'name', sender)}: {e}")
+
+
+@task_postrun.connect
+def metrics_task_finished(sender=None, task=None, state=None, **kwargs):
+    from apps.core.metrics import celery_task_finished
+    try:
+        celery_task_finished(task, state)
+    except Exception as e:
+        logger.debug(f"Task metrics failed for {getattr(task, 'name', sender)}: {e}")
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Debug task to test organization context"""
@@ -157,6 +157,7 @@ MIDDLEWARE = [
     "apps.core.middleware.CorrelationIdMiddleware",
     "apps.core.middleware.RequestIDMiddleware",
     "apps.core.middleware.MetricsMiddleware",
+    "apps.core.middleware.QueryProfilerMiddleware",
     "apps.core.middleware.AuditMiddleware",
     "apps.core.middleware.InputSanitizationMiddleware",
 
@@ -250,7 +251,7 @@ REDIS_CACHE_URL = config("REDIS_CACHE_URL", default=REDIS_URL)
 if REDIS_CACHE_URL:
     CACHES = {
         "default": {
-            "BACKEND": "django_redis.cache.RedisCache",
+            "BACKEND": "apps.core.cache_backends.RedisCache",
             "LOCATION": REDIS_CACHE_URL,
             "OPTIONS": {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -261,7 +262,7 @@ if REDIS_CACHE_URL:
 else:
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "BACKEND": "apps.core.cache_backends.LocMemCache",
             "LOCATION": f"hrms-{ENVIRONMENT}-cache",
         }
     }
@@ -276,6 +277,21 @@ if REDIS_URL:
 else:
     CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
+# =============================================================================
+# METRICS
+# =============================================================================
+
+# Bearer token required by /metrics (empty = superusers only).
+# Set PROMETHEUS_MULTIPROC_DIR in the environment for multi-worker servers.
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# SQL profiling (X-Query-* headers + "query_profile" log event).
+# Fraction of requests profiled; the X-Profile-Queries: 1 header is honoured
+# when QUERY_PROFILER_HEADER_ENABLED (defaults to DEBUG).
+QUERY_PROFILER_SAMPLE_RATE = config("QUERY_PROFILER_SAMPLE_RATE", default=0.0, cast=float)
+QUERY_PROFILER_HEADER_ENABLED = config("QUERY_PROFILER_HEADER_ENABLED", default=DEBUG, cast=bool)
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = config("QUERY_PROFILER_N_PLUS_ONE_THRESHOLD", default=5, cast=int)
+
 # =============================================================================
 # AUTH
 # =============================================================================
@@ -318,6 +334,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "apps.authentication.authentication.OrganizationAwareJWTAuthentication",
+        "apps.authentication.authentication.APIKeyAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated"
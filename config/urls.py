@@ -6,11 +6,13 @@ from django.views.generic import RedirectView
 from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 
 from apps.core.compat_views import DocumentCompatView
+from apps.core.views import metrics_view
 
 
 urlpatterns = [
     path("", RedirectView.as_view(url="/admin/", permanent=False)),
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/v1/auth/", include("apps.authentication.urls")),
     path("api/v1/employees/", include("apps.employees.urls")),
     path("api/v1/recruitment/", include("apps.recruitment.urls")),